@@ -0,0 +1,169 @@
+import { PrismaClient } from '@prisma/client';
+import { OrderRepository } from '../src/orders/order.repository';
+
+/**
+ * Micro-benchmark: OrderRepository vs the hand-written order commands it replaced.
+ *
+ *   npm run bench:orders -- [orders=500]
+ *
+ * Writes to the configured DATABASE_URL and deletes its own orders at the end
+ * (they are tagged with a bench product id).
+ */
+const prisma = new PrismaClient();
+const repository = new OrderRepository(prisma as any);
+
+const ORDERS = parseInt(process.argv[2] || '500', 10);
+const BENCH_PRODUCT_ID = 'bench-order-repository';
+
+// ===== Previous code paths (copied from CheckoutService before the repository) =====
+
+function legacyGenerateOrderId(): string {
+  const timestamp = Math.floor(Date.now() / 1000).toString(16).padStart(8, '0');
+  const random = Math.random().toString(16).substring(2, 18).padStart(16, '0');
+  return timestamp + random.substring(0, 16);
+}
+
+async function legacyCreate(): Promise<string> {
+  const orderId = legacyGenerateOrderId();
+  const now = new Date();
+  await prisma.$runCommandRaw({
+    insert: 'orders',
+    documents: [{
+      _id: { $oid: orderId },
+      product_id: BENCH_PRODUCT_ID,
+      tipster_id: 'bench',
+      amount_cents: 1000,
+      currency: 'EUR',
+      email_backup: null,
+      phone_backup: null,
+      telegram_user_id: '1',
+      telegram_username: 'bench',
+      status: 'PENDING',
+      payment_provider: 'stripe',
+      meta: { isGuest: true },
+      created_at: { $date: now.toISOString() },
+      updated_at: { $date: now.toISOString() },
+    }],
+  });
+  return orderId;
+}
+
+async function legacyFind(orderId: string) {
+  const result = await prisma.$runCommandRaw({
+    find: 'orders',
+    filter: { _id: { $oid: orderId } },
+    limit: 1,
+  }) as any;
+  return result.cursor?.firstBatch?.[0] || null;
+}
+
+async function legacyExpire(orderId: string) {
+  await prisma.$runCommandRaw({
+    update: 'orders',
+    updates: [{
+      q: { _id: { $oid: orderId } },
+      u: { $set: { status: 'EXPIRED', updated_at: { $date: new Date().toISOString() } } },
+    }],
+  });
+}
+
+// ===== Harness =====
+
+async function timed<T>(label: string, results: Record<string, number>, run: () => Promise<T>): Promise<T> {
+  const started = process.hrtime.bigint();
+  const value = await run();
+  results[label] = Number(process.hrtime.bigint() - started) / 1e6;
+  return value;
+}
+
+async function runLegacy() {
+  const results: Record<string, number> = {};
+  const ids = await timed('create', results, async () => {
+    const created: string[] = [];
+    for (let i = 0; i < ORDERS; i++) {
+      created.push(await legacyCreate());
+    }
+    return created;
+  });
+  await timed('read status', results, async () => {
+    for (const id of ids) {
+      await legacyFind(id);
+    }
+  });
+  await timed('expire all', results, async () => {
+    for (const id of ids) {
+      await legacyExpire(id);
+    }
+  });
+  return results;
+}
+
+async function runRepository() {
+  const results: Record<string, number> = {};
+  const ids = await timed('create', results, async () => {
+    const created: string[] = [];
+    for (let i = 0; i < ORDERS; i++) {
+      created.push(await repository.create({
+        productId: BENCH_PRODUCT_ID,
+        tipsterId: 'bench',
+        amountCents: 1000,
+        currency: 'EUR',
+        telegramUserId: '1',
+        telegramUsername: 'bench',
+        isGuest: true,
+        paymentProvider: 'stripe',
+      }));
+    }
+    return created;
+  });
+  await timed('read status', results, async () => {
+    for (const id of ids) {
+      await repository.findById(id, 'status');
+    }
+  });
+  await timed('expire all', results, () => repository.expirePending(ids));
+  return results;
+}
+
+function idGenerationCollisions(generate: () => string, count: number): number {
+  const seen = new Set<string>();
+  for (let i = 0; i < count; i++) {
+    seen.add(generate());
+  }
+  return count - seen.size;
+}
+
+async function main() {
+  console.log(`🏁 Order access benchmark (${ORDERS} orders per path)\n`);
+
+  const legacy = await runLegacy();
+  const current = await runRepository();
+
+  console.log('operation'.padEnd(14) + 'legacy ms'.padStart(12) + 'repository ms'.padStart(16) + 'speedup'.padStart(10));
+  for (const operation of Object.keys(legacy)) {
+    const speedup = legacy[operation] / current[operation];
+    console.log(
+      operation.padEnd(14) +
+      legacy[operation].toFixed(1).padStart(12) +
+      current[operation].toFixed(1).padStart(16) +
+      `${speedup.toFixed(2)}x`.padStart(10),
+    );
+  }
+
+  const idCount = 1_000_000;
+  console.log(`\nId collisions in ${idCount} generated ids (same second):`);
+  console.log(`  Math.random ids: ${idGenerationCollisions(legacyGenerateOrderId, idCount)}`);
+  console.log(`  ObjectId ids:    ${idGenerationCollisions(() => repository.newId(), idCount)}`);
+
+  await prisma.$runCommandRaw({
+    delete: 'orders',
+    deletes: [{ q: { product_id: BENCH_PRODUCT_ID }, limit: 0 }],
+  });
+}
+
+main()
+  .catch((error) => {
+    console.error('❌ Benchmark failed:', error);
+    process.exitCode = 1;
+  })
+  .finally(() => prisma.$disconnect());
@@ -0,0 +1,332 @@
+import { Injectable, Logger, OnModuleDestroy, OnModuleInit } from '@nestjs/common';
+import { ConfigService } from '@nestjs/config';
+import { randomBytes } from 'crypto';
+import { hostname } from 'os';
+import { PrismaService } from '../prisma/prisma.service';
+import { TelegramService } from '../telegram/telegram.service';
+import { runsBackgroundDuties } from '../common/cluster/worker-role';
+
+export interface SweepResult {
+  batches: number;
+  claimed: number;
+  revoked: number;
+  retried: number;
+  throttled: number;
+  superseded: number;
+  failed: number;
+  durationMs: number;
+}
+
+interface ClaimedGrant {
+  _id: any;
+  channel_id: string;
+  telegram_user_id?: string;
+  attempts?: number;
+}
+
+// superseded: the buyer still holds a live grant for the channel (renewal, second purchase)
+type RevokeOutcome = 'revoked' | 'retried' | 'throttled' | 'superseded' | 'failed';
+
+const MAX_ATTEMPTS = 5;
+// removeChannelMember is two Bot API calls (ban + unban)
+const CALLS_PER_REVOKE = 2;
+const RETRY_BACKOFF_MS = 60 * 1000;
+// Telegram answers these when the user already left: nothing left to revoke
+const ALREADY_GONE = /user not found|USER_NOT_PARTICIPANT|PARTICIPANT_ID_INVALID|user is not a member/i;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+/**
+ * Revokes channel access when grants reach expires_at.
+ *
+ * Due grants are found through the (status, expires_at) index and claimed in
+ * batches with a lease (lease_token + lease_until) set by a single update, so
+ * any number of API instances can sweep at once without revoking a grant
+ * twice; a crashed worker's lease simply runs out and the grant is picked up
+ * again. Revocations go to Telegram with bounded concurrency and a paced
+ * request rate shared by every sweep in the process.
+ */
+@Injectable()
+export class AccessExpiryService implements OnModuleInit, OnModuleDestroy {
+  private readonly logger = new Logger(AccessExpiryService.name);
+  private readonly workerId = `${hostname()}:${process.pid}:${randomBytes(3).toString('hex')}`;
+  private sweepTimer: NodeJS.Timeout | null = null;
+  private sweeping = false;
+  private claimSeq = 0;
+  private nextRevokeAt = 0;
+
+  private readonly intervalMs: number;
+  private readonly batchSize: number;
+  private readonly concurrency: number;
+  private readonly ratePerSecond: number; // Bot API calls per second
+  private readonly leaseMs: number;
+
+  constructor(
+    private prisma: PrismaService,
+    private config: ConfigService,
+    private telegramService: TelegramService,
+  ) {
+    this.intervalMs = Number(this.config.get('ACCESS_EXPIRY_INTERVAL_SECONDS') || 60) * 1000;
+    this.batchSize = Number(this.config.get('ACCESS_EXPIRY_BATCH_SIZE') || 500);
+    this.concurrency = Number(this.config.get('ACCESS_REVOKE_CONCURRENCY') || 8);
+    this.ratePerSecond = Number(this.config.get('ACCESS_REVOKE_RATE_PER_SECOND') || 25);
+    this.leaseMs = Number(this.config.get('ACCESS_EXPIRY_LEASE_SECONDS') || 300) * 1000;
+  }
+
+  onModuleInit() {
+    if (this.config.get('ACCESS_EXPIRY_ENABLED') === 'false') {
+      this.logger.warn('Access expiry scheduler disabled (ACCESS_EXPIRY_ENABLED=false)');
+      return;
+    }
+    if (!runsBackgroundDuties()) {
+      return;
+    }
+
+    this.sweepTimer = setInterval(() => {
+      if (this.sweeping) {
+        return;
+      }
+      this.sweeping = true;
+      this.sweep()
+        .catch((error) => this.logger.error('Error sweeping expired access grants:', error))
+        .finally(() => (this.sweeping = false));
+    }, this.intervalMs);
+    this.sweepTimer.unref();
+  }
+
+  onModuleDestroy() {
+    if (this.sweepTimer) {
+      clearInterval(this.sweepTimer);
+    }
+  }
+
+  /**
+   * Claim and revoke due grants batch after batch until none are left
+   * (or maxBatches is reached)
+   */
+  async sweep(maxBatches = Infinity): Promise<SweepResult> {
+    const started = Date.now();
+    const result: SweepResult = {
+      batches: 0, claimed: 0, revoked: 0, retried: 0, throttled: 0, superseded: 0, failed: 0, durationMs: 0,
+    };
+
+    while (result.batches < maxBatches) {
+      const { leaseToken, grants } = await this.claimDueGrants();
+      if (grants.length === 0) {
+        break;
+      }
+      result.batches++;
+      result.claimed += grants.length;
+
+      const outcomes = await this.revokeAll(grants);
+      await this.recordOutcomes(leaseToken, grants, outcomes);
+      for (const outcome of outcomes) {
+        result[outcome]++;
+      }
+
+      if (grants.length < this.batchSize) {
+        break;
+      }
+    }
+
+    result.durationMs = Date.now() - started;
+    if (result.claimed > 0) {
+      this.logger.log(
+        `⏰ Access sweep: ${result.revoked} revoked, ${result.retried} to retry, ${result.throttled} throttled, ` +
+        `${result.superseded} superseded, ${result.failed} failed in ${result.durationMs}ms`,
+      );
+    }
+    return result;
+  }
+
+  async getStats() {
+    const now = { $date: new Date().toISOString() };
+    const count = async (filter: any) => {
+      const result = await this.prisma.$runCommandRaw({
+        count: 'channel_access_grants',
+        query: filter,
+      }) as any;
+      return result.n || 0;
+    };
+
+    return {
+      due: await count({ status: 'GRANTED', expires_at: { $lte: now } }),
+      leased: await count({ status: 'GRANTED', lease_until: { $gt: now } }),
+      expired: await count({ status: 'EXPIRED' }),
+      revokeFailed: await count({ status: 'REVOKE_FAILED' }),
+    };
+  }
+
+  /**
+   * Lease up to batchSize due grants to this worker.
+   * The update only matches grants nobody holds a live lease on, so two
+   * workers racing for the same ids split them instead of sharing them.
+   */
+  private async claimDueGrants(): Promise<{ leaseToken: string; grants: ClaimedGrant[] }> {
+    const now = new Date();
+    const claimable = {
+      status: 'GRANTED',
+      expires_at: { $lte: { $date: now.toISOString() } },
+      $or: [{ lease_until: null }, { lease_until: { $lt: { $date: now.toISOString() } } }],
+    };
+
+    const candidates = await this.prisma.$runCommandRaw({
+      find: 'channel_access_grants',
+      filter: claimable,
+      projection: { _id: 1 },
+      sort: { expires_at: 1 },
+      limit: this.batchSize,
+    }) as any;
+    const ids = (candidates.cursor?.firstBatch || []).map((doc: any) => doc._id);
+
+    const leaseToken = `${this.workerId}:${++this.claimSeq}`;
+    if (ids.length === 0) {
+      return { leaseToken, grants: [] };
+    }
+
+    await this.prisma.$runCommandRaw({
+      update: 'channel_access_grants',
+      updates: [{
+        q: { ...claimable, _id: { $in: ids } },
+        u: {
+          $set: {
+            lease_token: leaseToken,
+            lease_until: { $date: new Date(now.getTime() + this.leaseMs).toISOString() },
+          },
+        },
+        multi: true,
+      }],
+    });
+
+    const claimed = await this.prisma.$runCommandRaw({
+      find: 'channel_access_grants',
+      filter: { lease_token: leaseToken },
+      projection: { channel_id: 1, telegram_user_id: 1, attempts: 1 },
+      limit: this.batchSize,
+    }) as any;
+
+    return { leaseToken, grants: claimed.cursor?.firstBatch || [] };
+  }
+
+  private async revokeAll(grants: ClaimedGrant[]): Promise<RevokeOutcome[]> {
+    const outcomes: RevokeOutcome[] = new Array(grants.length);
+    let next = 0;
+
+    const worker = async () => {
+      while (next < grants.length) {
+        const index = next++;
+        outcomes[index] = await this.revoke(grants[index]);
+      }
+    };
+
+    await Promise.all(Array.from({ length: Math.min(this.concurrency, grants.length) }, worker));
+    return outcomes;
+  }
+
+  private async revoke(grant: ClaimedGrant): Promise<RevokeOutcome> {
+    // Grants from the web checkout without a Telegram user have nobody to remove
+    if (!grant.telegram_user_id) {
+      return 'revoked';
+    }
+    if (await this.hasLiveGrant(grant)) {
+      return 'superseded';
+    }
+
+    await this.waitForRateSlot();
+    try {
+      await this.telegramService.removeChannelMember(grant.channel_id, grant.telegram_user_id);
+      return 'revoked';
+    } catch (error) {
+      const description = error?.response?.description || error.message;
+      if (ALREADY_GONE.test(description)) {
+        return 'revoked';
+      }
+
+      const retryAfter = error?.response?.parameters?.retry_after;
+      if (retryAfter) {
+        // Flood control: hold every sweep in this process back, and don't count the attempt
+        this.nextRevokeAt = Math.max(this.nextRevokeAt, Date.now() + retryAfter * 1000);
+        return 'throttled';
+      }
+
+      this.logger.warn(`Could not revoke access of ${grant.telegram_user_id} to ${grant.channel_id}: ${description}`);
+      return (grant.attempts || 0) + 1 >= MAX_ATTEMPTS ? 'failed' : 'retried';
+    }
+  }
+
+  /**
+   * Whether the user holds another GRANTED grant for the same channel that has not expired
+   */
+  private async hasLiveGrant(grant: ClaimedGrant): Promise<boolean> {
+    const result = await this.prisma.$runCommandRaw({
+      find: 'channel_access_grants',
+      filter: {
+        _id: { $ne: grant._id },
+        telegram_user_id: grant.telegram_user_id,
+        channel_id: grant.channel_id,
+        status: 'GRANTED',
+        $or: [{ expires_at: null }, { expires_at: { $gt: { $date: new Date().toISOString() } } }],
+      },
+      projection: { _id: 1 },
+      limit: 1,
+    }) as any;
+    return (result.cursor?.firstBatch || []).length > 0;
+  }
+
+  /**
+   * Space Telegram calls 1/rate apart across all concurrent revocations (a revocation
+   * takes CALLS_PER_REVOKE slots)
+   */
+  private async waitForRateSlot() {
+    const now = Date.now();
+    const slot = Math.max(now, this.nextRevokeAt);
+    this.nextRevokeAt = slot + (CALLS_PER_REVOKE * 1000) / this.ratePerSecond;
+    if (slot > now) {
+      await sleep(slot - now);
+    }
+  }
+
+  private async recordOutcomes(leaseToken: string, grants: ClaimedGrant[], outcomes: RevokeOutcome[]) {
+    const now = new Date();
+    const nowDate = { $date: now.toISOString() };
+    const release = { lease_token: '', lease_until: '' };
+
+    const updates = grants.map((grant, index) => {
+      const q = { _id: grant._id, lease_token: leaseToken };
+      switch (outcomes[index]) {
+        case 'revoked':
+          return { q, u: { $set: { status: 'EXPIRED', left_at: nowDate, revoked_at: nowDate }, $unset: release } };
+        case 'superseded':
+          // The member stays in the channel on the newer grant
+          return { q, u: { $set: { status: 'EXPIRED' }, $unset: release } };
+        case 'failed':
+          return { q, u: { $set: { status: 'REVOKE_FAILED' }, $inc: { attempts: 1 }, $unset: release } };
+        case 'throttled':
+          // Flood control says nothing about the grant: back off without using up an attempt
+          return {
+            q,
+            u: {
+              $set: { lease_until: { $date: new Date(now.getTime() + RETRY_BACKOFF_MS).toISOString() } },
+              $unset: { lease_token: '' },
+            },
+          };
+        default:
+          // Keep the lease until the backoff ends so no worker retries right away
+          return {
+            q,
+            u: {
+              $set: { lease_until: { $date: new Date(now.getTime() + RETRY_BACKOFF_MS).toISOString() } },
+              $inc: { attempts: 1 },
+              $unset: { lease_token: '' },
+            },
+          };
+      }
+    });
+
+    await this.prisma.$runCommandRaw({
+      update: 'channel_access_grants',
+      updates,
+      ordered: false,
+    });
+  }
+}
@@ -0,0 +1,100 @@
+import { Injectable, Logger, OnModuleInit } from '@nestjs/common';
+import { PrismaService } from '../prisma/prisma.service';
+import { OrderRepository } from '../orders/order.repository';
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+/**
+ * Channel access granted by a purchase. Products with validity_days get an
+ * indexed expires_at that the AccessExpiryService sweeps.
+ */
+@Injectable()
+export class AccessGrantsService implements OnModuleInit {
+  private readonly logger = new Logger(AccessGrantsService.name);
+
+  constructor(
+    private prisma: PrismaService,
+    private orders: OrderRepository,
+  ) {}
+
+  async onModuleInit() {
+    try {
+      await this.prisma.$runCommandRaw({
+        createIndexes: 'channel_access_grants',
+        indexes: [
+          { key: { status: 1, expires_at: 1 }, name: 'status_expires_at' },
+          { key: { order_id: 1 }, name: 'order_id', unique: true },
+          { key: { lease_token: 1 }, name: 'lease_token', sparse: true },
+          // Live grants of a user for a channel, checked before an expired one is revoked
+          {
+            key: { telegram_user_id: 1, channel_id: 1, status: 1 },
+            name: 'telegram_user_id_channel_id_status',
+          },
+        ],
+      });
+    } catch (error) {
+      this.logger.warn(`Could not ensure channel_access_grants indexes: ${error.message}`);
+    }
+  }
+
+  expiryFor(validityDays?: number | null, from = new Date()): Date | null {
+    return validityDays ? new Date(from.getTime() + validityDays * DAY_MS) : null;
+  }
+
+  /**
+   * Record the channel access of a paid order (idempotent per order).
+   * Never throws: a missing grant must not fail the payment.
+   */
+  async grantForOrder(orderId: string): Promise<void> {
+    try {
+      const order = await this.orders.findById(orderId, 'notification');
+      if (!order?.telegramUserId) {
+        return;
+      }
+
+      const product = await this.prisma.product.findUnique({
+        where: { id: order.productId },
+        select: { tipsterId: true, telegramChannelId: true, validityDays: true },
+      });
+      if (!product) {
+        return;
+      }
+
+      let channelId = product.telegramChannelId;
+      if (!channelId) {
+        const tipster = await this.prisma.tipsterProfile.findUnique({
+          where: { id: product.tipsterId },
+          select: { telegramChannelId: true },
+        });
+        channelId = tipster?.telegramChannelId;
+      }
+      if (!channelId) {
+        return;
+      }
+
+      const now = new Date();
+      const expiresAt = this.expiryFor(product.validityDays, now);
+      await this.prisma.$runCommandRaw({
+        update: 'channel_access_grants',
+        updates: [{
+          q: { order_id: orderId },
+          u: {
+            $setOnInsert: {
+              order_id: orderId,
+              client_user_id: null,
+              telegram_user_id: order.telegramUserId,
+              channel_id: channelId,
+              status: 'GRANTED',
+              joined_at: { $date: now.toISOString() },
+              expires_at: expiresAt ? { $date: expiresAt.toISOString() } : null,
+              created_at: { $date: now.toISOString() },
+            },
+          },
+          upsert: true,
+        }],
+      });
+    } catch (error) {
+      this.logger.error(`Error recording access grant for order ${orderId}:`, error);
+    }
+  }
+}
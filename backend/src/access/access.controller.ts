@@ -0,0 +1,34 @@
+import { BadRequestException, Controller, Get, Post, Query, UseGuards } from '@nestjs/common';
+import { ApiTags, ApiOperation, ApiBearerAuth } from '@nestjs/swagger';
+import { JwtAuthGuard } from '../common/guards/jwt-auth.guard';
+import { RolesGuard } from '../common/guards/roles.guard';
+import { Roles } from '../common/decorators/roles.decorator';
+import { AccessExpiryService } from './access-expiry.service';
+
+@ApiTags('admin')
+@ApiBearerAuth()
+@UseGuards(JwtAuthGuard, RolesGuard)
+@Roles('ADMIN', 'SUPERADMIN')
+@Controller('access/expiry')
+export class AccessController {
+  constructor(private accessExpiry: AccessExpiryService) {}
+
+  @Get('stats')
+  @ApiOperation({ summary: 'Due, leased and expired channel access grants (Admin only)' })
+  async getStats() {
+    return this.accessExpiry.getStats();
+  }
+
+  @Post('sweep')
+  @ApiOperation({ summary: 'Run an access expiry sweep now (Admin only)' })
+  async sweep(@Query('maxBatches') maxBatches?: string) {
+    if (maxBatches === undefined || maxBatches === '') {
+      return this.accessExpiry.sweep();
+    }
+    const batches = Number(maxBatches);
+    if (!Number.isInteger(batches) || batches < 1) {
+      throw new BadRequestException('maxBatches must be a positive integer');
+    }
+    return this.accessExpiry.sweep(batches);
+  }
+}
@@ -0,0 +1,16 @@
+import { Module } from '@nestjs/common';
+import { ConfigModule } from '@nestjs/config';
+import { PrismaModule } from '../prisma/prisma.module';
+import { OrdersModule } from '../orders/orders.module';
+import { TelegramModule } from '../telegram/telegram.module';
+import { AccessController } from './access.controller';
+import { AccessGrantsService } from './access-grants.service';
+import { AccessExpiryService } from './access-expiry.service';
+
+@Module({
+  imports: [PrismaModule, OrdersModule, ConfigModule, TelegramModule],
+  controllers: [AccessController],
+  providers: [AccessGrantsService, AccessExpiryService],
+  exports: [AccessGrantsService, AccessExpiryService],
+})
+export class AccessModule {}
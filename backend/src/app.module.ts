@@ -1,7 +1,10 @@
-import { Module } from '@nestjs/common';
+import { MiddlewareConsumer, Module, NestModule } from '@nestjs/common';
 import { ConfigModule } from '@nestjs/config';
 import { ThrottlerModule } from '@nestjs/throttler';
 import { PrismaModule } from './prisma/prisma.module';
+import { MetricsModule } from './metrics/metrics.module';
+import { LoadSheddingModule } from './load-shedding/load-shedding.module';
+import { CacheModule } from './cache/cache.module';
 import { AuthModule } from './auth/auth.module';
 import { UsersModule } from './users/users.module';
 import { ProductsModule } from './products/products.module';
@@ -14,7 +17,11 @@ import { TicketsModule } from './tickets/tickets.module';
 import { BotModule } from './bot/bot.module';
 import { TelegramModule } from './telegram/telegram.module';
 import { CheckoutModule } from './checkout/checkout.module';
+import { AccessModule } from './access/access.module';
+import { RuntimeConfigModule } from './runtime-config/runtime-config.module';
+import { ProfilingModule } from './profiling/profiling.module';
 import { HealthController } from './health.controller';
+import { RequestContextMiddleware } from './common/context/request-context';
 
 @Module({
   imports: [
@@ -26,6 +33,10 @@ import { HealthController } from './health.controller';
       limit: 100, // 100 requests per minute
     }]),
     PrismaModule,
+    MetricsModule,
+    // After metrics, so shed requests are still counted
+    LoadSheddingModule,
+    CacheModule,
     AuthModule,
     UsersModule,
     ProductsModule,
@@ -38,7 +49,15 @@ import { HealthController } from './health.controller';
     BotModule,
     TelegramModule,
     CheckoutModule,
+    AccessModule,
+    RuntimeConfigModule,
+    ProfilingModule,
   ],
   controllers: [HealthController],
 })
-export class AppModule {}
+export class AppModule implements NestModule {
+  configure(consumer: MiddlewareConsumer) {
+    // Correlation id (X-Request-Id) for every request, tagged on its log lines
+    consumer.apply(RequestContextMiddleware).forRoutes('*');
+  }
+}
@@ -3,6 +3,7 @@ import { ApiTags, ApiOperation, ApiResponse } from '@nestjs/swagger';
 import { AuthService } from './auth.service';
 import { RegisterTipsterDto, RegisterClientDto, LoginDto, SendOtpDto, VerifyOtpDto } from './dto';
 import { Public } from '../common/decorators/public.decorator';
+import { RateLimit } from '../common/decorators/rate-limit.decorator';
 import { Request, Response } from 'express';
 import { AuthGuard } from '@nestjs/passport';
 
@@ -61,6 +62,14 @@ export class AuthController {
   }
 
   @Public()
+  @RateLimit({
+    name: 'otp_send',
+    rules: [
+      { by: 'user', limit: 3, perSeconds: 300 },
+      { by: 'ip', limit: 10, perSeconds: 60 },
+      { by: 'route', limit: 200, perSeconds: 10 },
+    ],
+  })
   @Post('otp/send')
   @HttpCode(HttpStatus.OK)
   @ApiOperation({ summary: 'Send OTP to email' })
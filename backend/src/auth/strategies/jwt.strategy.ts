@@ -3,13 +3,17 @@ import { PassportStrategy } from '@nestjs/passport';
 import { Injectable, UnauthorizedException } from '@nestjs/common';
 import { ConfigService } from '@nestjs/config';
 import { PrismaService } from '../../prisma/prisma.service';
+import { CacheService } from '../../cache/cache.service';
 import { UserPayload } from '../../common/interfaces/user-payload.interface';
 
 @Injectable()
 export class JwtStrategy extends PassportStrategy(Strategy) {
+  private readonly principalTtlSeconds: number;
+
   constructor(
     private prisma: PrismaService,
     private config: ConfigService,
+    private cache: CacheService,
   ) {
     super({
       jwtFromRequest: ExtractJwt.fromExtractors([
@@ -21,12 +25,20 @@ export class JwtStrategy extends PassportStrategy(Strategy) {
       ignoreExpiration: false,
       secretOrKey: config.get('JWT_SECRET'),
     });
+    this.principalTtlSeconds = Number(config.get('PRINCIPAL_CACHE_SECONDS') || 60);
   }
 
-  async validate(payload: UserPayload) {
-    const user = await this.prisma.user.findUnique({
-      where: { id: payload.id },
-    });
+  /**
+   * Every authenticated request needs the user's current status; it is cached as a
+   * principal and invalidated by UsersService when the user changes
+   */
+  async validate(payload: UserPayload): Promise<UserPayload> {
+    const user = await this.cache.wrap('principal', payload.id, this.principalTtlSeconds, () =>
+      this.prisma.user.findUnique({
+        where: { id: payload.id },
+        select: { id: true, email: true, role: true, status: true },
+      }),
+    );
 
     if (!user || user.status !== 'ACTIVE') {
       throw new UnauthorizedException();
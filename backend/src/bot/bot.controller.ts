@@ -1,6 +1,7 @@
-import { Controller, Post, Body } from '@nestjs/common';
+import { Controller, Post, Body, UseGuards } from '@nestjs/common';
 import { ApiTags } from '@nestjs/swagger';
 import { Public } from '../common/decorators/public.decorator';
+import { BotTokenGuard } from '../common/guards/bot-token.guard';
 import { BotService } from './bot.service';
 
 @ApiTags('bot')
@@ -14,7 +15,9 @@ export class BotController {
     return this.botService.validateLinkToken(data.token, data.telegram_user_id);
   }
 
+  // Purchase history of any Telegram user: only for the bot (X-Bot-Token), never for browsers
   @Public()
+  @UseGuards(BotTokenGuard)
   @Post('sync-purchase')
   async syncPurchase(@Body() data: any) {
     return this.botService.syncPurchase(data.telegram_user_id, data.order_ref);
@@ -1,9 +1,13 @@
-import { Injectable } from '@nestjs/common';
+import { BadRequestException, Injectable } from '@nestjs/common';
 import { PrismaService } from '../prisma/prisma.service';
+import { PurchaseSummaryService } from '../orders/purchase-summary.service';
 
 @Injectable()
 export class BotService {
-  constructor(private prisma: PrismaService) {}
+  constructor(
+    private prisma: PrismaService,
+    private purchaseSummaries: PurchaseSummaryService,
+  ) {}
 
   async validateLinkToken(token: string, telegramUserId: string) {
     // TODO: Verify JWT token
@@ -13,10 +17,20 @@ export class BotService {
     };
   }
 
+  /**
+   * Purchase summary for the standalone bot's /mis_compras. Served from the cache
+   * unless the bot asks about a specific order (order_ref), e.g. right after paying.
+   */
   async syncPurchase(telegramUserId: string, orderRef?: string) {
-    // Find pending orders
+    if (!telegramUserId) {
+      throw new BadRequestException('telegram_user_id is required');
+    }
+    const summary = orderRef
+      ? await this.purchaseSummaries.refresh(String(telegramUserId))
+      : await this.purchaseSummaries.get(String(telegramUserId));
     return {
       synced: true,
+      ...summary,
     };
   }
 }
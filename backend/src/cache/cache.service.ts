@@ -0,0 +1,213 @@
+import { Injectable, Logger, OnModuleDestroy, OnModuleInit } from '@nestjs/common';
+import { ConfigService } from '@nestjs/config';
+import { randomUUID } from 'crypto';
+import Redis from 'ioredis';
+import { MetricsService } from '../metrics/metrics.service';
+
+const INVALIDATION_CHANNEL = 'antia:cache:invalidate';
+
+interface LocalEntry {
+  value: any;
+  expiresAt: number;
+}
+
+interface InvalidationMessage {
+  origin: string;
+  namespace: string;
+  key: string;
+}
+
+/**
+ * Read-through cache for data every request needs (principals, checkout products,
+ * geolocation), coherent across API processes and nodes.
+ *
+ * A lookup tries the per-process LRU (CACHE_LOCAL_SIZE entries), then Redis when
+ * REDIS_URL is set, and only then the loader, whose result is stored in both tiers.
+ * invalidate() deletes the Redis key and publishes the key on INVALIDATION_CHANNEL,
+ * so every other process drops its local copy as well. Messages sent while the
+ * subscription was down are lost, so the local tier is cleared when it reconnects.
+ * Without REDIS_URL (or with CACHE_REDIS=off) only the local tier exists and other
+ * processes keep their copy until the TTL.
+ *
+ * Values must be plain JSON (dates as ISO strings) and treated as read-only: local
+ * hits hand every caller the same object.
+ */
+@Injectable()
+export class CacheService implements OnModuleInit, OnModuleDestroy {
+  private readonly logger = new Logger(CacheService.name);
+  private readonly local = new Map<string, LocalEntry>();
+  private readonly loading = new Map<string, Promise<any>>();
+  private readonly nodeId = randomUUID();
+  private readonly maxEntries: number;
+  private readonly prefix: string;
+  private redis: Redis | null = null;
+  private subscriber: Redis | null = null;
+  private sharedReady = false;
+  private subscribed = false;
+
+  constructor(
+    private config: ConfigService,
+    private metrics: MetricsService,
+  ) {
+    this.maxEntries = Number(this.config.get('CACHE_LOCAL_SIZE') || 20000);
+    this.prefix = this.config.get<string>('CACHE_KEY_PREFIX') || 'antia:cache:';
+  }
+
+  onModuleInit() {
+    const url = this.config.get<string>('REDIS_URL');
+    if (!url || this.config.get('CACHE_REDIS') === 'off') {
+      this.logger.log('Shared cache tier off (no REDIS_URL): in-process cache only');
+      return;
+    }
+
+    // Lookups fail fast to the loader instead of queueing while Redis is away
+    this.redis = new Redis(url, {
+      commandTimeout: Number(this.config.get('CACHE_REDIS_TIMEOUT_MS') || 100),
+      maxRetriesPerRequest: 1,
+      enableOfflineQueue: false,
+    });
+    this.redis.on('ready', () => {
+      this.sharedReady = true;
+      this.logger.log(`📦 Shared cache tier connected (${url.replace(/\/\/[^@]*@/, '//')})`);
+    });
+    this.redis.on('error', (error) => {
+      if (this.sharedReady) {
+        this.logger.warn(`Shared cache tier unavailable: ${error.message}`);
+      }
+      this.sharedReady = false;
+    });
+
+    this.subscriber = new Redis(url);
+    this.subscriber.on('ready', () => {
+      if (this.subscribed) {
+        this.logger.warn('Cache invalidation channel reconnected: clearing the local tier');
+        this.local.clear();
+        this.loading.clear();
+      }
+      this.subscribed = true;
+    });
+    this.subscriber.on('error', () => undefined);
+    this.subscriber.on('message', (_channel, message) => this.onInvalidation(message));
+    this.subscriber.subscribe(INVALIDATION_CHANNEL).catch((error) =>
+      this.logger.warn(`Could not subscribe to cache invalidations: ${error.message}`),
+    );
+  }
+
+  onModuleDestroy() {
+    this.redis?.disconnect();
+    this.subscriber?.disconnect();
+  }
+
+  /**
+   * Cached value of namespace/key, loaded (once per process for concurrent misses)
+   * and kept for ttlSeconds in both tiers. A loader that throws caches nothing.
+   */
+  async wrap<T>(namespace: string, key: string, ttlSeconds: number, load: () => Promise<T>): Promise<T> {
+    const id = `${namespace}:${key}`;
+    const entry = this.local.get(id);
+    if (entry && entry.expiresAt > Date.now()) {
+      // Map keeps insertion order: re-inserting marks the entry as most recently used
+      this.local.delete(id);
+      this.local.set(id, entry);
+      this.metrics.observeCacheTierLookup(namespace, 'local', 'hit');
+      return entry.value;
+    }
+    this.metrics.observeCacheTierLookup(namespace, 'local', 'miss');
+
+    const pending = this.loading.get(id);
+    if (pending) {
+      return pending;
+    }
+    const ttlMs = ttlSeconds * 1000;
+    const promise: Promise<T> = this.readShared(namespace, id)
+      .then(async (shared) => {
+        if (shared) {
+          return shared.value;
+        }
+        const value = (await load()) ?? null;
+        // invalidate() ran meanwhile: the value may predate the change
+        if (this.loading.get(id) === promise) {
+          this.writeShared(id, value, ttlMs);
+        }
+        return value;
+      })
+      .then((value) => {
+        if (this.loading.get(id) === promise) {
+          this.storeLocal(id, value, ttlMs);
+        }
+        return value;
+      })
+      .finally(() => {
+        if (this.loading.get(id) === promise) {
+          this.loading.delete(id);
+        }
+      });
+    this.loading.set(id, promise);
+    return promise;
+  }
+
+  /**
+   * Drop namespace/key here, in Redis and (through the invalidation channel) in
+   * every other process. Call it after the write that made the value stale.
+   */
+  async invalidate(namespace: string, key: string): Promise<void> {
+    this.dropLocal(`${namespace}:${key}`);
+    this.metrics.observeCacheInvalidation(namespace, 'local');
+    if (!this.redis) {
+      return;
+    }
+    const message: InvalidationMessage = { origin: this.nodeId, namespace, key };
+    try {
+      await this.redis.del(this.prefix + `${namespace}:${key}`);
+      await this.redis.publish(INVALIDATION_CHANNEL, JSON.stringify(message));
+    } catch (error) {
+      this.logger.warn(`Could not invalidate ${namespace}:${key} on other nodes: ${error.message}`);
+    }
+  }
+
+  private onInvalidation(raw: string) {
+    let message: InvalidationMessage;
+    try {
+      message = JSON.parse(raw);
+    } catch {
+      return;
+    }
+    if (message.origin === this.nodeId) {
+      return;
+    }
+    this.dropLocal(`${message.namespace}:${message.key}`);
+    this.metrics.observeCacheInvalidation(message.namespace, 'remote');
+  }
+
+  private dropLocal(id: string) {
+    this.local.delete(id);
+    // A load already running may have read the value before the change
+    this.loading.delete(id);
+  }
+
+  private storeLocal(id: string, value: any, ttlMs: number) {
+    this.local.delete(id);
+    this.local.set(id, { value, expiresAt: Date.now() + ttlMs });
+    while (this.local.size > this.maxEntries) {
+      this.local.delete(this.local.keys().next().value);
+    }
+  }
+
+  private async readShared(namespace: string, id: string): Promise<{ value: any } | null> {
+    if (!this.redis) {
+      return null;
+    }
+    try {
+      const raw = await this.redis.get(this.prefix + id);
+      this.metrics.observeCacheTierLookup(namespace, 'shared', raw === null ? 'miss' : 'hit');
+      return raw === null ? null : { value: JSON.parse(raw) };
+    } catch {
+      this.metrics.observeCacheTierLookup(namespace, 'shared', 'error');
+      return null;
+    }
+  }
+
+  private writeShared(id: string, value: any, ttlMs: number) {
+    this.redis?.set(this.prefix + id, JSON.stringify(value), 'PX', ttlMs).catch(() => undefined);
+  }
+}
@@ -11,24 +11,63 @@ import {
   HttpCode,
   HttpStatus,
   Logger,
+  Res,
+  Sse,
+  MessageEvent,
 } from '@nestjs/common';
 import { ApiTags, ApiOperation } from '@nestjs/swagger';
+import { Response } from 'express';
+import { Observable } from 'rxjs';
+import { map } from 'rxjs/operators';
 import { CheckoutService, CreateCheckoutDto } from './checkout.service';
+import { OrderStatusService } from './order-status.service';
 import { Public } from '../common/decorators/public.decorator';
+import { RateLimit } from '../common/decorators/rate-limit.decorator';
+import { applyHttpCache, HttpCachePolicy } from '../common/utils/http-cache.util';
+import { parsePartFields } from '../common/utils/fieldsets.util';
+import { ORDER_FIELDS } from '../orders/order.repository';
+import { Prisma } from '@prisma/client';
+
+// Public checkout reads are hit by every visitor coming from a Telegram link
+const CHECKOUT_PRODUCT_CACHE: HttpCachePolicy = { maxAge: 30, sMaxAge: 60, staleWhileRevalidate: 120 };
+// Short lifetime so toggling a gateway during an outage propagates quickly
+const FEATURE_FLAGS_CACHE: HttpCachePolicy = { maxAge: 15, sMaxAge: 15, staleWhileRevalidate: 30 };
+
+// Fields accepted by GET /checkout/order/:orderId?fields=order.status,product.title,tipster
+const ORDER_DETAIL_PARTS = {
+  order: Object.keys(ORDER_FIELDS),
+  product: Object.values(Prisma.ProductScalarFieldEnum),
+  tipster: Object.values(Prisma.TipsterProfileScalarFieldEnum),
+};
+
+// Long-polls answer before common proxy idle timeouts (60s)
+const LONG_POLL_DEFAULT_SECONDS = 25;
+const LONG_POLL_MAX_SECONDS = 30;
 
 @ApiTags('checkout')
 @Controller('checkout')
 export class CheckoutController {
   private readonly logger = new Logger(CheckoutController.name);
 
-  constructor(private checkoutService: CheckoutService) {}
+  constructor(
+    private checkoutService: CheckoutService,
+    private orderStatus: OrderStatusService,
+  ) {}
 
   // Get product info for checkout page
   @Public()
   @Get('product/:productId')
   @ApiOperation({ summary: 'Get product info for checkout' })
-  async getProduct(@Param('productId') productId: string) {
-    return this.checkoutService.getProductForCheckout(productId);
+  async getProduct(
+    @Param('productId') productId: string,
+    @Req() req: any,
+    @Res({ passthrough: true }) res: Response,
+  ) {
+    const { etag, body } = await this.checkoutService.getCheckoutProductRepresentation(productId);
+    if (applyHttpCache(req, res, etag, CHECKOUT_PRODUCT_CACHE)) {
+      return; // 304 Not Modified
+    }
+    return body;
   }
 
   // Detect gateway based on IP geolocation
@@ -48,12 +87,23 @@ export class CheckoutController {
   @Public()
   @Get('feature-flags')
   @ApiOperation({ summary: 'Get payment feature flags' })
-  async getFeatureFlags() {
+  async getFeatureFlags(@Req() req: any, @Res({ passthrough: true }) res: Response) {
+    if (applyHttpCache(req, res, this.checkoutService.getFeatureFlagsEtag(), FEATURE_FLAGS_CACHE)) {
+      return; // 304 Not Modified
+    }
     return this.checkoutService.getFeatureFlags();
   }
 
-  // Create checkout session
+  // Create checkout session (an order plus a Stripe/Redsys session each)
   @Public()
+  @RateLimit({
+    name: 'checkout_session',
+    rules: [
+      { by: 'user', limit: 10, perSeconds: 60 },
+      { by: 'ip', limit: 20, perSeconds: 60 },
+      { by: 'route', limit: 100, perSeconds: 2 }, // Below Stripe's write quota
+    ],
+  })
   @Post('session')
   @ApiOperation({ summary: 'Create payment checkout session' })
   async createCheckoutSession(
@@ -98,6 +148,34 @@ export class CheckoutController {
     return this.checkoutService.verifyPaymentAndGetOrder(sessionId, orderId);
   }
 
+  // Order status pushed the moment a webhook or complete-payment settles it
+  @Public()
+  @Sse('order/:orderId/events')
+  @ApiOperation({ summary: 'Stream order status changes (server-sent events)' })
+  async streamOrderStatus(@Param('orderId') orderId: string): Promise<Observable<MessageEvent>> {
+    const status = await this.orderStatus.current(orderId);
+    return this.orderStatus
+      .stream(orderId, status)
+      .pipe(map((next) => ({ data: { orderId, status: next } })));
+  }
+
+  // Long-poll alternative for clients without EventSource (e.g. the bot)
+  @Public()
+  @Get('order/:orderId/status')
+  @ApiOperation({ summary: 'Order status; with known=STATUS, waits up to wait seconds for it to change' })
+  async waitForOrderStatus(
+    @Param('orderId') orderId: string,
+    @Query('known') known?: string,
+    @Query('wait') wait?: string,
+  ) {
+    if (!known) {
+      return { orderId, status: await this.orderStatus.current(orderId), changed: true };
+    }
+    const seconds = Math.min(Math.max(Number(wait ?? LONG_POLL_DEFAULT_SECONDS) || 0, 0), LONG_POLL_MAX_SECONDS);
+    const status = await this.orderStatus.waitForChange(orderId, known, seconds * 1000);
+    return { orderId, status, changed: status !== known };
+  }
+
   // Stripe webhook
   @Public()
   @Post('webhook/stripe')
@@ -154,12 +232,19 @@ export class CheckoutController {
   @Public()
   @Get('order/:orderId')
   @ApiOperation({ summary: 'Get order details' })
-  async getOrder(@Param('orderId') orderId: string) {
-    return this.checkoutService.getOrderDetails(orderId);
+  async getOrder(@Param('orderId') orderId: string, @Query('fields') fields?: string) {
+    return this.checkoutService.getOrderDetails(orderId, parsePartFields(fields, ORDER_DETAIL_PARTS));
   }
 
   // Create order and simulate payment in one step (for testing)
   @Public()
+  @RateLimit({
+    name: 'test_purchase',
+    rules: [
+      { by: 'ip', limit: 5, perSeconds: 60 },
+      { by: 'route', limit: 20, perSeconds: 10 },
+    ],
+  })
   @Post('test-purchase')
   @ApiOperation({ summary: 'Create order and simulate payment (testing only)' })
   async testPurchase(
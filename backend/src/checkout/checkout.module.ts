@@ -4,13 +4,18 @@ import { CheckoutController } from './checkout.controller';
 import { CheckoutService } from './checkout.service';
 import { GeolocationService } from './geolocation.service';
 import { RedsysService } from './redsys.service';
+import { OrderStatusService } from './order-status.service';
 import { PrismaModule } from '../prisma/prisma.module';
+import { OrdersModule } from '../orders/orders.module';
 import { TelegramModule } from '../telegram/telegram.module';
+import { ReservationsModule } from '../reservations/reservations.module';
+import { AccessModule } from '../access/access.module';
+import { RuntimeConfigModule } from '../runtime-config/runtime-config.module';
 
 @Module({
-  imports: [PrismaModule, ConfigModule, TelegramModule],
+  imports: [PrismaModule, OrdersModule, ConfigModule, TelegramModule, ReservationsModule, AccessModule, RuntimeConfigModule],
   controllers: [CheckoutController],
-  providers: [CheckoutService, GeolocationService, RedsysService],
-  exports: [CheckoutService, GeolocationService, RedsysService],
+  providers: [CheckoutService, GeolocationService, RedsysService, OrderStatusService],
+  exports: [CheckoutService, GeolocationService, RedsysService, OrderStatusService],
 })
 export class CheckoutModule {}
@@ -1,9 +1,18 @@
-import { Injectable, Logger, NotFoundException, BadRequestException } from '@nestjs/common';
+import { Injectable, Logger, NotFoundException, BadRequestException, ServiceUnavailableException } from '@nestjs/common';
 import { ConfigService } from '@nestjs/config';
 import { PrismaService } from '../prisma/prisma.service';
 import { TelegramService } from '../telegram/telegram.service';
 import { GeolocationService, GeoLocationResult } from './geolocation.service';
 import { RedsysService } from './redsys.service';
+import { buildEtag } from '../common/utils/http-cache.util';
+import { SeatReservationService, SeatHold } from '../reservations/seat-reservation.service';
+import { MetricsService } from '../metrics/metrics.service';
+import { CacheService } from '../cache/cache.service';
+import { OrderRepository, OrderRecord, ORDER_FIELDS, PURCHASED_STATUSES } from '../orders/order.repository';
+import { AccessGrantsService } from '../access/access-grants.service';
+import { RuntimeConfigService } from '../runtime-config/runtime-config.service';
+import { Prisma } from '@prisma/client';
+import { toSelect } from '../common/utils/fieldsets.util';
 import Stripe from 'stripe';
 
 export interface CreateCheckoutDto {
@@ -32,17 +41,20 @@ export interface PaymentFeatureFlags {
   stripeEnabled: boolean;
 }
 
+// configs keys behind each flag, with the value used while the key is absent
+const FEATURE_FLAG_KEYS: Record<keyof PaymentFeatureFlags, [string, boolean]> = {
+  cryptoEnabled: ['payments.crypto_enabled', false], // Future feature
+  redsysEnabled: ['payments.redsys_enabled', true],
+  stripeEnabled: ['payments.stripe_enabled', true],
+};
+
 @Injectable()
 export class CheckoutService {
   private stripe: Stripe;
   private readonly logger = new Logger(CheckoutService.name);
-  
-  // Feature flags (can be loaded from DB or config in production)
-  private featureFlags: PaymentFeatureFlags = {
-    cryptoEnabled: false, // Future feature
-    redsysEnabled: true,
-    stripeEnabled: true,
-  };
+  // Flags derived from the last runtime config snapshot seen
+  private flagsCache: { version: string; flags: PaymentFeatureFlags; etag: string } | null = null;
+  private readonly productCacheSeconds: number;
 
   constructor(
     private prisma: PrismaService,
@@ -50,12 +62,48 @@ export class CheckoutService {
     private telegramService: TelegramService,
     private geolocationService: GeolocationService,
     private redsysService: RedsysService,
+    private seatReservations: SeatReservationService,
+    private metrics: MetricsService,
+    private orders: OrderRepository,
+    private accessGrants: AccessGrantsService,
+    private runtimeConfig: RuntimeConfigService,
+    private cache: CacheService,
   ) {
+    this.productCacheSeconds = Number(this.config.get('CHECKOUT_PRODUCT_CACHE_SECONDS') || 300);
     const stripeKey = this.config.get<string>('STRIPE_API_KEY');
     if (!stripeKey) {
       this.logger.warn('STRIPE_API_KEY not configured');
     }
-    this.stripe = new Stripe(stripeKey || '');
+    this.stripe = new Stripe(stripeKey || '', this.stripeEndpointOptions());
+    this.stripe.on('response', (event) => {
+      // Ids (cs_..., pi_...) would explode the label cardinality
+      const path = event.path.replace(/\/[a-z]+_[A-Za-z0-9_]+/g, '/:id');
+      this.metrics.observeOutbound(
+        'stripe',
+        `${event.method} ${path}`,
+        event.status < 400 ? 'ok' : 'error',
+        event.elapsed / 1000,
+      );
+    });
+  }
+
+  /**
+   * STRIPE_API_BASE (e.g. http://localhost:12111) sends Stripe calls to a local
+   * stand-in instead of api.stripe.com
+   */
+  private stripeEndpointOptions(): Stripe.StripeConfig {
+    const apiBase = this.config.get<string>('STRIPE_API_BASE');
+    if (!apiBase) {
+      return {};
+    }
+    const url = new URL(apiBase);
+    const protocol = url.protocol === 'http:' ? 'http' : 'https';
+    this.logger.warn(`Using Stripe API at ${url.origin}`);
+    return {
+      host: url.hostname,
+      port: url.port || (protocol === 'http' ? 80 : 443),
+      protocol,
+    };
   }
 
   /**
@@ -68,13 +116,17 @@ export class CheckoutService {
   }> {
     const geo = await this.geolocationService.detectCountry(clientIp);
     
+    const flags = this.getFeatureFlags();
     let gateway: 'stripe' | 'redsys' = 'stripe';
     let availableMethods: string[] = ['card'];
 
-    // If in Spain and Redsys is enabled, use Redsys
-    if (geo.isSpain && this.featureFlags.redsysEnabled && this.redsysService.isAvailable()) {
+    // If in Spain and Redsys is enabled, use Redsys (also everywhere while Stripe is switched off)
+    const redsysUsable = flags.redsysEnabled && this.redsysService.isAvailable();
+    if (redsysUsable && (geo.isSpain || !flags.stripeEnabled)) {
       gateway = 'redsys';
       availableMethods = ['card', 'bizum'];
+    } else if (!flags.stripeEnabled) {
+      throw new ServiceUnavailableException('No hay pasarelas de pago disponibles en este momento');
     }
 
     this.logger.log(`Gateway selection for ${clientIp}: ${gateway} (country: ${geo.country})`);
@@ -83,10 +135,31 @@ export class CheckoutService {
   }
 
   /**
-   * Get feature flags for crypto payments (future)
+   * Payment feature flags from the runtime config snapshot (no I/O)
    */
   getFeatureFlags(): PaymentFeatureFlags {
-    return this.featureFlags;
+    return this.currentFlags().flags;
+  }
+
+  /**
+   * ETag for the feature flags document (changes whenever a flag changes)
+   */
+  getFeatureFlagsEtag(): string {
+    return this.currentFlags().etag;
+  }
+
+  private currentFlags() {
+    const { version } = this.runtimeConfig.snapshot;
+    if (this.flagsCache?.version !== version) {
+      const flags = Object.fromEntries(
+        Object.entries(FEATURE_FLAG_KEYS).map(([flag, [key, fallback]]) => [
+          flag,
+          Boolean(this.runtimeConfig.get(key, fallback)),
+        ]),
+      ) as unknown as PaymentFeatureFlags;
+      this.flagsCache = { version, flags, etag: buildEtag('feature-flags', JSON.stringify(flags)) };
+    }
+    return this.flagsCache;
   }
 
   async createCheckoutSession(dto: CreateCheckoutDto): Promise<CheckoutSessionResponse> {
@@ -114,34 +187,45 @@ export class CheckoutService {
       : 2.9; // Stripe ~2.9%
     const commissionCents = Math.round(product.priceCents * (commissionRate / 100));
 
-    // 3. Create order in database with geo info
-    const orderId = await this.createPendingOrderWithGeo({
-      productId: dto.productId,
-      tipsterId: product.tipsterId,
-      amountCents: product.priceCents,
-      currency: product.currency,
-      email: dto.email,
-      phone: dto.phone,
-      telegramUserId: dto.telegramUserId,
-      telegramUsername: dto.telegramUsername,
-      isGuest: dto.isGuest,
-      country: geo.country,
-      countryName: geo.countryName,
-      gateway,
-      commissionCents,
-      commissionRate,
-    });
+    // 3. Hold a seat for capacity-limited products, then create the order with geo info
+    const orderId = this.orders.newId();
+    const hold = await this.seatReservations.reserve(product, orderId);
 
     // 4. Build success and cancel URLs
     const successUrl = `${dto.originUrl}/checkout/success?session_id={CHECKOUT_SESSION_ID}&order_id=${orderId}`;
     const cancelUrl = `${dto.originUrl}/checkout/cancel?order_id=${orderId}`;
     const webhookUrl = `${this.config.get('APP_URL')}/api/checkout/webhook/redsys`;
 
-    // 5. Create payment session based on gateway
-    if (gateway === 'redsys' && this.redsysService.isAvailable()) {
-      return this.createRedsysSession(orderId, product, successUrl, cancelUrl, webhookUrl, geo.country);
-    } else {
-      return this.createStripeSession(orderId, product, tipster, successUrl, cancelUrl, dto, geo.country);
+    // 5. Create the order and the payment session (a failure of either gives the seat back)
+    try {
+      await this.orders.create({
+        id: orderId,
+        productId: dto.productId,
+        tipsterId: product.tipsterId,
+        amountCents: product.priceCents,
+        currency: product.currency,
+        email: dto.email,
+        phone: dto.phone,
+        telegramUserId: dto.telegramUserId,
+        telegramUsername: dto.telegramUsername,
+        isGuest: dto.isGuest,
+        country: geo.country,
+        countryName: geo.countryName,
+        paymentProvider: gateway,
+        commissionCents,
+        commissionRate,
+      });
+
+      if (gateway === 'redsys' && this.redsysService.isAvailable()) {
+        return await this.createRedsysSession(orderId, product, successUrl, cancelUrl, webhookUrl, geo.country);
+      } else {
+        return await this.createStripeSession(orderId, product, tipster, successUrl, cancelUrl, dto, geo.country, hold);
+      }
+    } catch (error) {
+      if (hold) {
+        await this.seatReservations.release(orderId);
+      }
+      throw error;
     }
   }
 
@@ -156,8 +240,14 @@ export class CheckoutService {
     cancelUrl: string,
     dto: CreateCheckoutDto,
     country: string,
+    hold: SeatHold | null,
   ): Promise<CheckoutSessionResponse> {
     try {
+      // Expire the session together with the seat hold (Stripe needs at least 30 minutes)
+      const expiresAt = hold
+        ? Math.floor(Math.max(hold.expiresAt.getTime(), Date.now() + 30 * 60 * 1000) / 1000)
+        : undefined;
+
       const session = await this.stripe.checkout.sessions.create({
         payment_method_types: ['card'],
         line_items: [
@@ -176,6 +266,7 @@ export class CheckoutService {
         mode: 'payment',
         success_url: successUrl,
         cancel_url: cancelUrl,
+        expires_at: expiresAt,
         customer_email: dto.email || undefined,
         metadata: {
           orderId,
@@ -188,7 +279,7 @@ export class CheckoutService {
         },
       });
 
-      await this.updateOrderWithSession(orderId, session.id);
+      await this.orders.setProviderOrderId(orderId, session.id);
 
       this.logger.log(`Created Stripe session ${session.id} for order ${orderId} (country: ${country})`);
 
@@ -228,7 +319,7 @@ export class CheckoutService {
         webhookUrl,
       );
 
-      await this.updateOrderWithSession(orderId, result.transactionId);
+      await this.orders.setProviderOrderId(orderId, result.transactionId);
 
       this.logger.log(`Created Redsys session ${result.transactionId} for order ${orderId} (country: ${country})`);
 
@@ -247,58 +338,14 @@ export class CheckoutService {
     }
   }
 
-  /**
-   * Create pending order with geolocation data
-   */
-  private async createPendingOrderWithGeo(data: {
-    productId: string;
-    tipsterId: string;
-    amountCents: number;
-    currency: string;
-    email?: string;
-    phone?: string;
-    telegramUserId?: string;
-    telegramUsername?: string;
-    isGuest: boolean;
-    country: string;
-    countryName: string;
-    gateway: string;
-    commissionCents: number;
-    commissionRate: number;
-  }): Promise<string> {
-    const now = new Date();
-    const orderId = this.generateOrderId();
-
-    await this.prisma.$runCommandRaw({
-      insert: 'orders',
-      documents: [{
-        _id: { $oid: orderId },
-        product_id: data.productId,
-        tipster_id: data.tipsterId,
-        amount_cents: data.amountCents,
-        currency: data.currency,
-        email_backup: data.email || null,
-        phone_backup: data.phone || null,
-        telegram_user_id: data.telegramUserId || null,
-        telegram_username: data.telegramUsername || null,
-        status: 'PENDING',
-        payment_provider: data.gateway,
-        // Geolocation data
-        detected_country: data.country,
-        detected_country_name: data.countryName,
-        // Commission data
-        commission_cents: data.commissionCents,
-        commission_rate: data.commissionRate,
-        meta: { isGuest: data.isGuest },
-        created_at: { $date: now.toISOString() },
-        updated_at: { $date: now.toISOString() },
-      }],
-    });
-
-    return orderId;
-  }
-
   async getCheckoutStatus(sessionId: string) {
+    // Once the webhook has settled the order there is nothing left to ask Stripe
+    const order = await this.orders.findByProviderOrderId(sessionId, 'notification');
+    const settled = order && this.settledCheckoutStatus(order);
+    if (settled) {
+      return settled;
+    }
+
     try {
       const session = await this.stripe.checkout.sessions.retrieve(sessionId);
       
@@ -315,6 +362,24 @@ export class CheckoutService {
     }
   }
 
+  /**
+   * Session status as Stripe would report it, from an order that is no longer PENDING
+   * (null while it is, or for statuses Stripe has no equivalent for)
+   */
+  private settledCheckoutStatus(order: OrderRecord) {
+    const paid = PURCHASED_STATUSES.includes(order.status);
+    if (!paid && order.status !== 'EXPIRED') {
+      return null;
+    }
+    return {
+      status: paid ? 'complete' : 'expired',
+      paymentStatus: paid ? 'paid' : 'unpaid',
+      amountTotal: order.amountCents ?? null,
+      currency: order.currency?.toLowerCase() ?? null,
+      metadata: { orderId: order.id, productId: order.productId },
+    };
+  }
+
   async handleStripeWebhook(payload: Buffer, signature: string) {
     const webhookSecret = this.config.get<string>('STRIPE_WEBHOOK_SECRET');
     
@@ -361,28 +426,39 @@ export class CheckoutService {
 
     this.logger.log(`Processing Redsys webhook for order ${result.orderId}`);
 
-    // Update order status
-    const status = result.success ? 'PAGADA' : 'FAILED';
-    await this.prisma.$runCommandRaw({
-      update: 'orders',
-      updates: [{
-        q: { _id: { $oid: result.orderId } },
-        u: {
-          $set: {
-            status,
+    // Update order status. Redsys retries notifications and may deliver them out of
+    // order, so only the first one that finds the order PENDING takes effect
+    const redsysDetails = {
+      response_code: result.responseCode,
+      authorization_code: result.authCode,
+    };
+    const transitioned = result.success
+      ? await this.orders.markPaid(
+          result.orderId,
+          { provider: 'redsys', providerOrderId: result.transactionId, extra: redsysDetails },
+          'PENDING',
+        )
+      : await this.orders.update(
+          result.orderId,
+          {
+            status: 'FAILED',
             payment_provider: 'redsys',
             provider_order_id: result.transactionId,
-            response_code: result.responseCode,
-            authorization_code: result.authCode,
-            updated_at: { $date: new Date().toISOString() },
+            ...redsysDetails,
           },
-        },
-      }],
-    });
+          'PENDING',
+        );
+
+    if (!transitioned) {
+      this.logger.log(`Redsys notification for order ${result.orderId} already applied, ignoring`);
+      return { received: true, processed: false, duplicate: true };
+    }
 
     // If successful, send Telegram notification
     if (result.success) {
-      const order = await this.getOrderById(result.orderId);
+      await this.onOrderPaid(result.orderId);
+
+      const order = await this.orders.findById(result.orderId, 'notification');
       if (order?.telegramUserId) {
         await this.telegramService.notifyPaymentSuccess(
           order.telegramUserId,
@@ -417,22 +493,18 @@ export class CheckoutService {
 
     this.logger.log(`Processing successful payment for order ${orderId}`);
 
-    // Update order status
-    await this.prisma.$runCommandRaw({
-      update: 'orders',
-      updates: [{
-        q: { _id: { $oid: orderId } },
-        u: {
-          $set: {
-            status: 'PAGADA',
-            payment_provider: 'stripe',
-            provider_order_id: session.id,
-            payment_method: 'card',
-            updated_at: { $date: new Date().toISOString() },
-          },
-        },
-      }],
-    });
+    // Update order status. Stripe redelivers checkout.session.completed, and the success
+    // page may have marked it paid already: only the first one that finds it PENDING counts
+    const paid = await this.orders.markPaid(
+      orderId,
+      { provider: 'stripe', providerOrderId: session.id, method: 'card' },
+      'PENDING',
+    );
+    if (!paid) {
+      this.logger.log(`Payment of order ${orderId} already applied, ignoring`);
+      return;
+    }
+    await this.onOrderPaid(orderId);
 
     // Send Telegram notification if user came from Telegram
     const telegramUserId = session.metadata?.telegramUserId;
@@ -449,49 +521,31 @@ export class CheckoutService {
     const orderId = session.metadata?.orderId;
     if (!orderId) return;
 
-    await this.prisma.$runCommandRaw({
-      update: 'orders',
-      updates: [{
-        q: { _id: { $oid: orderId } },
-        u: {
-          $set: {
-            status: 'EXPIRED',
-            updated_at: { $date: new Date().toISOString() },
-          },
-        },
-      }],
-    });
+    await this.orders.update(orderId, { status: 'EXPIRED' }, 'PENDING');
+
+    // Give the held seat back to capacity-limited products
+    await this.seatReservations.release(orderId);
   }
 
   async verifyPaymentAndGetOrder(sessionId: string, orderId: string) {
-    // Get session status from Stripe
-    const status = await this.getCheckoutStatus(sessionId);
+    // Get session status from Stripe, unless the order already says how it ended
+    const known = await this.orders.findById(orderId, 'notification');
+    const status = (known && this.settledCheckoutStatus(known)) || await this.getCheckoutStatus(sessionId);
     
     if (status.paymentStatus === 'paid') {
       // Update order if not already updated
-      const order = await this.getOrderById(orderId);
-      
-      if (order && order.status === 'PENDING') {
-        await this.prisma.$runCommandRaw({
-          update: 'orders',
-          updates: [{
-            q: { _id: { $oid: orderId } },
-            u: {
-              $set: {
-                status: 'PAGADA',
-                payment_provider: 'stripe',
-                provider_order_id: sessionId,
-                payment_method: 'card',
-                updated_at: { $date: new Date().toISOString() },
-              },
-            },
-          }],
-        });
+      const paid = await this.orders.markPaid(
+        orderId,
+        { provider: 'stripe', providerOrderId: sessionId, method: 'card' },
+        'PENDING',
+      );
+      if (paid) {
+        await this.onOrderPaid(orderId);
       }
     }
 
     // Get updated order
-    const order = await this.getOrderById(orderId);
+    const order = await this.orders.findById(orderId);
     
     // Get product info
     const product = order ? await this.prisma.product.findUnique({
@@ -511,119 +565,80 @@ export class CheckoutService {
     };
   }
 
-  private async createPendingOrder(data: {
-    productId: string;
-    tipsterId: string;
-    amountCents: number;
-    currency: string;
-    email?: string;
-    phone?: string;
-    telegramUserId?: string;
-    telegramUsername?: string;
-    isGuest: boolean;
-  }): Promise<string> {
-    const now = new Date();
-    const orderId = this.generateOrderId();
-
-    await this.prisma.$runCommandRaw({
-      insert: 'orders',
-      documents: [{
-        _id: { $oid: orderId },
-        product_id: data.productId,
-        tipster_id: data.tipsterId,
-        amount_cents: data.amountCents,
-        currency: data.currency,
-        email_backup: data.email || null,
-        phone_backup: data.phone || null,
-        telegram_user_id: data.telegramUserId || null,
-        telegram_username: data.telegramUsername || null,
-        status: 'PENDING',
-        payment_provider: 'stripe',
-        meta: { isGuest: data.isGuest },
-        created_at: { $date: now.toISOString() },
-        updated_at: { $date: now.toISOString() },
-      }],
-    });
-
-    return orderId;
+  /**
+   * Side effects of a confirmed payment: the held seat becomes sold and the
+   * buyer gets a channel access grant (with expiry when the product has validity_days)
+   */
+  private async onOrderPaid(orderId: string) {
+    await this.seatReservations.confirm(orderId);
+    await this.accessGrants.grantForOrder(orderId);
   }
 
-  private async updateOrderWithSession(orderId: string, sessionId: string) {
-    await this.prisma.$runCommandRaw({
-      update: 'orders',
-      updates: [{
-        q: { _id: { $oid: orderId } },
-        u: {
-          $set: {
-            provider_order_id: sessionId,
-            updated_at: { $date: new Date().toISOString() },
-          },
-        },
-      }],
-    });
+  async getProductForCheckout(productId: string) {
+    const { body } = await this.getCheckoutProductRepresentation(productId);
+    return body;
   }
 
-  private async getOrderById(orderId: string) {
-    const result = await this.prisma.$runCommandRaw({
-      find: 'orders',
-      filter: { _id: { $oid: orderId } },
-      limit: 1,
-    }) as any;
-
-    if (result.cursor?.firstBatch?.length > 0) {
-      const doc = result.cursor.firstBatch[0];
-      return {
-        id: doc._id.$oid || doc._id,
-        productId: doc.product_id,
-        tipsterId: doc.tipster_id,
-        amountCents: doc.amount_cents,
-        currency: doc.currency,
-        status: doc.status,
-        emailBackup: doc.email_backup,
-        phoneBackup: doc.phone_backup,
-        telegramUserId: doc.telegram_user_id,
-        telegramUsername: doc.telegram_username,
-        paymentProvider: doc.payment_provider,
-        providerOrderId: doc.provider_order_id,
-        createdAt: doc.created_at,
-      };
+  /**
+   * Checkout product body plus a strong ETag derived from the product updated_at and the
+   * tipster fields shown. Product and tipster are cached on every node under their own
+   * keys: ProductsService invalidates the product, tipster profile writes the tipster.
+   */
+  async getCheckoutProductRepresentation(productId: string) {
+    const product = await this.cache.wrap('checkout_product', productId, this.productCacheSeconds, () =>
+      this.loadCheckoutProduct(productId),
+    );
+    if (!product) {
+      throw new NotFoundException('Producto no encontrado');
     }
-    return null;
-  }
+    const tipster = await this.cache.wrap('checkout_tipster', product.tipsterId, this.productCacheSeconds, () =>
+      this.prisma.tipsterProfile.findUnique({
+        where: { id: product.tipsterId },
+        select: { id: true, publicName: true, avatarUrl: true },
+      }),
+    );
+
+    const etag = buildEtag('checkout-product', product.id, product.updatedAt,
+      tipster?.id, tipster?.publicName, tipster?.avatarUrl);
+
+    const body = {
+      id: product.id,
+      title: product.title,
+      description: product.description,
+      priceCents: product.priceCents,
+      currency: product.currency,
+      billingType: product.billingType,
+      validityDays: product.validityDays,
+      tipster: tipster ? {
+        id: tipster.id,
+        publicName: tipster.publicName,
+        avatarUrl: tipster.avatarUrl,
+      } : null,
+    };
 
-  private generateOrderId(): string {
-    // Generate a MongoDB ObjectId-like string
-    const timestamp = Math.floor(Date.now() / 1000).toString(16).padStart(8, '0');
-    const random = Math.random().toString(16).substring(2, 18).padStart(16, '0');
-    return timestamp + random.substring(0, 16);
+    return { etag, body };
   }
 
-  async getProductForCheckout(productId: string) {
+  private async loadCheckoutProduct(productId: string) {
     const product = await this.prisma.product.findUnique({
       where: { id: productId },
     });
 
     if (!product || !product.active) {
-      throw new NotFoundException('Producto no encontrado');
+      return null;
     }
 
-    const tipster = await this.prisma.tipsterProfile.findUnique({
-      where: { id: product.tipsterId },
-    });
-
+    // Plain JSON for the shared tier
     return {
       id: product.id,
+      tipsterId: product.tipsterId,
+      updatedAt: product.updatedAt.toISOString(),
       title: product.title,
       description: product.description,
       priceCents: product.priceCents,
       currency: product.currency,
       billingType: product.billingType,
       validityDays: product.validityDays,
-      tipster: tipster ? {
-        id: tipster.id,
-        publicName: tipster.publicName,
-        avatarUrl: tipster.avatarUrl,
-      } : null,
     };
   }
 
@@ -631,7 +646,7 @@ export class CheckoutService {
    * Simulate a successful payment (for testing purposes)
    */
   async simulateSuccessfulPayment(orderId: string) {
-    const order = await this.getOrderById(orderId);
+    const order = await this.orders.findById(orderId);
     
     if (!order) {
       throw new NotFoundException('Orden no encontrada');
@@ -645,22 +660,24 @@ export class CheckoutService {
       };
     }
 
-    // Update order status to PAGADA
-    await this.prisma.$runCommandRaw({
-      update: 'orders',
-      updates: [{
-        q: { _id: { $oid: orderId } },
-        u: {
-          $set: {
-            status: 'PAGADA',
-            payment_provider: 'stripe_simulated',
-            payment_method: 'card_simulated',
-            paid_at: { $date: new Date().toISOString() },
-            updated_at: { $date: new Date().toISOString() },
-          },
-        },
-      }],
-    });
+    // Update order status to PAGADA (once, even if called twice at the same time)
+    const paid = await this.orders.markPaid(
+      orderId,
+      { provider: 'stripe_simulated', method: 'card_simulated' },
+      'PENDING',
+    );
+    if (!paid) {
+      const current = await this.orders.findById(orderId);
+      if (current?.status !== 'PAGADA') {
+        throw new BadRequestException(`La orden no está pendiente de pago (${current?.status})`);
+      }
+      return {
+        success: true,
+        message: 'La orden ya está pagada',
+        order: current,
+      };
+    }
+    await this.onOrderPaid(orderId);
 
     // Send Telegram notification if user came from Telegram
     let telegramResult = null;
@@ -673,7 +690,7 @@ export class CheckoutService {
     }
 
     // Get updated order
-    const updatedOrder = await this.getOrderById(orderId);
+    const updatedOrder = await this.orders.findById(orderId);
 
     return {
       success: true,
@@ -687,7 +704,7 @@ export class CheckoutService {
    * Complete payment and send notifications
    */
   async completePaymentAndNotify(orderId: string, sessionId?: string) {
-    const order = await this.getOrderById(orderId);
+    const order = await this.orders.findById(orderId);
     
     if (!order) {
       throw new NotFoundException('Orden no encontrada');
@@ -711,23 +728,12 @@ export class CheckoutService {
       };
     }
 
-    // Update order status to PAGADA
-    await this.prisma.$runCommandRaw({
-      update: 'orders',
-      updates: [{
-        q: { _id: { $oid: orderId } },
-        u: {
-          $set: {
-            status: 'PAGADA',
-            payment_provider: 'stripe',
-            provider_order_id: sessionId || order.providerOrderId,
-            payment_method: 'card',
-            paid_at: { $date: new Date().toISOString() },
-            updated_at: { $date: new Date().toISOString() },
-          },
-        },
-      }],
-    });
+    // Update order status to PAGADA (once: the webhook may be marking it at the same time)
+    const paid = await this.orders.markPaid(
+      orderId,
+      { provider: 'stripe', providerOrderId: sessionId || order.providerOrderId, method: 'card' },
+      'PENDING',
+    );
 
     // Get product and tipster info first
     const product = await this.prisma.product.findUnique({
@@ -737,6 +743,21 @@ export class CheckoutService {
       where: { id: product.tipsterId },
     }) : null;
 
+    if (!paid) {
+      const current = await this.orders.findById(orderId);
+      if (current?.status !== 'PAGADA') {
+        throw new BadRequestException(`La orden no está pendiente de pago (${current?.status})`);
+      }
+      return {
+        success: true,
+        alreadyPaid: true,
+        order: current,
+        product,
+        tipster,
+      };
+    }
+    await this.onOrderPaid(orderId);
+
     // Send Telegram notification to BUYER if user came from Telegram
     let telegramResult = null;
     if (order.telegramUserId) {
@@ -761,7 +782,7 @@ export class CheckoutService {
     }
 
     // Get updated order
-    const updatedOrder = await this.getOrderById(orderId);
+    const updatedOrder = await this.orders.findById(orderId);
 
     return {
       success: true,
@@ -773,26 +794,46 @@ export class CheckoutService {
   }
 
   /**
-   * Get order details by ID
+   * Get order details by ID. `fields` (see ORDER_DETAIL_PARTS) narrows each part's projection; parts left out
+   * of it are not queried at all
    */
-  async getOrderDetails(orderId: string) {
-    const order = await this.getOrderById(orderId);
-    
+  async getOrderDetails(orderId: string, fields?: Record<string, string[] | 'all'> | null) {
+    const wants = (part: string) => !fields || part in fields;
+    const pick = (part: string) => (!fields || fields[part] === 'all' ? null : (fields[part] as string[]));
+    const needsProduct = wants('product') || wants('tipster');
+
+    const orderFields = pick('order') ?? (fields && !wants('order') ? [] : null);
+    const order = await this.orders.findById(
+      orderId,
+      orderFields ? [...new Set([...orderFields, ...(needsProduct ? ['productId'] : [])])] : 'detail',
+    );
+
     if (!order) {
       throw new NotFoundException('Orden no encontrada');
     }
 
-    const product = await this.prisma.product.findUnique({
-      where: { id: order.productId },
-    });
-    const tipster = product ? await this.prisma.tipsterProfile.findUnique({
+    let product: any = null;
+    if (needsProduct) {
+      // Only the tipster was asked for: the product is read for its tipsterId alone
+      const productFields = wants('product') ? pick('product') : [];
+      product = await this.prisma.product.findUnique({
+        where: { id: order.productId },
+        ...(productFields && { select: toSelect([...productFields, 'tipsterId']) }),
+      });
+    }
+    const tipsterFields = pick('tipster');
+    const tipster = product && wants('tipster') ? await this.prisma.tipsterProfile.findUnique({
       where: { id: product.tipsterId },
+      ...(tipsterFields && { select: toSelect(tipsterFields) }),
     }) : null;
 
+    if (!fields) {
+      return { order, product, tipster };
+    }
     return {
-      order,
-      product,
-      tipster,
+      ...(wants('order') && { order }),
+      ...(wants('product') && { product }),
+      ...(wants('tipster') && { tipster }),
     };
   }
 
@@ -815,37 +856,35 @@ export class CheckoutService {
       throw new NotFoundException('Producto no encontrado o no está disponible');
     }
 
-    // 2. Create order
-    const orderId = await this.createPendingOrder({
-      productId: data.productId,
-      tipsterId: product.tipsterId,
-      amountCents: product.priceCents,
-      currency: product.currency,
-      email: data.email,
-      phone: data.phone,
-      telegramUserId: data.telegramUserId,
-      telegramUsername: data.telegramUsername,
-      isGuest: true,
-    });
+    // 2. Hold a seat (capacity-limited products) and create order
+    const orderId = this.orders.newId();
+    const hold = await this.seatReservations.reserve(product, orderId);
+
+    try {
+      await this.orders.create({
+        id: orderId,
+        productId: data.productId,
+        tipsterId: product.tipsterId,
+        amountCents: product.priceCents,
+        currency: product.currency,
+        email: data.email,
+        phone: data.phone,
+        telegramUserId: data.telegramUserId,
+        telegramUsername: data.telegramUsername,
+        isGuest: true,
+      });
+    } catch (error) {
+      if (hold) {
+        await this.seatReservations.release(orderId);
+      }
+      throw error;
+    }
 
     this.logger.log(`Created test order ${orderId}`);
 
     // 3. Simulate payment
-    await this.prisma.$runCommandRaw({
-      update: 'orders',
-      updates: [{
-        q: { _id: { $oid: orderId } },
-        u: {
-          $set: {
-            status: 'PAGADA',
-            payment_provider: 'test_simulated',
-            payment_method: 'test',
-            paid_at: { $date: new Date().toISOString() },
-            updated_at: { $date: new Date().toISOString() },
-          },
-        },
-      }],
-    });
+    await this.orders.markPaid(orderId, { provider: 'test_simulated', method: 'test' }, 'PENDING');
+    await this.onOrderPaid(orderId);
 
     this.logger.log(`Simulated payment for order ${orderId}`);
 
@@ -871,7 +910,7 @@ export class CheckoutService {
     );
 
     // 6. Get order details
-    const order = await this.getOrderById(orderId);
+    const order = await this.orders.findById(orderId);
     const tipster = await this.prisma.tipsterProfile.findUnique({
       where: { id: product.tipsterId },
     });
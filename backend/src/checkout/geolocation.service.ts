@@ -1,5 +1,7 @@
 import { Injectable, Logger } from '@nestjs/common';
 import { ConfigService } from '@nestjs/config';
+import { MetricsService } from '../metrics/metrics.service';
+import { CacheService } from '../cache/cache.service';
 
 export interface GeoLocationResult {
   country: string; // Country code (ES, US, etc.)
@@ -13,8 +15,20 @@ export interface GeoLocationResult {
 @Injectable()
 export class GeolocationService {
   private readonly logger = new Logger(GeolocationService.name);
+  private readonly apiUrl: string;
+  private readonly timeoutMs: number;
+  private readonly cacheTtlSeconds: number;
 
-  constructor(private config: ConfigService) {}
+  constructor(
+    private config: ConfigService,
+    private metrics: MetricsService,
+    private cache: CacheService,
+  ) {
+    // GEOLOCATION_API_URL lets load tests route lookups through a local proxy
+    this.apiUrl = this.config.get<string>('GEOLOCATION_API_URL') || 'http://ip-api.com';
+    this.timeoutMs = parseInt(this.config.get<string>('GEOLOCATION_TIMEOUT_MS') || '2000', 10);
+    this.cacheTtlSeconds = parseInt(this.config.get<string>('GEOLOCATION_CACHE_SECONDS') || '86400', 10);
+  }
 
   /**
    * Detect country from IP address using ip-api.com (free, no API key)
@@ -30,26 +44,8 @@ export class GeolocationService {
         return this.getDefaultResult(cleanIp, 'ES');
       }
 
-      // Call ip-api.com (free, no API key needed)
-      const response = await fetch(`http://ip-api.com/json/${cleanIp}?fields=status,country,countryCode,regionName,city`);
-      const data = await response.json();
-
-      if (data.status === 'success') {
-        const result: GeoLocationResult = {
-          country: data.countryCode,
-          countryName: data.country,
-          city: data.city,
-          region: data.regionName,
-          ip: cleanIp,
-          isSpain: data.countryCode === 'ES',
-        };
-
-        this.logger.log(`Geolocation for ${cleanIp}: ${data.countryCode} (${data.country})`);
-        return result;
-      }
-
-      this.logger.warn(`Geolocation failed for ${cleanIp}: ${data.message}`);
-      return this.getDefaultResult(cleanIp, 'ES');
+      // Only successful lookups are cached; a failure is retried on the next checkout
+      return await this.cache.wrap('geolocation', cleanIp, this.cacheTtlSeconds, () => this.lookup(cleanIp));
 
     } catch (error) {
       this.logger.error(`Geolocation error for ${ip}:`, error);
@@ -58,6 +54,32 @@ export class GeolocationService {
     }
   }
 
+  private async lookup(cleanIp: string): Promise<GeoLocationResult> {
+    // Call ip-api.com (free, no API key needed). A slow lookup must not hold the
+    // checkout: after GEOLOCATION_TIMEOUT_MS we fall back to the default country
+    const data = await this.metrics.timeOutbound('geolocation', 'lookup', async () => {
+      const response = await fetch(
+        `${this.apiUrl}/json/${cleanIp}?fields=status,country,countryCode,regionName,city`,
+        { signal: AbortSignal.timeout(this.timeoutMs) },
+      );
+      return response.json();
+    });
+
+    if (data.status !== 'success') {
+      throw new Error(`lookup failed: ${data.message}`);
+    }
+
+    this.logger.log(`Geolocation for ${cleanIp}: ${data.countryCode} (${data.country})`);
+    return {
+      country: data.countryCode,
+      countryName: data.country,
+      city: data.city,
+      region: data.regionName,
+      ip: cleanIp,
+      isSpain: data.countryCode === 'ES',
+    };
+  }
+
   /**
    * Check if IP is private/localhost
    */
@@ -0,0 +1,212 @@
+import { Injectable, Logger, NotFoundException, OnModuleDestroy } from '@nestjs/common';
+import { ConfigService } from '@nestjs/config';
+import { Observable } from 'rxjs';
+import { MetricsService } from '../metrics/metrics.service';
+import { OrderRepository } from '../orders/order.repository';
+
+// The only status still waiting on the gateway; any other one is final for the buyer
+const WAITING_STATUS = 'PENDING';
+
+interface CachedStatus {
+  status: string;
+  checkedAt: number;
+}
+
+/**
+ * Order status for the success page and the bot, pushed instead of polled.
+ *
+ * Status changes made through OrderRepository in this process (webhooks,
+ * complete-payment, expiry) reach waiting long-polls and SSE streams at once.
+ * Changes made by another cluster worker are picked up by one batched query every
+ * ORDER_STATUS_RECHECK_MS while somebody is waiting. Answers come from a local
+ * cache, so repeated polls reach neither Mongo nor Stripe.
+ */
+@Injectable()
+export class OrderStatusService implements OnModuleDestroy {
+  private readonly logger = new Logger(OrderStatusService.name);
+  private readonly cache = new Map<string, CachedStatus>();
+  private readonly watchers = new Map<string, Set<(status: string) => void>>();
+  private readonly recheckMs: number;
+  private readonly settledTtlMs: number;
+  private readonly streamMs: number;
+  private readonly maxEntries: number;
+  private recheckTimer: NodeJS.Timeout | null = null;
+  private rechecking = false;
+
+  constructor(
+    private config: ConfigService,
+    private metrics: MetricsService,
+    private orders: OrderRepository,
+  ) {
+    this.recheckMs = Number(this.config.get('ORDER_STATUS_RECHECK_MS') || 1000);
+    this.settledTtlMs = Number(this.config.get('ORDER_STATUS_CACHE_SECONDS') || 60) * 1000;
+    this.streamMs = Number(this.config.get('ORDER_STATUS_STREAM_SECONDS') || 120) * 1000;
+    this.maxEntries = Number(this.config.get('ORDER_STATUS_CACHE_SIZE') || 50000);
+    this.orders.onStatusChange((orderId, status) => this.publish(orderId, status, Date.now()));
+  }
+
+  onModuleDestroy() {
+    this.stopRecheck();
+  }
+
+  /**
+   * PENDING answers are re-read after ORDER_STATUS_RECHECK_MS, settled ones after
+   * ORDER_STATUS_CACHE_SECONDS (a refund may still follow)
+   */
+  async current(orderId: string): Promise<string> {
+    const cached = this.cache.get(orderId);
+    const ttl = cached?.status === WAITING_STATUS ? this.recheckMs : this.settledTtlMs;
+    if (cached && Date.now() - cached.checkedAt < ttl) {
+      this.metrics.observeCacheLookup('order_status', true);
+      return cached.status;
+    }
+    this.metrics.observeCacheLookup('order_status', false);
+
+    const checkedAt = Date.now();
+    const order = await this.orders.findById(orderId, 'status');
+    if (!order) {
+      throw new NotFoundException('Orden no encontrada');
+    }
+    // A change published while the query ran is newer than what it read
+    return this.store(orderId, order.status, checkedAt) ? order.status : this.cache.get(orderId)!.status;
+  }
+
+  /**
+   * Long-poll: resolves as soon as the status differs from `known`, or with `known`
+   * once `timeoutMs` has passed
+   */
+  async waitForChange(orderId: string, known: string, timeoutMs: number): Promise<string> {
+    const status = await this.current(orderId);
+    if (status !== known || timeoutMs <= 0) {
+      return status;
+    }
+    return new Promise((resolve) => {
+      let timer: NodeJS.Timeout;
+      const unsubscribe = this.subscribe(orderId, (next) => {
+        if (next !== known) {
+          clearTimeout(timer);
+          unsubscribe();
+          resolve(next);
+        }
+      });
+      timer = setTimeout(() => {
+        unsubscribe();
+        resolve(known);
+      }, timeoutMs);
+    });
+  }
+
+  /**
+   * `initial`, then every change; completes once the order leaves PENDING or after
+   * ORDER_STATUS_STREAM_SECONDS
+   */
+  stream(orderId: string, initial: string): Observable<string> {
+    return new Observable<string>((subscriber) => {
+      subscriber.next(initial);
+      if (initial !== WAITING_STATUS) {
+        subscriber.complete();
+        return;
+      }
+      let last = initial;
+      const unsubscribe = this.subscribe(orderId, (status) => {
+        if (status === last) {
+          return;
+        }
+        last = status;
+        subscriber.next(status);
+        if (status !== WAITING_STATUS) {
+          subscriber.complete();
+        }
+      });
+      const timer = setTimeout(() => subscriber.complete(), this.streamMs);
+      return () => {
+        clearTimeout(timer);
+        unsubscribe();
+      };
+    });
+  }
+
+  private subscribe(orderId: string, listener: (status: string) => void): () => void {
+    let listeners = this.watchers.get(orderId);
+    if (!listeners) {
+      listeners = new Set();
+      this.watchers.set(orderId, listeners);
+    }
+    listeners.add(listener);
+    this.startRecheck();
+
+    return () => {
+      listeners!.delete(listener);
+      if (!listeners!.size && this.watchers.get(orderId) === listeners) {
+        this.watchers.delete(orderId);
+      }
+      if (!this.watchers.size) {
+        this.stopRecheck();
+      }
+    };
+  }
+
+  private publish(orderId: string, status: string, checkedAt: number) {
+    if (!this.store(orderId, status, checkedAt)) {
+      return;
+    }
+    for (const listener of [...(this.watchers.get(orderId) || [])]) {
+      listener(status);
+    }
+  }
+
+  /**
+   * False (and nothing stored) when the cache already holds a newer answer
+   */
+  private store(orderId: string, status: string, checkedAt: number): boolean {
+    const cached = this.cache.get(orderId);
+    if (cached && cached.checkedAt > checkedAt) {
+      return false;
+    }
+    this.cache.delete(orderId);
+    this.cache.set(orderId, { status, checkedAt });
+    while (this.cache.size > this.maxEntries) {
+      this.cache.delete(this.cache.keys().next().value);
+    }
+    return true;
+  }
+
+  private startRecheck() {
+    if (!this.recheckTimer) {
+      this.recheckTimer = setInterval(() => this.recheck(), this.recheckMs);
+      this.recheckTimer.unref();
+    }
+  }
+
+  private stopRecheck() {
+    if (this.recheckTimer) {
+      clearInterval(this.recheckTimer);
+      this.recheckTimer = null;
+    }
+  }
+
+  /**
+   * One query for every order somebody is waiting on
+   */
+  private async recheck() {
+    if (this.rechecking || !this.watchers.size) {
+      return;
+    }
+    this.rechecking = true;
+    try {
+      const checkedAt = Date.now();
+      const statuses = await this.orders.findStatuses([...this.watchers.keys()]);
+      for (const [orderId, status] of statuses) {
+        if (this.cache.get(orderId)?.status !== status) {
+          this.publish(orderId, status, checkedAt);
+        } else {
+          this.store(orderId, status, checkedAt);
+        }
+      }
+    } catch (error) {
+      this.logger.warn(`Order status recheck failed: ${error.message}`);
+    } finally {
+      this.rechecking = false;
+    }
+  }
+}
@@ -0,0 +1,63 @@
+import { Logger } from '@nestjs/common';
+import type { Cluster, Worker } from 'cluster';
+import { cpus } from 'os';
+import { WORKER_INDEX_ENV } from './common/cluster/worker-role';
+
+// @types/node only declares a default export and esModuleInterop is off
+// eslint-disable-next-line @typescript-eslint/no-var-requires
+const cluster: Cluster = require('cluster');
+
+const RESPAWN_DELAY_MS = 1000;
+
+function workerCount(): number {
+  const setting = process.env.API_WORKERS || '1';
+  return setting === 'auto' ? cpus().length : Math.max(1, parseInt(setting, 10) || 1);
+}
+
+/**
+ * API_WORKERS=N (or auto = one per core) forks N API processes that share the port.
+ * A crashed worker is replaced with the same index, so worker 0 keeps the background duties.
+ */
+export function runClustered(bootstrap: () => Promise<void>) {
+  const workers = workerCount();
+  if (workers === 1 || cluster.isWorker) {
+    void bootstrap();
+    return;
+  }
+
+  const logger = new Logger('Cluster');
+  const indexes = new Map<number, number>();
+  let stopping = false;
+
+  const fork = (index: number) => {
+    const worker: Worker = cluster.fork({ [WORKER_INDEX_ENV]: String(index) });
+    indexes.set(worker.id, index);
+  };
+
+  cluster.on('exit', (worker, code, signal) => {
+    const index = indexes.get(worker.id);
+    indexes.delete(worker.id);
+    if (stopping) {
+      if (indexes.size === 0) {
+        process.exit(0);
+      }
+      return;
+    }
+    logger.error(`Worker ${index} (pid ${worker.process.pid}) exited (${signal || code}), respawning`);
+    setTimeout(() => fork(index), RESPAWN_DELAY_MS);
+  });
+
+  for (const signal of ['SIGTERM', 'SIGINT'] as const) {
+    process.on(signal, () => {
+      stopping = true;
+      for (const worker of Object.values(cluster.workers)) {
+        worker?.kill(signal);
+      }
+    });
+  }
+
+  logger.log(`Starting ${workers} API workers (primary pid ${process.pid})`);
+  for (let index = 0; index < workers; index++) {
+    fork(index);
+  }
+}
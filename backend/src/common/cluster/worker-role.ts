@@ -0,0 +1,18 @@
+/**
+ * Role of this process when the API runs clustered (API_WORKERS > 1).
+ * The primary passes each worker its index; a single process is worker 0.
+ */
+export const WORKER_INDEX_ENV = 'API_WORKER_INDEX';
+
+export function workerIndex(): number {
+  return Number(process.env[WORKER_INDEX_ENV] || 0);
+}
+
+/**
+ * Schedulers and one-off registrations (Telegram webhook, seat-hold sweeper, access
+ * expiry) run in worker 0 only. BACKGROUND_DUTIES=off disables them on the whole
+ * instance, e.g. on every host but one.
+ */
+export function runsBackgroundDuties(): boolean {
+  return process.env.BACKGROUND_DUTIES !== 'off' && workerIndex() === 0;
+}
@@ -0,0 +1,60 @@
+import { Injectable, NestMiddleware } from '@nestjs/common';
+import { AsyncLocalStorage } from 'async_hooks';
+import { randomUUID } from 'crypto';
+import { NextFunction, Request, Response } from 'express';
+
+export const REQUEST_ID_HEADER = 'X-Request-Id';
+
+export interface RequestTiming {
+  ms: number;
+  count: number;
+}
+
+export interface RequestContext {
+  requestId: string;
+  // Time spent waiting on the database and outbound calls, reported in Server-Timing
+  timings: Record<string, RequestTiming>;
+}
+
+const storage = new AsyncLocalStorage<RequestContext>();
+
+// Accept caller-provided ids (harness, proxies) only if they look sane
+const VALID_REQUEST_ID = /^[A-Za-z0-9._:-]{1,128}$/;
+
+/**
+ * Every request runs inside its own context carrying the correlation id,
+ * which is echoed back in X-Request-Id and added to log lines.
+ * Applied as a Nest middleware so it runs after body parsing (stream
+ * callbacks would otherwise drop the async context).
+ */
+@Injectable()
+export class RequestContextMiddleware implements NestMiddleware {
+  use(req: Request, res: Response, next: NextFunction) {
+    const incoming = req.header(REQUEST_ID_HEADER);
+    const requestId = incoming && VALID_REQUEST_ID.test(incoming) ? incoming : randomUUID();
+    res.setHeader(REQUEST_ID_HEADER, requestId);
+    storage.run({ requestId, timings: {} }, next);
+  }
+}
+
+export function getRequestId(): string | undefined {
+  return storage.getStore()?.requestId;
+}
+
+/**
+ * Add ms to the current request's `name` timing (no-op outside a request).
+ * Concurrent calls overlap, so a total can exceed the request's wall time.
+ */
+export function recordTiming(name: string, ms: number) {
+  const timings = storage.getStore()?.timings;
+  if (!timings) {
+    return;
+  }
+  const timing = timings[name] || (timings[name] = { ms: 0, count: 0 });
+  timing.ms += ms;
+  timing.count += 1;
+}
+
+export function getTimings(): Record<string, RequestTiming> {
+  return storage.getStore()?.timings ?? {};
+}
@@ -0,0 +1,5 @@
+import { applyDecorators, SetMetadata, UseInterceptors } from '@nestjs/common';
+import { RATE_LIMIT_KEY, RateLimitInterceptor, RateLimitPolicy } from '../interceptors/rate-limit.interceptor';
+
+export const RateLimit = (policy: RateLimitPolicy) =>
+  applyDecorators(SetMetadata(RATE_LIMIT_KEY, policy), UseInterceptors(RateLimitInterceptor));
@@ -0,0 +1,31 @@
+import { CanActivate, ExecutionContext, Injectable, Logger, UnauthorizedException } from '@nestjs/common';
+import { ConfigService } from '@nestjs/config';
+import { timingSafeEqual } from 'crypto';
+
+export const BOT_TOKEN_HEADER = 'X-Bot-Token';
+
+/**
+ * Routes only the Telegram bot process may call: the request must carry BOT_API_TOKEN
+ * (shared between backend and bot) in X-Bot-Token. Without BOT_API_TOKEN every call is refused.
+ */
+@Injectable()
+export class BotTokenGuard implements CanActivate {
+  private readonly logger = new Logger(BotTokenGuard.name);
+
+  constructor(private config: ConfigService) {}
+
+  canActivate(context: ExecutionContext): boolean {
+    const expected = this.config.get<string>('BOT_API_TOKEN');
+    if (!expected) {
+      this.logger.warn('BOT_API_TOKEN is not configured: refusing bot-only route');
+      throw new UnauthorizedException();
+    }
+    const provided = context.switchToHttp().getRequest().header(BOT_TOKEN_HEADER) || '';
+    const a = Buffer.from(String(provided));
+    const b = Buffer.from(expected);
+    if (a.length !== b.length || !timingSafeEqual(a, b)) {
+      throw new UnauthorizedException();
+    }
+    return true;
+  }
+}
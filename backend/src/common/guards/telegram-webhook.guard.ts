@@ -0,0 +1,33 @@
+import { CanActivate, ExecutionContext, Injectable, Logger, UnauthorizedException } from '@nestjs/common';
+import { ConfigService } from '@nestjs/config';
+import { timingSafeEqual } from 'crypto';
+
+export const TELEGRAM_SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token';
+
+/**
+ * Only Telegram may post updates: the webhook is registered with TELEGRAM_WEBHOOK_SECRET
+ * as secret_token and Telegram sends it back in X-Telegram-Bot-Api-Secret-Token.
+ * Runs before the rate limiter, so forged updates cannot drain its buckets.
+ * Without TELEGRAM_WEBHOOK_SECRET every update is refused.
+ */
+@Injectable()
+export class TelegramWebhookGuard implements CanActivate {
+  private readonly logger = new Logger(TelegramWebhookGuard.name);
+
+  constructor(private config: ConfigService) {}
+
+  canActivate(context: ExecutionContext): boolean {
+    const expected = this.config.get<string>('TELEGRAM_WEBHOOK_SECRET');
+    if (!expected) {
+      this.logger.warn('TELEGRAM_WEBHOOK_SECRET is not configured: refusing Telegram update');
+      throw new UnauthorizedException();
+    }
+    const provided = context.switchToHttp().getRequest().header(TELEGRAM_SECRET_HEADER) || '';
+    const a = Buffer.from(String(provided));
+    const b = Buffer.from(expected);
+    if (a.length !== b.length || !timingSafeEqual(a, b)) {
+      throw new UnauthorizedException();
+    }
+    return true;
+  }
+}
@@ -0,0 +1,139 @@
+import { CallHandler, ExecutionContext, Injectable, NestInterceptor, StreamableFile } from '@nestjs/common';
+import { SSE_METADATA } from '@nestjs/common/constants';
+import { Request, Response } from 'express';
+import { Observable, from, of } from 'rxjs';
+import { mergeMap } from 'rxjs/operators';
+import { promisify } from 'util';
+import { brotliCompress, constants as zlibConstants, gzip } from 'zlib';
+import { getTimings } from '../context/request-context';
+
+const brotliAsync = promisify(brotliCompress);
+const gzipAsync = promisify(gzip);
+
+type Encoding = 'br' | 'gzip';
+
+// Fast settings: these run on every JSON response, not on static assets built once
+const BROTLI_QUALITY = 4;
+const GZIP_LEVEL = 6;
+
+/**
+ * Pick the encoding from Accept-Encoding (q-values honoured, br preferred on a tie)
+ */
+export function negotiateEncoding(header: string | undefined): Encoding | null {
+  if (!header) {
+    return null;
+  }
+  let best: Encoding | null = null;
+  let bestQ = 0;
+  for (const entry of header.split(',')) {
+    const [name, ...params] = entry.trim().split(';');
+    const qParam = params.find((param) => param.trim().startsWith('q='));
+    const q = qParam ? parseFloat(qParam.trim().slice(2)) : 1;
+    const coding = name.trim().toLowerCase();
+    const candidates: Encoding[] = coding === '*' ? ['br', 'gzip'] : coding === 'br' || coding === 'gzip' ? [coding] : [];
+    for (const candidate of candidates) {
+      if (q > bestQ || (q === bestQ && q > 0 && candidate === 'br' && best !== 'br')) {
+        best = candidate;
+        bestQ = q;
+      }
+    }
+  }
+  return bestQ > 0 ? best : null;
+}
+
+/**
+ * Serializes JSON responses itself so it can time it, and compresses bodies above
+ * COMPRESSION_THRESHOLD_BYTES (default 1024) with br or gzip as the client allows.
+ * COMPRESSION=off keeps the serialization timing but never compresses.
+ *
+ * Timings are reported in Server-Timing for the load harness: handler (interceptor
+ * to returned body), the database and outbound totals recorded in the request
+ * context while it ran (db, stripe, telegram, geolocation), serialize and compress.
+ */
+@Injectable()
+export class CompressionInterceptor implements NestInterceptor {
+  private readonly enabled = process.env.COMPRESSION !== 'off';
+  private readonly threshold = parseInt(process.env.COMPRESSION_THRESHOLD_BYTES || '1024', 10);
+
+  intercept(context: ExecutionContext, next: CallHandler): Observable<any> {
+    // Server-sent events are written (and flushed) one message at a time by Nest
+    if (context.getType() !== 'http' || Reflect.getMetadata(SSE_METADATA, context.getHandler())) {
+      return next.handle();
+    }
+    const http = context.switchToHttp();
+    const req = http.getRequest<Request>();
+    const res = http.getResponse<Response>();
+    const handlerStart = process.hrtime.bigint();
+
+    return next.handle().pipe(
+      mergeMap((body) => {
+        // Handlers that answer by themselves (@Res(), 304s, files, plain text) and empty
+        // bodies (Nest sends null as an empty response) are left alone
+        if (
+          body === undefined ||
+          body === null ||
+          res.headersSent ||
+          typeof body === 'string' ||
+          Buffer.isBuffer(body) ||
+          body instanceof StreamableFile
+        ) {
+          return of(body);
+        }
+        return from(this.encode(req, res, body, elapsedMs(handlerStart)));
+      }),
+    );
+  }
+
+  /**
+   * Uncompressed bodies go back as a JSON string so Express sends them itself, with its
+   * Content-Length and If-None-Match handling. Compressed ones are tagged from the
+   * uncompressed bytes first, so a client holding a fresh copy gets a 304 and nothing
+   * is compressed.
+   */
+  private async encode(req: Request, res: Response, body: any, handlerMs: string): Promise<StreamableFile | string> {
+    const timings = [`handler;dur=${handlerMs}`];
+    for (const [name, timing] of Object.entries(getTimings())) {
+      timings.push(`${name};dur=${timing.ms.toFixed(3)};desc="${timing.count} calls"`);
+    }
+
+    const serializeStart = process.hrtime.bigint();
+    const json = JSON.stringify(body);
+    const payload = Buffer.from(json, 'utf8');
+    timings.push(`serialize;dur=${elapsedMs(serializeStart)}`);
+
+    res.vary('Accept-Encoding');
+    // Same (weak by default) ETag Express would generate; routes using applyHttpCache set their own
+    const etagFn = req.app.get('etag fn');
+    if (etagFn && !res.getHeader('ETag')) {
+      res.setHeader('ETag', etagFn(payload, 'utf8'));
+    }
+    const encoding = this.enabled && payload.length >= this.threshold && !req.fresh
+      ? negotiateEncoding(req.headers['accept-encoding'] as string | undefined)
+      : null;
+
+    if (!encoding) {
+      res.setHeader('Server-Timing', timings.join(', '));
+      res.setHeader('Content-Type', 'application/json; charset=utf-8');
+      return json;
+    }
+
+    const compressStart = process.hrtime.bigint();
+    const compressed = encoding === 'br'
+      ? await brotliAsync(payload, {
+          params: {
+            [zlibConstants.BROTLI_PARAM_QUALITY]: BROTLI_QUALITY,
+            [zlibConstants.BROTLI_PARAM_SIZE_HINT]: payload.length,
+          },
+        })
+      : await gzipAsync(payload, { level: GZIP_LEVEL });
+    timings.push(`compress;dur=${elapsedMs(compressStart)};desc="${encoding}"`);
+    res.setHeader('Content-Encoding', encoding);
+
+    res.setHeader('Server-Timing', timings.join(', '));
+    return new StreamableFile(compressed, { type: 'application/json; charset=utf-8', length: compressed.length });
+  }
+}
+
+function elapsedMs(start: bigint): string {
+  return (Number(process.hrtime.bigint() - start) / 1e6).toFixed(3);
+}
@@ -0,0 +1,111 @@
+import {
+  CallHandler,
+  ExecutionContext,
+  HttpException,
+  HttpStatus,
+  Injectable,
+  NestInterceptor,
+} from '@nestjs/common';
+import { Reflector } from '@nestjs/core';
+import { Observable, of, throwError } from 'rxjs';
+import { MetricsService } from '../../metrics/metrics.service';
+import { clientIp } from '../utils/client-ip.util';
+import { TokenBuckets } from '../utils/token-bucket.util';
+
+export const RATE_LIMIT_KEY = 'rateLimit';
+
+/**
+ * ip: client address (see clientIp). user: the authenticated user, else the Telegram user
+ * or email the request is about (body telegramUserId / update sender / email); the rule is
+ * skipped when there is none. route: every caller of the endpoint together.
+ */
+export type RateLimitSubject = 'ip' | 'user' | 'route';
+
+export interface RateLimitRule {
+  by: RateLimitSubject;
+  limit: number; // Burst size; refilled at limit / perSeconds tokens per second
+  perSeconds: number;
+}
+
+export interface RateLimitPolicy {
+  name: string; // Bucket namespace and metrics label
+  rules: RateLimitRule[];
+  // Over a per-user rule, answer 200 { ok: true, throttled: true } instead of 429 (webhooks
+  // whose sender would just retry). ip and route rules still answer 429, so a flood from
+  // elsewhere delays the sender's retries instead of losing its requests
+  drop?: boolean;
+}
+
+const PRUNE_INTERVAL_MS = 60 * 1000;
+
+// One set of buckets per process, shared by every rate-limited route
+const buckets = new TokenBuckets(parseInt(process.env.RATE_LIMIT_MAX_KEYS || '100000', 10));
+let pruneTimer: NodeJS.Timeout | null = null;
+
+/**
+ * Token-bucket limits declared with @RateLimit(). State is in memory, so each cluster
+ * worker enforces the limits on its own share of the traffic. RATE_LIMIT=off disables
+ * them and RATE_LIMIT_MULTIPLIER scales every limit (e.g. for load tests).
+ */
+@Injectable()
+export class RateLimitInterceptor implements NestInterceptor {
+  private readonly enabled = process.env.RATE_LIMIT !== 'off';
+  private readonly multiplier = Number(process.env.RATE_LIMIT_MULTIPLIER || 1);
+
+  constructor(
+    private reflector: Reflector,
+    private metrics: MetricsService,
+  ) {
+    if (!pruneTimer) {
+      pruneTimer = setInterval(() => buckets.prune(), PRUNE_INTERVAL_MS);
+      pruneTimer.unref();
+    }
+  }
+
+  intercept(context: ExecutionContext, next: CallHandler): Observable<any> {
+    const policy = this.reflector.get<RateLimitPolicy>(RATE_LIMIT_KEY, context.getHandler());
+    if (!this.enabled || !policy || context.getType() !== 'http') {
+      return next.handle();
+    }
+    const req = context.switchToHttp().getRequest();
+    const now = Date.now();
+
+    for (const rule of policy.rules) {
+      const subject = subjectOf(rule.by, req);
+      if (subject === null) {
+        continue;
+      }
+      const limit = rule.limit * this.multiplier;
+      const waitSeconds = buckets.take(`${policy.name}:${rule.by}:${subject}`, limit, limit / rule.perSeconds, now);
+      if (waitSeconds > 0) {
+        this.metrics.observeRateLimit(policy.name, rule.by);
+        if (policy.drop && rule.by === 'user') {
+          return of({ ok: true, throttled: true });
+        }
+        const retryAfter = Math.ceil(waitSeconds);
+        context.switchToHttp().getResponse().setHeader('Retry-After', String(retryAfter));
+        return throwError(() => new HttpException(
+          { statusCode: HttpStatus.TOO_MANY_REQUESTS, message: 'Demasiadas peticiones, inténtalo más tarde', retryAfter },
+          HttpStatus.TOO_MANY_REQUESTS,
+        ));
+      }
+    }
+
+    this.metrics.observeRateLimit(policy.name, null);
+    return next.handle();
+  }
+}
+
+function subjectOf(by: RateLimitSubject, req: any): string | null {
+  if (by === 'route') {
+    return '*';
+  }
+  if (by === 'ip') {
+    return clientIp(req);
+  }
+  const body = req.body || {};
+  const telegramSender = body.message?.from?.id ?? body.edited_message?.from?.id ?? body.callback_query?.from?.id
+    ?? body.my_chat_member?.from?.id ?? body.chat_member?.from?.id;
+  const user = req.user?.id ?? body.telegramUserId ?? telegramSender ?? body.email;
+  return user !== undefined && user !== null && user !== '' ? String(user).toLowerCase() : null;
+}
@@ -0,0 +1,41 @@
+import { ConsoleLogger, LogLevel } from '@nestjs/common';
+import { getRequestId } from '../context/request-context';
+
+/**
+ * Nest console logger that tags every line written while handling a request
+ * with its correlation id ("[req:<id>]").
+ * LOG_FORMAT=json writes one JSON object per line instead.
+ */
+export class AppLogger extends ConsoleLogger {
+  private readonly json = process.env.LOG_FORMAT === 'json';
+
+  protected formatContext(context: string): string {
+    const requestId = getRequestId();
+    return super.formatContext(context) + (requestId ? `[req:${requestId}] ` : '');
+  }
+
+  protected printMessages(
+    messages: unknown[],
+    context = '',
+    logLevel: LogLevel = 'log',
+    writeStreamType?: 'stdout' | 'stderr',
+  ) {
+    if (!this.json) {
+      return super.printMessages(messages, context, logLevel, writeStreamType);
+    }
+
+    const requestId = getRequestId();
+    for (const message of messages) {
+      const entry = {
+        ts: new Date().toISOString(),
+        level: logLevel,
+        pid: process.pid,
+        context: context || undefined,
+        requestId,
+        message: message instanceof Error ? message.message : message,
+        stack: message instanceof Error ? message.stack : undefined,
+      };
+      process[writeStreamType ?? 'stdout'].write(JSON.stringify(entry) + '\n');
+    }
+  }
+}
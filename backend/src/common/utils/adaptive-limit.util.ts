@@ -0,0 +1,90 @@
+export interface AdaptiveLimitOptions {
+  initial: number;
+  min: number;
+  max: number;
+  // Recent latency may exceed the long-term baseline by this factor before the limit shrinks
+  tolerance: number;
+  // Event-loop delay (ms) above which the limit backs off whatever the latency says
+  loopDelayTargetMs: number;
+}
+
+// Share of each new estimate blended into the limit, and into the latency baseline
+const LIMIT_SMOOTHING = 0.2;
+const BASELINE_SMOOTHING = 0.02;
+const LOOP_DELAY_BACKOFF = 0.8;
+const MIN_GRADIENT = 0.5;
+
+/**
+ * Concurrency limit that follows the latency gradient (the Gradient2 idea): each window
+ * compares its mean latency with a slowly moving baseline and shrinks the limit when
+ * requests take longer than `tolerance` times the baseline, i.e. when they queue. When
+ * latency is fine and the limit was actually reached, it grows by sqrt(limit). A blocked
+ * event loop delays every request but is seen first in the loop delay, so it backs the
+ * limit off directly.
+ */
+export class AdaptiveConcurrencyLimit {
+  private current: number;
+  private running = 0;
+  private baselineMs: number | null = null;
+  private windowSamples = 0;
+  private windowTotalMs = 0;
+  private windowPeak = 0;
+
+  constructor(private readonly options: AdaptiveLimitOptions) {
+    this.current = options.initial;
+  }
+
+  get limit(): number {
+    return Math.floor(this.current);
+  }
+
+  get inFlight(): number {
+    return this.running;
+  }
+
+  acquire() {
+    this.running += 1;
+    this.windowPeak = Math.max(this.windowPeak, this.running);
+  }
+
+  /**
+   * `latencyMs` is null for requests whose time says nothing about load (aborted ones)
+   */
+  release(latencyMs: number | null) {
+    this.running -= 1;
+    if (latencyMs !== null) {
+      this.windowSamples += 1;
+      this.windowTotalMs += latencyMs;
+    }
+  }
+
+  /**
+   * Close the current window and return the new limit. `loopDelayMs` is the event-loop
+   * delay seen during the window (a high percentile, not the mean).
+   */
+  update(loopDelayMs: number): number {
+    const { min, max, tolerance, loopDelayTargetMs } = this.options;
+    const samples = this.windowSamples;
+    const recentMs = samples ? this.windowTotalMs / samples : 0;
+    const reachedLimit = this.windowPeak >= this.current * 0.8;
+    this.windowSamples = 0;
+    this.windowTotalMs = 0;
+    this.windowPeak = this.running;
+
+    if (loopDelayMs > loopDelayTargetMs) {
+      this.current = Math.max(min, this.current * LOOP_DELAY_BACKOFF);
+      return this.limit;
+    }
+    if (!samples) {
+      return this.limit;
+    }
+
+    this.baselineMs = this.baselineMs === null
+      ? recentMs
+      : this.baselineMs * (1 - BASELINE_SMOOTHING) + recentMs * BASELINE_SMOOTHING;
+    const gradient = Math.max(MIN_GRADIENT, Math.min(1, (tolerance * this.baselineMs) / recentMs));
+    const estimate = this.current * gradient + (reachedLimit ? Math.sqrt(this.current) : 0);
+    this.current = Math.max(min, Math.min(max, this.current * (1 - LIMIT_SMOOTHING) + estimate * LIMIT_SMOOTHING));
+    return this.limit;
+  }
+}
@@ -0,0 +1,16 @@
+/**
+ * Address the nearest trusted proxy saw: the TRUSTED_PROXY_HOPS-th X-Forwarded-For entry
+ * counting from the right (default 1). Entries further left are set by the client and can
+ * be forged. With TRUSTED_PROXY_HOPS=0 (API exposed directly) the socket address is used.
+ */
+export function clientIp(req: any): string {
+  const hops = parseInt(process.env.TRUSTED_PROXY_HOPS ?? '1', 10);
+  const forwarded = req.headers?.['x-forwarded-for'];
+  if (hops > 0 && forwarded) {
+    const chain = String(forwarded).split(',').map((entry) => entry.trim()).filter(Boolean);
+    if (chain.length) {
+      return chain[Math.max(chain.length - hops, 0)];
+    }
+  }
+  return req.socket?.remoteAddress || req.ip || 'unknown';
+}
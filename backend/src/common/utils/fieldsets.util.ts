@@ -0,0 +1,51 @@
+import { BadRequestException } from '@nestjs/common';
+
+/**
+ * Parse a `fields=a,b,c` query parameter against the fields a resource exposes.
+ * Returns null when the parameter is absent (full representation).
+ */
+export function parseFields(raw: string | undefined, allowed: readonly string[]): string[] | null {
+  if (!raw) {
+    return null;
+  }
+  const requested = [...new Set(raw.split(',').map((field) => field.trim()).filter(Boolean))];
+  const unknown = requested.filter((field) => !allowed.includes(field));
+  if (unknown.length) {
+    throw new BadRequestException(`Unknown fields: ${unknown.join(', ')}`);
+  }
+  return requested;
+}
+
+/**
+ * Prisma `select` for a fieldset (the id is always included)
+ */
+export function toSelect(fields: readonly string[]): Record<string, true> {
+  return Object.fromEntries(['id', ...fields].map((field) => [field, true]));
+}
+
+/**
+ * Fieldset of a composite response such as `order.status,product.title,tipster`.
+ * A bare part name selects the whole part; parts that are not mentioned are left out.
+ * Returns null when the parameter is absent (every part, complete).
+ */
+export function parsePartFields(
+  raw: string | undefined,
+  parts: Record<string, readonly string[]>,
+): Record<string, string[] | 'all'> | null {
+  if (!raw) {
+    return null;
+  }
+  const selected: Record<string, string[] | 'all'> = {};
+  for (const item of raw.split(',').map((field) => field.trim()).filter(Boolean)) {
+    const [part, field] = item.split('.', 2);
+    if (!(part in parts) || (field && !parts[part].includes(field))) {
+      throw new BadRequestException(`Unknown field: ${item}`);
+    }
+    if (!field) {
+      selected[part] = 'all';
+    } else if (selected[part] !== 'all') {
+      selected[part] = [...((selected[part] as string[]) || []), field];
+    }
+  }
+  return selected;
+}
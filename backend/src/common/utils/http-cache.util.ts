@@ -0,0 +1,46 @@
+import { createHash } from 'crypto';
+import { Request, Response } from 'express';
+
+export interface HttpCachePolicy {
+  maxAge: number; // seconds browsers may reuse the response
+  sMaxAge?: number; // seconds shared caches (CDN) may reuse the response
+  staleWhileRevalidate?: number;
+}
+
+/**
+ * Build a strong ETag from the values that identify a representation
+ * (document ids, versions, updated_at timestamps...)
+ */
+export function buildEtag(...parts: Array<string | number | Date | null | undefined>): string {
+  const hash = createHash('sha1');
+  for (const part of parts) {
+    hash.update(part instanceof Date ? part.toISOString() : String(part ?? ''));
+    hash.update('|');
+  }
+  return `"${hash.digest('base64url')}"`;
+}
+
+/**
+ * Set ETag and Cache-Control headers and tell whether the client copy is still fresh.
+ * When it returns true the handler should return nothing: Express answers 304 Not Modified.
+ */
+export function applyHttpCache(
+  req: Request,
+  res: Response,
+  etag: string,
+  policy: HttpCachePolicy,
+): boolean {
+  const directives = ['public', `max-age=${policy.maxAge}`];
+  if (policy.sMaxAge !== undefined) {
+    directives.push(`s-maxage=${policy.sMaxAge}`);
+  }
+  if (policy.staleWhileRevalidate !== undefined) {
+    directives.push(`stale-while-revalidate=${policy.staleWhileRevalidate}`);
+  }
+
+  res.setHeader('ETag', etag);
+  res.setHeader('Cache-Control', directives.join(', '));
+
+  // req.fresh compares If-None-Match against the ETag we just set
+  return req.fresh;
+}
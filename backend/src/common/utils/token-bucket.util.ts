@@ -0,0 +1,65 @@
+interface Bucket {
+  tokens: number;
+  updatedAt: number;
+  fullAt: number; // When the bucket is back at capacity if nobody takes from it
+}
+
+/**
+ * Token buckets keyed by string, refilled lazily when touched (no timer per key).
+ * Buckets that have filled up again carry no state worth keeping and are dropped by prune().
+ */
+export class TokenBuckets {
+  private readonly buckets = new Map<string, Bucket>();
+
+  constructor(private readonly maxKeys: number) {}
+
+  get size(): number {
+    return this.buckets.size;
+  }
+
+  /**
+   * Take one token. Returns 0 when allowed, otherwise the seconds until a token is available.
+   */
+  take(key: string, capacity: number, refillPerSecond: number, now = Date.now()): number {
+    let bucket = this.buckets.get(key);
+    if (bucket) {
+      bucket.tokens = Math.min(capacity, bucket.tokens + ((now - bucket.updatedAt) / 1000) * refillPerSecond);
+    } else {
+      if (this.buckets.size >= this.maxKeys) {
+        this.evict(now);
+      }
+      bucket = { tokens: capacity, updatedAt: now, fullAt: now };
+      this.buckets.set(key, bucket);
+    }
+    bucket.updatedAt = now;
+
+    if (bucket.tokens < 1) {
+      return (1 - bucket.tokens) / refillPerSecond;
+    }
+    bucket.tokens -= 1;
+    bucket.fullAt = now + ((capacity - bucket.tokens) / refillPerSecond) * 1000;
+    return 0;
+  }
+
+  /**
+   * Forget buckets that are full again (indistinguishable from new ones)
+   */
+  prune(now = Date.now()): number {
+    let pruned = 0;
+    for (const [key, bucket] of this.buckets) {
+      if (bucket.fullAt <= now) {
+        this.buckets.delete(key);
+        pruned++;
+      }
+    }
+    return pruned;
+  }
+
+  private evict(now: number) {
+    if (this.prune(now) > 0) {
+      return;
+    }
+    // Every key is still throttled: drop the oldest rather than grow without bound
+    this.buckets.delete(this.buckets.keys().next().value);
+  }
+}
@@ -1,7 +1,16 @@
-import { Controller, Get } from '@nestjs/common';
+import { Controller, Get, ServiceUnavailableException } from '@nestjs/common';
 import { ApiTags, ApiOperation } from '@nestjs/swagger';
+import { readdirSync } from 'fs';
+import { monitorEventLoopDelay } from 'perf_hooks';
 import { PrismaService } from './prisma/prisma.service';
 
+// Event-loop delay histogram, reset on every /health/runtime read
+const eventLoopDelay = monitorEventLoopDelay({ resolution: 20 });
+eventLoopDelay.enable();
+
+const toMb = (bytes: number) => Math.round((bytes / 1024 / 1024) * 100) / 100;
+const nsToMs = (ns: number) => Math.round((ns / 1e6) * 100) / 100;
+
 @ApiTags('health')
 @Controller('health')
 export class HealthController {
@@ -29,4 +38,58 @@ export class HealthController {
       };
     }
   }
+
+  @Get('ready')
+  @ApiOperation({ summary: 'Readiness: 503 until the database pool is warmed up' })
+  ready() {
+    if (!this.prisma.isWarm) {
+      throw new ServiceUnavailableException({ status: 'starting', uptime: process.uptime() });
+    }
+    return { status: 'ready', uptime: process.uptime() };
+  }
+
+  @Get('runtime')
+  @ApiOperation({ summary: 'Process resource usage (memory, handles, event-loop delay)' })
+  runtime() {
+    const memory = process.memoryUsage();
+    const resources = process.getActiveResourcesInfo();
+    const handles: Record<string, number> = {};
+    for (const type of resources) {
+      handles[type] = (handles[type] || 0) + 1;
+    }
+
+    // Window since the previous read
+    const delay = {
+      mean_ms: nsToMs(eventLoopDelay.mean),
+      p50_ms: nsToMs(eventLoopDelay.percentile(50)),
+      p99_ms: nsToMs(eventLoopDelay.percentile(99)),
+      max_ms: nsToMs(eventLoopDelay.max),
+    };
+    eventLoopDelay.reset();
+
+    let openFds: number | null = null;
+    try {
+      openFds = readdirSync('/proc/self/fd').length;
+    } catch {
+      // Not available outside Linux
+    }
+
+    return {
+      pid: process.pid,
+      timestamp: new Date().toISOString(),
+      uptime: process.uptime(),
+      memory: {
+        rss_mb: toMb(memory.rss),
+        heap_used_mb: toMb(memory.heapUsed),
+        heap_total_mb: toMb(memory.heapTotal),
+        external_mb: toMb(memory.external),
+        array_buffers_mb: toMb(memory.arrayBuffers),
+      },
+      active_resources: resources.length,
+      active_handles: handles,
+      sockets: (handles.TCPSocketWrap || 0) + (handles.TLSWrap || 0),
+      open_fds: openFds,
+      event_loop_delay: delay,
+    };
+  }
 }
@@ -1,8 +1,13 @@
-import { Controller, Get } from '@nestjs/common';
+import { Controller, Get, Req, Res } from '@nestjs/common';
 import { ApiTags } from '@nestjs/swagger';
+import { Request, Response } from 'express';
 import { Public } from '../common/decorators/public.decorator';
+import { applyHttpCache, HttpCachePolicy } from '../common/utils/http-cache.util';
 import { HousesService } from './houses.service';
 
+// Houses change a few times a year: let browsers and the CDN keep them for minutes
+const HOUSES_CACHE: HttpCachePolicy = { maxAge: 300, sMaxAge: 600, staleWhileRevalidate: 3600 };
+
 @ApiTags('houses')
 @Controller('houses')
 export class HousesController {
@@ -10,7 +15,11 @@ export class HousesController {
 
   @Public()
   @Get()
-  async findAll() {
-    return this.housesService.findAll();
+  async findAll(@Req() req: Request, @Res({ passthrough: true }) res: Response) {
+    const { etag, houses } = await this.housesService.findAllWithEtag();
+    if (applyHttpCache(req, res, etag, HOUSES_CACHE)) {
+      return; // 304 Not Modified
+    }
+    return houses;
   }
 }
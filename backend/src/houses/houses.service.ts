@@ -1,5 +1,6 @@
 import { Injectable } from '@nestjs/common';
 import { PrismaService } from '../prisma/prisma.service';
+import { buildEtag } from '../common/utils/http-cache.util';
 
 @Injectable()
 export class HousesService {
@@ -10,4 +11,16 @@ export class HousesService {
       where: { status: 'ACTIVE' },
     });
   }
+
+  /**
+   * Active houses plus a strong ETag derived from their ids and updated_at
+   */
+  async findAllWithEtag() {
+    const houses = await this.findAll();
+    const etag = buildEtag(
+      'houses',
+      ...houses.map((house) => `${house.id}@${house.updatedAt.toISOString()}`),
+    );
+    return { etag, houses };
+  }
 }
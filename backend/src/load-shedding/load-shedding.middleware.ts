@@ -0,0 +1,44 @@
+import { HttpException, HttpStatus, Injectable, NestMiddleware } from '@nestjs/common';
+import { NextFunction, Request, Response } from 'express';
+import { LoadSheddingService } from './load-shedding.service';
+import { routePriority } from './route-priority';
+
+/**
+ * Admit or shed every request before guards and handlers run, so a rejected request
+ * costs no authentication or database work. The slot is held until the response is
+ * finished (or the client goes away).
+ */
+@Injectable()
+export class LoadSheddingMiddleware implements NestMiddleware {
+  constructor(private shedder: LoadSheddingService) {}
+
+  use(req: Request, res: Response, next: NextFunction) {
+    const priority = routePriority(req.originalUrl);
+    if (priority === null) {
+      return next();
+    }
+    if (!this.shedder.tryAcquire(priority)) {
+      const retryAfter = this.shedder.retryAfterSeconds(priority);
+      res.setHeader('Retry-After', String(retryAfter));
+      throw new HttpException(
+        { statusCode: HttpStatus.SERVICE_UNAVAILABLE, message: 'Servicio saturado, inténtalo más tarde', retryAfter },
+        HttpStatus.SERVICE_UNAVAILABLE,
+      );
+    }
+
+    const started = process.hrtime.bigint();
+    let released = false;
+    const release = () => {
+      if (released) {
+        return;
+      }
+      released = true;
+      // Aborted requests say nothing about how long the work takes
+      const finished = res.writableFinished;
+      this.shedder.release(finished ? Number(process.hrtime.bigint() - started) / 1e6 : null);
+    };
+    res.on('finish', release);
+    res.on('close', release);
+    next();
+  }
+}
@@ -0,0 +1,13 @@
+import { MiddlewareConsumer, Module, NestModule } from '@nestjs/common';
+import { LoadSheddingMiddleware } from './load-shedding.middleware';
+import { LoadSheddingService } from './load-shedding.service';
+
+@Module({
+  providers: [LoadSheddingService],
+  exports: [LoadSheddingService],
+})
+export class LoadSheddingModule implements NestModule {
+  configure(consumer: MiddlewareConsumer) {
+    consumer.apply(LoadSheddingMiddleware).forRoutes('*');
+  }
+}
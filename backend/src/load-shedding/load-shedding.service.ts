@@ -0,0 +1,96 @@
+import { Injectable, Logger, OnModuleDestroy, OnModuleInit } from '@nestjs/common';
+import { ConfigService } from '@nestjs/config';
+import { IntervalHistogram, monitorEventLoopDelay } from 'perf_hooks';
+import { AdaptiveConcurrencyLimit } from '../common/utils/adaptive-limit.util';
+import { MetricsService } from '../metrics/metrics.service';
+import { RoutePriority } from './route-priority';
+
+// Share of the limit each priority may fill: dashboards are shed first, payments last
+const ADMISSION_SHARE: Record<RoutePriority, number> = { critical: 1, normal: 0.8, low: 0.5 };
+const RETRY_AFTER_SECONDS: Record<RoutePriority, number> = { critical: 1, normal: 2, low: 5 };
+
+/**
+ * Adaptive concurrency limit for the worker, recomputed every LOAD_SHED_WINDOW_MS (500)
+ * from request latency and the event-loop delay p99 (LOAD_SHED_LOOP_DELAY_MS, 100).
+ * A request is admitted while the requests in flight stay under its priority's share
+ * of the limit, so low-priority routes are rejected well before payments are.
+ * LOAD_SHEDDING=off admits everything (the limit is still computed and exported).
+ */
+@Injectable()
+export class LoadSheddingService implements OnModuleInit, OnModuleDestroy {
+  private readonly logger = new Logger(LoadSheddingService.name);
+  private readonly enabled: boolean;
+  private readonly windowMs: number;
+  private readonly limiter: AdaptiveConcurrencyLimit;
+  private loopDelay?: IntervalHistogram;
+  private timer?: NodeJS.Timeout;
+  private shedding = false;
+
+  constructor(
+    private config: ConfigService,
+    private metrics: MetricsService,
+  ) {
+    this.enabled = this.config.get('LOAD_SHEDDING') !== 'off';
+    this.windowMs = Number(this.config.get('LOAD_SHED_WINDOW_MS') || 500);
+    this.limiter = new AdaptiveConcurrencyLimit({
+      initial: Number(this.config.get('LOAD_SHED_INITIAL_LIMIT') || 100),
+      min: Number(this.config.get('LOAD_SHED_MIN_LIMIT') || 10),
+      max: Number(this.config.get('LOAD_SHED_MAX_LIMIT') || 1000),
+      tolerance: Number(this.config.get('LOAD_SHED_TOLERANCE') || 2),
+      loopDelayTargetMs: Number(this.config.get('LOAD_SHED_LOOP_DELAY_MS') || 100),
+    });
+  }
+
+  onModuleInit() {
+    this.loopDelay = monitorEventLoopDelay({ resolution: 10 });
+    this.loopDelay.enable();
+    this.timer = setInterval(() => this.update(), this.windowMs);
+    this.timer.unref();
+  }
+
+  onModuleDestroy() {
+    this.loopDelay?.disable();
+    if (this.timer) {
+      clearInterval(this.timer);
+    }
+  }
+
+  /**
+   * Take a slot for a request of this priority. Returns false (and counts it as shed)
+   * when it must be rejected; otherwise release() must be called once it finishes.
+   */
+  tryAcquire(priority: RoutePriority): boolean {
+    if (this.enabled && this.limiter.inFlight >= this.limiter.limit * ADMISSION_SHARE[priority]) {
+      this.metrics.observeLoadShed(priority);
+      return false;
+    }
+    this.limiter.acquire();
+    return true;
+  }
+
+  release(latencyMs: number | null) {
+    this.limiter.release(latencyMs);
+  }
+
+  retryAfterSeconds(priority: RoutePriority): number {
+    return RETRY_AFTER_SECONDS[priority];
+  }
+
+  private update() {
+    // percentile() is in nanoseconds; NaN until the first sample
+    const loopDelayMs = (this.loopDelay?.percentile(99) || 0) / 1e6;
+    this.loopDelay?.reset();
+    const limit = this.limiter.update(loopDelayMs);
+    this.metrics.observeConcurrency(limit, this.limiter.inFlight);
+
+    const saturated = this.limiter.inFlight >= limit * ADMISSION_SHARE.low;
+    if (this.enabled && saturated !== this.shedding) {
+      this.shedding = saturated;
+      if (saturated) {
+        this.logger.warn(`Shedding low-priority routes: ${this.limiter.inFlight} in flight, limit ${limit}`);
+      } else {
+        this.logger.log(`Load back under the limit (${limit}): admitting every route`);
+      }
+    }
+  }
+}
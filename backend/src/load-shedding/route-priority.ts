@@ -0,0 +1,46 @@
+/**
+ * critical: money and bot traffic that must keep working during a launch.
+ * low: tipster dashboards, which can be retried a few seconds later.
+ * normal: everything else.
+ */
+export type RoutePriority = 'critical' | 'normal' | 'low';
+
+// Paths without the /api prefix or query string
+const CRITICAL_ROUTES = [
+  /^\/checkout\/session$/,
+  /^\/checkout\/webhook\/(stripe|redsys)$/,
+  /^\/checkout\/complete-payment$/,
+  /^\/telegram\/webhook$/,
+  /^\/webhooks\/payments\/confirm$/,
+];
+
+const LOW_ROUTES = [
+  /^\/orders\/(stats|sales)$/,
+  /^\/referrals\/(metrics|links|commissions)$/,
+  /^\/products\/my$/,
+];
+
+// Never limited: probes and metrics must answer under overload, and requests that wait
+// for an order status change (SSE, long-poll) are parked rather than working
+const EXEMPT_ROUTES = [
+  /^\/health(\/|$)/,
+  /^\/metrics$/,
+  /^\/checkout\/order\/[^/]+\/(events|status)$/,
+];
+
+/**
+ * Priority of a request path (with or without the /api prefix), or null when it is exempt
+ */
+export function routePriority(url: string): RoutePriority | null {
+  const path = url.split('?', 1)[0].replace(/^\/api(?=\/|$)/, '').replace(/\/+$/, '') || '/';
+  if (EXEMPT_ROUTES.some((route) => route.test(path))) {
+    return null;
+  }
+  if (CRITICAL_ROUTES.some((route) => route.test(path))) {
+    return 'critical';
+  }
+  if (LOW_ROUTES.some((route) => route.test(path))) {
+    return 'low';
+  }
+  return 'normal';
+}
@@ -1,14 +1,20 @@
 import { NestFactory } from '@nestjs/core';
 import { AppModule } from './app.module';
 import { ValidationPipe } from '@nestjs/common';
-import { DocumentBuilder, SwaggerModule } from '@nestjs/swagger';
 import * as cookieParser from 'cookie-parser';
 import helmet from 'helmet';
+import { AppLogger } from './common/logger/app.logger';
+import { setupSwagger } from './swagger';
+import { runClustered } from './cluster';
+import { workerIndex } from './common/cluster/worker-role';
+import { CompressionInterceptor } from './common/interceptors/compression.interceptor';
 
 async function bootstrap() {
   const app = await NestFactory.create(AppModule, {
     rawBody: true, // Enable raw body for Stripe webhooks
+    bufferLogs: true,
   });
+  app.useLogger(new AppLogger());
 
   // Security
   app.use(helmet());
@@ -19,8 +25,8 @@ async function bootstrap() {
     origin: true, // Allow all origins
     credentials: true,
     methods: ['GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'],
-    allowedHeaders: ['Content-Type', 'Authorization', 'X-CSRF-Token', 'Accept'],
-    exposedHeaders: ['Content-Length', 'Content-Type'],
+    allowedHeaders: ['Content-Type', 'Authorization', 'X-CSRF-Token', 'Accept', 'If-None-Match', 'X-Request-Id'],
+    exposedHeaders: ['Content-Length', 'Content-Type', 'ETag', 'X-Request-Id', 'Server-Timing'],
     preflightContinue: false,
     optionsSuccessStatus: 204,
   });
@@ -37,39 +43,20 @@ async function bootstrap() {
     }),
   );
 
-  // Swagger/OpenAPI
-  const config = new DocumentBuilder()
-    .setTitle('Antia API')
-    .setDescription('API completa para plataforma de pronósticos deportivos')
-    .setVersion('1.0')
-    .addBearerAuth()
-    .addCookieAuth('access_token')
-    .addTag('auth', 'Autenticación y registro')
-    .addTag('users', 'Gestión de usuarios')
-    .addTag('tipsters', 'Panel de Tipster')
-    .addTag('clients', 'Panel de Cliente')
-    .addTag('products', 'Productos y servicios')
-    .addTag('orders', 'Órdenes y pagos')
-    .addTag('referrals', 'Sistema de referidos')
-    .addTag('commissions', 'Comisiones y ganancias')
-    .addTag('payouts', 'Liquidaciones')
-    .addTag('houses', 'Casas de apuestas')
-    .addTag('webhooks', 'Webhooks externos')
-    .addTag('tickets', 'Soporte y tickets')
-    .addTag('admin', 'Panel de administración')
-    .build();
+  // JSON serialization + gzip/br negotiation (COMPRESSION, COMPRESSION_THRESHOLD_BYTES)
+  app.useGlobalInterceptors(new CompressionInterceptor());
 
-  const document = SwaggerModule.createDocument(app, config);
-  SwaggerModule.setup('api/docs', app, document);
+  // Swagger/OpenAPI (built on first use unless SWAGGER_MODE=eager)
+  setupSwagger(app);
 
   // Start server
   const port = process.env.BACKEND_PORT || 8001;
   await app.listen(port, '0.0.0.0');
   
-  console.log(`\n🚀 Antia Backend API running on: http://localhost:${port}/api`);
+  console.log(`\n🚀 Antia Backend API running on: http://localhost:${port}/api (worker ${workerIndex()}, listening ${Math.round(process.uptime() * 1000)}ms after start)`);
   console.log(`📚 Swagger docs available at: http://localhost:${port}/api/docs`);
   console.log(`🗄️  Database: ${process.env.DATABASE_URL?.split('@')[1] || 'PostgreSQL'}`);
-  console.log(`📦 Redis: ${process.env.REDIS_URL || 'localhost:6379'}`);
+  console.log(`📦 Redis (shared cache): ${process.env.REDIS_URL?.replace(/\/\/[^@]*@/, '//') || 'off'}`);
 }
 
-bootstrap();
+runClustered(bootstrap);
@@ -0,0 +1,25 @@
+import { Injectable, NestMiddleware } from '@nestjs/common';
+import { NextFunction, Request, Response } from 'express';
+import { MetricsService } from './metrics.service';
+
+/**
+ * Count and time every request. Runs before guards so 401/404 are included;
+ * the route pattern (not the raw URL) is read once the response is finished.
+ */
+@Injectable()
+export class HttpMetricsMiddleware implements NestMiddleware {
+  constructor(private metrics: MetricsService) {}
+
+  use(req: Request, res: Response, next: NextFunction) {
+    const started = process.hrtime.bigint();
+    res.on('finish', () => {
+      const route = req.route ? `${req.baseUrl}${req.route.path}` : 'unmatched';
+      if (route.endsWith('/metrics')) {
+        return;
+      }
+      const seconds = Number(process.hrtime.bigint() - started) / 1e9;
+      this.metrics.observeHttpRequest(req.method, route, res.statusCode, seconds);
+    });
+    next();
+  }
+}
@@ -0,0 +1,249 @@
+import { Injectable, Logger, OnModuleDestroy, OnModuleInit } from '@nestjs/common';
+import { ConfigService } from '@nestjs/config';
+import { cpus } from 'os';
+import { Counter, Gauge, Histogram, Registry, collectDefaultMetrics } from 'prom-client';
+import { PrismaService } from '../prisma/prisma.service';
+import { workerIndex } from '../common/cluster/worker-role';
+import { recordTiming } from '../common/context/request-context';
+
+const LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10];
+const LOOP_DELAY_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1];
+const LOOP_PROBE_INTERVAL_MS = 100;
+
+export type OutboundTarget = 'telegram' | 'stripe' | 'geolocation';
+
+/**
+ * Prometheus registry for the API: default Node.js metrics (heap, GC pauses,
+ * handles) plus HTTP routes, Prisma saturation, event-loop delay and outbound calls
+ */
+@Injectable()
+export class MetricsService implements OnModuleInit, OnModuleDestroy {
+  private readonly logger = new Logger(MetricsService.name);
+  readonly registry = new Registry();
+  private loopProbe?: NodeJS.Timeout;
+
+  private readonly httpRequests = new Counter({
+    name: 'antia_http_requests_total',
+    help: 'HTTP requests by route and status',
+    labelNames: ['method', 'route', 'status_code'],
+    registers: [this.registry],
+  });
+
+  private readonly httpDuration = new Histogram({
+    name: 'antia_http_request_duration_seconds',
+    help: 'HTTP request latency by route',
+    labelNames: ['method', 'route', 'status_code'],
+    buckets: LATENCY_BUCKETS,
+    registers: [this.registry],
+  });
+
+  private readonly loopDelay = new Histogram({
+    name: 'antia_event_loop_delay_seconds',
+    help: `Lateness of a ${LOOP_PROBE_INTERVAL_MS}ms timer, i.e. time the event loop was blocked`,
+    buckets: LOOP_DELAY_BUCKETS,
+    registers: [this.registry],
+  });
+
+  private readonly prismaInFlight = new Gauge({
+    name: 'antia_prisma_queries_in_flight',
+    help: 'Prisma queries currently waiting for or holding a pool connection',
+    registers: [this.registry],
+  });
+
+  private readonly prismaPoolLimit = new Gauge({
+    name: 'antia_prisma_pool_limit',
+    help: 'Configured Prisma connection pool size',
+    registers: [this.registry],
+  });
+
+  private readonly prismaDuration = new Histogram({
+    name: 'antia_prisma_query_duration_seconds',
+    help: 'Prisma query latency by model and action',
+    labelNames: ['model', 'action'],
+    buckets: LATENCY_BUCKETS,
+    registers: [this.registry],
+  });
+
+  private readonly outboundDuration = new Histogram({
+    name: 'antia_outbound_request_duration_seconds',
+    help: 'Latency of calls to Telegram, Stripe and the geolocation API',
+    labelNames: ['target', 'operation', 'outcome'],
+    buckets: LATENCY_BUCKETS,
+    registers: [this.registry],
+  });
+
+  private readonly cacheLookups = new Counter({
+    name: 'antia_cache_lookups_total',
+    help: 'In-process cache lookups by cache and result (hit/miss)',
+    labelNames: ['cache', 'result'],
+    registers: [this.registry],
+  });
+
+  private readonly cacheTierLookups = new Counter({
+    name: 'antia_cache_tier_lookups_total',
+    help: 'Shared cache lookups by cache, tier (local/shared) and result (hit/miss/error)',
+    labelNames: ['cache', 'tier', 'result'],
+    registers: [this.registry],
+  });
+
+  private readonly cacheInvalidations = new Counter({
+    name: 'antia_cache_invalidations_total',
+    help: 'Shared cache invalidations by cache and source (local / remote, from another node)',
+    labelNames: ['cache', 'source'],
+    registers: [this.registry],
+  });
+
+  private readonly rateLimitDecisions = new Counter({
+    name: 'antia_rate_limit_decisions_total',
+    help: 'Requests checked against a rate limit, by limit and result (allowed / throttled_<rule>)',
+    labelNames: ['limit', 'result'],
+    registers: [this.registry],
+  });
+
+  private readonly loadShed = new Counter({
+    name: 'antia_load_shed_total',
+    help: 'Requests rejected with 503 by the adaptive concurrency limit, by route priority',
+    labelNames: ['priority'],
+    registers: [this.registry],
+  });
+
+  private readonly concurrencyLimit = new Gauge({
+    name: 'antia_concurrency_limit',
+    help: 'Adaptive concurrency limit of the worker',
+    registers: [this.registry],
+  });
+
+  private readonly concurrencyInFlight = new Gauge({
+    name: 'antia_concurrency_in_flight',
+    help: 'Requests of the worker counted against the adaptive concurrency limit',
+    registers: [this.registry],
+  });
+
+  private readonly inviteLinkClaims = new Histogram({
+    name: 'antia_invite_link_claim_seconds',
+    help: 'Time to hand a buyer a single-use invite link, by source (pool/minted/existing)',
+    labelNames: ['source'],
+    buckets: LATENCY_BUCKETS,
+    registers: [this.registry],
+  });
+
+  constructor(
+    private prisma: PrismaService,
+    private config: ConfigService,
+  ) {
+    // Clustered, each worker serves its own registry; the label tells the series apart
+    this.registry.setDefaultLabels({ worker: String(workerIndex()) });
+    collectDefaultMetrics({ register: this.registry, eventLoopMonitoringPrecision: 10 });
+  }
+
+  onModuleInit() {
+    this.prismaPoolLimit.set(this.resolvePoolLimit());
+
+    this.prisma.$use(async (params, next) => {
+      const stopTimer = this.prismaDuration.startTimer({
+        model: params.model ?? 'raw',
+        action: params.action,
+      });
+      this.prismaInFlight.inc();
+      try {
+        return await next(params);
+      } finally {
+        this.prismaInFlight.dec();
+        recordTiming('db', stopTimer() * 1000);
+      }
+    });
+
+    // Un timer que llega tarde = event loop bloqueado
+    let expected = Date.now() + LOOP_PROBE_INTERVAL_MS;
+    this.loopProbe = setInterval(() => {
+      const now = Date.now();
+      this.loopDelay.observe(Math.max(0, now - expected) / 1000);
+      expected = now + LOOP_PROBE_INTERVAL_MS;
+    }, LOOP_PROBE_INTERVAL_MS).unref();
+
+    this.logger.log('📈 Metrics collection enabled');
+  }
+
+  onModuleDestroy() {
+    if (this.loopProbe) {
+      clearInterval(this.loopProbe);
+    }
+  }
+
+  observeHttpRequest(method: string, route: string, statusCode: number, seconds: number) {
+    const labels = { method, route, status_code: String(statusCode) };
+    this.httpRequests.inc(labels);
+    this.httpDuration.observe(labels, seconds);
+  }
+
+  observeOutbound(target: OutboundTarget, operation: string, outcome: 'ok' | 'error', seconds: number) {
+    this.outboundDuration.observe({ target, operation, outcome }, seconds);
+    recordTiming(target, seconds * 1000);
+  }
+
+  observeCacheLookup(cache: string, hit: boolean) {
+    this.cacheLookups.inc({ cache, result: hit ? 'hit' : 'miss' });
+  }
+
+  observeCacheTierLookup(cache: string, tier: 'local' | 'shared', result: 'hit' | 'miss' | 'error') {
+    this.cacheTierLookups.inc({ cache, tier, result });
+  }
+
+  observeCacheInvalidation(cache: string, source: 'local' | 'remote') {
+    this.cacheInvalidations.inc({ cache, source });
+  }
+
+  /**
+   * `throttledBy` is the rule that rejected the request (null when it was allowed)
+   */
+  observeRateLimit(limit: string, throttledBy: string | null) {
+    this.rateLimitDecisions.inc({ limit, result: throttledBy ? `throttled_${throttledBy}` : 'allowed' });
+  }
+
+  observeLoadShed(priority: string) {
+    this.loadShed.inc({ priority });
+  }
+
+  observeConcurrency(limit: number, inFlight: number) {
+    this.concurrencyLimit.set(limit);
+    this.concurrencyInFlight.set(inFlight);
+  }
+
+  observeInviteLinkClaim(source: string, seconds: number) {
+    this.inviteLinkClaims.observe({ source }, seconds);
+  }
+
+  /**
+   * Time an outbound call, recording failures too
+   */
+  async timeOutbound<T>(target: OutboundTarget, operation: string, call: () => Promise<T>): Promise<T> {
+    const started = process.hrtime.bigint();
+    const elapsed = () => Number(process.hrtime.bigint() - started) / 1e9;
+    try {
+      const result = await call();
+      this.observeOutbound(target, operation, 'ok', elapsed());
+      return result;
+    } catch (error) {
+      this.observeOutbound(target, operation, 'error', elapsed());
+      throw error;
+    }
+  }
+
+  async render(): Promise<string> {
+    return this.registry.metrics();
+  }
+
+  get contentType(): string {
+    return this.registry.contentType;
+  }
+
+  /**
+   * Pool size from DATABASE_URL (connection_limit / maxPoolSize),
+   * otherwise Prisma's default of num_cpus * 2 + 1
+   */
+  private resolvePoolLimit(): number {
+    const url = this.config.get<string>('DATABASE_URL') || '';
+    const match = url.match(/[?&](?:connection_limit|maxPoolSize)=(\d+)/);
+    return match ? parseInt(match[1], 10) : cpus().length * 2 + 1;
+  }
+}
@@ -0,0 +1,434 @@
+import { Injectable, Logger, OnModuleInit } from '@nestjs/common';
+import { randomBytes } from 'crypto';
+import { PrismaService } from '../prisma/prisma.service';
+
+export interface OrderRecord {
+  id: string;
+  productId: string;
+  tipsterId?: string;
+  amountCents?: number;
+  currency?: string;
+  status: string;
+  emailBackup?: string;
+  phoneBackup?: string;
+  telegramUserId?: string;
+  telegramUsername?: string;
+  paymentProvider?: string;
+  paymentMethod?: string;
+  providerOrderId?: string;
+  paidAt?: any;
+  createdAt?: any;
+}
+
+export interface NewOrder {
+  id?: string; // Pre-generated with newId() when something (e.g. a seat hold) is keyed by it
+  productId: string;
+  tipsterId?: string;
+  amountCents?: number;
+  currency?: string;
+  email?: string;
+  phone?: string;
+  telegramUserId?: string;
+  telegramUsername?: string;
+  isGuest?: boolean;
+  paymentProvider?: string;
+  // Geolocation / commission (checkout with gateway detection)
+  country?: string;
+  countryName?: string;
+  commissionCents?: number;
+  commissionRate?: number;
+}
+
+export interface OrderChange {
+  id: string;
+  set: Record<string, any>;
+  expectStatus?: string; // Only apply while the order is still in this status
+}
+
+export interface PaymentDetails {
+  provider?: string; // Kept as created when omitted
+  providerOrderId?: string;
+  method?: string;
+  extra?: Record<string, any>;
+}
+
+/**
+ * Fields each use case reads, so hot paths (status polling, notifications)
+ * don't pull the whole document
+ */
+export const ORDER_PROJECTIONS = {
+  status: { status: 1, product_id: 1, telegram_user_id: 1 },
+  notification: {
+    status: 1,
+    product_id: 1,
+    tipster_id: 1,
+    amount_cents: 1,
+    currency: 1,
+    email_backup: 1,
+    telegram_user_id: 1,
+    telegram_username: 1,
+  },
+  detail: {
+    product_id: 1,
+    tipster_id: 1,
+    amount_cents: 1,
+    currency: 1,
+    status: 1,
+    email_backup: 1,
+    phone_backup: 1,
+    telegram_user_id: 1,
+    telegram_username: 1,
+    payment_provider: 1,
+    provider_order_id: 1,
+    created_at: 1,
+  },
+  purchases: {
+    product_id: 1,
+    amount_cents: 1,
+    currency: 1,
+    status: 1,
+    paid_at: 1,
+    created_at: 1,
+  },
+  sales: {
+    product_id: 1,
+    amount_cents: 1,
+    currency: 1,
+    status: 1,
+    email_backup: 1,
+    telegram_username: 1,
+    payment_provider: 1,
+    paid_at: 1,
+    created_at: 1,
+  },
+} as const;
+
+export type OrderView = keyof typeof ORDER_PROJECTIONS;
+
+/**
+ * OrderRecord field -> document field, for client-chosen fieldsets (?fields=)
+ */
+export const ORDER_FIELDS: Record<string, string> = {
+  productId: 'product_id',
+  tipsterId: 'tipster_id',
+  amountCents: 'amount_cents',
+  currency: 'currency',
+  status: 'status',
+  emailBackup: 'email_backup',
+  phoneBackup: 'phone_backup',
+  telegramUserId: 'telegram_user_id',
+  telegramUsername: 'telegram_username',
+  paymentProvider: 'payment_provider',
+  paymentMethod: 'payment_method',
+  providerOrderId: 'provider_order_id',
+  paidAt: 'paid_at',
+  createdAt: 'created_at',
+};
+
+// Statuses of an order the buyer has paid for
+export const PURCHASED_STATUSES = ['PAGADA', 'ACCESS_GRANTED'];
+
+// Max statements per update command
+const UPDATE_BATCH_SIZE = 500;
+
+// ObjectId layout: 4-byte timestamp, 5-byte per-process random, 3-byte counter
+const PROCESS_UNIQUE = randomBytes(5);
+let idCounter = randomBytes(3).readUIntBE(0, 3);
+
+/**
+ * Single access point for the orders collection.
+ *
+ * Orders are written with raw commands (snake_case fields, like the rest of the
+ * payment code) so this is the only place that knows the document layout.
+ */
+@Injectable()
+export class OrderRepository implements OnModuleInit {
+  private readonly logger = new Logger(OrderRepository.name);
+  private readonly paidListeners: Array<(orderId: string) => void> = [];
+  private readonly statusListeners: Array<(orderId: string, status: string) => void> = [];
+
+  constructor(private prisma: PrismaService) {}
+
+  async onModuleInit() {
+    try {
+      await this.prisma.$runCommandRaw({
+        createIndexes: 'orders',
+        indexes: [
+          { key: { tipster_id: 1, status: 1, created_at: -1 }, name: 'tipster_id_status_created_at' },
+          // Bot lookups (/mis_compras, purchase summaries)
+          { key: { telegram_user_id: 1, created_at: -1 }, name: 'telegram_user_id_created_at' },
+          // Checkout status by Stripe session id
+          { key: { provider_order_id: 1 }, name: 'provider_order_id', sparse: true },
+        ],
+      });
+    } catch (error) {
+      this.logger.warn(`Could not ensure orders indexes: ${error.message}`);
+    }
+  }
+
+  /**
+   * New ObjectId hex string (same layout as the MongoDB driver)
+   */
+  newId(): string {
+    const id = Buffer.alloc(12);
+    id.writeUInt32BE(Math.floor(Date.now() / 1000), 0);
+    PROCESS_UNIQUE.copy(id, 4);
+    idCounter = (idCounter + 1) % 0x1000000;
+    id.writeUIntBE(idCounter, 9, 3);
+    return id.toString('hex');
+  }
+
+  /**
+   * Insert a PENDING order in one round trip and return its id
+   */
+  async create(data: NewOrder): Promise<string> {
+    const id = data.id || this.newId();
+    const now = { $date: new Date().toISOString() };
+
+    const document: Record<string, any> = {
+      _id: { $oid: id },
+      product_id: data.productId,
+      tipster_id: data.tipsterId ?? null,
+      amount_cents: data.amountCents ?? null,
+      currency: data.currency || 'EUR',
+      email_backup: data.email || null,
+      phone_backup: data.phone || null,
+      telegram_user_id: data.telegramUserId || null,
+      telegram_username: data.telegramUsername || null,
+      status: 'PENDING',
+      payment_provider: data.paymentProvider || null,
+      meta: { isGuest: data.isGuest ?? false },
+      created_at: now,
+      updated_at: now,
+    };
+    if (data.country) {
+      document.detected_country = data.country;
+      document.detected_country_name = data.countryName;
+    }
+    if (data.commissionCents !== undefined) {
+      document.commission_cents = data.commissionCents;
+      document.commission_rate = data.commissionRate;
+    }
+
+    await this.prisma.$runCommandRaw({ insert: 'orders', documents: [document] });
+    return id;
+  }
+
+  /**
+   * `view` is one of ORDER_PROJECTIONS or a list of OrderRecord fields (see ORDER_FIELDS)
+   */
+  async findById(orderId: string, view: OrderView | string[] = 'detail'): Promise<OrderRecord | null> {
+    const projection = Array.isArray(view)
+      ? Object.fromEntries([['_id', 1], ...view.map((field) => [ORDER_FIELDS[field], 1])])
+      : ORDER_PROJECTIONS[view];
+    const result = await this.prisma.$runCommandRaw({
+      find: 'orders',
+      filter: { _id: this.idFilter(orderId) },
+      projection,
+      limit: 1,
+    }) as any;
+
+    const doc = result.cursor?.firstBatch?.[0];
+    return doc ? this.toOrder(doc) : null;
+  }
+
+  async findByProviderOrderId(providerOrderId: string, view: OrderView = 'status'): Promise<OrderRecord | null> {
+    const result = await this.prisma.$runCommandRaw({
+      find: 'orders',
+      filter: { provider_order_id: providerOrderId },
+      projection: ORDER_PROJECTIONS[view],
+      limit: 1,
+    }) as any;
+
+    const doc = result.cursor?.firstBatch?.[0];
+    return doc ? this.toOrder(doc) : null;
+  }
+
+  /**
+   * Current status of many orders in one query (ids that don't exist are left out)
+   */
+  async findStatuses(orderIds: string[]): Promise<Map<string, string>> {
+    const result = await this.prisma.$runCommandRaw({
+      find: 'orders',
+      filter: { _id: { $in: orderIds.map((id) => this.idFilter(id)) } },
+      projection: { status: 1 },
+      batchSize: orderIds.length || 1,
+    }) as any;
+
+    return new Map(
+      (result.cursor?.firstBatch || []).map((doc: any) => [this.toOrder(doc).id, doc.status as string]),
+    );
+  }
+
+  async findPaidByTipster(tipsterId: string, limit = 100): Promise<OrderRecord[]> {
+    const result = await this.prisma.$runCommandRaw({
+      find: 'orders',
+      filter: { tipster_id: tipsterId, status: 'PAGADA' },
+      projection: ORDER_PROJECTIONS.sales,
+      sort: { created_at: -1 },
+      limit,
+    }) as any;
+
+    return (result.cursor?.firstBatch || []).map((doc: any) => this.toOrder(doc));
+  }
+
+  /**
+   * Orders paid by a Telegram user, newest first
+   */
+  async findPurchasesByTelegramUser(telegramUserId: string, limit = 200): Promise<OrderRecord[]> {
+    const result = await this.prisma.$runCommandRaw({
+      find: 'orders',
+      filter: { telegram_user_id: telegramUserId, status: { $in: PURCHASED_STATUSES } },
+      projection: ORDER_PROJECTIONS.purchases,
+      sort: { created_at: -1 },
+      limit,
+    }) as any;
+
+    return (result.cursor?.firstBatch || []).map((doc: any) => this.toOrder(doc));
+  }
+
+  /**
+   * Count and amount of a Telegram user's purchases, by currency (over all of them, not a page)
+   */
+  async purchaseTotalsByTelegramUser(
+    telegramUserId: string,
+  ): Promise<{ count: number; spentCents: Record<string, number> }> {
+    const result = await this.prisma.$runCommandRaw({
+      aggregate: 'orders',
+      pipeline: [
+        { $match: { telegram_user_id: telegramUserId, status: { $in: PURCHASED_STATUSES } } },
+        { $group: { _id: '$currency', count: { $sum: 1 }, amountCents: { $sum: '$amount_cents' } } },
+      ],
+      cursor: {},
+    }) as any;
+
+    let count = 0;
+    const spentCents: Record<string, number> = {};
+    for (const row of result.cursor?.firstBatch || []) {
+      const currency = row._id || 'EUR';
+      count += row.count;
+      spentCents[currency] = (spentCents[currency] || 0) + (row.amountCents || 0);
+    }
+    return { count, spentCents };
+  }
+
+  async update(orderId: string, set: Record<string, any>, expectStatus?: string): Promise<boolean> {
+    const updated = (await this.updateMany([{ id: orderId, set, expectStatus }])) > 0;
+    if (updated && set.status) {
+      this.notifyStatus(orderId, set.status);
+    }
+    return updated;
+  }
+
+  /**
+   * Apply many changes with one unordered update command per batch.
+   * Returns how many orders were modified.
+   */
+  async updateMany(changes: OrderChange[]): Promise<number> {
+    let modified = 0;
+    for (let i = 0; i < changes.length; i += UPDATE_BATCH_SIZE) {
+      const now = { $date: new Date().toISOString() };
+      const updates = changes.slice(i, i + UPDATE_BATCH_SIZE).map((change) => ({
+        q: change.expectStatus
+          ? { _id: this.idFilter(change.id), status: change.expectStatus }
+          : { _id: this.idFilter(change.id) },
+        u: { $set: { ...change.set, updated_at: now } },
+      }));
+
+      const result = await this.prisma.$runCommandRaw({
+        update: 'orders',
+        updates,
+        ordered: false,
+      }) as any;
+      modified += result.nModified || 0;
+    }
+    return modified;
+  }
+
+  async markPaid(orderId: string, payment: PaymentDetails, expectStatus?: string): Promise<boolean> {
+    const paid = await this.update(orderId, {
+      status: 'PAGADA',
+      ...(payment.provider && { payment_provider: payment.provider }),
+      ...(payment.providerOrderId !== undefined && { provider_order_id: payment.providerOrderId }),
+      ...(payment.method && { payment_method: payment.method }),
+      ...payment.extra,
+      paid_at: { $date: new Date().toISOString() },
+    }, expectStatus);
+    if (paid) {
+      this.notifyPaid(orderId);
+    }
+    return paid;
+  }
+
+  /**
+   * Called with the id of every order that reaches PAGADA (e.g. to refresh caches)
+   */
+  onPaid(listener: (orderId: string) => void) {
+    this.paidListeners.push(listener);
+  }
+
+  /**
+   * For code that sets PAGADA outside markPaid
+   */
+  notifyPaid(orderId: string) {
+    for (const listener of this.paidListeners) {
+      listener(orderId);
+    }
+  }
+
+  /**
+   * Called whenever update() moves an order to a new status (bulk updates are not reported)
+   */
+  onStatusChange(listener: (orderId: string, status: string) => void) {
+    this.statusListeners.push(listener);
+  }
+
+  /**
+   * For code that sets the status outside update()
+   */
+  notifyStatus(orderId: string, status: string) {
+    for (const listener of this.statusListeners) {
+      listener(orderId, status);
+    }
+  }
+
+  async setProviderOrderId(orderId: string, providerOrderId: string): Promise<void> {
+    await this.update(orderId, { provider_order_id: providerOrderId });
+  }
+
+  /**
+   * Expire abandoned checkouts in one command (orders already paid are left alone)
+   */
+  async expirePending(orderIds: string[]): Promise<number> {
+    return this.updateMany(
+      orderIds.map((id) => ({ id, set: { status: 'EXPIRED' }, expectStatus: 'PENDING' })),
+    );
+  }
+
+  toOrder(doc: any): OrderRecord {
+    return {
+      id: doc._id?.$oid || doc._id,
+      productId: doc.product_id,
+      tipsterId: doc.tipster_id,
+      amountCents: doc.amount_cents,
+      currency: doc.currency,
+      status: doc.status,
+      emailBackup: doc.email_backup,
+      phoneBackup: doc.phone_backup,
+      telegramUserId: doc.telegram_user_id,
+      telegramUsername: doc.telegram_username,
+      paymentProvider: doc.payment_provider,
+      paymentMethod: doc.payment_method,
+      providerOrderId: doc.provider_order_id,
+      paidAt: doc.paid_at,
+      createdAt: doc.created_at,
+    };
+  }
+
+  /**
+   * Orders created by the bot before ObjectIds were used have string ids ('order_...')
+   */
+  private idFilter(orderId: string) {
+    return /^[0-9a-f]{24}$/.test(orderId) ? { $oid: orderId } : orderId;
+  }
+}
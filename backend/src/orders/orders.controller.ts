@@ -1,11 +1,15 @@
-import { Controller, Get, UseGuards } from '@nestjs/common';
-import { ApiTags, ApiOperation, ApiBearerAuth } from '@nestjs/swagger';
+import { Controller, Get, Query, UseGuards } from '@nestjs/common';
+import { ApiTags, ApiOperation, ApiBearerAuth, ApiQuery } from '@nestjs/swagger';
+import { Prisma } from '@prisma/client';
 import { JwtAuthGuard } from '../common/guards/jwt-auth.guard';
 import { RolesGuard } from '../common/guards/roles.guard';
 import { Roles } from '../common/decorators/roles.decorator';
 import { CurrentUser } from '../common/decorators/current-user.decorator';
 import { OrdersService } from './orders.service';
 import { PrismaService } from '../prisma/prisma.service';
+import { parseFields } from '../common/utils/fieldsets.util';
+
+const ORDER_FIELDS = Object.values(Prisma.OrderScalarFieldEnum);
 
 @ApiTags('orders')
 @ApiBearerAuth()
@@ -20,8 +24,9 @@ export class OrdersController {
   @Get('my')
   @Roles('CLIENT')
   @ApiOperation({ summary: 'Get my orders (Client only)' })
-  async getMyOrders(@CurrentUser() user: any) {
-    return this.ordersService.findByClient(user.id);
+  @ApiQuery({ name: 'fields', required: false, description: 'Comma-separated order fields, e.g. id,status,amountCents' })
+  async getMyOrders(@CurrentUser() user: any, @Query('fields') fields?: string) {
+    return this.ordersService.findByClient(user.id, parseFields(fields, ORDER_FIELDS));
   }
 
   @Get('sales')
@@ -1,10 +1,12 @@
 import { Module } from '@nestjs/common';
 import { OrdersController } from './orders.controller';
 import { OrdersService } from './orders.service';
+import { OrderRepository } from './order.repository';
+import { PurchaseSummaryService } from './purchase-summary.service';
 
 @Module({
   controllers: [OrdersController],
-  providers: [OrdersService],
-  exports: [OrdersService],
+  providers: [OrdersService, OrderRepository, PurchaseSummaryService],
+  exports: [OrdersService, OrderRepository, PurchaseSummaryService],
 })
 export class OrdersModule {}
@@ -1,11 +1,16 @@
 import { Injectable, Logger } from '@nestjs/common';
 import { PrismaService } from '../prisma/prisma.service';
+import { OrderRepository } from './order.repository';
+import { toSelect } from '../common/utils/fieldsets.util';
 
 @Injectable()
 export class OrdersService {
   private readonly logger = new Logger(OrdersService.name);
 
-  constructor(private prisma: PrismaService) {}
+  constructor(
+    private prisma: PrismaService,
+    private orders: OrderRepository,
+  ) {}
 
   async create(data: any) {
     return this.prisma.order.create({ data });
@@ -17,21 +22,30 @@ export class OrdersService {
     });
   }
 
-  async findByClient(clientUserId: string) {
+  async findByClient(clientUserId: string, fields?: string[] | null) {
     return this.prisma.order.findMany({
       where: { clientUserId },
       orderBy: { createdAt: 'desc' },
+      ...(fields && { select: toSelect(fields) }),
     });
   }
 
   async updateStatus(orderId: string, status: string) {
-    return this.prisma.order.update({
+    if (status === 'PAGADA') {
+      // Through markPaid so the order gets its paid_at: settlement periods are cut on it.
+      // Only from PENDING, so a redelivered confirmation does not move paid_at
+      await this.orders.markPaid(orderId, {}, 'PENDING');
+      return this.findById(orderId);
+    }
+    const order = await this.prisma.order.update({
       where: { id: orderId },
       data: { status },
     });
+    this.orders.notifyStatus(orderId, status);
+    return order;
   }
 
-  async grantAccess(orderId: string, clientUserId: string, channelId: string) {
+  async grantAccess(orderId: string, clientUserId: string, channelId: string, validityDays?: number | null) {
     // Update order status
     await this.updateStatus(orderId, 'ACCESS_GRANTED');
 
@@ -43,6 +57,7 @@ export class OrdersService {
         channelId,
         status: 'GRANTED',
         joinedAt: new Date(),
+        expiresAt: validityDays ? new Date(Date.now() + validityDays * 24 * 60 * 60 * 1000) : null,
       },
     });
   }
@@ -61,31 +76,21 @@ export class OrdersService {
         return [];
       }
 
-      // Get all orders for this tipster
-      const result = await this.prisma.$runCommandRaw({
-        find: 'orders',
-        filter: { 
-          tipster_id: tipster.id,
-          status: 'PAGADA',
-        },
-        sort: { created_at: -1 },
-        limit: 100,
-      }) as any;
-
-      const orders = result.cursor?.firstBatch || [];
+      // Get the latest paid orders for this tipster
+      const orders = await this.orders.findPaidByTipster(tipster.id, 100);
 
       // Map orders to a cleaner format
-      return orders.map((order: any) => ({
-        id: order._id.$oid || order._id,
-        productId: order.product_id,
-        amountCents: order.amount_cents,
+      return orders.map((order) => ({
+        id: order.id,
+        productId: order.productId,
+        amountCents: order.amountCents,
         currency: order.currency,
         status: order.status,
-        email: order.email_backup,
-        telegramUsername: order.telegram_username,
-        paymentProvider: order.payment_provider,
-        paidAt: order.paid_at,
-        createdAt: order.created_at,
+        email: order.emailBackup,
+        telegramUsername: order.telegramUsername,
+        paymentProvider: order.paymentProvider,
+        paidAt: order.paidAt,
+        createdAt: order.createdAt,
       }));
     } catch (error) {
       this.logger.error('Error finding sales by tipster:', error);
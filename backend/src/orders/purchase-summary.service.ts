@@ -0,0 +1,163 @@
+import { Injectable, Logger } from '@nestjs/common';
+import { ConfigService } from '@nestjs/config';
+import { PrismaService } from '../prisma/prisma.service';
+import { MetricsService } from '../metrics/metrics.service';
+import { OrderRepository } from './order.repository';
+
+// Purchases listed in the summary (totals are aggregated over all of them)
+const RECENT_PURCHASES = 10;
+
+export interface PurchaseSummaryItem {
+  orderId: string;
+  productId: string;
+  productTitle: string | null;
+  amountCents?: number;
+  currency?: string;
+  paidAt?: string;
+}
+
+export interface PurchaseSummary {
+  telegramUserId: string;
+  totalPurchases: number;
+  spentCents: Record<string, number>; // by currency
+  recent: PurchaseSummaryItem[];
+  generatedAt: string;
+}
+
+interface CachedSummary {
+  summary: PurchaseSummary;
+  expiresAt: number;
+}
+
+/**
+ * What a Telegram user has bought, for the bot's /mis_compras.
+ *
+ * Summaries are kept in a per-process LRU cache and rebuilt as soon as one of the
+ * user's orders reaches PAGADA. Clustered, only the worker that handled the payment
+ * sees that event, so entries also expire after PURCHASE_SUMMARY_TTL_SECONDS.
+ */
+@Injectable()
+export class PurchaseSummaryService {
+  private readonly logger = new Logger(PurchaseSummaryService.name);
+  private readonly cache = new Map<string, CachedSummary>();
+  private readonly loading = new Map<string, Promise<PurchaseSummary>>();
+  private readonly ttlMs: number;
+  private readonly maxEntries: number;
+
+  constructor(
+    private prisma: PrismaService,
+    private config: ConfigService,
+    private metrics: MetricsService,
+    private orders: OrderRepository,
+  ) {
+    this.ttlMs = Number(this.config.get('PURCHASE_SUMMARY_TTL_SECONDS') || 300) * 1000;
+    this.maxEntries = Number(this.config.get('PURCHASE_SUMMARY_CACHE_SIZE') || 10000);
+    this.orders.onPaid((orderId) => {
+      this.refreshForOrder(orderId).catch((error) =>
+        this.logger.warn(`Could not refresh purchase summary for order ${orderId}: ${error.message}`),
+      );
+    });
+  }
+
+  async get(telegramUserId: string): Promise<PurchaseSummary> {
+    const cached = this.cache.get(telegramUserId);
+    if (cached && cached.expiresAt > Date.now()) {
+      // Map keeps insertion order: re-inserting marks the entry as most recently used
+      this.cache.delete(telegramUserId);
+      this.cache.set(telegramUserId, cached);
+      this.metrics.observeCacheLookup('purchase_summary', true);
+      return cached.summary;
+    }
+    this.metrics.observeCacheLookup('purchase_summary', false);
+    return this.load(telegramUserId);
+  }
+
+  /**
+   * Drop the user's summary and build it again
+   */
+  async refresh(telegramUserId: string): Promise<PurchaseSummary> {
+    this.cache.delete(telegramUserId);
+    // A load already running may have read the orders before the change
+    this.loading.delete(telegramUserId);
+    return this.load(telegramUserId);
+  }
+
+  private async refreshForOrder(orderId: string) {
+    const order = await this.orders.findById(orderId, 'status');
+    if (order?.telegramUserId) {
+      await this.refresh(order.telegramUserId);
+    }
+  }
+
+  /**
+   * Concurrent misses for the same user share one query
+   */
+  private load(telegramUserId: string): Promise<PurchaseSummary> {
+    const pending = this.loading.get(telegramUserId);
+    if (pending) {
+      return pending;
+    }
+    const promise = this.build(telegramUserId)
+      .then((summary) => {
+        if (this.loading.get(telegramUserId) === promise) {
+          this.store(telegramUserId, summary);
+        }
+        return summary;
+      })
+      .finally(() => {
+        if (this.loading.get(telegramUserId) === promise) {
+          this.loading.delete(telegramUserId);
+        }
+      });
+    this.loading.set(telegramUserId, promise);
+    return promise;
+  }
+
+  private store(telegramUserId: string, summary: PurchaseSummary) {
+    this.cache.delete(telegramUserId);
+    this.cache.set(telegramUserId, { summary, expiresAt: Date.now() + this.ttlMs });
+    while (this.cache.size > this.maxEntries) {
+      this.cache.delete(this.cache.keys().next().value);
+    }
+  }
+
+  private async build(telegramUserId: string): Promise<PurchaseSummary> {
+    const [recent, totals] = await Promise.all([
+      this.orders.findPurchasesByTelegramUser(telegramUserId, RECENT_PURCHASES),
+      this.orders.purchaseTotalsByTelegramUser(telegramUserId),
+    ]);
+
+    const productIds = [...new Set(recent.map((order) => order.productId))];
+    const products = productIds.length
+      ? await this.prisma.product.findMany({
+          where: { id: { in: productIds } },
+          select: { id: true, title: true },
+        })
+      : [];
+    const titles = new Map(products.map((product) => [product.id, product.title]));
+
+    return {
+      telegramUserId,
+      totalPurchases: totals.count,
+      spentCents: totals.spentCents,
+      recent: recent.map((order) => ({
+        orderId: order.id,
+        productId: order.productId,
+        productTitle: titles.get(order.productId) ?? null,
+        amountCents: order.amountCents,
+        currency: order.currency,
+        paidAt: toIsoDate(order.paidAt ?? order.createdAt),
+      })),
+      generatedAt: new Date().toISOString(),
+    };
+  }
+}
+
+// Raw command results carry dates as { $date: iso } or { $date: { $numberLong: ms } }
+function toIsoDate(value: any): string | undefined {
+  const raw = value?.$date ?? value;
+  if (!raw) {
+    return undefined;
+  }
+  return new Date(raw.$numberLong !== undefined ? Number(raw.$numberLong) : raw).toISOString();
+}
@@ -1,21 +1,40 @@
-import { Controller, Get, UseGuards } from '@nestjs/common';
-import { ApiTags, ApiBearerAuth } from '@nestjs/swagger';
+import { Controller, Get, HttpCode, HttpStatus, Param, Post, Query, UseGuards } from '@nestjs/common';
+import { ApiTags, ApiBearerAuth, ApiOperation } from '@nestjs/swagger';
 import { JwtAuthGuard } from '../common/guards/jwt-auth.guard';
 import { RolesGuard } from '../common/guards/roles.guard';
 import { Roles } from '../common/decorators/roles.decorator';
 import { CurrentUser } from '../common/decorators/current-user.decorator';
 import { PayoutsService } from './payouts.service';
+import { SettlementService } from './settlement.service';
 
 @ApiTags('payouts')
 @ApiBearerAuth()
 @UseGuards(JwtAuthGuard, RolesGuard)
 @Controller('payouts')
 export class PayoutsController {
-  constructor(private payoutsService: PayoutsService) {}
+  constructor(
+    private payoutsService: PayoutsService,
+    private settlements: SettlementService,
+  ) {}
 
   @Get('my')
   @Roles('TIPSTER')
   async getMyPayouts(@CurrentUser() user: any) {
     return this.payoutsService.getByTipster(user.tipsterProfile.id);
   }
+
+  @Post('settlements/:period')
+  @HttpCode(HttpStatus.OK)
+  @Roles('ADMIN', 'SUPERADMIN')
+  @ApiOperation({ summary: 'Compute payouts and commissions for a month, YYYY-MM (Admin only)' })
+  async runSettlement(@Param('period') period: string, @Query('restart') restart?: string) {
+    return this.settlements.run(period, restart === 'true');
+  }
+
+  @Get('settlements/:period')
+  @Roles('ADMIN', 'SUPERADMIN')
+  @ApiOperation({ summary: 'Progress of a month settlement (Admin only)' })
+  async getSettlement(@Param('period') period: string) {
+    return this.settlements.getRun(period);
+  }
 }
@@ -1,9 +1,10 @@
 import { Module } from '@nestjs/common';
 import { PayoutsController } from './payouts.controller';
 import { PayoutsService } from './payouts.service';
+import { SettlementService } from './settlement.service';
 
 @Module({
   controllers: [PayoutsController],
-  providers: [PayoutsService],
+  providers: [PayoutsService, SettlementService],
 })
 export class PayoutsModule {}
@@ -0,0 +1,476 @@
+import { BadRequestException, ConflictException, Injectable, Logger, OnModuleInit } from '@nestjs/common';
+import { ConfigService } from '@nestjs/config';
+import { randomBytes } from 'crypto';
+import { hostname } from 'os';
+import { PrismaService } from '../prisma/prisma.service';
+import { PURCHASED_STATUSES } from '../orders/order.repository';
+
+type Phase = 'orders' | 'events';
+
+interface StreamSpec {
+  phase: Phase;
+  collection: string;
+  timeField: string;
+  match: Record<string, any>;
+  key: any; // $group _id expression, one partial per key
+  sums: Record<string, any>; // partial field -> $sum argument
+  countField: string; // Partial field that counts the documents
+}
+
+export interface SettlementResult {
+  period: string;
+  status: string;
+  chunks: Record<Phase, number>;
+  documents: Record<Phase, number>;
+  payouts: { written: number; locked: number };
+  commissions: { written: number; locked: number };
+  durationMs: number;
+}
+
+// Commission rows are only rewritten until they are paid; payouts until approved
+const COMMISSION_LOCKED = 'PAID';
+const PAYOUT_OPEN = 'IN_PROCESS';
+const EVENT_TYPES = ['REGISTER', 'FTD', 'DEPOSIT'];
+// Max statements per update command
+const WRITE_BATCH_SIZE = 500;
+const DUPLICATE_KEY = 11000;
+
+const sumIf = (condition: any, value: any = 1) => ({ $cond: [condition, value, 0] });
+
+/**
+ * Month-end settlement: per-tipster payouts from the period's paid orders and per
+ * tipster/house commissions from its referral events.
+ *
+ * Orders and events are read in chunks along (paid_at|event_at, _id) and reduced
+ * server-side with $group; each chunk's partial sums are added to the run document
+ * (settlement_runs, one per period) in the same update that advances its cursor, so
+ * a run that dies halfway resumes where it stopped without counting anything twice.
+ * A lease on the run document keeps two instances from working on the same period.
+ * Results are upserted in bulk on (tipster, period[, house|currency]): running a
+ * period again rewrites the same rows, except payouts already approved and
+ * commissions already paid.
+ */
+@Injectable()
+export class SettlementService implements OnModuleInit {
+  private readonly logger = new Logger(SettlementService.name);
+  private readonly workerId = `${hostname()}:${process.pid}:${randomBytes(3).toString('hex')}`;
+  private readonly chunkSize: number;
+  private readonly leaseMs: number;
+  private readonly platformFeeBps: number;
+
+  constructor(
+    private prisma: PrismaService,
+    private config: ConfigService,
+  ) {
+    this.chunkSize = Number(this.config.get('SETTLEMENT_CHUNK_SIZE') || 50000);
+    this.leaseMs = Number(this.config.get('SETTLEMENT_LEASE_SECONDS') || 300) * 1000;
+    this.platformFeeBps = Number(this.config.get('PAYOUT_PLATFORM_FEE_BPS') || 0);
+  }
+
+  async onModuleInit() {
+    try {
+      await this.prisma.$runCommandRaw({
+        createIndexes: 'orders',
+        indexes: [{ key: { paid_at: 1, _id: 1 }, name: 'paid_at_id' }],
+      });
+      await this.prisma.$runCommandRaw({
+        createIndexes: 'referral_events',
+        indexes: [{ key: { event_at: 1, _id: 1 }, name: 'event_at_id' }],
+      });
+      // Partial: rows created before the engine have no period_month
+      await this.prisma.$runCommandRaw({
+        createIndexes: 'payouts',
+        indexes: [{
+          key: { tipster_id: 1, period_month: 1, currency: 1 },
+          name: 'tipster_id_period_month_currency',
+          unique: true,
+          partialFilterExpression: { period_month: { $exists: true } },
+        }],
+      });
+      await this.prisma.$runCommandRaw({
+        createIndexes: 'commissions',
+        indexes: [{
+          key: { tipster_id: 1, house_id: 1, period_month: 1 },
+          name: 'tipster_id_house_id_period_month',
+          unique: true,
+          partialFilterExpression: { period_month: { $exists: true } },
+        }],
+      });
+    } catch (error) {
+      this.logger.warn(`Could not ensure settlement indexes: ${error.message}`);
+    }
+  }
+
+  /**
+   * Progress of a period's run (without the partial sums)
+   */
+  async getRun(period: string) {
+    const result = await this.prisma.$runCommandRaw({
+      find: 'settlement_runs',
+      filter: { _id: period },
+      projection: { partials: 0 },
+      limit: 1,
+    }) as any;
+    return result.cursor?.firstBatch?.[0] || null;
+  }
+
+  /**
+   * Settle a month ('YYYY-MM', UTC). Resumes an interrupted run; a finished one is
+   * returned as is unless restart is set.
+   */
+  async run(period: string, restart = false): Promise<SettlementResult> {
+    const [start, end] = periodRange(period);
+    const started = Date.now();
+    const token = await this.claim(period, restart);
+
+    try {
+      let run = await this.readRun(period);
+      if (run.status !== 'DONE') {
+        for (const spec of this.streams()) {
+          await this.stream(period, token, spec, start, end);
+        }
+        run = await this.readRun(period);
+        const written = await this.writeResults(period, start, end, run.partials || {});
+        await this.prisma.$runCommandRaw({
+          update: 'settlement_runs',
+          updates: [{
+            q: { _id: period, lease_token: token },
+            u: {
+              $set: {
+                status: 'DONE',
+                result: written,
+                finished_at: { $date: new Date().toISOString() },
+              },
+            },
+          }],
+        });
+        run = await this.readRun(period);
+      }
+
+      const result: SettlementResult = {
+        period,
+        status: run.status,
+        chunks: { orders: run.progress?.orders?.chunks || 0, events: run.progress?.events?.chunks || 0 },
+        documents: { orders: run.progress?.orders?.documents || 0, events: run.progress?.events?.documents || 0 },
+        payouts: run.result?.payouts || { written: 0, locked: 0 },
+        commissions: run.result?.commissions || { written: 0, locked: 0 },
+        durationMs: Date.now() - started,
+      };
+      this.logger.log(
+        `💶 Settlement ${period}: ${result.documents.orders} orders, ${result.documents.events} events, ` +
+        `${result.payouts.written} payouts, ${result.commissions.written} commissions in ${result.durationMs}ms`,
+      );
+      return result;
+    } finally {
+      await this.prisma.$runCommandRaw({
+        update: 'settlement_runs',
+        updates: [{ q: { _id: period, lease_token: token }, u: { $set: { lease_token: null, lease_until: null } } }],
+      });
+    }
+  }
+
+  private streams(): StreamSpec[] {
+    const eventSums: Record<string, any> = { events: 1 };
+    for (const type of EVENT_TYPES) {
+      const name = type.toLowerCase();
+      const isType = { $eq: ['$type', type] };
+      const isValid = { $and: [isType, { $eq: ['$status', 'VALID'] }] };
+      eventSums[name] = sumIf(isType);
+      eventSums[`valid_${name}`] = sumIf(isValid);
+      if (type === 'DEPOSIT') {
+        eventSums.deposit_cents = sumIf(isType, { $ifNull: ['$amount_cents', 0] });
+        eventSums.valid_deposit_cents = sumIf(isValid, { $ifNull: ['$amount_cents', 0] });
+      }
+    }
+
+    return [
+      {
+        phase: 'orders',
+        collection: 'orders',
+        timeField: 'paid_at',
+        match: { status: { $in: PURCHASED_STATUSES }, tipster_id: { $ne: null } },
+        key: { $concat: ['$tipster_id', '|', { $ifNull: ['$currency', 'EUR'] }] },
+        sums: {
+          gross_cents: { $ifNull: ['$amount_cents', 0] },
+          gateway_fee_cents: { $ifNull: ['$commission_cents', 0] },
+          orders: 1,
+        },
+        countField: 'orders',
+      },
+      {
+        phase: 'events',
+        collection: 'referral_events',
+        timeField: 'event_at',
+        match: { status: { $ne: 'REJECTED' }, tipster_id: { $ne: null }, type: { $in: EVENT_TYPES } },
+        key: { $concat: ['$tipster_id', '|', '$house_id'] },
+        sums: eventSums,
+        countField: 'events',
+      },
+    ];
+  }
+
+  /**
+   * Take (or renew) the lease on the period's run document
+   */
+  private async claim(period: string, restart: boolean): Promise<string> {
+    const token = `${this.workerId}:${Date.now()}`;
+    const now = new Date();
+    const nowDate = { $date: now.toISOString() };
+    const fresh = { status: 'RUNNING', progress: {}, partials: {}, result: null, started_at: nowDate };
+    const lease = { lease_token: token, lease_until: { $date: new Date(now.getTime() + this.leaseMs).toISOString() } };
+
+    try {
+      await this.prisma.$runCommandRaw({
+        update: 'settlement_runs',
+        updates: [{
+          q: { _id: period, $or: [{ lease_until: null }, { lease_until: { $lt: nowDate } }] },
+          u: restart ? { $set: { ...fresh, ...lease } } : { $set: lease, $setOnInsert: fresh },
+          upsert: true,
+        }],
+      });
+    } catch (error) {
+      // The upsert collides with the existing document when someone else holds the lease
+      if (String(error.message).includes('E11000')) {
+        throw new ConflictException(`Settlement ${period} is already running`);
+      }
+      throw error;
+    }
+
+    const run = await this.readRun(period);
+    if (run?.lease_token !== token) {
+      throw new ConflictException(`Settlement ${period} is already running`);
+    }
+    return token;
+  }
+
+  private async readRun(period: string): Promise<any> {
+    const result = await this.prisma.$runCommandRaw({
+      find: 'settlement_runs',
+      filter: { _id: period },
+      limit: 1,
+    }) as any;
+    return result.cursor?.firstBatch?.[0];
+  }
+
+  /**
+   * Reduce one collection over the period, chunk by chunk from the stored cursor
+   */
+  private async stream(period: string, token: string, spec: StreamSpec, start: Date, end: Date) {
+    const { phase, timeField } = spec;
+    const inPeriod = { [timeField]: { $gte: { $date: start.toISOString() }, $lt: { $date: end.toISOString() } } };
+    const after = (cursor: any) => ({
+      $or: [
+        { [timeField]: { $gt: cursor.t } },
+        { [timeField]: cursor.t, _id: { $gt: cursor.id } },
+      ],
+    });
+    const upTo = (bound: any) => ({
+      $or: [
+        { [timeField]: { $lt: bound.t } },
+        { [timeField]: bound.t, _id: { $lte: bound.id } },
+      ],
+    });
+
+    for (;;) {
+      const run = await this.readRun(period);
+      const progress = run.progress?.[phase] || {};
+      if (progress.done) {
+        return;
+      }
+      const chunks = progress.chunks || 0;
+      const range = { $and: [inPeriod, ...(progress.cursor ? [after(progress.cursor)] : [])] };
+
+      // Last key of this chunk, read from the (time, _id) index
+      const boundary = await this.prisma.$runCommandRaw({
+        find: spec.collection,
+        filter: range,
+        sort: { [timeField]: 1, _id: 1 },
+        projection: { [timeField]: 1 },
+        skip: this.chunkSize - 1,
+        limit: 1,
+      }) as any;
+      const last = boundary.cursor?.firstBatch?.[0];
+      const bound = last ? { t: last[timeField], id: last._id } : null;
+
+      const aggregate = await this.prisma.$runCommandRaw({
+        aggregate: spec.collection,
+        pipeline: [
+          { $match: { $and: [range, ...(bound ? [upTo(bound)] : []), spec.match] } },
+          {
+            $group: {
+              _id: spec.key,
+              ...Object.fromEntries(Object.entries(spec.sums).map(([field, value]) => [field, { $sum: value }])),
+            },
+          },
+        ],
+        cursor: { batchSize: 100000 },
+        allowDiskUse: true,
+      }) as any;
+
+      const increments: Record<string, number> = {};
+      let documents = 0;
+      for (const group of aggregate.cursor?.firstBatch || []) {
+        if (!group._id) {
+          continue;
+        }
+        for (const field of Object.keys(spec.sums)) {
+          increments[`partials.${phase}.${group._id}.${field}`] = toNumber(group[field]);
+        }
+        documents += toNumber(group[spec.countField]);
+      }
+
+      // Sums and cursor move together, and only if nobody else advanced this phase meanwhile
+      const result = await this.prisma.$runCommandRaw({
+        update: 'settlement_runs',
+        updates: [{
+          q: { _id: period, lease_token: token, [`progress.${phase}.chunks`]: chunks ? chunks : { $in: [0, null] } },
+          u: {
+            $inc: { ...increments, [`progress.${phase}.chunks`]: 1, [`progress.${phase}.documents`]: documents },
+            $set: {
+              [`progress.${phase}.cursor`]: bound,
+              [`progress.${phase}.done`]: !bound,
+              lease_until: { $date: new Date(Date.now() + this.leaseMs).toISOString() },
+            },
+          },
+        }],
+      }) as any;
+      if (!result.nModified) {
+        throw new ConflictException(`Lost the lease on settlement ${period}`);
+      }
+    }
+  }
+
+  /**
+   * Build payouts and commissions from the partial sums and upsert them in bulk
+   */
+  private async writeResults(period: string, start: Date, end: Date, partials: any) {
+    const now = { $date: new Date().toISOString() };
+    const orderPartials: Record<string, any> = partials.orders || {};
+    const eventPartials: Record<string, any> = partials.events || {};
+
+    const tipsterIds = [...new Set(Object.keys(orderPartials).map((key) => key.split('|')[0]))];
+    const tipsters = new Map<string, any>();
+    for (let i = 0; i < tipsterIds.length; i += 1000) {
+      const profiles = await this.prisma.tipsterProfile.findMany({
+        where: { id: { in: tipsterIds.slice(i, i + 1000).filter((id) => /^[0-9a-f]{24}$/.test(id)) } },
+        select: { id: true, payoutMethod: true, payoutFields: true },
+      });
+      profiles.forEach((profile) => tipsters.set(profile.id, profile));
+    }
+
+    const payouts = Object.entries(orderPartials).map(([key, sums]) => {
+      const [tipsterId, currency] = key.split('|');
+      const gross = toNumber(sums.gross_cents);
+      const gatewayFees = toNumber(sums.gateway_fee_cents);
+      const platformFee = Math.round((gross * this.platformFeeBps) / 10000);
+      const profile = tipsters.get(tipsterId);
+      return {
+        q: { tipster_id: tipsterId, period_month: period, currency, status: PAYOUT_OPEN },
+        u: {
+          $set: {
+            period_start: { $date: start.toISOString() },
+            period_end: { $date: end.toISOString() },
+            gross_cents: gross,
+            gateway_fee_cents: gatewayFees,
+            platform_fee_bps: this.platformFeeBps,
+            platform_fee_cents: platformFee,
+            net_cents: gross - gatewayFees - platformFee,
+            order_count: toNumber(sums.orders),
+            method_snapshot: { method: profile?.payoutMethod ?? null, fields: profile?.payoutFields ?? null },
+            updated_at: now,
+          },
+          $setOnInsert: { created_at: now },
+        },
+        upsert: true,
+      };
+    });
+
+    const houses = new Map(
+      (await this.prisma.house.findMany({ select: { id: true, currency: true, commissionRules: true, validationWindowDays: true } }))
+        .map((house) => [house.id, house]),
+    );
+    const commissions = Object.entries(eventPartials).map(([key, sums]) => {
+      const [tipsterId, houseId] = key.split('|');
+      const house = houses.get(houseId);
+      const rules: any = house?.commissionRules || {};
+      // Events stay open to validation for validationWindowDays after the period
+      const settled = end.getTime() + (house?.validationWindowDays ?? 30) * 86400000 <= Date.now();
+      return {
+        q: { tipster_id: tipsterId, house_id: houseId, period_month: period, status: { $ne: COMMISSION_LOCKED } },
+        u: {
+          $set: {
+            type: rules.type || 'CPA',
+            estimated_cents: commissionCents(rules, sums, ''),
+            final_cents: settled ? commissionCents(rules, sums, 'valid_') : null,
+            currency: house?.currency || 'EUR',
+            status: settled ? 'FINAL' : 'ESTIMATED',
+            event_counts: Object.fromEntries(Object.entries(sums).map(([field, value]) => [field, toNumber(value)])),
+            updated_at: now,
+          },
+          $setOnInsert: { created_at: now },
+        },
+        upsert: true,
+      };
+    });
+
+    return {
+      payouts: await this.bulkUpsert('payouts', payouts),
+      commissions: await this.bulkUpsert('commissions', commissions),
+    };
+  }
+
+  /**
+   * Rows that no longer match their open status collide with the unique index on
+   * insert; they are counted as locked and left untouched
+   */
+  private async bulkUpsert(collection: string, updates: any[]) {
+    let written = 0;
+    let locked = 0;
+    for (let i = 0; i < updates.length; i += WRITE_BATCH_SIZE) {
+      const batch = updates.slice(i, i + WRITE_BATCH_SIZE);
+      const result = await this.prisma.$runCommandRaw({ update: collection, updates: batch, ordered: false }) as any;
+      const errors = result.writeErrors || [];
+      const unexpected = errors.filter((error: any) => error.code !== DUPLICATE_KEY);
+      if (unexpected.length) {
+        throw new Error(`Settlement write to ${collection} failed: ${unexpected[0].errmsg}`);
+      }
+      locked += errors.length;
+      written += batch.length - errors.length;
+    }
+    return { written, locked };
+  }
+}
+
+/**
+ * [first day of the month, first day of the next) in UTC
+ */
+export function periodRange(period: string): [Date, Date] {
+  const match = /^(\d{4})-(0[1-9]|1[0-2])$/.exec(period || '');
+  if (!match) {
+    throw new BadRequestException('period must be YYYY-MM');
+  }
+  const year = Number(match[1]);
+  const month = Number(match[2]) - 1;
+  return [new Date(Date.UTC(year, month, 1)), new Date(Date.UTC(year, month + 1, 1))];
+}
+
+/**
+ * House commission rules: CPA per register / FTD plus revshare on deposits
+ */
+function commissionCents(rules: any, sums: any, prefix: '' | 'valid_'): number {
+  const cpa = rules.cpa || {};
+  const revsharePct = rules.revshare?.percentage || 0;
+  return Math.round(
+    toNumber(sums[`${prefix}register`]) * (cpa.register || 0) +
+    toNumber(sums[`${prefix}ftd`]) * (cpa.ftd || 0) +
+    (toNumber(sums[`${prefix}deposit_cents`]) * revsharePct) / 100,
+  );
+}
+
+// Raw command results may wrap numbers ({ $numberLong: '...' })
+function toNumber(value: any): number {
+  if (value && typeof value === 'object') {
+    return Number(value.$numberLong ?? value.$numberInt ?? value.$numberDouble ?? 0);
+  }
+  return Number(value || 0);
+}
@@ -1,14 +1,63 @@
-import { Injectable, OnModuleInit, OnModuleDestroy } from '@nestjs/common';
+import { Injectable, Logger, OnApplicationBootstrap, OnModuleInit, OnModuleDestroy } from '@nestjs/common';
 import { PrismaClient } from '@prisma/client';
 
+const WARM_UP_ATTEMPTS = 5;
+
 @Injectable()
-export class PrismaService extends PrismaClient implements OnModuleInit, OnModuleDestroy {
+export class PrismaService extends PrismaClient implements OnModuleInit, OnApplicationBootstrap, OnModuleDestroy {
+  private readonly logger = new Logger(PrismaService.name);
+  private warm = false;
+
   async onModuleInit() {
     await this.$connect();
     console.log('✅ Database connected');
   }
 
+  onApplicationBootstrap() {
+    // Runs alongside listen(); /health/ready reports 503 until it finishes
+    void this.warmUpWithRetry();
+  }
+
   async onModuleDestroy() {
     await this.$disconnect();
   }
+
+  get isWarm(): boolean {
+    return this.warm;
+  }
+
+  /**
+   * Retry the warm-up with exponential backoff. If every attempt fails the instance is
+   * marked ready anyway: the pool then fills on demand, which only costs latency, while
+   * staying out of rotation forever would take a healthy worker down for good
+   */
+  private async warmUpWithRetry(attempt = 1) {
+    try {
+      await this.warmUp();
+    } catch (error) {
+      if (attempt < WARM_UP_ATTEMPTS) {
+        const delayMs = 1000 * 2 ** (attempt - 1);
+        this.logger.warn(`Connection warm-up failed (attempt ${attempt}), retrying in ${delayMs}ms: ${error.message}`);
+        setTimeout(() => void this.warmUpWithRetry(attempt + 1), delayMs).unref();
+        return;
+      }
+      this.warm = true;
+      this.logger.error(`Connection warm-up failed ${attempt} times, reporting ready without it: ${error.message}`);
+    }
+  }
+
+  /**
+   * Open PRISMA_WARM_CONNECTIONS pool connections (concurrent pings) and run one query
+   * through the engine, so the first real requests do not pay for it
+   */
+  async warmUp() {
+    const started = Date.now();
+    const connections = parseInt(process.env.PRISMA_WARM_CONNECTIONS || '4', 10);
+    await Promise.all(
+      Array.from({ length: connections }, () => this.$runCommandRaw({ ping: 1 })),
+    );
+    await this.product.findFirst({ select: { id: true } });
+    this.warm = true;
+    this.logger.log(`Connection pool warmed (${connections} connections) in ${Date.now() - started}ms`);
+  }
 }
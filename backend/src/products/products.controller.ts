@@ -1,5 +1,6 @@
-import { Controller, Get, Post, Patch, Body, Param, UseGuards } from '@nestjs/common';
-import { ApiTags, ApiOperation, ApiBearerAuth } from '@nestjs/swagger';
+import { Controller, Get, Post, Patch, Body, Param, Query, UseGuards } from '@nestjs/common';
+import { ApiTags, ApiOperation, ApiBearerAuth, ApiQuery } from '@nestjs/swagger';
+import { Prisma } from '@prisma/client';
 import { JwtAuthGuard } from '../common/guards/jwt-auth.guard';
 import { RolesGuard } from '../common/guards/roles.guard';
 import { Roles } from '../common/decorators/roles.decorator';
@@ -7,6 +8,9 @@ import { CurrentUser } from '../common/decorators/current-user.decorator';
 import { ProductsService } from './products.service';
 import { CreateProductDto, UpdateProductDto } from './dto';
 import { PrismaService } from '../prisma/prisma.service';
+import { parseFields } from '../common/utils/fieldsets.util';
+
+const PRODUCT_FIELDS = Object.values(Prisma.ProductScalarFieldEnum);
 
 @ApiTags('products')
 @ApiBearerAuth()
@@ -32,8 +36,9 @@ export class ProductsController {
   @Get('my')
   @Roles('TIPSTER')
   @ApiOperation({ summary: 'Get my products (Tipster only)' })
-  async getMyProducts(@CurrentUser() user: any) {
-    return this.productsService.findAllByUserId(user.id);
+  @ApiQuery({ name: 'fields', required: false, description: 'Comma-separated product fields, e.g. id,title,priceCents' })
+  async getMyProducts(@CurrentUser() user: any, @Query('fields') fields?: string) {
+    return this.productsService.findAllByUserId(user.id, parseFields(fields, PRODUCT_FIELDS));
   }
 
   @Get(':id')
@@ -1,6 +1,8 @@
 import { Injectable, NotFoundException, ForbiddenException } from '@nestjs/common';
 import { ModuleRef } from '@nestjs/core';
 import { PrismaService } from '../prisma/prisma.service';
+import { CacheService } from '../cache/cache.service';
+import { toSelect } from '../common/utils/fieldsets.util';
 import { CreateProductDto, UpdateProductDto } from './dto';
 
 @Injectable()
@@ -8,6 +10,7 @@ export class ProductsService {
   constructor(
     private prisma: PrismaService,
     private moduleRef: ModuleRef,
+    private cache: CacheService,
   ) {}
 
   async create(tipsterId: string, dto: CreateProductDto) {
@@ -51,14 +54,15 @@ export class ProductsService {
     return products[0] || null;
   }
 
-  async findAllByTipster(tipsterId: string) {
+  async findAllByTipster(tipsterId: string, fields?: string[] | null) {
     return this.prisma.product.findMany({
       where: { tipsterId },
       orderBy: { createdAt: 'desc' },
+      ...(fields && { select: toSelect(fields) }),
     });
   }
 
-  async findAllByUserId(userId: string) {
+  async findAllByUserId(userId: string, fields?: string[] | null) {
     // Get tipster profile first
     const tipsterProfile = await this.prisma.tipsterProfile.findUnique({
       where: { userId },
@@ -68,7 +72,7 @@ export class ProductsService {
       return [];
     }
     
-    return this.findAllByTipster(tipsterProfile.id);
+    return this.findAllByTipster(tipsterProfile.id, fields);
   }
 
   async findOne(id: string) {
@@ -112,6 +116,7 @@ export class ProductsService {
         u: { $set: updateData }
       }]
     });
+    await this.cache.invalidate('checkout_product', id);
 
     return this.findOne(id);
   }
@@ -131,6 +136,7 @@ export class ProductsService {
         u: { $set: { active: true, updated_at: { $date: new Date().toISOString() } } }
       }]
     });
+    await this.cache.invalidate('checkout_product', id);
 
     return this.findOne(id);
   }
@@ -150,6 +156,7 @@ export class ProductsService {
         u: { $set: { active: false, updated_at: { $date: new Date().toISOString() } } }
       }]
     });
+    await this.cache.invalidate('checkout_product', id);
 
     return this.findOne(id);
   }
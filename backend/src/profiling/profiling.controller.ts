@@ -0,0 +1,35 @@
+import { Body, Controller, Get, HttpCode, HttpStatus, Post, UseGuards } from '@nestjs/common';
+import { ApiTags, ApiOperation, ApiBearerAuth } from '@nestjs/swagger';
+import { JwtAuthGuard } from '../common/guards/jwt-auth.guard';
+import { RolesGuard } from '../common/guards/roles.guard';
+import { Roles } from '../common/decorators/roles.decorator';
+import { ProfilingOptions, ProfilingService } from './profiling.service';
+
+@ApiTags('admin')
+@ApiBearerAuth()
+@UseGuards(JwtAuthGuard, RolesGuard)
+@Roles('ADMIN', 'SUPERADMIN')
+@Controller('admin/profiling')
+export class ProfilingController {
+  constructor(private profiling: ProfilingService) {}
+
+  @Get()
+  @ApiOperation({ summary: 'Profiling state of the worker that answers (Admin only)' })
+  getStatus() {
+    return this.profiling.status;
+  }
+
+  @Post('start')
+  @HttpCode(HttpStatus.OK)
+  @ApiOperation({ summary: 'Start V8 CPU profiling and heap sampling (Admin only)' })
+  async start(@Body() options: ProfilingOptions) {
+    return this.profiling.start(options || {});
+  }
+
+  @Post('stop')
+  @HttpCode(HttpStatus.OK)
+  @ApiOperation({ summary: 'Stop profiling and return the .cpuprofile / .heapprofile (Admin only)' })
+  async stop() {
+    return this.profiling.stop();
+  }
+}
@@ -0,0 +1,11 @@
+import { Module } from '@nestjs/common';
+import { ConfigModule } from '@nestjs/config';
+import { ProfilingController } from './profiling.controller';
+import { ProfilingService } from './profiling.service';
+
+@Module({
+  imports: [ConfigModule],
+  controllers: [ProfilingController],
+  providers: [ProfilingService],
+})
+export class ProfilingModule {}
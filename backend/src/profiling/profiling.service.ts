@@ -0,0 +1,161 @@
+import { ConflictException, Injectable, Logger, NotFoundException, OnModuleDestroy } from '@nestjs/common';
+import { ConfigService } from '@nestjs/config';
+import { Session } from 'inspector';
+import { workerIndex } from '../common/cluster/worker-role';
+
+export interface ProfilingOptions {
+  label?: string;
+  samplingIntervalUs?: number; // CPU sampling period (V8 default 1000us)
+  heap?: boolean; // Also run the sampling heap profiler
+  heapSamplingIntervalBytes?: number;
+}
+
+export interface ProfilingResult {
+  label: string;
+  worker: number;
+  startedAt: string;
+  durationMs: number;
+  stoppedBy: 'request' | 'timeout';
+  cpuProfile: any; // .cpuprofile (Chrome DevTools / speedscope)
+  heapProfile: any | null; // .heapprofile
+}
+
+interface ActiveProfile {
+  label: string;
+  heap: boolean;
+  startedAt: Date;
+  timer: NodeJS.Timeout;
+}
+
+/**
+ * V8 CPU profiling and heap sampling of this process through the inspector protocol,
+ * started and stopped on demand (admin API) around a load test phase.
+ *
+ * One window at a time. A window left open stops itself after PROFILING_MAX_SECONDS
+ * (default 300) and its result is kept until the next stop call collects it.
+ */
+@Injectable()
+export class ProfilingService implements OnModuleDestroy {
+  private readonly logger = new Logger(ProfilingService.name);
+  private session: Session | null = null;
+  private active: ActiveProfile | null = null;
+  // Label of a window whose profilers are still being enabled
+  private starting: string | null = null;
+  private finished: ProfilingResult | null = null;
+  private readonly maxMs: number;
+
+  constructor(private config: ConfigService) {
+    this.maxMs = Number(this.config.get('PROFILING_MAX_SECONDS') || 300) * 1000;
+  }
+
+  onModuleDestroy() {
+    this.session?.disconnect();
+  }
+
+  get status() {
+    return {
+      worker: workerIndex(),
+      active: this.active && {
+        label: this.active.label,
+        heap: this.active.heap,
+        startedAt: this.active.startedAt.toISOString(),
+      },
+      resultPending: this.finished ? this.finished.label : null,
+    };
+  }
+
+  async start(options: ProfilingOptions = {}) {
+    const running = this.active?.label || this.starting;
+    if (running) {
+      throw new ConflictException(`Profiling "${running}" is already running on worker ${workerIndex()}`);
+    }
+    const label = options.label || `profile-${Date.now()}`;
+    const heap = options.heap !== false;
+
+    // Claim the window before the first await so a concurrent start is rejected
+    this.starting = label;
+    // Calls that undo what has been enabled so far, run in reverse if a later step fails
+    const undo: string[] = [];
+    try {
+      await this.post('Profiler.enable');
+      undo.push('Profiler.disable');
+      await this.post('Profiler.setSamplingInterval', { interval: options.samplingIntervalUs || 1000 });
+      await this.post('Profiler.start');
+      undo.push('Profiler.stop');
+      if (heap) {
+        await this.post('HeapProfiler.enable');
+        undo.push('HeapProfiler.disable');
+        await this.post('HeapProfiler.startSampling', {
+          samplingInterval: options.heapSamplingIntervalBytes || 32768,
+        });
+      }
+    } catch (error) {
+      for (const method of undo.reverse()) {
+        await this.post(method).catch(() => undefined);
+      }
+      throw error;
+    } finally {
+      this.starting = null;
+    }
+
+    const timer = setTimeout(() => {
+      this.collect('timeout').catch((error) => this.logger.error(`Could not stop profiling: ${error.message}`));
+    }, this.maxMs);
+    timer.unref();
+    this.active = { label, heap, startedAt: new Date(), timer };
+    this.finished = null;
+    this.logger.log(`🔬 Profiling "${label}" started (heap sampling ${heap ? 'on' : 'off'})`);
+    return this.status;
+  }
+
+  async stop(): Promise<ProfilingResult> {
+    if (this.active) {
+      await this.collect('request');
+    }
+    if (!this.finished) {
+      throw new NotFoundException('No profiling window to stop');
+    }
+    const result = this.finished;
+    this.finished = null;
+    return result;
+  }
+
+  private async collect(stoppedBy: ProfilingResult['stoppedBy']) {
+    const active = this.active;
+    if (!active) {
+      return;
+    }
+    this.active = null;
+    clearTimeout(active.timer);
+
+    const { profile: cpuProfile } = await this.post('Profiler.stop');
+    await this.post('Profiler.disable');
+    let heapProfile = null;
+    if (active.heap) {
+      heapProfile = (await this.post('HeapProfiler.stopSampling')).profile;
+      await this.post('HeapProfiler.disable');
+    }
+
+    const durationMs = Date.now() - active.startedAt.getTime();
+    this.finished = {
+      label: active.label,
+      worker: workerIndex(),
+      startedAt: active.startedAt.toISOString(),
+      durationMs,
+      stoppedBy,
+      cpuProfile,
+      heapProfile,
+    };
+    this.logger.log(`🔬 Profiling "${active.label}" stopped after ${durationMs}ms (${stoppedBy})`);
+  }
+
+  private post(method: string, params: Record<string, any> = {}): Promise<any> {
+    if (!this.session) {
+      this.session = new Session();
+      this.session.connect();
+    }
+    return new Promise((resolve, reject) => {
+      this.session.post(method, params, (error, result) => (error ? reject(error) : resolve(result)));
+    });
+  }
+}
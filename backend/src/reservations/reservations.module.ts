@@ -0,0 +1,12 @@
+import { Module } from '@nestjs/common';
+import { ConfigModule } from '@nestjs/config';
+import { PrismaModule } from '../prisma/prisma.module';
+import { OrdersModule } from '../orders/orders.module';
+import { SeatReservationService } from './seat-reservation.service';
+
+@Module({
+  imports: [PrismaModule, OrdersModule, ConfigModule],
+  providers: [SeatReservationService],
+  exports: [SeatReservationService],
+})
+export class ReservationsModule {}
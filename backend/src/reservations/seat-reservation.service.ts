@@ -0,0 +1,224 @@
+import {
+  Injectable,
+  Logger,
+  ConflictException,
+  OnModuleInit,
+  OnModuleDestroy,
+} from '@nestjs/common';
+import { ConfigService } from '@nestjs/config';
+import { PrismaService } from '../prisma/prisma.service';
+import { OrderRepository } from '../orders/order.repository';
+import { runsBackgroundDuties } from '../common/cluster/worker-role';
+
+export interface SeatHold {
+  orderId: string;
+  productId: string;
+  expiresAt: Date;
+}
+
+const SWEEP_INTERVAL_MS = 60 * 1000;
+const SWEEP_BATCH_SIZE = 500;
+// Extra time before the sweeper reclaims a hold, so a payment completed
+// right at session expiry still finds its seat
+const SWEEP_GRACE_MS = 5 * 60 * 1000;
+
+/**
+ * Atomic seat counter for capacity-limited products.
+ *
+ * Counters live on the product document (seats_held / seats_sold) so the
+ * capacity check and the increment happen in a single findAndModify.
+ * Every hold is also recorded in seat_holds (keyed by order id) with an
+ * expiry, which makes confirm/release idempotent and lets the sweeper
+ * reclaim seats from abandoned checkouts.
+ */
+@Injectable()
+export class SeatReservationService implements OnModuleInit, OnModuleDestroy {
+  private readonly logger = new Logger(SeatReservationService.name);
+  private sweepTimer: NodeJS.Timeout | null = null;
+  readonly holdTtlMs: number;
+
+  constructor(
+    private prisma: PrismaService,
+    private config: ConfigService,
+    private orders: OrderRepository,
+  ) {
+    this.holdTtlMs = Number(this.config.get('SEAT_HOLD_TTL_MINUTES') || 30) * 60 * 1000;
+  }
+
+  async onModuleInit() {
+    try {
+      await this.prisma.$runCommandRaw({
+        createIndexes: 'seat_holds',
+        indexes: [
+          { key: { status: 1, expires_at: 1 }, name: 'status_expires_at' },
+          { key: { product_id: 1, status: 1 }, name: 'product_id_status' },
+        ],
+      });
+    } catch (error) {
+      this.logger.warn(`Could not ensure seat_holds indexes: ${error.message}`);
+    }
+
+    if (!runsBackgroundDuties()) {
+      return;
+    }
+    this.sweepTimer = setInterval(() => {
+      this.releaseExpiredHolds().catch((error) =>
+        this.logger.error('Error releasing expired seat holds:', error),
+      );
+    }, SWEEP_INTERVAL_MS);
+    this.sweepTimer.unref();
+  }
+
+  onModuleDestroy() {
+    if (this.sweepTimer) {
+      clearInterval(this.sweepTimer);
+    }
+  }
+
+  /**
+   * Reserve one seat for an order. Returns null when the product has no capacity limit,
+   * throws ConflictException when it is sold out.
+   */
+  async reserve(
+    product: { id: string; capacityLimit?: number | null },
+    orderId: string,
+  ): Promise<SeatHold | null> {
+    if (!product.capacityLimit) {
+      return null;
+    }
+
+    if (!(await this.takeSeat(product.id, { seats_held: 1 }))) {
+      this.logger.warn(`Product ${product.id} is sold out (capacity ${product.capacityLimit})`);
+      throw new ConflictException('No quedan plazas disponibles para este producto');
+    }
+
+    const now = new Date();
+    const expiresAt = new Date(now.getTime() + this.holdTtlMs);
+
+    try {
+      await this.prisma.$runCommandRaw({
+        insert: 'seat_holds',
+        documents: [{
+          _id: orderId,
+          product_id: product.id,
+          status: 'HELD',
+          expires_at: { $date: expiresAt.toISOString() },
+          created_at: { $date: now.toISOString() },
+          updated_at: { $date: now.toISOString() },
+        }],
+      });
+    } catch (error) {
+      // Give the seat back if we could not record the hold
+      await this.incrementCounters(product.id, { seats_held: -1 });
+      throw error;
+    }
+
+    return { orderId, productId: product.id, expiresAt };
+  }
+
+  /**
+   * Turn a hold into a sold seat once the order is paid (idempotent)
+   */
+  async confirm(orderId: string): Promise<void> {
+    const held = await this.transitionHold(orderId, 'HELD', 'CONFIRMED');
+    if (held) {
+      await this.incrementCounters(held.product_id, { seats_held: -1, seats_sold: 1 });
+      return;
+    }
+
+    // Payment landed after the hold was reclaimed: the seat is the buyer's if one is still free
+    const released = await this.transitionHold(orderId, 'RELEASED', 'CONFIRMED');
+    if (!released) {
+      return;
+    }
+    if (await this.takeSeat(released.product_id, { seats_sold: 1 })) {
+      this.logger.warn(`Late payment for order ${orderId}: confirming seat after its hold expired`);
+      return;
+    }
+    await this.transitionHold(orderId, 'CONFIRMED', 'OVERSOLD');
+    this.logger.error(
+      `Late payment for order ${orderId}: product ${released.product_id} is full, hold marked OVERSOLD (refund needed)`,
+    );
+  }
+
+  /**
+   * Give a held seat back (expired or failed checkout). Idempotent.
+   */
+  async release(orderId: string): Promise<boolean> {
+    const held = await this.transitionHold(orderId, 'HELD', 'RELEASED');
+    if (!held) {
+      return false;
+    }
+    await this.incrementCounters(held.product_id, { seats_held: -1 });
+    return true;
+  }
+
+  /**
+   * Release holds whose checkout was abandoned and expire their pending orders
+   */
+  async releaseExpiredHolds(): Promise<number> {
+    const cutoff = new Date(Date.now() - SWEEP_GRACE_MS);
+    const result = await this.prisma.$runCommandRaw({
+      find: 'seat_holds',
+      filter: { status: 'HELD', expires_at: { $lt: { $date: cutoff.toISOString() } } },
+      projection: { _id: 1 },
+      limit: SWEEP_BATCH_SIZE,
+    }) as any;
+
+    const orderIds: string[] = (result.cursor?.firstBatch || []).map((doc: any) => doc._id);
+    const released: string[] = [];
+
+    for (const orderId of orderIds) {
+      if (await this.release(orderId)) {
+        released.push(orderId);
+      }
+    }
+
+    if (released.length > 0) {
+      await this.orders.expirePending(released);
+      this.logger.log(`Released ${released.length} expired seat holds`);
+    }
+    return released.length;
+  }
+
+  /**
+   * Apply `inc` to the product only while held + sold is under capacity (one findAndModify)
+   */
+  private async takeSeat(productId: string, inc: Record<string, number>): Promise<boolean> {
+    const result = await this.prisma.$runCommandRaw({
+      findAndModify: 'products',
+      query: {
+        _id: { $oid: productId },
+        $expr: {
+          $lt: [
+            { $add: [{ $ifNull: ['$seats_held', 0] }, { $ifNull: ['$seats_sold', 0] }] },
+            '$capacity_limit',
+          ],
+        },
+      },
+      update: { $inc: inc },
+      fields: { _id: 1 },
+    }) as any;
+    return Boolean(result.value);
+  }
+
+  private async transitionHold(orderId: string, from: string, to: string) {
+    const result = await this.prisma.$runCommandRaw({
+      findAndModify: 'seat_holds',
+      query: { _id: orderId, status: from },
+      update: { $set: { status: to, updated_at: { $date: new Date().toISOString() } } },
+      fields: { product_id: 1 },
+    }) as any;
+    return result.value as { product_id: string } | null;
+  }
+
+  private async incrementCounters(productId: string, inc: Record<string, number>) {
+    await this.prisma.$runCommandRaw({
+      update: 'products',
+      updates: [{
+        q: { _id: { $oid: productId } },
+        u: { $inc: inc },
+      }],
+    });
+  }
+}
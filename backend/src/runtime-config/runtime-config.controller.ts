@@ -0,0 +1,27 @@
+import { Body, Controller, Get, Param, Put, UseGuards } from '@nestjs/common';
+import { ApiTags, ApiOperation, ApiBearerAuth } from '@nestjs/swagger';
+import { JwtAuthGuard } from '../common/guards/jwt-auth.guard';
+import { RolesGuard } from '../common/guards/roles.guard';
+import { Roles } from '../common/decorators/roles.decorator';
+import { RuntimeConfigService } from './runtime-config.service';
+
+@ApiTags('admin')
+@ApiBearerAuth()
+@UseGuards(JwtAuthGuard, RolesGuard)
+@Roles('ADMIN', 'SUPERADMIN')
+@Controller('admin/config')
+export class RuntimeConfigController {
+  constructor(private runtimeConfig: RuntimeConfigService) {}
+
+  @Get()
+  @ApiOperation({ summary: 'Runtime config snapshot served by this process (Admin only)' })
+  getSnapshot() {
+    return this.runtimeConfig.snapshot;
+  }
+
+  @Put(':key')
+  @ApiOperation({ summary: 'Set a runtime config key, e.g. payments.redsys_enabled (Admin only)' })
+  async setKey(@Param('key') key: string, @Body() body: { value: any }) {
+    return this.runtimeConfig.set(key, body?.value);
+  }
+}
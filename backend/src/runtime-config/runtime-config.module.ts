@@ -0,0 +1,13 @@
+import { Module } from '@nestjs/common';
+import { ConfigModule } from '@nestjs/config';
+import { PrismaModule } from '../prisma/prisma.module';
+import { RuntimeConfigController } from './runtime-config.controller';
+import { RuntimeConfigService } from './runtime-config.service';
+
+@Module({
+  imports: [PrismaModule, ConfigModule],
+  controllers: [RuntimeConfigController],
+  providers: [RuntimeConfigService],
+  exports: [RuntimeConfigService],
+})
+export class RuntimeConfigModule {}
@@ -0,0 +1,177 @@
+import { BadRequestException, Injectable, Logger, OnModuleDestroy, OnModuleInit } from '@nestjs/common';
+import { ConfigService } from '@nestjs/config';
+import { PrismaService } from '../prisma/prisma.service';
+
+export interface ConfigSnapshot {
+  version: string; // Changes whenever a document is added, edited or removed
+  loadedAt: string;
+  values: Readonly<Record<string, any>>;
+}
+
+// JSON type of the keys the code reads; other keys take any JSON value
+const KEY_TYPES: Record<string, 'boolean' | 'number' | 'string'> = {
+  'payments.crypto_enabled': 'boolean',
+  'payments.redsys_enabled': 'boolean',
+  'payments.stripe_enabled': 'boolean',
+};
+
+const EMPTY_SNAPSHOT: ConfigSnapshot = Object.freeze({
+  version: 'empty',
+  loadedAt: new Date(0).toISOString(),
+  values: Object.freeze({}),
+});
+
+/**
+ * Runtime settings from the configs collection (key -> value_json), e.g. payment
+ * gateway switches that must change during an outage without a redeploy.
+ *
+ * Reads never touch the database: they go to an immutable snapshot that is swapped
+ * as a whole. Every CONFIG_POLL_INTERVAL_MS each process asks MongoDB for the
+ * collection version (document count + latest updated_at, one small aggregate) and
+ * reloads the documents only when it changed. Change streams would avoid the polling
+ * but need a replica set and a driver cursor, which Prisma does not expose.
+ */
+@Injectable()
+export class RuntimeConfigService implements OnModuleInit, OnModuleDestroy {
+  private readonly logger = new Logger(RuntimeConfigService.name);
+  private current: ConfigSnapshot = EMPTY_SNAPSHOT;
+  private pollTimer: NodeJS.Timeout | null = null;
+  private inFlight: Promise<boolean> | null = null;
+  readonly pollIntervalMs: number;
+
+  constructor(
+    private prisma: PrismaService,
+    private config: ConfigService,
+  ) {
+    this.pollIntervalMs = Number(this.config.get('CONFIG_POLL_INTERVAL_MS') || 1000);
+  }
+
+  async onModuleInit() {
+    try {
+      await this.prisma.$runCommandRaw({
+        createIndexes: 'configs',
+        indexes: [{ key: { updated_at: -1 }, name: 'updated_at' }],
+      });
+      await this.refresh();
+    } catch (error) {
+      this.logger.warn(`Could not load runtime config, using defaults: ${error.message}`);
+    }
+
+    this.pollTimer = setInterval(() => {
+      this.refresh().catch((error) => this.logger.warn(`Runtime config poll failed: ${error.message}`));
+    }, this.pollIntervalMs);
+    this.pollTimer.unref();
+  }
+
+  onModuleDestroy() {
+    if (this.pollTimer) {
+      clearInterval(this.pollTimer);
+    }
+  }
+
+  get snapshot(): ConfigSnapshot {
+    return this.current;
+  }
+
+  get<T>(key: string, fallback: T): T {
+    const value = this.current.values[key];
+    return value === undefined ? fallback : value;
+  }
+
+  /**
+   * Upsert one key and reload this process right away (the others follow on their next poll).
+   * The value is served as soon as it is written, so a missing one or the wrong type for a
+   * known key is refused
+   */
+  async set(key: string, value: any): Promise<ConfigSnapshot> {
+    if (value === undefined) {
+      throw new BadRequestException('value is required');
+    }
+    const expected = KEY_TYPES[key];
+    if (expected && typeof value !== expected) {
+      throw new BadRequestException(`${key} must be a ${expected}`);
+    }
+    const now = { $date: new Date().toISOString() };
+    await this.prisma.$runCommandRaw({
+      update: 'configs',
+      updates: [{
+        q: { key },
+        u: { $set: { value_json: value, updated_at: now }, $setOnInsert: { key, created_at: now } },
+        upsert: true,
+      }],
+    });
+    await this.refresh(true);
+    return this.current;
+  }
+
+  /**
+   * Reload the snapshot if the collection version moved (or always, with force)
+   */
+  async refresh(force = false): Promise<boolean> {
+    if (this.inFlight) {
+      if (!force) {
+        return this.inFlight;
+      }
+      // A poll already running may have read the collection before our write
+      await this.inFlight.catch(() => undefined);
+    }
+    const run = this.reload(force).finally(() => {
+      if (this.inFlight === run) {
+        this.inFlight = null;
+      }
+    });
+    this.inFlight = run;
+    return run;
+  }
+
+  private async reload(force: boolean): Promise<boolean> {
+    const version = await this.readVersion();
+    if (!force && version === this.current.version) {
+      return false;
+    }
+    const result = await this.prisma.$runCommandRaw({
+      find: 'configs',
+      filter: {},
+      projection: { key: 1, value_json: 1 },
+      batchSize: 1000,
+    }) as any;
+
+    const values: Record<string, any> = {};
+    for (const doc of result.cursor?.firstBatch || []) {
+      values[doc.key] = deepFreeze(doc.value_json);
+    }
+    const previous = this.current.version;
+    this.current = Object.freeze({
+      version,
+      loadedAt: new Date().toISOString(),
+      values: Object.freeze(values),
+    });
+    if (previous !== version) {
+      this.logger.log(`Runtime config ${version} loaded (${Object.keys(values).length} keys)`);
+    }
+    return true;
+  }
+
+  private async readVersion(): Promise<string> {
+    const result = await this.prisma.$runCommandRaw({
+      aggregate: 'configs',
+      pipeline: [{ $group: { _id: null, count: { $sum: 1 }, updated: { $max: '$updated_at' } } }],
+      cursor: {},
+    }) as any;
+    const stats = result.cursor?.firstBatch?.[0];
+    if (!stats) {
+      return EMPTY_SNAPSHOT.version;
+    }
+    // { $date: iso } or { $date: { $numberLong: ms } } depending on the date range
+    const updated = stats.updated?.$date?.$numberLong ?? (Date.parse(stats.updated?.$date) || 0);
+    return `${stats.count}-${updated}`;
+  }
+}
+
+function deepFreeze<T>(value: T): T {
+  if (value && typeof value === 'object' && !Object.isFrozen(value)) {
+    Object.values(value).forEach(deepFreeze);
+    Object.freeze(value);
+  }
+  return value;
+}
@@ -0,0 +1,87 @@
+import { INestApplication, Logger } from '@nestjs/common';
+import { DocumentBuilder, OpenAPIObject, SwaggerModule } from '@nestjs/swagger';
+import { existsSync, readFileSync, writeFileSync } from 'fs';
+import { join } from 'path';
+
+const logger = new Logger('Swagger');
+
+function buildDocument(app: INestApplication): OpenAPIObject {
+  const config = new DocumentBuilder()
+    .setTitle('Antia API')
+    .setDescription('API completa para plataforma de pronósticos deportivos')
+    .setVersion('1.0')
+    .addBearerAuth()
+    .addCookieAuth('access_token')
+    .addTag('auth', 'Autenticación y registro')
+    .addTag('users', 'Gestión de usuarios')
+    .addTag('tipsters', 'Panel de Tipster')
+    .addTag('clients', 'Panel de Cliente')
+    .addTag('products', 'Productos y servicios')
+    .addTag('orders', 'Órdenes y pagos')
+    .addTag('referrals', 'Sistema de referidos')
+    .addTag('commissions', 'Comisiones y ganancias')
+    .addTag('payouts', 'Liquidaciones')
+    .addTag('houses', 'Casas de apuestas')
+    .addTag('webhooks', 'Webhooks externos')
+    .addTag('tickets', 'Soporte y tickets')
+    .addTag('admin', 'Panel de administración')
+    .build();
+
+  const started = Date.now();
+  const document = SwaggerModule.createDocument(app, config);
+  logger.log(`Document generated in ${Date.now() - started}ms`);
+  return document;
+}
+
+/**
+ * Read the document written by a previous start of this build. The cache lives next to
+ * the compiled code, so every build (deleteOutDir) starts without one.
+ */
+function loadCachedDocument(cacheFile: string): OpenAPIObject | null {
+  if (!existsSync(cacheFile)) {
+    return null;
+  }
+  try {
+    return JSON.parse(readFileSync(cacheFile, 'utf8'));
+  } catch (error) {
+    logger.warn(`Ignoring unreadable Swagger cache ${cacheFile}: ${error.message}`);
+    return null;
+  }
+}
+
+/**
+ * SWAGGER_MODE:
+ * - lazy (default): the document is built (or read from SWAGGER_CACHE_FILE) on the first
+ *   request to /api/docs, so it stays off the startup path
+ * - eager: built before listen, as before
+ * - off: no docs
+ */
+export function setupSwagger(app: INestApplication) {
+  const mode = process.env.SWAGGER_MODE || 'lazy';
+  if (mode === 'off') {
+    logger.log('Swagger disabled (SWAGGER_MODE=off)');
+    return;
+  }
+
+  if (mode === 'eager') {
+    SwaggerModule.setup('api/docs', app, buildDocument(app));
+    return;
+  }
+
+  const cacheFile = process.env.SWAGGER_CACHE_FILE || join(__dirname, 'swagger.json');
+  let document: OpenAPIObject | null = null;
+  SwaggerModule.setup('api/docs', app, () => {
+    if (!document) {
+      document = loadCachedDocument(cacheFile);
+    }
+    if (!document) {
+      document = buildDocument(app);
+      try {
+        writeFileSync(cacheFile, JSON.stringify(document));
+      } catch (error) {
+        logger.warn(`Could not write Swagger cache ${cacheFile}: ${error.message}`);
+      }
+    }
+    return document;
+  });
+}
@@ -0,0 +1,44 @@
+import { Body, Controller, Delete, Get, HttpCode, HttpStatus, Param, Post, Query, UseGuards } from '@nestjs/common';
+import { ApiTags, ApiOperation, ApiBearerAuth } from '@nestjs/swagger';
+import { JwtAuthGuard } from '../common/guards/jwt-auth.guard';
+import { RolesGuard } from '../common/guards/roles.guard';
+import { Roles } from '../common/decorators/roles.decorator';
+import { InviteLinkPoolService } from './invite-link-pool.service';
+
+@ApiTags('admin')
+@ApiBearerAuth()
+@UseGuards(JwtAuthGuard, RolesGuard)
+@Roles('ADMIN', 'SUPERADMIN')
+@Controller('admin/invite-links')
+export class InviteLinkPoolController {
+  constructor(private inviteLinks: InviteLinkPoolService) {}
+
+  @Get()
+  @ApiOperation({ summary: 'Available and claimed invite links per channel (Admin only)' })
+  async getStats(@Query('channelId') channelId?: string) {
+    return this.inviteLinks.getStats(channelId);
+  }
+
+  @Post(':channelId/refill')
+  @HttpCode(HttpStatus.OK)
+  @ApiOperation({ summary: 'Top a channel pool up to INVITE_POOL_SIZE now (Admin only)' })
+  async refill(@Param('channelId') channelId: string) {
+    return this.inviteLinks.refill(channelId);
+  }
+
+  @Post(':channelId/claim')
+  @HttpCode(HttpStatus.OK)
+  @ApiOperation({ summary: "Hand out (or look up) an order's single-use invite link, e.g. to resend it (Admin only)" })
+  async claim(
+    @Param('channelId') channelId: string,
+    @Body() body: { orderId: string; telegramUserId?: string },
+  ) {
+    return this.inviteLinks.claim(channelId, body.orderId, body.telegramUserId);
+  }
+
+  @Delete(':channelId')
+  @ApiOperation({ summary: 'Discard the unclaimed links of a channel (Admin only)' })
+  async discard(@Param('channelId') channelId: string) {
+    return { discarded: await this.inviteLinks.discard(channelId) };
+  }
+}
@@ -0,0 +1,435 @@
+import { Injectable, Logger, OnModuleDestroy, OnModuleInit } from '@nestjs/common';
+import { ConfigService } from '@nestjs/config';
+import { PrismaService } from '../prisma/prisma.service';
+import { MetricsService } from '../metrics/metrics.service';
+import { runsBackgroundDuties } from '../common/cluster/worker-role';
+
+/**
+ * Creates one single-use invite link for a channel (Bot API createChatInviteLink)
+ */
+export type InviteLinkMinter = (channelId: string) => Promise<string>;
+
+/**
+ * Revokes one invite link of a channel (Bot API revokeChatInviteLink)
+ */
+export type InviteLinkRevoker = (channelId: string, inviteLink: string) => Promise<void>;
+
+export type InviteLinkSource = 'existing' | 'pool' | 'minted';
+
+export interface ClaimedInviteLink {
+  inviteLink: string;
+  source: InviteLinkSource;
+}
+
+export interface RefillResult {
+  channelId: string;
+  minted: number;
+  failed: number;
+  available: number;
+  durationMs: number;
+}
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+/**
+ * Single-use invite links (member_limit 1) minted ahead of time for every
+ * connected channel, so a payment notification hands the buyer a personal link
+ * without waiting on the Bot API.
+ *
+ * A claim takes the oldest AVAILABLE link of the channel with one findAndModify and
+ * stamps it with the order; the unique order_id index makes a repeated claim for the
+ * same order return the same link. When a claim leaves fewer than
+ * INVITE_POOL_LOW_WATERMARK links the channel is topped up to INVITE_POOL_SIZE in the
+ * background (worker 0 also tops every channel up periodically). An empty pool mints
+ * a link on the spot.
+ */
+@Injectable()
+export class InviteLinkPoolService implements OnModuleInit, OnModuleDestroy {
+  private readonly logger = new Logger(InviteLinkPoolService.name);
+  private readonly refilling = new Map<string, Promise<RefillResult>>();
+  private minter: InviteLinkMinter | null = null;
+  private revoker: InviteLinkRevoker | null = null;
+  private refillTimer: NodeJS.Timeout | null = null;
+  private nextMintAt = 0;
+
+  private readonly poolSize: number;
+  private readonly lowWatermark: number;
+  private readonly mintConcurrency: number;
+  private readonly mintRatePerSecond: number;
+  private readonly intervalMs: number;
+
+  constructor(
+    private prisma: PrismaService,
+    private config: ConfigService,
+    private metrics: MetricsService,
+  ) {
+    this.poolSize = Number(this.config.get('INVITE_POOL_SIZE') || 50);
+    this.lowWatermark = Number(this.config.get('INVITE_POOL_LOW_WATERMARK') || 10);
+    this.mintConcurrency = Number(this.config.get('INVITE_POOL_MINT_CONCURRENCY') || 4);
+    this.mintRatePerSecond = Number(this.config.get('INVITE_POOL_MINT_RATE_PER_SECOND') || 20);
+    this.intervalMs = Number(this.config.get('INVITE_POOL_REFILL_INTERVAL_SECONDS') || 300) * 1000;
+  }
+
+  async onModuleInit() {
+    try {
+      await this.prisma.$runCommandRaw({
+        createIndexes: 'invite_links',
+        indexes: [
+          { key: { channel_id: 1, status: 1, created_at: 1 }, name: 'channel_id_status_created_at' },
+          {
+            key: { order_id: 1 },
+            name: 'order_id',
+            unique: true,
+            partialFilterExpression: { order_id: { $type: 'string' } },
+          },
+        ],
+      });
+    } catch (error) {
+      this.logger.warn(`Could not ensure invite_links indexes: ${error.message}`);
+    }
+
+    if (this.config.get('INVITE_POOL_ENABLED') === 'false' || !runsBackgroundDuties()) {
+      return;
+    }
+    this.refillTimer = setInterval(() => {
+      this.refillAll().catch((error) => this.logger.error('Error refilling invite link pools:', error));
+    }, this.intervalMs);
+    this.refillTimer.unref();
+  }
+
+  onModuleDestroy() {
+    if (this.refillTimer) {
+      clearInterval(this.refillTimer);
+    }
+  }
+
+  /**
+   * TelegramService hands over its (instrumented) Bot API client
+   */
+  setMinter(minter: InviteLinkMinter) {
+    this.minter = minter;
+  }
+
+  setRevoker(revoker: InviteLinkRevoker) {
+    this.revoker = revoker;
+  }
+
+  /**
+   * The order's personal invite link, also recorded on its ChannelAccessGrant.
+   * Never throws: null lets the caller fall back to the tipster's static link.
+   */
+  async claim(channelId: string, orderId: string, telegramUserId?: string | null): Promise<ClaimedInviteLink | null> {
+    const started = process.hrtime.bigint();
+    try {
+      const existing = await this.findClaim(orderId);
+      let claimed: ClaimedInviteLink | null = existing ? { inviteLink: existing, source: 'existing' } : null;
+      if (!claimed) {
+        const pooled = await this.takeFromPool(channelId, orderId, telegramUserId);
+        if (pooled) {
+          claimed = { inviteLink: pooled, source: 'pool' };
+        } else if (this.minter) {
+          claimed = await this.mintClaimed(channelId, orderId, telegramUserId);
+        }
+        this.refillIfLow(channelId);
+      }
+
+      if (claimed) {
+        await this.prisma.$runCommandRaw({
+          update: 'channel_access_grants',
+          updates: [{ q: { order_id: orderId }, u: { $set: { invite_link: claimed.inviteLink } } }],
+        });
+        this.metrics.observeInviteLinkClaim(claimed.source, Number(process.hrtime.bigint() - started) / 1e9);
+      }
+      return claimed;
+    } catch (error) {
+      this.logger.warn(`Could not claim an invite link for order ${orderId}: ${error.message}`);
+      return null;
+    }
+  }
+
+  /**
+   * Top the channel's pool up to INVITE_POOL_SIZE (one refill per channel at a time in this process)
+   */
+  refill(channelId: string): Promise<RefillResult> {
+    const running = this.refilling.get(channelId);
+    if (running) {
+      return running;
+    }
+    const promise = this.fill(channelId).finally(() => this.refilling.delete(channelId));
+    this.refilling.set(channelId, promise);
+    // Claims that ran meanwhile may have drained it below the watermark again
+    promise
+      .then((result) => result.minted && !result.failed && this.refillIfLow(channelId))
+      .catch(() => undefined);
+    return promise;
+  }
+
+  /**
+   * Revoke and drop the unclaimed links of a channel (e.g. after it is disconnected).
+   * They are taken out of the pool first (status REVOKING) so no claim hands one out,
+   * then revoked at the mint rate. A link that cannot be revoked keeps its REVOKING row
+   * so it can be found and revoked by hand; the rest are deleted.
+   */
+  async discard(channelId: string): Promise<number> {
+    await this.prisma.$runCommandRaw({
+      update: 'invite_links',
+      updates: [{
+        q: { channel_id: channelId, status: 'AVAILABLE' },
+        u: { $set: { status: 'REVOKING' } },
+        multi: true,
+      }],
+    });
+    const found = await this.prisma.$runCommandRaw({
+      find: 'invite_links',
+      filter: { channel_id: channelId, status: 'REVOKING' },
+      projection: { invite_link: 1 },
+      batchSize: 1000,
+    }) as any;
+    const pending: string[] = (found.cursor?.firstBatch || []).map((row: any) => row.invite_link);
+    if (!pending.length) {
+      return 0;
+    }
+
+    const revoked: string[] = [];
+    let failed = 0;
+    let next = 0;
+    const worker = async () => {
+      while (next < pending.length) {
+        const inviteLink = pending[next++];
+        await this.waitForMintSlot();
+        try {
+          await this.revoker!(channelId, inviteLink);
+          revoked.push(inviteLink);
+        } catch (error) {
+          const retryAfter = error?.response?.parameters?.retry_after;
+          if (retryAfter) {
+            // Flood control: same back-off as fill(), then try this link again
+            this.nextMintAt = Math.max(this.nextMintAt, Date.now() + retryAfter * 1000);
+            pending.push(inviteLink);
+            continue;
+          }
+          failed++;
+          this.logger.warn(`Could not revoke invite link of ${channelId}: ${error?.response?.description || error.message}`);
+        }
+      }
+    };
+    if (this.revoker) {
+      await Promise.all(Array.from({ length: Math.min(this.mintConcurrency, pending.length) }, worker));
+    } else {
+      failed = pending.length;
+    }
+
+    if (revoked.length) {
+      await this.prisma.$runCommandRaw({
+        delete: 'invite_links',
+        deletes: [{ q: { channel_id: channelId, invite_link: { $in: revoked } }, limit: 0 }],
+      });
+    }
+    if (failed) {
+      this.logger.warn(`${failed} invite links of ${channelId} were left unrevoked (status REVOKING)`);
+    }
+    return revoked.length;
+  }
+
+  async getStats(channelId?: string) {
+    const result = await this.prisma.$runCommandRaw({
+      aggregate: 'invite_links',
+      pipeline: [
+        ...(channelId ? [{ $match: { channel_id: channelId } }] : []),
+        { $group: { _id: { channel: '$channel_id', status: '$status' }, count: { $sum: 1 } } },
+      ],
+      cursor: {},
+    }) as any;
+
+    const channels: Record<string, { available: number; claimed: number }> = {};
+    for (const row of result.cursor?.firstBatch || []) {
+      const stats = (channels[row._id.channel] ||= { available: 0, claimed: 0 });
+      if (row._id.status === 'AVAILABLE' || row._id.status === 'CLAIMED') {
+        stats[row._id.status === 'AVAILABLE' ? 'available' : 'claimed'] = row.count;
+      }
+    }
+    return { poolSize: this.poolSize, lowWatermark: this.lowWatermark, channels };
+  }
+
+  private async findClaim(orderId: string): Promise<string | null> {
+    const result = await this.prisma.$runCommandRaw({
+      find: 'invite_links',
+      filter: { order_id: orderId },
+      projection: { invite_link: 1 },
+      limit: 1,
+    }) as any;
+    return result.cursor?.firstBatch?.[0]?.invite_link ?? null;
+  }
+
+  private claimFields(orderId: string, telegramUserId?: string | null) {
+    return {
+      status: 'CLAIMED',
+      order_id: orderId,
+      telegram_user_id: telegramUserId ?? null,
+      claimed_at: { $date: new Date().toISOString() },
+    };
+  }
+
+  private async takeFromPool(channelId: string, orderId: string, telegramUserId?: string | null): Promise<string | null> {
+    try {
+      const result = await this.prisma.$runCommandRaw({
+        findAndModify: 'invite_links',
+        query: { channel_id: channelId, status: 'AVAILABLE' },
+        sort: { created_at: 1 },
+        update: { $set: this.claimFields(orderId, telegramUserId) },
+        fields: { invite_link: 1 },
+      }) as any;
+      return result.value?.invite_link ?? null;
+    } catch (error) {
+      // A concurrent claim for the same order won the unique order_id
+      if (String(error.message).includes('E11000')) {
+        return this.findClaim(orderId);
+      }
+      throw error;
+    }
+  }
+
+  /**
+   * Empty pool: mint the buyer's link now and store it as already claimed
+   */
+  private async mintClaimed(
+    channelId: string,
+    orderId: string,
+    telegramUserId?: string | null,
+  ): Promise<ClaimedInviteLink | null> {
+    const inviteLink = await this.minter!(channelId);
+    try {
+      await this.prisma.$runCommandRaw({
+        insert: 'invite_links',
+        documents: [{
+          channel_id: channelId,
+          invite_link: inviteLink,
+          ...this.claimFields(orderId, telegramUserId),
+          created_at: { $date: new Date().toISOString() },
+        }],
+      });
+      return { inviteLink, source: 'minted' };
+    } catch (error) {
+      if (String(error.message).includes('E11000')) {
+        const existing = await this.findClaim(orderId);
+        return existing && { inviteLink: existing, source: 'existing' };
+      }
+      throw error;
+    }
+  }
+
+  private refillIfLow(channelId: string) {
+    if (!this.minter || this.refilling.has(channelId)) {
+      return;
+    }
+    this.countAvailable(channelId, this.lowWatermark)
+      .then((available) => {
+        if (available < this.lowWatermark) {
+          return this.refill(channelId);
+        }
+      })
+      .catch((error) => this.logger.warn(`Could not refill invite links of ${channelId}: ${error.message}`));
+  }
+
+  private async countAvailable(channelId: string, limit?: number): Promise<number> {
+    const result = await this.prisma.$runCommandRaw({
+      count: 'invite_links',
+      query: { channel_id: channelId, status: 'AVAILABLE' },
+      ...(limit && { limit }),
+    }) as any;
+    return result.n || 0;
+  }
+
+  private async fill(channelId: string): Promise<RefillResult> {
+    const started = Date.now();
+    const available = await this.countAvailable(channelId);
+    const missing = this.poolSize - available;
+    const links: string[] = [];
+    let failed = 0;
+    let next = 0;
+    let stopped = false;
+
+    const worker = async () => {
+      while (!stopped && next < missing) {
+        next++;
+        await this.waitForMintSlot();
+        try {
+          links.push(await this.minter!(channelId));
+        } catch (error) {
+          const retryAfter = error?.response?.parameters?.retry_after;
+          if (retryAfter) {
+            // Flood control: hold every refill in this process back and try this link again
+            this.nextMintAt = Math.max(this.nextMintAt, Date.now() + retryAfter * 1000);
+            next--;
+            continue;
+          }
+          // Bot removed from the channel, channel gone...: the next refill will tell
+          failed++;
+          stopped = true;
+          this.logger.warn(`Could not mint invite links for ${channelId}: ${error?.response?.description || error.message}`);
+        }
+      }
+    };
+    if (missing > 0 && this.minter) {
+      await Promise.all(Array.from({ length: Math.min(this.mintConcurrency, missing) }, worker));
+    }
+
+    if (links.length) {
+      const now = { $date: new Date().toISOString() };
+      await this.prisma.$runCommandRaw({
+        insert: 'invite_links',
+        documents: links.map((inviteLink) => ({
+          channel_id: channelId,
+          invite_link: inviteLink,
+          status: 'AVAILABLE',
+          created_at: now,
+        })),
+        ordered: false,
+      });
+    }
+
+    const result: RefillResult = {
+      channelId,
+      minted: links.length,
+      failed,
+      available: available + links.length,
+      durationMs: Date.now() - started,
+    };
+    if (links.length) {
+      this.logger.log(`🔗 Minted ${links.length} invite links for ${channelId} in ${result.durationMs}ms`);
+    }
+    return result;
+  }
+
+  /**
+   * Every connected channel (tipster channels and per-product channels)
+   */
+  private async refillAll() {
+    const channels = new Set<string>();
+    for (const collection of ['tipster_profiles', 'products']) {
+      const result = await this.prisma.$runCommandRaw({
+        distinct: collection,
+        key: 'telegram_channel_id',
+        query: { telegram_channel_id: { $type: 'string' } },
+      }) as any;
+      for (const channelId of result.values || []) {
+        channels.add(channelId);
+      }
+    }
+    for (const channelId of channels) {
+      await this.refill(channelId);
+    }
+  }
+
+  /**
+   * Space Bot API calls 1/rate apart across all concurrent refills
+   */
+  private async waitForMintSlot() {
+    const now = Date.now();
+    const slot = Math.max(now, this.nextMintAt);
+    this.nextMintAt = slot + 1000 / this.mintRatePerSecond;
+    if (slot > now) {
+      await sleep(slot - now);
+    }
+  }
+}
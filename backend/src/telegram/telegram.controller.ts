@@ -14,7 +14,9 @@ import { TelegramService } from './telegram.service';
 import { JwtAuthGuard } from '../common/guards/jwt-auth.guard';
 import { Roles } from '../common/decorators/roles.decorator';
 import { RolesGuard } from '../common/guards/roles.guard';
+import { TelegramWebhookGuard } from '../common/guards/telegram-webhook.guard';
 import { CurrentUser } from '../common/decorators/current-user.decorator';
+import { RateLimit } from '../common/decorators/rate-limit.decorator';
 import { PrismaService } from '../prisma/prisma.service';
 import { ApiTags, ApiOperation, ApiBearerAuth } from '@nestjs/swagger';
 
@@ -28,8 +30,20 @@ export class TelegramController {
     private prisma: PrismaService,
   ) {}
 
-  // Webhook endpoint (sin guards - debe ser público para Telegram)
+  // Webhook endpoint (público, pero solo Telegram conoce el secret_token del webhook)
+  // Updates from one user beyond the limit are acknowledged and dropped (Telegram would
+  // otherwise redeliver them); over the route limit the answer is 429 so Telegram retries.
+  // Per-IP limits don't apply, every update comes from Telegram
   @Post('webhook')
+  @UseGuards(TelegramWebhookGuard)
+  @RateLimit({
+    name: 'telegram_webhook',
+    rules: [
+      { by: 'user', limit: 20, perSeconds: 10 },
+      { by: 'route', limit: 1000, perSeconds: 1 },
+    ],
+    drop: true,
+  })
   @HttpCode(HttpStatus.OK)
   @ApiOperation({ summary: 'Telegram webhook endpoint' })
   async handleWebhook(@Req() req: any, @Body() update: any) {
@@ -161,6 +175,7 @@ export class TelegramController {
       }],
     });
 
+    await this.telegramService.tipsterProfileChanged(tipster.id);
     this.logger.log(`Updated premium channel link for tipster ${tipster.id}: ${body.premiumChannelLink}`);
 
     return {
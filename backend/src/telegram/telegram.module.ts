@@ -1,13 +1,17 @@
 import { Module } from '@nestjs/common';
 import { TelegramService } from './telegram.service';
 import { TelegramController } from './telegram.controller';
+import { InviteLinkPoolService } from './invite-link-pool.service';
+import { InviteLinkPoolController } from './invite-link-pool.controller';
 import { PrismaModule } from '../prisma/prisma.module';
+import { OrdersModule } from '../orders/orders.module';
 import { ConfigModule } from '@nestjs/config';
+import { ReservationsModule } from '../reservations/reservations.module';
 
 @Module({
-  imports: [PrismaModule, ConfigModule],
-  providers: [TelegramService],
-  controllers: [TelegramController],
-  exports: [TelegramService],
+  imports: [PrismaModule, OrdersModule, ConfigModule, ReservationsModule],
+  providers: [TelegramService, InviteLinkPoolService],
+  controllers: [TelegramController, InviteLinkPoolController],
+  exports: [TelegramService, InviteLinkPoolService],
 })
 export class TelegramModule {}
@@ -1,44 +1,115 @@
-import { Injectable, Logger, OnModuleInit } from '@nestjs/common';
+import { Injectable, Logger, OnApplicationBootstrap } from '@nestjs/common';
 import { Telegraf, Context } from 'telegraf';
 import { PrismaService } from '../prisma/prisma.service';
 import { ConfigService } from '@nestjs/config';
+import { SeatReservationService } from '../reservations/seat-reservation.service';
+import { MetricsService } from '../metrics/metrics.service';
+import { OrderRepository } from '../orders/order.repository';
+import { PurchaseSummary, PurchaseSummaryService } from '../orders/purchase-summary.service';
+import { runsBackgroundDuties } from '../common/cluster/worker-role';
+import { InviteLinkPoolService } from './invite-link-pool.service';
+import { CacheService } from '../cache/cache.service';
+
+const WEBHOOK_REGISTER_ATTEMPTS = 5;
+// Name shown in the channel's invite link list for pooled links
+const POOL_LINK_NAME = 'Antia';
 
 @Injectable()
-export class TelegramService implements OnModuleInit {
+export class TelegramService implements OnApplicationBootstrap {
   private bot: Telegraf;
   private readonly logger = new Logger(TelegramService.name);
 
   constructor(
     private prisma: PrismaService,
     private config: ConfigService,
+    private seatReservations: SeatReservationService,
+    private metrics: MetricsService,
+    private orders: OrderRepository,
+    private purchaseSummaries: PurchaseSummaryService,
+    private inviteLinks: InviteLinkPoolService,
+    private cache: CacheService,
   ) {
     const token = this.config.get<string>('TELEGRAM_BOT_TOKEN');
     if (!token) {
       this.logger.error('TELEGRAM_BOT_TOKEN is not configured');
       throw new Error('Telegram bot token is required');
     }
-    this.bot = new Telegraf(token);
+    // TELEGRAM_API_ROOT points the bot at a local stand-in for load tests
+    const apiRoot = this.config.get<string>('TELEGRAM_API_ROOT');
+    this.bot = new Telegraf(token, apiRoot ? { telegram: { apiRoot } } : {});
+    this.instrumentTelegramApi();
+    this.inviteLinks.setMinter(async (channelId) => {
+      const link = await this.bot.telegram.createChatInviteLink(channelId, {
+        member_limit: 1,
+        name: POOL_LINK_NAME,
+      });
+      return link.invite_link;
+    });
+    this.inviteLinks.setRevoker(async (channelId, inviteLink) => {
+      await this.bot.telegram.revokeChatInviteLink(channelId, inviteLink);
+    });
     this.setupBot();
     this.setupCallbackHandlers();
   }
 
-  async onModuleInit() {
+  onApplicationBootstrap() {
+    // Bot registration talks to the Telegram API; keep it off the startup path.
+    // Clustered, only worker 0 registers the webhook
+    if (runsBackgroundDuties()) {
+      void this.registerWebhook();
+    }
+  }
+
+  /**
+   * getMe + setWebhook, retried with backoff. setWebhook is skipped when Telegram already
+   * has our URL (every instance of a rolling deploy would otherwise set it again), unless
+   * TELEGRAM_WEBHOOK_SECRET is set: getWebhookInfo does not tell which secret it has.
+   */
+  private async registerWebhook(attempt = 1): Promise<void> {
     try {
       // Obtener info del bot
       const botInfo = await this.bot.telegram.getMe();
+      this.bot.botInfo = botInfo;
       this.logger.log(`📱 Bot info: @${botInfo.username}`);
-      
+
       // Configurar webhook en lugar de polling
       const webhookUrl = `${this.config.get('APP_URL')}/api/telegram/webhook`;
-      await this.bot.telegram.setWebhook(webhookUrl);
+      const secretToken = this.config.get<string>('TELEGRAM_WEBHOOK_SECRET');
+      if (secretToken) {
+        await this.bot.telegram.setWebhook(webhookUrl, { secret_token: secretToken });
+      } else {
+        this.logger.warn('TELEGRAM_WEBHOOK_SECRET is not configured: the webhook will refuse every update');
+        const current = await this.bot.telegram.getWebhookInfo();
+        if (current.url !== webhookUrl) {
+          await this.bot.telegram.setWebhook(webhookUrl);
+        }
+      }
       this.logger.log(`✅ Webhook configured: ${webhookUrl}`);
       this.logger.log('✅ TelegramService initialized (webhook mode)');
     } catch (error) {
+      if (attempt < WEBHOOK_REGISTER_ATTEMPTS) {
+        const delayMs = 1000 * 2 ** (attempt - 1);
+        this.logger.warn(`Telegram bot registration failed (attempt ${attempt}), retrying in ${delayMs}ms`);
+        setTimeout(() => void this.registerWebhook(attempt + 1), delayMs).unref();
+        return;
+      }
       this.logger.error('Failed to initialize Telegram bot:', error);
       this.logger.warn('⚠️  Telegram features may not work correctly');
     }
   }
 
+  /**
+   * Time every Bot API call (sendMessage, createChatInviteLink, getChatMember...)
+   */
+  private instrumentTelegramApi() {
+    const telegram = this.bot.telegram;
+    const callApi = telegram.callApi.bind(telegram);
+    telegram.callApi = ((method: string, payload: any, options?: any) =>
+      this.metrics.timeOutbound('telegram', method, () =>
+        callApi(method as any, payload, options),
+      )) as typeof telegram.callApi;
+  }
+
   private setupBot() {
     // Handler cuando el bot es añadido a un canal
     this.bot.on('my_chat_member', async (ctx) => {
@@ -108,6 +179,17 @@ export class TelegramService implements OnModuleInit {
       `, { parse_mode: 'Markdown' });
     });
 
+    // Command /mis_compras - historial del comprador (resumen cacheado por usuario)
+    this.bot.command('mis_compras', async (ctx) => {
+      try {
+        const summary = await this.purchaseSummaries.get(ctx.from.id.toString());
+        await ctx.reply(this.formatPurchaseSummary(summary));
+      } catch (error) {
+        this.logger.error('Error in /mis_compras command:', error);
+        await ctx.reply('Error al obtener tus compras. Intenta más tarde.');
+      }
+    });
+
     // Handler para mensajes de texto - detectar enlaces de producto
     this.bot.on('text', async (ctx) => {
       try {
@@ -149,6 +231,24 @@ export class TelegramService implements OnModuleInit {
     });
   }
 
+  private formatPurchaseSummary(summary: PurchaseSummary): string {
+    if (!summary.totalPurchases) {
+      return '🛒 Mis Compras:\n\nNo tienes compras registradas aún.';
+    }
+    const money = (cents: number | undefined, currency = 'EUR') => `${((cents || 0) / 100).toFixed(2)} ${currency}`;
+    const lines = summary.recent.map((item) =>
+      `• ${item.productTitle || 'Producto'} - ${money(item.amountCents, item.currency)}` +
+      (item.paidAt ? ` (${item.paidAt.slice(0, 10)})` : ''),
+    );
+    const spent = Object.entries(summary.spentCents).map(([currency, cents]) => money(cents, currency)).join(' + ');
+    return (
+      `🛒 Mis Compras (${summary.totalPurchases}):\n\n` +
+      lines.join('\n') +
+      (summary.totalPurchases > summary.recent.length ? `\n… y ${summary.totalPurchases - summary.recent.length} más` : '') +
+      `\n\n💰 Total: ${spent}`
+    );
+  }
+
   // Método para manejar la conexión automática del canal
   private async handleChannelConnection(
     channelId: string,
@@ -184,6 +284,7 @@ export class TelegramService implements OnModuleInit {
           }],
         });
 
+        await this.tipsterProfileChanged(tipster.id);
         this.logger.log(`✅ Auto-connected channel for tipster: ${tipster.publicName}`);
         
         // Enviar mensaje de confirmación al canal
@@ -263,6 +364,7 @@ export class TelegramService implements OnModuleInit {
         }],
       });
 
+      await this.tipsterProfileChanged(tipsterId);
       this.logger.log(`✅ Manually connected channel for tipster ID: ${tipsterId}`);
 
       return {
@@ -287,6 +389,11 @@ export class TelegramService implements OnModuleInit {
    * Desconectar un canal
    */
   async disconnectChannel(tipsterId: string): Promise<void> {
+    const tipster = await this.prisma.tipsterProfile.findUnique({
+      where: { id: tipsterId },
+      select: { telegramChannelId: true },
+    });
+
     await this.prisma.$runCommandRaw({
       update: 'tipster_profiles',
       updates: [{
@@ -304,9 +411,25 @@ export class TelegramService implements OnModuleInit {
       }],
     });
 
+    await this.tipsterProfileChanged(tipsterId);
+    if (tipster?.telegramChannelId) {
+      // Revoking a full pool takes a few seconds at the Bot API rate: do not hold the request
+      const channelId = tipster.telegramChannelId;
+      this.inviteLinks.discard(channelId).catch((error) =>
+        this.logger.error(`Could not discard invite links of ${channelId}: ${error.message}`),
+      );
+    }
+
     this.logger.log(`✅ Disconnected channel for tipster ID: ${tipsterId}`);
   }
 
+  /**
+   * Call after writing a tipster profile: the checkout page caches the tipster on every node
+   */
+  async tipsterProfileChanged(tipsterId: string) {
+    await this.cache.invalidate('checkout_tipster', tipsterId);
+  }
+
   /**
    * Publicar un producto en Telegram
    */
@@ -583,36 +706,29 @@ export class TelegramService implements OnModuleInit {
    * Crear orden pendiente
    */
   private async createPendingOrder(productId: string, telegramUserId: string, username: string): Promise<string> {
-    const orderId = this.generateOrderId();
-    const now = new Date();
+    const orderId = this.orders.newId();
+
+    // Reservar plaza si el producto tiene aforo limitado (lanza ConflictException si está agotado)
+    const product = await this.prisma.product.findUnique({
+      where: { id: productId },
+      select: { id: true, capacityLimit: true },
+    });
+    if (product) {
+      await this.seatReservations.reserve(product, orderId);
+    }
 
     // Guardar orden en base de datos
-    await this.prisma.$runCommandRaw({
-      insert: 'orders',
-      documents: [{
-        _id: orderId,
-        product_id: productId,
-        telegram_user_id: telegramUserId,
-        telegram_username: username,
-        status: 'PENDING',
-        payment_method: null,
-        amount_cents: null,
-        created_at: { $date: now.toISOString() },
-        updated_at: { $date: now.toISOString() },
-      }],
+    await this.orders.create({
+      id: orderId,
+      productId,
+      telegramUserId,
+      telegramUsername: username,
     });
 
     this.logger.log(`Created pending order ${orderId} for Telegram user ${telegramUserId}`);
     return orderId;
   }
 
-  /**
-   * Generar ID de orden
-   */
-  private generateOrderId(): string {
-    return 'order_' + Date.now() + '_' + Math.random().toString(36).substr(2, 9);
-  }
-
   /**
    * Notificar al cliente sobre pago exitoso
    */
@@ -649,15 +765,23 @@ export class TelegramService implements OnModuleInit {
         parse_mode: 'Markdown',
       });
 
-      // Obtener el enlace del canal premium configurado por el tipster
-      const tipsterProfileResult = await this.prisma.$runCommandRaw({
-        find: 'tipster_profiles',
-        filter: { _id: { $oid: tipster.id } },
-        projection: { premium_channel_link: 1 },
-        limit: 1,
-      }) as any;
-      
-      const premiumChannelLink = tipsterProfileResult.cursor?.firstBatch?.[0]?.premium_channel_link;
+      // Enlace personal de un solo uso del pool del canal conectado; si no hay canal
+      // conectado (o el pool falla) se usa el enlace del canal premium configurado por el tipster
+      const channelId = product.telegramChannelId || tipster.telegramChannelId;
+      const claimed = channelId
+        ? await this.inviteLinks.claim(channelId, orderId, telegramUserId)
+        : null;
+
+      let premiumChannelLink = claimed?.inviteLink;
+      if (!premiumChannelLink) {
+        const tipsterProfileResult = await this.prisma.$runCommandRaw({
+          find: 'tipster_profiles',
+          filter: { _id: { $oid: tipster.id } },
+          projection: { premium_channel_link: 1 },
+          limit: 1,
+        }) as any;
+        premiumChannelLink = tipsterProfileResult.cursor?.firstBatch?.[0]?.premium_channel_link;
+      }
 
       // Si el tipster tiene un enlace de canal premium configurado, enviarlo
       if (premiumChannelLink) {
@@ -793,7 +917,7 @@ export class TelegramService implements OnModuleInit {
       const currentEarnings = result.cursor?.firstBatch?.[0]?.total_earnings_cents || 0;
       const currentSales = result.cursor?.firstBatch?.[0]?.total_sales || 0;
 
-      // Update earnings
+      // Update earnings (not shown at checkout: no tipsterProfileChanged on every sale)
       await this.prisma.$runCommandRaw({
         update: 'tipster_profiles',
         updates: [{
@@ -825,6 +949,15 @@ export class TelegramService implements OnModuleInit {
     return !!tipster?.telegramChannelId;
   }
 
+  /**
+   * Sacar a un usuario del canal (ban + unban: puede volver a entrar si compra de nuevo)
+   */
+  async removeChannelMember(channelId: string, telegramUserId: string) {
+    const userId = Number(telegramUserId);
+    await this.bot.telegram.banChatMember(channelId, userId);
+    await this.bot.telegram.unbanChatMember(channelId, userId, { only_if_banned: true });
+  }
+
   /**
    * Manejar updates desde webhook
    */
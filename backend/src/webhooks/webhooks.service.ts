@@ -46,6 +46,7 @@ export class WebhooksService {
           order.id,
           order.clientUserId || data.client_user_id,
           product.telegramChannelId,
+          product.validityDays,
         );
       }
     }
@@ -0,0 +1,2183 @@
+#!/usr/bin/env python3
+"""
+Antia Platform Backend Load Testing
+Runs concurrent load scenarios against the API and reports latency/throughput
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import math
+import os
+import random
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+import bench_warehouse
+import bulk_seeder
+import trace_export
+
+# Configuration
+BASE_URL = os.environ.get("ANTIA_BASE_URL", "http://localhost:8001")
+API_BASE = f"{BASE_URL}/api"
+
+# Seeded product used by the checkout scenarios
+PRODUCT_ID = "6941ab8bc37d0aa47ab23ef8"
+BOT_API_TOKEN = os.environ.get("BOT_API_TOKEN", "")  # Shared secret of bot-only routes (X-Bot-Token)
+# secret_token of the Telegram webhook (X-Telegram-Bot-Api-Secret-Token)
+TELEGRAM_WEBHOOK_SECRET = os.environ.get("TELEGRAM_WEBHOOK_SECRET", "")
+TELEGRAM_WEBHOOK_HEADERS = {"X-Telegram-Bot-Api-Secret-Token": TELEGRAM_WEBHOOK_SECRET}
+
+# Test credentials
+TIPSTER_EMAIL = "fausto.perez@antia.com"
+TIPSTER_PASSWORD = "Tipster123!"
+ADMIN_EMAIL = "admin@antia.com"
+ADMIN_PASSWORD = "Admin123!"
+CLIENT_EMAIL = "cliente@example.com"
+CLIENT_PASSWORD = "Client123!"
+
+# Local Telegram Bot API stand-in (telegram_standin.py)
+TELEGRAM_STANDIN_URL = os.environ.get("TELEGRAM_STANDIN_URL", "http://localhost:8081")
+REDIS_STANDIN_URL = os.environ.get("REDIS_STANDIN_URL", "http://localhost:8380")  # Stats API of redis_standin.py
+STRIPE_STANDIN_URL = os.environ.get("STRIPE_STANDIN_URL", "http://localhost:12111")
+
+DEFAULT_CONCURRENCY = 20
+DEFAULT_REQUESTS = 500
+DEFAULT_SEAT_CAPACITY = 50
+
+# Buyer journey stages, in order
+FUNNEL_STAGES = ["product_view", "detect_gateway", "create_session", "complete_payment", "order_polling"]
+ORDER_POLL_INTERVAL = 0.2
+ORDER_POLL_MAX = 25
+
+# Soak mode: hours of steady mixed traffic while sampling backend resources
+DEFAULT_SOAK_DURATION = 4 * 3600
+DEFAULT_SAMPLE_INTERVAL = 30
+DEFAULT_THINK_MS = 50
+SOAK_WARMUP_FRACTION = 0.1
+SOAK_METRICS = ["rss_mb", "heap_used_mb", "external_mb", "active_resources", "sockets", "open_fds",
+                "event_loop_p99_ms"]
+# Growth over the run, relative to the starting level, that counts as a leak
+SOAK_GROWTH_THRESHOLD = 0.10
+
+DEFAULT_GRANTS = 1_000_000
+SWEEP_BATCHES_PER_CALL = 5
+
+# Cold start: restart the backend and time how long until it serves real traffic
+RESTART_CMD = os.environ.get("ANTIA_RESTART_CMD", "sudo supervisorctl restart backend")
+DEFAULT_COLD_STARTS = 3
+COLD_START_TIMEOUT = 120
+COLD_START_PROBE_INTERVAL = 0.05
+COLD_START_BURST = 20
+COLD_START_SETTLE = 5
+
+# Scaling: start a separate backend with API_WORKERS=N on its own port
+BACKEND_CMD = os.environ.get("ANTIA_BACKEND_CMD", "node backend/dist/main.js")
+SCALING_PORT = int(os.environ.get("ANTIA_SCALING_PORT", "8101"))
+DEFAULT_WORKER_COUNTS = [1, 2, 4, 8]
+DEFAULT_SCALE_DURATION = 30
+SCALE_WARMUP = 5
+SCALE_START_TIMEOUT = 120
+
+# Bot purchases: /mis_compras updates replayed to the Telegram webhook for seeded buyers
+BOT_BUYERS = 200
+BOT_ORDERS_PER_BUYER = 3
+BOT_REFRESH_POLLS = 20
+
+# Config propagation: flip a runtime config flag and time until every read sees it
+CONFIG_FLAG_KEY = "payments.crypto_enabled"
+CONFIG_ROUNDS = 10
+CONFIG_PROBE_INTERVAL = 0.01
+CONFIG_CONSISTENT_READS = 20  # In a row, so every cluster worker has answered with the new value
+CONFIG_TIMEOUT = 30
+
+# Payload size: each route fetched in full and with ?fields=, under each encoding
+PAYLOAD_SAMPLES = 30
+PAYLOAD_ENCODINGS = ["identity", "gzip", "br"]
+PAYLOAD_FIELDSETS = {
+    "products_my": "id,title,priceCents,currency,active",
+    "orders_my": "id,status,amountCents,currency,createdAt",
+    "order_details": "order.status,order.amountCents,product.title,tipster.publicName",
+}
+
+# Order status after payment: polling /checkout/verify vs long-poll vs server-sent events
+ORDER_STATUS_MODES = ["poll", "long_poll", "sse"]
+ORDER_STATUS_TIMEOUT = 60
+LONG_POLL_WAIT = 25
+
+# Invite link pool: claims per purchase and background refills against the Telegram stand-in
+INVITE_REFILL_TIMEOUT = 120
+INVITE_REPEAT_CLAIMS = 20
+
+# Abuse: one client flooding bcrypt-heavy /auth/otp/send while regular visitors browse
+ABUSE_PHASE_SECONDS = 20
+ABUSE_ATTACKERS = 20
+ABUSE_ATTACKER_IP = "203.0.113.66"
+ABUSE_OTP_USERS = 5  # Legitimate OTP requests per second, each from its own address
+
+# Overload: tipster dashboards flooding the API while payments and bot updates arrive at a steady rate
+OVERLOAD_PHASE_SECONDS = 30
+OVERLOAD_DASHBOARD_USERS = 200  # Closed-loop dashboard threads, no think time
+OVERLOAD_PAYMENT_RATE = 10  # Critical requests per second (open loop: sent on schedule, not after replies)
+OVERLOAD_PAYMENT_SLO_MS = 1000  # p95 that checkout sessions and webhooks must keep under overload
+DASHBOARD_ROUTES = ("/orders/stats", "/referrals/metrics", "/products/my")
+
+# Shared cache: a second backend on SCALING_PORT shares REDIS_URL with the main one
+SHARED_CACHE_ROUNDS = 20
+SHARED_CACHE_PROPAGATION_MS = 1000  # A product change must be visible on the other node within this
+SHARED_CACHE_STALE_TIMEOUT = 5
+CACHE_NAMES = ("principal", "checkout_product", "geolocation")
+
+# Settlement: month-end payouts/commissions over millions of seeded orders
+SETTLEMENT_PERIOD = "2020-01"
+DEFAULT_SETTLEMENT_ORDERS = 1_000_000
+SETTLEMENT_EVENTS_RATIO = 0.2
+SETTLEMENT_TIPSTERS = 1000
+SETTLEMENT_TIMEOUT = 3600
+
+# On-demand V8 profiling (--profile): CPU profile + heap sampling around each measured phase
+PROFILE_STOP_TIMEOUT = 120
+
+# Fault-injection proxy (fault_proxy.py) in front of MongoDB and the Telegram stand-in
+FAULT_PROXY_URL = os.environ.get("FAULT_PROXY_URL", "http://localhost:8474")
+DEFAULT_FAULT_STEP = 30
+FAULT_REQUEST_TIMEOUT = 10
+# Each step runs the soak traffic mix for --fault-step seconds with these faults applied
+DEFAULT_FAULT_STEPS = [
+    {"name": "baseline", "faults": {}},
+    {"name": "mongo_20ms", "faults": {"mongo": {"latency_ms": 20}}},
+    {"name": "mongo_lognormal_50ms", "faults": {"mongo": {"latency_ms": 50, "distribution": "lognormal", "sigma": 1}}},
+    {"name": "mongo_pareto_tail", "faults": {"mongo": {"latency_ms": 10, "distribution": "pareto", "alpha": 1.5}}},
+    {"name": "mongo_256kb_s", "faults": {"mongo": {"bandwidth_kb_s": 256}}},
+    {"name": "mongo_resets", "faults": {"mongo": {"reset_rate": 0.01}}},
+    {"name": "telegram_slow", "faults": {"telegram": {"latency_ms": 800, "distribution": "uniform", "jitter_ms": 400}}},
+    {"name": "telegram_stalls", "faults": {"telegram": {"stall_rate": 0.2, "stall_ms": 5000}}},
+    {"name": "recovery", "faults": {}},
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0-100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_latencies(values_ms: List[float]) -> Dict[str, float]:
+    """Count, mean and tail percentiles of a list of latencies in milliseconds"""
+    if not values_ms:
+        return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    return {
+        "count": len(values_ms),
+        "mean_ms": round(sum(values_ms) / len(values_ms), 2),
+        "p50_ms": round(percentile(values_ms, 50), 2),
+        "p95_ms": round(percentile(values_ms, 95), 2),
+        "p99_ms": round(percentile(values_ms, 99), 2),
+        "max_ms": round(max(values_ms), 2),
+    }
+
+
+def linear_slope(xs: List[float], ys: List[float]) -> float:
+    """Least-squares slope of ys over xs"""
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if var_x == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+
+
+def detect_growth(samples: List[Dict[str, Any]], metric: str) -> Dict[str, Any]:
+    """Flag a metric that keeps climbing after warm-up.
+
+    Growth is reported when the fitted trend adds more than SOAK_GROWTH_THRESHOLD
+    over the run and the last quarter never drops back to the first quarter's peak.
+    """
+    points = [(s["elapsed_s"], s[metric]) for s in samples if s.get(metric) is not None]
+    points = points[int(len(points) * SOAK_WARMUP_FRACTION):]
+    if len(points) < 8:
+        return {"samples": len(points), "growing": False}
+
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    slope = linear_slope(xs, ys)
+    quarter = len(ys) // 4
+    first, last = ys[:quarter], ys[-quarter:]
+    baseline = sum(first) / len(first)
+    relative_growth = slope * (xs[-1] - xs[0]) / baseline if baseline else 0.0
+    rises = sum(1 for a, b in zip(ys, ys[1:]) if b > a)
+
+    return {
+        "samples": len(points),
+        "start": round(baseline, 2),
+        "end": round(sum(last) / len(last), 2),
+        "slope_per_hour": round(slope * 3600, 3),
+        "relative_growth": round(relative_growth, 4),
+        "rising_steps": round(rises / (len(ys) - 1), 3),
+        "growing": relative_growth > SOAK_GROWTH_THRESHOLD and min(last) > max(first),
+    }
+
+
+def read_proc_stats(pid: int) -> Dict[str, Any]:
+    """RSS, fd and socket counts straight from /proc (backend on this host only)"""
+    stats: Dict[str, Any] = {}
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    stats["proc_rss_mb"] = round(int(line.split()[1]) / 1024, 2)
+        fds = os.listdir(f"/proc/{pid}/fd")
+        stats["proc_fds"] = len(fds)
+        stats["proc_sockets"] = sum(
+            1 for fd in fds if os.readlink(f"/proc/{pid}/fd/{fd}").startswith("socket:"))
+    except OSError:
+        pass
+    return stats
+
+
+def server_timing(response: requests.Response) -> Dict[str, float]:
+    """Durations from a Server-Timing header, e.g. {'serialize': 0.4, 'compress': 1.2}"""
+    timings = {}
+    for entry in response.headers.get("Server-Timing", "").split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        for param in params:
+            if param.startswith("dur="):
+                timings[name] = float(param[4:])
+    return timings
+
+
+def metric_total(text: str, name: str, **labels: str) -> float:
+    """Sum of a Prometheus metric over the series matching labels (all workers)"""
+    total = 0.0
+    for line in text.splitlines():
+        if not line.startswith(name + "{"):
+            continue
+        series, _, value = line.rpartition(" ")
+        if all(f'{key}="{val}"' in series for key, val in labels.items()):
+            total += float(value)
+    return total
+
+
+def body_size(response: requests.Response) -> int:
+    """Bytes of body sent on the wire (before client-side decompression)"""
+    if response.status_code == 304:
+        return 0
+    length = response.headers.get("Content-Length")
+    return int(length) if length is not None else len(response.content)
+
+
+class AntiaLoadTester:
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, total_requests: int = DEFAULT_REQUESTS,
+                 product_id: str = PRODUCT_ID, seat_capacity: int = DEFAULT_SEAT_CAPACITY,
+                 soak_duration: int = DEFAULT_SOAK_DURATION, sample_interval: int = DEFAULT_SAMPLE_INTERVAL,
+                 think_ms: int = DEFAULT_THINK_MS, soak_output: Optional[str] = None,
+                 grants: int = DEFAULT_GRANTS, fault_schedule: Optional[str] = None,
+                 fault_step: int = DEFAULT_FAULT_STEP, cold_starts: int = DEFAULT_COLD_STARTS,
+                 restart_cmd: str = RESTART_CMD, worker_counts: List[int] = None,
+                 scale_duration: int = DEFAULT_SCALE_DURATION, profile_dir: Optional[str] = None,
+                 settlement_orders: int = DEFAULT_SETTLEMENT_ORDERS, trace_path: Optional[str] = None):
+        self.concurrency = concurrency
+        self.total_requests = total_requests
+        self.product_id = product_id
+        self.seat_capacity = seat_capacity
+        self.soak_duration = soak_duration
+        self.sample_interval = sample_interval
+        self.think_ms = think_ms
+        self.soak_output = soak_output or f"soak_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+        self.grants = grants
+        self.fault_schedule = fault_schedule
+        self.fault_step = fault_step
+        self.cold_starts = cold_starts
+        self.restart_cmd = restart_cmd
+        self.worker_counts = worker_counts or DEFAULT_WORKER_COUNTS
+        self.scale_duration = scale_duration
+        self.profile_dir = profile_dir
+        self.settlement_orders = settlement_orders
+        self.profiles: List[Dict[str, Any]] = []
+        # Request timeline of every virtual user (--trace), written after the scenarios
+        self.trace_path = trace_path
+        self.trace = trace_export.TraceRecorder("antia load harness") if trace_path else None
+        # Per-endpoint latency of the scenario running now, and of every finished one
+        self.endpoint_stats = bench_warehouse.EndpointStats()
+        self.endpoints: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self.durations: Dict[str, float] = {}
+        self.current_scenario = None
+        self.api_base = API_BASE
+        self.access_token = None
+        self.admin_token = None
+        self._local = threading.local()
+        self._log_lock = threading.Lock()
+
+    def log(self, message: str, level: str = "INFO"):
+        """Log test messages"""
+        with self._log_lock:
+            print(f"[{level}] {message}")
+        if self.trace:
+            self.trace.log_line(message, level)
+
+    def session(self) -> requests.Session:
+        """One HTTP session per worker thread (requests.Session is not thread-safe)"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def timed_request(self, method: str, endpoint: str, data: Dict = None,
+                      headers: Dict = None, use_auth: bool = False,
+                      timeout: float = 30, base: str = None) -> Tuple[requests.Response, float]:
+        """Make HTTP request (to `base` instead of the current API base if given) and return
+        (response, elapsed milliseconds)"""
+        req_headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        }
+        if use_auth and self.access_token:
+            req_headers["Authorization"] = f"Bearer {self.access_token}"
+        if headers:
+            req_headers.update(headers)
+
+        started = time.perf_counter()
+        try:
+            response = self.session().request(
+                method=method,
+                url=f"{base or self.api_base}{endpoint}",
+                json=data if data else None,
+                headers=req_headers,
+                timeout=timeout
+            )
+        except requests.RequestException as e:
+            finished = time.perf_counter()
+            self.endpoint_stats.record(method, endpoint, 0, (finished - started) * 1000)
+            if self.trace:
+                self.trace.request(method, endpoint, started, finished, error=e)
+            raise
+        finished = time.perf_counter()
+        elapsed = (finished - started) * 1000
+        self.endpoint_stats.record(method, endpoint, response.status_code, elapsed)
+        if self.trace:
+            self.trace.request(method, endpoint, started, finished, response)
+        return response, elapsed
+
+    def login(self, email: str = TIPSTER_EMAIL, password: str = TIPSTER_PASSWORD) -> bool:
+        """Authenticate and keep the JWT for use_auth requests"""
+        response, _ = self.timed_request("POST", "/auth/login", {"email": email, "password": password})
+        if response.status_code == 200 and "access_token" in response.json():
+            self.access_token = response.json()["access_token"]
+            return True
+        self.log(f"❌ Login failed with status {response.status_code}", "ERROR")
+        return False
+
+    def admin_request(self, method: str, endpoint: str, data: Dict = None,
+                      timeout: float = 30) -> Optional[requests.Response]:
+        """Admin API call with its own token, so scenarios logged in as other users are not disturbed"""
+        for _ in range(2):
+            if not self.admin_token:
+                response, _ = self.timed_request("POST", "/auth/login",
+                                                 {"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+                if response.status_code != 200:
+                    return None
+                self.admin_token = response.json()["access_token"]
+            response, _ = self.timed_request(method, endpoint, data, timeout=timeout,
+                                             headers={"Authorization": f"Bearer {self.admin_token}"})
+            if response.status_code != 401:
+                return response
+            self.admin_token = None
+        return response
+
+    @contextlib.contextmanager
+    def profiling(self, phase: str):
+        """With --profile, run the block inside a backend CPU/heap profiling window and save the profiles
+        (with --trace, the block is also a span on the trace's harness row)"""
+        label = f"{self.current_scenario}.{phase}"
+        with self.trace.phase(label) if self.trace else contextlib.nullcontext():
+            if not self.profile_dir:
+                yield
+                return
+            with self.profile_window(label):
+                yield
+
+    @contextlib.contextmanager
+    def profile_window(self, label: str):
+        try:
+            started = self.admin_request("POST", "/admin/profiling/start", {"label": label})
+        except requests.RequestException:
+            started = None
+        if started is None or started.status_code != 200:
+            self.log(f"⚠️ Could not start profiling {label}: "
+                     f"{started.status_code if started is not None else 'no admin access'}", "WARN")
+        try:
+            yield
+        finally:
+            if started is not None and started.status_code == 200:
+                self.save_profile(label)
+
+    def save_profile(self, label: str):
+        try:
+            response = self.admin_request("POST", "/admin/profiling/stop", timeout=PROFILE_STOP_TIMEOUT)
+        except requests.RequestException as e:
+            self.log(f"⚠️ Could not stop profiling {label}: {e}", "WARN")
+            return
+        if response is None or response.status_code != 200:
+            self.log(f"⚠️ Could not stop profiling {label}", "WARN")
+            return
+        result = response.json()
+        os.makedirs(self.profile_dir, exist_ok=True)
+        entry = {key: result[key] for key in ("label", "worker", "startedAt", "durationMs", "stoppedBy")}
+        for kind, extension in (("cpuProfile", "cpuprofile"), ("heapProfile", "heapprofile")):
+            if result.get(kind):
+                path = os.path.join(self.profile_dir, f"{label}.{extension}")
+                with open(path, "w") as f:
+                    json.dump(result[kind], f)
+                entry[extension] = path
+        self.profiles.append(entry)
+        self.log(f"🔬 Saved profile {label} ({result['durationMs']}ms, worker {result['worker']})")
+
+    def run_concurrently(self, task: Callable[[int], Any], total: int) -> List[Any]:
+        """Run task(i) for i in range(total) on the worker pool and collect results"""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            return list(pool.map(task, range(total)))
+
+    # ===== HTTP CACHING =====
+
+    def scenario_conditional_get(self) -> Dict[str, Any]:
+        """Returning visitors revalidate public reads with If-None-Match"""
+        self.log("=== Scenario: Conditional GET on public reads ===")
+
+        endpoints = [
+            f"/checkout/product/{self.product_id}",
+            "/houses",
+            "/checkout/feature-flags",
+        ]
+        results = {}
+        passed = True
+
+        for endpoint in endpoints:
+            response, _ = self.timed_request("GET", endpoint)
+            etag = response.headers.get("ETag")
+            if response.status_code != 200 or not etag:
+                self.log(f"❌ {endpoint} returned {response.status_code} without ETag", "ERROR")
+                results[endpoint] = {"error": f"status {response.status_code}, etag {etag}"}
+                passed = False
+                continue
+
+            full_bytes = body_size(response)
+            cache_control = response.headers.get("Cache-Control")
+            self.log(f"✅ {endpoint}: ETag {etag}, {full_bytes} bytes, Cache-Control '{cache_control}'")
+
+            def revalidate(_: int) -> Tuple[int, int, float]:
+                resp, elapsed = self.timed_request("GET", endpoint, headers={"If-None-Match": etag})
+                return resp.status_code, body_size(resp), elapsed
+
+            samples = self.run_concurrently(revalidate, self.total_requests)
+            not_modified = [s for s in samples if s[0] == 304]
+            refetched = [s for s in samples if s[0] == 200]
+            errors = [s for s in samples if s[0] not in (200, 304)]
+            transferred = sum(s[1] for s in samples)
+            uncached = full_bytes * len(samples)
+
+            results[endpoint] = {
+                "requests": len(samples),
+                "revalidated_share": round(len(not_modified) / len(samples), 4),
+                "refetched": len(refetched),
+                "errors": len(errors),
+                "full_body_bytes": full_bytes,
+                "bytes_transferred": transferred,
+                "bytes_saved": uncached - transferred,
+                "cache_control": cache_control,
+                "latency_304": summarize_latencies([s[2] for s in not_modified]),
+                "latency_200": summarize_latencies([s[2] for s in refetched]),
+            }
+            self.log(f"   304 share: {results[endpoint]['revalidated_share']:.1%}, "
+                     f"bytes saved: {results[endpoint]['bytes_saved']}")
+            if errors or not not_modified:
+                passed = False
+
+        total_requests = sum(r.get("requests", 0) for r in results.values())
+        total_304 = sum(r.get("requests", 0) * r.get("revalidated_share", 0) for r in results.values())
+        return {
+            "passed": passed,
+            "revalidated_share": round(total_304 / total_requests, 4) if total_requests else 0.0,
+            "bytes_saved": sum(r.get("bytes_saved", 0) for r in results.values()),
+            "endpoints": results,
+        }
+
+    # ===== PAYLOAD SIZE =====
+
+    def measure_payload(self, endpoint: str, encoding: str, token: str) -> Dict[str, Any]:
+        """Wire bytes, latency and server serialize/compress time of one route variant"""
+        sizes, latencies, serialize, compress = [], [], [], []
+        content_encoding = None
+        for _ in range(PAYLOAD_SAMPLES):
+            response, elapsed = self.timed_request("GET", endpoint, headers={
+                "Accept-Encoding": encoding,
+                "Authorization": f"Bearer {token}",
+            })
+            if response.status_code != 200:
+                return {"error": f"status {response.status_code}"}
+            timings = server_timing(response)
+            sizes.append(body_size(response))
+            latencies.append(elapsed)
+            serialize.append(timings.get("serialize", 0.0))
+            compress.append(timings.get("compress", 0.0))
+            content_encoding = response.headers.get("Content-Encoding", "identity")
+        return {
+            "bytes": int(percentile(sizes, 50)),
+            "content_encoding": content_encoding,
+            "serialize_ms_p50": round(percentile(serialize, 50), 3),
+            "compress_ms_p50": round(percentile(compress, 50), 3),
+            "latency": summarize_latencies(latencies),
+        }
+
+    def scenario_payload_size(self) -> Dict[str, Any]:
+        """Bytes on the wire and serialization cost per route: full vs ?fields=, per encoding"""
+        self.log("=== Scenario: Payload size (sparse fieldsets + compression) ===")
+
+        if not self.login(CLIENT_EMAIL, CLIENT_PASSWORD):
+            return {"passed": False, "error": "client login failed"}
+        client_token = self.access_token
+        if not self.login():
+            return {"passed": False, "error": "tipster login failed"}
+        tipster_token = self.access_token
+
+        response, _ = self.timed_request("POST", "/checkout/test-purchase", {"productId": self.product_id})
+        if response.status_code not in (200, 201):
+            return {"passed": False, "error": f"test-purchase returned {response.status_code}"}
+        order_id = response.json()["orderId"]
+
+        routes = {
+            "products_my": ("/products/my", tipster_token),
+            "orders_my": ("/orders/my", client_token),
+            "order_details": (f"/checkout/order/{order_id}", client_token),
+        }
+        results = {}
+        passed = True
+        for name, (endpoint, token) in routes.items():
+            variants = {}
+            for shape, path in (("full", endpoint), ("fields", f"{endpoint}?fields={PAYLOAD_FIELDSETS[name]}")):
+                for encoding in PAYLOAD_ENCODINGS:
+                    variant = self.measure_payload(path, encoding, token)
+                    variants[f"{shape}_{encoding}"] = variant
+                    if "error" in variant:
+                        self.log(f"❌ {name} {shape}/{encoding}: {variant['error']}", "ERROR")
+                        passed = False
+
+            baseline = variants["full_identity"].get("bytes")
+            best = min((v["bytes"] for v in variants.values() if "bytes" in v), default=None)
+            results[name] = {
+                "variants": variants,
+                "baseline_bytes": baseline,
+                "smallest_bytes": best,
+                "reduction": round(1 - best / baseline, 4) if baseline and best is not None else None,
+            }
+            self.log(f"   {name}: {baseline} bytes full/identity -> {best} bytes smallest "
+                     f"({results[name]['reduction']:.1%} smaller)" if results[name]["reduction"] is not None
+                     else f"   {name}: incomplete")
+
+        return {"passed": passed, "routes": results}
+
+    # ===== RUNTIME CONFIG =====
+
+    def wait_for_flag(self, expected: bool, started: float) -> Dict[str, Optional[float]]:
+        """Poll the public feature flags until CONFIG_CONSISTENT_READS reads in a row show expected"""
+        first_seen, streak = None, 0
+        while time.perf_counter() - started < CONFIG_TIMEOUT:
+            response, _ = self.timed_request("GET", "/checkout/feature-flags", timeout=5)
+            if response.status_code == 200 and response.json().get("cryptoEnabled") == expected:
+                if first_seen is None:
+                    first_seen = (time.perf_counter() - started) * 1000
+                streak += 1
+                if streak >= CONFIG_CONSISTENT_READS:
+                    return {"first_seen_ms": first_seen, "consistent_ms": (time.perf_counter() - started) * 1000}
+            else:
+                streak = 0
+            time.sleep(CONFIG_PROBE_INTERVAL)
+        return {"first_seen_ms": first_seen, "consistent_ms": None}
+
+    def scenario_config_propagation(self) -> Dict[str, Any]:
+        """Flip a payment flag through the admin API and time until /checkout/feature-flags serves it"""
+        self.log("=== Scenario: Runtime config propagation ===")
+        if not self.login(ADMIN_EMAIL, ADMIN_PASSWORD):
+            return {"passed": False, "error": "admin login failed"}
+
+        response, _ = self.timed_request("GET", "/admin/config", use_auth=True)
+        if response.status_code != 200:
+            return {"passed": False, "error": f"admin/config returned {response.status_code}"}
+        original = response.json()["values"].get(CONFIG_FLAG_KEY)
+
+        rounds = []
+        value = bool(original)
+        try:
+            for _ in range(CONFIG_ROUNDS):
+                value = not value
+                started = time.perf_counter()
+                response, write_ms = self.timed_request("PUT", f"/admin/config/{CONFIG_FLAG_KEY}",
+                                                        {"value": value}, use_auth=True)
+                if response.status_code != 200:
+                    rounds.append({"error": f"status {response.status_code}"})
+                    continue
+                result = self.wait_for_flag(value, started)
+                result["write_ms"] = write_ms
+                rounds.append(result)
+                self.log(f"   {CONFIG_FLAG_KEY}={value}: first read {result['first_seen_ms']}ms, "
+                         f"consistent {result['consistent_ms']}ms")
+        finally:
+            restore = original if original is not None else False
+            self.timed_request("PUT", f"/admin/config/{CONFIG_FLAG_KEY}", {"value": restore}, use_auth=True)
+
+        converged = [r for r in rounds if r.get("consistent_ms") is not None]
+
+        return {
+            "passed": len(converged) == CONFIG_ROUNDS,
+            "rounds": len(rounds),
+            "first_seen": summarize_latencies([r["first_seen_ms"] for r in converged]),
+            "consistent": summarize_latencies([r["consistent_ms"] for r in converged]),
+            "write": summarize_latencies([r["write_ms"] for r in converged]),
+            "errors": [r["error"] for r in rounds if "error" in r],
+        }
+
+    # ===== SEAT RESERVATION =====
+
+    def scenario_seat_contention(self) -> Dict[str, Any]:
+        """Many buyers race for the seats of a capacity-limited product"""
+        self.log("=== Scenario: Seat reservation contention ===")
+
+        if not self.login():
+            return {"passed": False, "error": "login failed"}
+
+        product_data = {
+            "title": f"Load test seats {int(time.time())}",
+            "description": "Capacity-limited product for contention benchmark",
+            "priceCents": 1000,
+            "currency": "EUR",
+            "billingType": "ONE_TIME",
+            "capacityLimit": self.seat_capacity,
+        }
+        response, _ = self.timed_request("POST", "/products", product_data, use_auth=True)
+        if response.status_code != 201:
+            self.log(f"❌ Could not create product: {response.status_code}", "ERROR")
+            return {"passed": False, "error": f"create product status {response.status_code}"}
+        product_id = response.json()["id"]
+        self.log(f"✅ Created product {product_id} with {self.seat_capacity} seats")
+
+        def attempt(i: int) -> Tuple[int, float]:
+            resp, elapsed = self.timed_request("POST", "/checkout/test-purchase", {
+                "productId": product_id,
+                "email": f"seat{i}@loadtest.antia",
+            })
+            return resp.status_code, elapsed
+
+        started = time.perf_counter()
+        samples = self.run_concurrently(attempt, self.total_requests)
+        duration = time.perf_counter() - started
+
+        sold = [s for s in samples if s[0] in (200, 201)]
+        rejected = [s for s in samples if s[0] == 409]
+        errors = [s for s in samples if s[0] not in (200, 201, 409)]
+
+        # Cross-check the counters stored on the product
+        response, _ = self.timed_request("GET", f"/products/{product_id}", use_auth=True)
+        product = response.json() if response.status_code == 200 else {}
+        seats_sold = product.get("seatsSold") or 0
+        seats_held = product.get("seatsHeld") or 0
+
+        # Leave the product paused so it does not show up in listings
+        self.timed_request("POST", f"/products/{product_id}/pause", use_auth=True)
+
+        oversold = len(sold) > self.seat_capacity or seats_sold + seats_held > self.seat_capacity
+        if oversold:
+            self.log(f"❌ Oversell detected: {len(sold)} purchases, counters sold={seats_sold} held={seats_held}",
+                     "ERROR")
+        else:
+            self.log(f"✅ No oversell: {len(sold)}/{self.seat_capacity} seats sold, {len(rejected)} rejected")
+
+        return {
+            "passed": not oversold and not errors and seats_sold == len(sold),
+            "product_id": product_id,
+            "capacity": self.seat_capacity,
+            "attempts": len(samples),
+            "sold": len(sold),
+            "rejected": len(rejected),
+            "errors": len(errors),
+            "counter_seats_sold": seats_sold,
+            "counter_seats_held": seats_held,
+            "attempts_per_sec": round(len(samples) / duration, 2),
+            "latency_all": summarize_latencies([s[1] for s in samples]),
+            "latency_sold": summarize_latencies([s[1] for s in sold]),
+            "latency_rejected": summarize_latencies([s[1] for s in rejected]),
+        }
+
+    # ===== CHECKOUT FUNNEL =====
+
+    def run_buyer_journey(self, buyer: int) -> Dict[str, Any]:
+        """One buyer: product view → gateway → session → payment → order polling"""
+        timings: Dict[str, float] = {}
+        telegram_user_id = str(700000000 + buyer)
+        # Spread buyers over public IPs so gateway detection is not all-localhost
+        client_headers = {"X-Forwarded-For": f"88.6.{buyer // 250 % 250}.{buyer % 250 + 1}"}
+        click = time.perf_counter()
+
+        def failed(stage: str, response: requests.Response) -> Dict[str, Any]:
+            return {"completed": False, "failed_stage": stage, "status": response.status_code, "timings": timings}
+
+        response, timings["product_view"] = self.timed_request("GET", f"/checkout/product/{self.product_id}")
+        if response.status_code != 200:
+            return failed("product_view", response)
+
+        response, timings["detect_gateway"] = self.timed_request(
+            "GET", "/checkout/detect-gateway", headers=client_headers)
+        if response.status_code != 200:
+            return failed("detect_gateway", response)
+
+        response, timings["create_session"] = self.timed_request("POST", "/checkout/session", {
+            "productId": self.product_id,
+            "originUrl": BASE_URL,
+            "isGuest": True,
+            "email": f"funnel{buyer}@loadtest.antia",
+            "telegramUserId": telegram_user_id,
+            "telegramUsername": f"funnel{buyer}",
+        }, headers=client_headers)
+        if response.status_code not in (200, 201):
+            return failed("create_session", response)
+        order_id = response.json()["orderId"]
+
+        response, timings["complete_payment"] = self.timed_request(
+            "POST", f"/checkout/simulate-payment/{order_id}")
+        if response.status_code not in (200, 201):
+            return failed("complete_payment", response)
+        # The buyer notification is sent before simulate-payment answers
+        notified = bool(response.json().get("telegramNotification"))
+        click_to_notification = (time.perf_counter() - click) * 1000 if notified else None
+
+        polls = 0
+        poll_started = time.perf_counter()
+        status = None
+        while polls < ORDER_POLL_MAX:
+            polls += 1
+            response, _ = self.timed_request("GET", f"/checkout/order/{order_id}")
+            if response.status_code == 200:
+                status = response.json().get("order", {}).get("status")
+                if status == "PAGADA":
+                    break
+            time.sleep(ORDER_POLL_INTERVAL)
+        timings["order_polling"] = (time.perf_counter() - poll_started) * 1000
+        if status != "PAGADA":
+            return failed("order_polling", response)
+
+        return {
+            "completed": True,
+            "timings": timings,
+            "polls": polls,
+            "click_to_notification_ms": click_to_notification,
+            "journey_ms": (time.perf_counter() - click) * 1000,
+        }
+
+    def scenario_checkout_funnel(self) -> Dict[str, Any]:
+        """Full buyer journey for many concurrent buyers"""
+        self.log("=== Scenario: Checkout funnel ===")
+
+        started = time.perf_counter()
+        journeys = self.run_concurrently(self.run_buyer_journey, self.total_requests)
+        duration = time.perf_counter() - started
+
+        completed = [j for j in journeys if j["completed"]]
+        abandoned: Dict[str, int] = {}
+        for journey in journeys:
+            if not journey["completed"]:
+                abandoned[journey["failed_stage"]] = abandoned.get(journey["failed_stage"], 0) + 1
+
+        stages = {}
+        for stage in FUNNEL_STAGES:
+            stages[stage] = summarize_latencies([j["timings"][stage] for j in journeys if stage in j["timings"]])
+
+        notifications = [j["click_to_notification_ms"] for j in completed if j["click_to_notification_ms"]]
+        self.log(f"✅ {len(completed)}/{len(journeys)} purchases completed "
+                 f"({len(completed) / duration:.2f}/s)")
+        for stage, failures in abandoned.items():
+            self.log(f"⚠️ {failures} buyers stopped at {stage}", "WARN")
+
+        return {
+            "passed": len(completed) == len(journeys),
+            "buyers": len(journeys),
+            "completed": len(completed),
+            "abandoned_by_stage": abandoned,
+            "purchases_per_sec": round(len(completed) / duration, 2),
+            "click_to_notification": summarize_latencies(notifications),
+            "journey": summarize_latencies([j["journey_ms"] for j in completed]),
+            "mean_polls": round(sum(j["polls"] for j in completed) / len(completed), 2) if completed else 0,
+            "stage_p95_ms": {stage: stats["p95_ms"] for stage, stats in stages.items()},
+            "stages": stages,
+        }
+
+    # ===== ORDER STATUS PUSH =====
+
+    def stripe_standin_stats(self) -> Optional[Dict[str, int]]:
+        try:
+            return requests.get(f"{STRIPE_STANDIN_URL}/_standin/stats", timeout=5).json()["counters"]
+        except requests.RequestException:
+            return None
+
+    def wait_for_order_status(self, mode: str, order_id: str, session_id: str) -> Tuple[Optional[str], int]:
+        """Follow one order until it leaves PENDING the way each client style would; (status, requests made)"""
+        deadline = time.perf_counter() + ORDER_STATUS_TIMEOUT
+        calls = 0
+        if mode == "sse":
+            calls += 1
+            with self.session().get(f"{self.api_base}/checkout/order/{order_id}/events", stream=True,
+                                    headers={"Accept": "text/event-stream"}, timeout=ORDER_STATUS_TIMEOUT) as stream:
+                for line in stream.iter_lines(decode_unicode=True):
+                    if line and line.startswith("data:"):
+                        status = json.loads(line[5:])["status"]
+                        if status != "PENDING":
+                            return status, calls
+            return None, calls
+
+        while time.perf_counter() < deadline:
+            calls += 1
+            if mode == "poll":
+                response, _ = self.timed_request(
+                    "GET", f"/checkout/verify?session_id={session_id}&order_id={order_id}")
+                if response.status_code == 200 and response.json().get("paymentStatus") == "paid":
+                    return "PAGADA", calls
+                time.sleep(ORDER_POLL_INTERVAL)
+            else:
+                response, _ = self.timed_request(
+                    "GET", f"/checkout/order/{order_id}/status?known=PENDING&wait={LONG_POLL_WAIT}",
+                    timeout=LONG_POLL_WAIT + 10)
+                if response.status_code == 200 and response.json()["status"] != "PENDING":
+                    return response.json()["status"], calls
+        return None, calls
+
+    def run_status_buyer(self, mode: str, buyer: int) -> Dict[str, Any]:
+        response, _ = self.timed_request("POST", "/checkout/session", {
+            "productId": self.product_id,
+            "originUrl": BASE_URL,
+            "isGuest": True,
+            "email": f"status{buyer}@loadtest.antia",
+        }, headers={"X-Forwarded-For": f"100.64.{buyer // 250 % 250}.{buyer % 250 + 1}"})
+        if response.status_code not in (200, 201) or response.json().get("gateway") != "stripe":
+            return {"ok": False, "error": f"session {response.status_code}"}
+        session = response.json()
+        created = time.perf_counter()
+        try:
+            status, calls = self.wait_for_order_status(mode, session["orderId"], session["sessionId"])
+        except requests.RequestException as e:
+            return {"ok": False, "error": type(e).__name__}
+        return {
+            "ok": status == "PAGADA",
+            "error": None if status == "PAGADA" else f"status {status}",
+            "time_to_status_ms": (time.perf_counter() - created) * 1000,
+            "requests": calls,
+        }
+
+    def scenario_order_status(self) -> Dict[str, Any]:
+        """Stripe purchases completed by webhook: upstream Stripe calls and time-to-status for
+        /checkout/verify polling, long-poll and server-sent events"""
+        self.log("=== Scenario: Order status push vs polling ===")
+        if self.stripe_standin_stats() is None:
+            return {"passed": False, "error": f"Stripe stand-in not reachable at {STRIPE_STANDIN_URL} "
+                                              "(start it with --auto-complete-ms and the webhook secret)"}
+        response = self.admin_request("GET", "/admin/config")
+        if response is None or response.status_code != 200:
+            return {"passed": False, "error": "admin/config not available"}
+        redsys = response.json()["values"].get("payments.redsys_enabled")
+
+        modes = {}
+        # Every buyer goes through Stripe, whatever country they are detected in
+        self.admin_request("PUT", "/admin/config/payments.redsys_enabled", {"value": False})
+        try:
+            for mode in ORDER_STATUS_MODES:
+                before = self.stripe_standin_stats()
+                with self.profiling(mode):
+                    buyers = self.run_concurrently(lambda i, m=mode: self.run_status_buyer(m, i),
+                                                   self.total_requests)
+                after = self.stripe_standin_stats()
+                done = [b for b in buyers if b["ok"]]
+                retrieved = after.get("sessions_retrieved", 0) - before.get("sessions_retrieved", 0)
+                errors: Dict[str, int] = {}
+                for buyer in buyers:
+                    if not buyer["ok"]:
+                        errors[buyer["error"]] = errors.get(buyer["error"], 0) + 1
+                modes[mode] = {
+                    "purchases": len(buyers),
+                    "settled": len(done),
+                    "stripe_retrievals_per_purchase": round(retrieved / len(buyers), 2) if buyers else 0,
+                    "requests_per_purchase": round(sum(b["requests"] for b in done) / len(done), 2) if done else 0,
+                    "time_to_status": summarize_latencies([b["time_to_status_ms"] for b in done]),
+                    "errors": errors,
+                }
+                self.log(f"   {mode}: {len(done)}/{len(buyers)} settled, "
+                         f"{modes[mode]['stripe_retrievals_per_purchase']} Stripe retrievals and "
+                         f"{modes[mode]['requests_per_purchase']} requests per purchase, "
+                         f"p95 time-to-status {modes[mode]['time_to_status']['p95_ms']}ms")
+        finally:
+            self.admin_request("PUT", "/admin/config/payments.redsys_enabled",
+                               {"value": redsys if redsys is not None else True})
+
+        return {
+            "passed": all(m["settled"] == m["purchases"] for m in modes.values())
+                      and all(modes[m]["stripe_retrievals_per_purchase"] == 0 for m in ("long_poll", "sse")),
+            "modes": modes,
+        }
+
+    # ===== SOAK =====
+
+    def soak_traffic_mix(self) -> List[Tuple[str, float]]:
+        """Weighted mix of bot/checkout reads sent during the soak"""
+        return [
+            (f"/checkout/product/{self.product_id}", 0.35),
+            ("/checkout/feature-flags", 0.2),
+            ("/houses", 0.15),
+            ("/checkout/detect-gateway", 0.15),
+            (f"/products/{self.product_id}", 0.1),
+            ("/health", 0.05),
+        ]
+
+    def sample_runtime(self, started: float) -> Optional[Dict[str, Any]]:
+        """One resource sample from /health/runtime (plus /proc when the backend is local)"""
+        try:
+            response, _ = self.timed_request("GET", "/health/runtime")
+        except requests.RequestException as e:
+            self.log(f"⚠️ Runtime sample failed: {e}", "WARN")
+            return None
+        if response.status_code != 200:
+            self.log(f"⚠️ Runtime sample returned {response.status_code}", "WARN")
+            return None
+
+        runtime = response.json()
+        sample = {
+            "timestamp": runtime["timestamp"],
+            "elapsed_s": round(time.perf_counter() - started, 1),
+            "pid": runtime["pid"],
+            **runtime["memory"],
+            "active_resources": runtime["active_resources"],
+            "sockets": runtime["sockets"],
+            "open_fds": runtime["open_fds"],
+            "event_loop_mean_ms": runtime["event_loop_delay"]["mean_ms"],
+            "event_loop_p99_ms": runtime["event_loop_delay"]["p99_ms"],
+        }
+        sample.update(read_proc_stats(runtime["pid"]))
+        return sample
+
+    def scenario_soak(self) -> Dict[str, Any]:
+        """Hours of steady mixed traffic, sampling backend resources to spot leaks"""
+        self.log("=== Scenario: Soak ===")
+        self.log(f"Duration {self.soak_duration}s, sample every {self.sample_interval}s, "
+                 f"series -> {self.soak_output}")
+
+        mix = self.soak_traffic_mix()
+        endpoints = [m[0] for m in mix]
+        weights = [m[1] for m in mix]
+        stop = threading.Event()
+        counters_lock = threading.Lock()
+        counters = {"requests": 0, "errors": 0}
+        window_latencies: List[float] = []
+
+        def worker(_: int):
+            while not stop.is_set():
+                endpoint = random.choices(endpoints, weights)[0]
+                try:
+                    response, elapsed = self.timed_request("GET", endpoint)
+                    failed = response.status_code >= 400
+                except requests.RequestException:
+                    elapsed, failed = None, True
+                with counters_lock:
+                    counters["requests"] += 1
+                    counters["errors"] += int(failed)
+                    if elapsed is not None:
+                        window_latencies.append(elapsed)
+                stop.wait(self.think_ms / 1000)
+
+        samples: List[Dict[str, Any]] = []
+        started = time.perf_counter()
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        for i in range(self.concurrency):
+            pool.submit(worker, i)
+
+        writer = None
+        try:
+            with open(self.soak_output, "w", newline="") as series:
+                while time.perf_counter() - started < self.soak_duration:
+                    stop.wait(self.sample_interval)
+                    sample = self.sample_runtime(started)
+                    if sample is None:
+                        continue
+                    with counters_lock:
+                        sample["requests"] = counters["requests"]
+                        sample["errors"] = counters["errors"]
+                        sample["p95_ms"] = round(percentile(window_latencies, 95), 2)
+                        window_latencies.clear()
+                    samples.append(sample)
+
+                    if writer is None:
+                        writer = csv.DictWriter(series, fieldnames=list(sample), extrasaction="ignore")
+                        writer.writeheader()
+                    writer.writerow(sample)
+                    series.flush()
+                    self.log(f"   t={sample['elapsed_s']:.0f}s rss={sample['rss_mb']}MB "
+                             f"heap={sample['heap_used_mb']}MB handles={sample['active_resources']} "
+                             f"sockets={sample['sockets']} loop_p99={sample['event_loop_p99_ms']}ms "
+                             f"p95={sample['p95_ms']}ms")
+        finally:
+            stop.set()
+            pool.shutdown(wait=True)
+
+        if not samples:
+            return {"passed": False, "error": "no runtime samples collected"}
+
+        trends = {metric: detect_growth(samples, metric) for metric in SOAK_METRICS}
+        growing = [metric for metric, trend in trends.items() if trend["growing"]]
+        for metric in growing:
+            self.log(f"⚠️ {metric} keeps growing: {trends[metric]['start']} → {trends[metric]['end']} "
+                     f"({trends[metric]['slope_per_hour']}/h)", "WARN")
+        if len({s["pid"] for s in samples}) > 1:
+            self.log("⚠️ Backend restarted during the soak", "WARN")
+
+        return {
+            "passed": not growing and counters["errors"] == 0,
+            "duration_s": samples[-1]["elapsed_s"],
+            "requests": counters["requests"],
+            "errors": counters["errors"],
+            "samples": len(samples),
+            "restarts": len({s["pid"] for s in samples}) - 1,
+            "growing_metrics": growing,
+            "trends": trends,
+            "series_file": self.soak_output,
+        }
+
+    # ===== ACCESS EXPIRY =====
+
+    def standin_call(self, method: str, path: str) -> Optional[Dict[str, Any]]:
+        """Talk to the Telegram stand-in control API (None if it is not running)"""
+        try:
+            return requests.request(method, f"{TELEGRAM_STANDIN_URL}{path}", timeout=5).json()
+        except requests.RequestException:
+            return None
+
+    def telegram_update(self, update_id: int, telegram_user_id: int, text: str) -> Dict[str, Any]:
+        """Minimal Telegram message update, as the Bot API posts it to the webhook"""
+        user = {"id": telegram_user_id, "is_bot": False, "first_name": "Load", "username": f"buyer{telegram_user_id}"}
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "from": user,
+                "chat": {"id": telegram_user_id, "type": "private", "first_name": "Load"},
+                "date": int(time.time()),
+                "text": text,
+                "entities": [{"offset": 0, "length": len(text.split()[0]), "type": "bot_command"}],
+            },
+        }
+
+    def cache_lookups(self, cache: str) -> Dict[str, float]:
+        response, _ = self.timed_request("GET", "/metrics")
+        if response.status_code != 200:
+            return {}
+        return {result: metric_total(response.text, "antia_cache_lookups_total", cache=cache, result=result)
+                for result in ("hit", "miss")}
+
+    def scenario_bot_purchases(self) -> Dict[str, Any]:
+        """Replay /mis_compras webhook updates from active buyers; cold vs cached, and refresh on payment"""
+        self.log("=== Scenario: Bot /mis_compras webhook replay ===")
+        if self.standin_call("POST", "/reset") is None:
+            self.log("⚠️ Telegram stand-in not reachable: bot replies will fail against the real API", "WARN")
+
+        seeded = bulk_seeder.seed_orders(BOT_BUYERS * BOT_ORDERS_PER_BUYER, self.product_id,
+                                         status="PAGADA", telegram_users=BOT_BUYERS)
+        buyers = [bulk_seeder.TELEGRAM_USER_BASE + n for n in range(BOT_BUYERS)]
+        self.log(f"✅ Seeded {len(seeded)} paid orders for {BOT_BUYERS} Telegram buyers")
+        update_ids = iter(range(1, 10_000_000))
+        update_lock = threading.Lock()
+
+        def replay(buyer: int) -> Tuple[int, float]:
+            with update_lock:
+                update_id = next(update_ids)
+            response, elapsed = self.timed_request("POST", "/telegram/webhook",
+                                                   self.telegram_update(update_id, buyer, "/mis_compras"),
+                                                   headers=TELEGRAM_WEBHOOK_HEADERS)
+            ok = response.status_code == 200 and response.json().get("ok")
+            return (200 if ok else response.status_code), elapsed
+
+        try:
+            before = self.cache_lookups("purchase_summary")
+            # First pass: one command per buyer, nothing cached yet
+            with self.profiling("cold"):
+                cold = self.run_concurrently(lambda i: replay(buyers[i]), len(buyers))
+            # Then active buyers repeating the command
+            with self.profiling("cached"):
+                started = time.perf_counter()
+                warm = self.run_concurrently(lambda i: replay(random.choice(buyers)), self.total_requests)
+                duration = time.perf_counter() - started
+            after = self.cache_lookups("purchase_summary")
+
+            # A new payment must show up on the buyer's next /mis_compras
+            buyer = buyers[0]
+            response, _ = self.timed_request("POST", "/checkout/test-purchase", {
+                "productId": self.product_id, "telegramUserId": str(buyer)})
+            refreshed = None
+            expected = BOT_ORDERS_PER_BUYER + 1
+            # The summary is rebuilt in the background once the order is PAGADA
+            for _ in range(BOT_REFRESH_POLLS if response.status_code in (200, 201) else 0):
+                response, _ = self.timed_request("POST", "/bot/sync-purchase", {"telegram_user_id": str(buyer)},
+                                                 headers={"X-Bot-Token": BOT_API_TOKEN})
+                refreshed = response.json().get("totalPurchases") if response.status_code in (200, 201) else None
+                if refreshed == expected:
+                    break
+                time.sleep(0.1)
+        finally:
+            self.log(f"🧹 Removed {bulk_seeder.clear_orders()} seeded orders")
+
+        errors = [s for s in cold + warm if s[0] != 200]
+        hits = after.get("hit", 0) - before.get("hit", 0)
+        misses = after.get("miss", 0) - before.get("miss", 0)
+        hit_ratio = hits / (hits + misses) if hits + misses else None
+        self.log(f"   cold p95 {summarize_latencies([s[1] for s in cold])['p95_ms']}ms, "
+                 f"cached p95 {summarize_latencies([s[1] for s in warm])['p95_ms']}ms, "
+                 f"hit ratio {hit_ratio if hit_ratio is None else round(hit_ratio, 3)}")
+        if refreshed != expected:
+            self.log(f"❌ Summary after a new payment shows {refreshed} purchases, expected {expected}", "ERROR")
+
+        return {
+            "passed": not errors and refreshed == expected,
+            "buyers": BOT_BUYERS,
+            "updates": len(cold) + len(warm),
+            "errors": len(errors),
+            "updates_per_sec": round(len(warm) / duration, 1) if duration else 0,
+            "latency_cold": summarize_latencies([s[1] for s in cold]),
+            "latency_cached": summarize_latencies([s[1] for s in warm]),
+            "cache_hits": hits,
+            "cache_misses": misses,
+            "cache_hit_ratio": round(hit_ratio, 4) if hit_ratio is not None else None,
+            "purchases_after_payment": refreshed,
+            "telegram_calls": (self.standin_call("GET", "/stats") or {}).get("calls"),
+        }
+
+    def scenario_expiry_sweep(self) -> Dict[str, Any]:
+        """Seed expired grants and measure how fast concurrent sweeps revoke them"""
+        self.log("=== Scenario: Access expiry sweep ===")
+        if not self.login(ADMIN_EMAIL, ADMIN_PASSWORD):
+            return {"passed": False, "error": "admin login failed"}
+
+        self.log(f"Seeding {self.grants} expired grants...")
+        seed_started = time.perf_counter()
+        seeded = bulk_seeder.seed_grants(self.grants)
+        self.log(f"✅ Seeded {seeded} grants in {time.perf_counter() - seed_started:.1f}s")
+        if self.standin_call("POST", "/reset") is None:
+            self.log("⚠️ Telegram stand-in not reachable: duplicate revocations will not be checked", "WARN")
+
+        def sweeper(_: int) -> Dict[str, Any]:
+            totals = {"calls": 0, "claimed": 0, "revoked": 0, "retried": 0, "throttled": 0, "superseded": 0,
+                      "failed": 0, "latencies": []}
+            while True:
+                response, elapsed = self.timed_request(
+                    "POST", f"/access/expiry/sweep?maxBatches={SWEEP_BATCHES_PER_CALL}",
+                    use_auth=True, timeout=600)
+                if response.status_code == 401:
+                    self.login(ADMIN_EMAIL, ADMIN_PASSWORD)
+                    continue
+                if response.status_code not in (200, 201):
+                    totals["error"] = f"status {response.status_code}"
+                    return totals
+                result = response.json()
+                totals["calls"] += 1
+                totals["latencies"].append(elapsed)
+                for key in ("claimed", "revoked", "retried", "throttled", "superseded", "failed"):
+                    totals[key] += result[key]
+                if result["claimed"] == 0:
+                    return totals
+
+        started = time.perf_counter()
+        sweepers = self.run_concurrently(sweeper, self.concurrency)
+        duration = time.perf_counter() - started
+
+        revoked = sum(s["revoked"] for s in sweepers)
+        claimed = sum(s["claimed"] for s in sweepers)
+        errors = [s["error"] for s in sweepers if "error" in s]
+        response, _ = self.timed_request("GET", "/access/expiry/stats", use_auth=True)
+        backend_stats = response.json() if response.status_code == 200 else {}
+        standin = self.standin_call("GET", "/stats")
+        by_status = bulk_seeder.count_grants()
+        self.log(f"✅ {revoked} grants revoked in {duration:.1f}s ({revoked / duration:.0f}/s) "
+                 f"by {len(sweepers)} concurrent sweepers")
+
+        duplicates = standin["duplicate_bans"] if standin else None
+        if duplicates:
+            self.log(f"❌ {duplicates} users were banned more than once", "ERROR")
+
+        cleared = bulk_seeder.clear_grants()
+        self.log(f"🧹 Removed {cleared} seeded grants")
+
+        return {
+            "passed": not errors and not duplicates and by_status.get("EXPIRED", 0) == seeded,
+            "seeded": seeded,
+            "claimed": claimed,
+            "revoked": revoked,
+            "retried": sum(s["retried"] for s in sweepers),
+            "throttled": sum(s["throttled"] for s in sweepers),
+            "superseded": sum(s["superseded"] for s in sweepers),
+            "failed": sum(s["failed"] for s in sweepers),
+            "duration_s": round(duration, 2),
+            "revocations_per_sec": round(revoked / duration, 1) if duration else 0,
+            "sweep_call_latency": summarize_latencies([l for s in sweepers for l in s["latencies"]]),
+            "grants_by_status": by_status,
+            "backend_stats": backend_stats,
+            "telegram_calls": standin["calls"] if standin else None,
+            "duplicate_bans": duplicates,
+            "errors": errors,
+        }
+
+    def run_timed_mix(self, duration: float, think_ms: float, timeout: float = 30) -> Dict[str, Any]:
+        """Closed-loop soak traffic mix from every worker for `duration` seconds"""
+        mix = self.soak_traffic_mix()
+        endpoints = [m[0] for m in mix]
+        weights = [m[1] for m in mix]
+        deadline = time.perf_counter() + duration
+        lock = threading.Lock()
+        latencies: List[float] = []
+        counters = {"requests": 0, "errors": 0, "timeouts": 0}
+
+        def worker(_: int):
+            while time.perf_counter() < deadline:
+                endpoint = random.choices(endpoints, weights)[0]
+                try:
+                    response, elapsed = self.timed_request("GET", endpoint, timeout=timeout)
+                    failed, timed_out = response.status_code >= 500, False
+                except requests.Timeout:
+                    elapsed, failed, timed_out = timeout * 1000, True, True
+                except requests.RequestException:
+                    elapsed, failed, timed_out = None, True, False
+                with lock:
+                    counters["requests"] += 1
+                    counters["errors"] += int(failed)
+                    counters["timeouts"] += int(timed_out)
+                    if elapsed is not None:
+                        latencies.append(elapsed)
+                if think_ms:
+                    time.sleep(think_ms / 1000)
+
+        self.run_concurrently(worker, self.concurrency)
+        return {**counters, "throughput_rps": round(counters["requests"] / duration, 1),
+                **summarize_latencies(latencies)}
+
+    # ===== DEPENDENCY FAULTS =====
+
+    def fault_proxy_call(self, method: str, path: str, body: Dict = None) -> Optional[Dict[str, Any]]:
+        """Talk to the fault proxy control API (None if it is not running)"""
+        try:
+            return requests.request(method, f"{FAULT_PROXY_URL}{path}", json=body, timeout=5).json()
+        except requests.RequestException:
+            return None
+
+    def load_fault_steps(self) -> List[Dict[str, Any]]:
+        """Steps from --fault-schedule ({"steps": [{"name", "duration_s", "faults": {route: profile}}]})"""
+        if not self.fault_schedule:
+            return DEFAULT_FAULT_STEPS
+        with open(self.fault_schedule) as schedule:
+            return json.load(schedule)["steps"]
+
+    def scenario_dependency_faults(self) -> Dict[str, Any]:
+        """Step through MongoDB/Telegram faults under steady traffic and record tail latency per step"""
+        self.log("=== Scenario: Dependency faults ===")
+        routes = self.fault_proxy_call("GET", "/routes")
+        if routes is None:
+            return {"passed": False, "error": f"fault proxy not reachable at {FAULT_PROXY_URL}"}
+        self.fault_proxy_call("POST", "/reset")
+
+        steps: Dict[str, Dict[str, Any]] = {}
+
+        try:
+            for step in self.load_fault_steps():
+                for route in routes:
+                    profile = step["faults"].get(route, {})
+                    if self.fault_proxy_call("POST", f"/routes/{route}", profile) is None:
+                        raise RuntimeError(f"could not apply faults to route {route}")
+                with self.profiling(step["name"]):
+                    result = self.run_timed_mix(step.get("duration_s", self.fault_step), self.think_ms,
+                                                FAULT_REQUEST_TIMEOUT)
+                steps[step["name"]] = result
+                self.log(f"   {step['name']}: {result['throughput_rps']} req/s, p50 {result['p50_ms']}ms, "
+                         f"p95 {result['p95_ms']}ms, p99 {result['p99_ms']}ms, "
+                         f"errors {result['errors']}, timeouts {result['timeouts']}")
+        finally:
+            proxy_stats = self.fault_proxy_call("GET", "/routes")
+            self.fault_proxy_call("POST", "/reset")
+
+        baseline = steps.get("baseline", {})
+        recovery = steps.get("recovery", {})
+        # The backend must be healthy without faults and come back once they are removed
+        recovered = not recovery or (
+            recovery["errors"] == 0 and recovery["p95_ms"] <= 2 * max(baseline.get("p95_ms", 0), 50))
+        if not recovered:
+            self.log("❌ Backend did not recover after the faults were removed", "ERROR")
+
+        return {
+            "passed": baseline.get("errors", 0) == 0 and recovered,
+            "steps": steps,
+            "p99_by_step_ms": {name: result["p99_ms"] for name, result in steps.items()},
+            "proxy_stats": {route: info["stats"] for route, info in (proxy_stats or {}).items()},
+        }
+
+    # ===== INVITE LINK POOL =====
+
+    def invite_pool_available(self, channel_id: str) -> int:
+        response = self.admin_request("GET", f"/admin/invite-links?channelId={channel_id}")
+        return response.json()["channels"].get(channel_id, {}).get("available", 0)
+
+    def scenario_invite_pool(self) -> Dict[str, Any]:
+        """Single-use invite links: refill throughput, claim latency (pooled vs minted on the spot),
+        one distinct link per order and the low-watermark top-up"""
+        self.log("=== Scenario: Invite link pool ===")
+        if self.standin_call("POST", "/reset") is None:
+            return {"passed": False, "error": f"Telegram stand-in not reachable at {TELEGRAM_STANDIN_URL}"}
+        response = self.admin_request("GET", "/admin/invite-links")
+        if response is None or response.status_code != 200:
+            return {"passed": False, "error": "admin/invite-links not available"}
+        pool_size = response.json()["poolSize"]
+        low_watermark = response.json()["lowWatermark"]
+        channel_id = f"-100{int(time.time() * 1000)}"
+        run_tag = f"invite-{int(time.time())}"
+
+        try:
+            with self.profiling("refill"):
+                response = self.admin_request("POST", f"/admin/invite-links/{channel_id}/refill", timeout=300)
+            refill = response.json()
+            refill_rate = refill["minted"] / (refill["durationMs"] / 1000) if refill["durationMs"] else 0
+            self.log(f"✅ Minted {refill['minted']} links in {refill['durationMs']}ms ({refill_rate:.1f}/s)")
+
+            def claim(i: int) -> Tuple[Optional[Dict[str, Any]], float]:
+                response, elapsed = self.timed_request(
+                    "POST", f"/admin/invite-links/{channel_id}/claim",
+                    {"orderId": f"{run_tag}-{i}", "telegramUserId": str(bulk_seeder.TELEGRAM_USER_BASE + i)},
+                    headers={"Authorization": f"Bearer {self.admin_token}"})
+                return (response.json() if response.status_code == 200 and response.content else None), elapsed
+
+            with self.profiling("claims"):
+                claims = self.run_concurrently(claim, self.total_requests)
+            links = [c["inviteLink"] for c, _ in claims if c]
+            sources: Dict[str, int] = {}
+            for claimed, _ in claims:
+                source = claimed["source"] if claimed else "failed"
+                sources[source] = sources.get(source, 0) + 1
+            latency_by_source = {
+                source: summarize_latencies([ms for c, ms in claims if c and c["source"] == source])
+                for source in ("pool", "minted")
+            }
+            self.log(f"✅ {len(links)}/{len(claims)} claims: {sources}, "
+                     f"p95 pooled {latency_by_source['pool']['p95_ms']}ms / minted {latency_by_source['minted']['p95_ms']}ms")
+
+            # Claiming again for an order hands back the same link
+            repeats = self.run_concurrently(claim, min(INVITE_REPEAT_CLAIMS, self.total_requests))
+            stable = all(c and c["inviteLink"] == claims[i][0]["inviteLink"]
+                         for i, (c, _) in enumerate(repeats) if claims[i][0])
+
+            # The claims drained the pool: the low-watermark top-up should bring it back
+            started = time.perf_counter()
+            available = self.invite_pool_available(channel_id)
+            while available < low_watermark and time.perf_counter() - started < INVITE_REFILL_TIMEOUT:
+                time.sleep(0.25)
+                available = self.invite_pool_available(channel_id)
+            refilled_s = time.perf_counter() - started if available >= low_watermark else None
+
+            response, _ = self.timed_request("GET", "/metrics")
+            claim_seconds = {source: {
+                "count": metric_total(response.text, "antia_invite_link_claim_seconds_count", source=source),
+                "sum_s": round(metric_total(response.text, "antia_invite_link_claim_seconds_sum", source=source), 3),
+            } for source in ("pool", "minted", "existing")} if response.status_code == 200 else {}
+            telegram = self.standin_call("GET", "/stats") or {}
+        finally:
+            self.admin_request("DELETE", f"/admin/invite-links/{channel_id}")
+            bulk_seeder.clear_invite_links(channel_id)
+
+        distinct = len(set(links)) == len(links)
+        if not distinct:
+            self.log(f"❌ {len(links) - len(set(links))} invite links were handed to more than one order", "ERROR")
+        if refilled_s is None:
+            self.log(f"❌ Pool still below the low watermark after {INVITE_REFILL_TIMEOUT}s "
+                     f"({available}/{low_watermark})", "ERROR")
+
+        return {
+            "passed": len(links) == len(claims) and distinct and stable and refilled_s is not None,
+            "pool_size": pool_size,
+            "low_watermark": low_watermark,
+            "available_after": available,
+            "refill": {**refill, "links_per_sec": round(refill_rate, 1)},
+            "claims": len(claims),
+            "sources": sources,
+            "claim_latency": latency_by_source,
+            "claim_seconds": claim_seconds,
+            "distinct_links": distinct,
+            "repeat_claims_stable": stable,
+            "background_refill_s": round(refilled_s, 2) if refilled_s is not None else None,
+            "telegram_invite_calls": telegram.get("calls", {}).get("createChatInviteLink", 0),
+        }
+
+    # ===== ABUSE / RATE LIMITING =====
+
+    def flood(self, stop: threading.Event, counters: Dict[str, int], lock: threading.Lock):
+        """One attacker thread: /auth/otp/send as fast as possible from a single address"""
+        while not stop.is_set():
+            try:
+                response, _ = self.timed_request("POST", "/auth/otp/send", {"email": "victim@loadtest.antia"},
+                                                 headers={"X-Forwarded-For": ABUSE_ATTACKER_IP}, timeout=10)
+                status = response.status_code
+                retry_after = response.headers.get("Retry-After")
+            except requests.RequestException:
+                status, retry_after = 0, None
+            with lock:
+                counters["requests"] += 1
+                counters["throttled"] += int(status == 429)
+                counters["with_retry_after"] += int(status == 429 and retry_after is not None)
+                counters["errors"] += int(status == 0 or status >= 500)
+
+    def legit_otp(self, stop: threading.Event, results: List[int]):
+        """A trickle of real sign-ins: ABUSE_OTP_USERS per second, each from its own address"""
+        n = 0
+        while not stop.is_set():
+            n += 1
+            try:
+                response, _ = self.timed_request(
+                    "POST", "/auth/otp/send", {"email": f"user{n}@loadtest.antia"},
+                    headers={"X-Forwarded-For": f"198.18.{n // 250 % 250}.{n % 250 + 1}"}, timeout=10)
+                results.append(response.status_code)
+            except requests.RequestException:
+                results.append(0)
+            stop.wait(1 / ABUSE_OTP_USERS)
+
+    def abuse_phase(self, attackers: int) -> Dict[str, Any]:
+        stop = threading.Event()
+        lock = threading.Lock()
+        counters = {"requests": 0, "throttled": 0, "with_retry_after": 0, "errors": 0}
+        otp_statuses: List[int] = []
+        pool = ThreadPoolExecutor(max_workers=attackers + 1)
+        for _ in range(attackers):
+            pool.submit(self.flood, stop, counters, lock)
+        pool.submit(self.legit_otp, stop, otp_statuses)
+        try:
+            browsing = self.run_timed_mix(ABUSE_PHASE_SECONDS, self.think_ms)
+        finally:
+            stop.set()
+            pool.shutdown(wait=True)
+        return {
+            "browsing": browsing,
+            "attacker": {**counters,
+                         "throttled_ratio": round(counters["throttled"] / counters["requests"], 4)
+                         if counters["requests"] else 0},
+            "legit_otp": {"requests": len(otp_statuses),
+                          "rejected": sum(1 for status in otp_statuses if status != 200)},
+        }
+
+    def scenario_abuse(self) -> Dict[str, Any]:
+        """Browsing latency with and without an attacker flooding /auth/otp/send from one address"""
+        self.log("=== Scenario: Abuse vs rate limits ===")
+        response, _ = self.timed_request("GET", "/metrics")
+        throttled_before = metric_total(response.text, "antia_rate_limit_decisions_total", limit="otp_send") \
+            - metric_total(response.text, "antia_rate_limit_decisions_total", limit="otp_send", result="allowed")
+
+        with self.profiling("baseline"):
+            baseline = self.abuse_phase(0)
+        self.log(f"   baseline: browsing p95 {baseline['browsing']['p95_ms']}ms, "
+                 f"{baseline['legit_otp']['rejected']}/{baseline['legit_otp']['requests']} OTP requests rejected")
+        with self.profiling("attack"):
+            attack = self.abuse_phase(ABUSE_ATTACKERS)
+        self.log(f"   attack: browsing p95 {attack['browsing']['p95_ms']}ms, attacker "
+                 f"{attack['attacker']['throttled']}/{attack['attacker']['requests']} throttled, "
+                 f"{attack['legit_otp']['rejected']}/{attack['legit_otp']['requests']} OTP requests rejected")
+
+        response, _ = self.timed_request("GET", "/metrics")
+        throttled_after = metric_total(response.text, "antia_rate_limit_decisions_total", limit="otp_send") \
+            - metric_total(response.text, "antia_rate_limit_decisions_total", limit="otp_send", result="allowed")
+
+        base_p95 = baseline["browsing"]["p95_ms"]
+        # Browsing may get a little slower under attack, but not by the bcrypt work of the flood
+        steady = attack["browsing"]["p95_ms"] <= max(base_p95 * 1.5, base_p95 + 20)
+        return {
+            "passed": steady
+                      and attack["attacker"]["throttled_ratio"] >= 0.9
+                      and attack["attacker"]["with_retry_after"] == attack["attacker"]["throttled"]
+                      and attack["legit_otp"]["rejected"] == 0
+                      and attack["browsing"]["errors"] == 0,
+            "baseline": baseline,
+            "attack": attack,
+            "browsing_p95_ratio": round(attack["browsing"]["p95_ms"] / base_p95, 2) if base_p95 else None,
+            "throttled_by_server": throttled_after - throttled_before,
+        }
+
+    # ===== OVERLOAD / LOAD SHEDDING =====
+
+    def dashboard_user(self, stop: threading.Event, statuses: List[Tuple[int, float, bool]], lock: threading.Lock):
+        """One tipster reloading dashboard widgets back to back"""
+        while not stop.is_set():
+            try:
+                response, elapsed = self.timed_request("GET", random.choice(DASHBOARD_ROUTES), use_auth=True,
+                                                       timeout=10)
+                sample = (response.status_code, elapsed, response.headers.get("Retry-After") is not None)
+            except requests.RequestException:
+                sample = (0, 10_000.0, False)
+            with lock:
+                statuses.append(sample)
+
+    def payment_request(self, n: int) -> Tuple[str, int, float]:
+        """Alternately a guest checkout session and a bot update (kind, status, ms)"""
+        try:
+            if n % 2 == 0:
+                response, elapsed = self.timed_request("POST", "/checkout/session", {
+                    "productId": self.product_id,
+                    "originUrl": BASE_URL,
+                    "isGuest": True,
+                    "email": f"overload{n}@loadtest.antia",
+                }, headers={"X-Forwarded-For": f"100.65.{n // 250 % 250}.{n % 250 + 1}"}, timeout=30)
+                return "checkout_session", response.status_code, elapsed
+            buyer = bulk_seeder.TELEGRAM_USER_BASE + n
+            response, elapsed = self.timed_request("POST", "/telegram/webhook",
+                                                   self.telegram_update(n, buyer, "/mis_compras"),
+                                                   headers=TELEGRAM_WEBHOOK_HEADERS, timeout=30)
+            return "telegram_webhook", response.status_code, elapsed
+        except requests.RequestException:
+            return "checkout_session" if n % 2 == 0 else "telegram_webhook", 0, 30_000.0
+
+    def overload_phase(self, dashboard_users: int) -> Dict[str, Any]:
+        stop = threading.Event()
+        lock = threading.Lock()
+        dashboards: List[Tuple[int, float, bool]] = []
+        pool = ThreadPoolExecutor(max_workers=max(dashboard_users, 1))
+        for _ in range(dashboard_users):
+            pool.submit(self.dashboard_user, stop, dashboards, lock)
+
+        # Payments are scheduled on the clock, so a slow server cannot hold back the next one
+        payments_pool = ThreadPoolExecutor(max_workers=OVERLOAD_PAYMENT_RATE * 10)
+        futures = []
+        started = time.perf_counter()
+        try:
+            for n in range(OVERLOAD_PHASE_SECONDS * OVERLOAD_PAYMENT_RATE):
+                delay = started + n / OVERLOAD_PAYMENT_RATE - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(payments_pool.submit(self.payment_request, n))
+            payments = [future.result() for future in futures]
+        finally:
+            stop.set()
+            pool.shutdown(wait=True)
+            payments_pool.shutdown(wait=True)
+        duration = time.perf_counter() - started
+
+        by_kind = {}
+        for kind in ("checkout_session", "telegram_webhook"):
+            samples = [p for p in payments if p[0] == kind]
+            by_kind[kind] = {**summarize_latencies([p[2] for p in samples]),
+                             "requests": len(samples),
+                             "shed": sum(1 for p in samples if p[1] == 503),
+                             "errors": sum(1 for p in samples if p[1] == 0 or p[1] >= 400)}
+        shed = [d for d in dashboards if d[0] == 503]
+        served = [d[1] for d in dashboards if d[0] == 200]
+        return {
+            "payments": {**summarize_latencies([p[2] for p in payments]),
+                         "requests": len(payments),
+                         "shed": sum(1 for p in payments if p[1] == 503),
+                         "errors": sum(1 for p in payments if p[1] == 0 or p[1] >= 400),
+                         "by_kind": by_kind},
+            "dashboards": {"requests": len(dashboards),
+                           "served": len(served),
+                           "shed": len(shed),
+                           "shed_ratio": round(len(shed) / len(dashboards), 4) if dashboards else 0,
+                           "shed_with_retry_after": sum(1 for d in shed if d[2]),
+                           "errors": sum(1 for d in dashboards if d[0] not in (200, 503)),
+                           "served_rps": round(len(served) / duration, 1),
+                           "served_latency": summarize_latencies(served)},
+        }
+
+    def load_shedding_counts(self) -> Dict[str, float]:
+        """antia_load_shed_total by priority plus the current limits (summed over workers)"""
+        response, _ = self.timed_request("GET", "/metrics")
+        if response.status_code != 200:
+            return {}
+        counts = {priority: metric_total(response.text, "antia_load_shed_total", priority=priority)
+                  for priority in ("critical", "normal", "low")}
+        counts["limit"] = metric_total(response.text, "antia_concurrency_limit")
+        return counts
+
+    def scenario_overload(self) -> Dict[str, Any]:
+        """Payment and bot latency at a fixed rate, alone and with a dashboard flood that must be shed first"""
+        self.log("=== Scenario: Overload vs load shedding ===")
+        if self.stripe_standin_stats() is None:
+            self.log("⚠️ Stripe stand-in not reachable: checkout sessions go to the real Stripe API", "WARN")
+        if not self.login():
+            return {"passed": False, "error": "tipster login failed"}
+
+        before = self.load_shedding_counts()
+        with self.profiling("baseline"):
+            baseline = self.overload_phase(0)
+        self.log(f"   baseline: payments p95 {baseline['payments']['p95_ms']}ms, "
+                 f"{baseline['payments']['errors']}/{baseline['payments']['requests']} failed")
+        with self.profiling("overload"):
+            overload = self.overload_phase(OVERLOAD_DASHBOARD_USERS)
+        after = self.load_shedding_counts()
+        payments, dashboards = overload["payments"], overload["dashboards"]
+        self.log(f"   overload: payments p95 {payments['p95_ms']}ms, {payments['shed']} shed; dashboards "
+                 f"{dashboards['shed']}/{dashboards['requests']} shed, {dashboards['served_rps']} served/s "
+                 f"(limit {after.get('limit')})")
+
+        if payments["p95_ms"] > OVERLOAD_PAYMENT_SLO_MS:
+            self.log(f"❌ Payment p95 {payments['p95_ms']}ms over the {OVERLOAD_PAYMENT_SLO_MS}ms SLO", "ERROR")
+        if not dashboards["shed"]:
+            self.log("⚠️ No dashboard request was shed: the flood did not saturate the backend "
+                     "(or it runs with LOAD_SHEDDING=off)", "WARN")
+
+        return {
+            "passed": payments["p95_ms"] <= OVERLOAD_PAYMENT_SLO_MS
+                      and payments["shed"] == 0
+                      and payments["errors"] == 0
+                      and dashboards["shed"] > 0
+                      and dashboards["shed_with_retry_after"] == dashboards["shed"]
+                      and dashboards["errors"] == 0,
+            "payment_slo_ms": OVERLOAD_PAYMENT_SLO_MS,
+            "baseline": baseline,
+            "overload": overload,
+            "payment_p95_ratio": round(payments["p95_ms"] / baseline["payments"]["p95_ms"], 2)
+            if baseline["payments"]["p95_ms"] else None,
+            "shed_by_server": {priority: after.get(priority, 0) - before.get(priority, 0)
+                               for priority in ("critical", "normal", "low")},
+            "concurrency_limit": after.get("limit"),
+        }
+
+    # ===== SHARED CACHE =====
+
+    def cache_tier_counts(self, base: str) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """antia_cache_tier_lookups_total of one backend as {cache: {tier: {result: count}}}"""
+        response, _ = self.timed_request("GET", "/metrics", base=base)
+        return {
+            cache: {tier: {result: metric_total(response.text, "antia_cache_tier_lookups_total",
+                                                cache=cache, tier=tier, result=result)
+                           for result in ("hit", "miss", "error")}
+                    for tier in ("local", "shared")}
+            for cache in CACHE_NAMES
+        }
+
+    def scenario_shared_cache(self) -> Dict[str, Any]:
+        """Hit rate per cache tier and product-change propagation between two backends sharing Redis"""
+        self.log("=== Scenario: Shared cache across nodes ===")
+        if not os.environ.get("REDIS_URL"):
+            self.log("⚠️ REDIS_URL is not set: the second backend will only have its local tier", "WARN")
+        standin = False
+        try:
+            standin = requests.post(f"{REDIS_STANDIN_URL}/reset", timeout=5).ok
+        except requests.RequestException:
+            self.log(f"Redis stand-in stats not reachable at {REDIS_STANDIN_URL} (real Redis?)")
+        if not self.login():
+            return {"passed": False, "error": "tipster login failed"}
+
+        node_b = f"http://localhost:{SCALING_PORT}/api"
+        nodes = [API_BASE, node_b]
+        product_path = f"/checkout/product/{self.product_id}"
+        process = self.start_backend(1)
+        try:
+            self.api_base = node_b
+            ready = self.wait_until_ready(1)
+            self.api_base = API_BASE
+            if not ready:
+                return {"passed": False, "error": "second backend did not become ready"}
+            original_title = self.timed_request("GET", product_path)[0].json()["title"]
+            before = [self.cache_tier_counts(node) for node in nodes]
+
+            # Reads spread over both nodes: checkout product (anonymous) and principal (authenticated)
+            def read(i: int) -> Tuple[int, float]:
+                endpoint = product_path if i % 4 < 2 else "/users/me"
+                response, elapsed = self.timed_request("GET", endpoint, use_auth=endpoint == "/users/me",
+                                                       base=nodes[i % 2])
+                return response.status_code, elapsed
+
+            with self.profiling("reads"):
+                reads = self.run_concurrently(read, self.total_requests)
+            read_errors = sum(1 for status, _ in reads if status != 200)
+
+            # Change the product on one node and wait for the other one to serve it
+            propagation_ms: List[float] = []
+            stale = 0
+            for round_no in range(SHARED_CACHE_ROUNDS):
+                writer, reader = nodes[round_no % 2], nodes[1 - round_no % 2]
+                title = f"{original_title} #{round_no}"
+                self.timed_request("GET", product_path, base=reader)  # Make sure the reader has it cached
+                response, _ = self.timed_request("PATCH", f"/products/{self.product_id}", {"title": title},
+                                                 use_auth=True, base=writer)
+                if response.status_code != 200:
+                    return {"passed": False, "error": f"product update returned {response.status_code}"}
+                changed = time.perf_counter()
+                while True:
+                    response, _ = self.timed_request("GET", product_path, base=reader)
+                    elapsed = (time.perf_counter() - changed) * 1000
+                    if response.status_code == 200 and response.json()["title"] == title:
+                        propagation_ms.append(elapsed)
+                        break
+                    if elapsed > SHARED_CACHE_STALE_TIMEOUT * 1000:
+                        stale += 1
+                        break
+                    time.sleep(0.01)
+            self.timed_request("PATCH", f"/products/{self.product_id}", {"title": original_title}, use_auth=True)
+            after = [self.cache_tier_counts(node) for node in nodes]
+        finally:
+            self.api_base = API_BASE
+            self.stop_backend(process)
+
+        tiers: Dict[str, Dict[str, Any]] = {}
+        for cache in CACHE_NAMES:
+            for tier in ("local", "shared"):
+                counts = {result: sum(a[cache][tier][result] - b[cache][tier][result]
+                                      for a, b in zip(after, before))
+                          for result in ("hit", "miss", "error")}
+                lookups = sum(counts.values())
+                if lookups:
+                    tiers.setdefault(cache, {})[tier] = {
+                        **{result: int(count) for result, count in counts.items()},
+                        "hit_ratio": round(counts["hit"] / lookups, 4),
+                    }
+        for cache, by_tier in tiers.items():
+            self.log(f"   {cache}: " + ", ".join(f"{tier} tier {stats['hit_ratio']:.1%} hits"
+                                                for tier, stats in by_tier.items()))
+        propagation = summarize_latencies(propagation_ms)
+        self.log(f"   propagation p50 {propagation['p50_ms']}ms, max {propagation['max_ms']}ms, {stale} stale reads")
+
+        shared_used = any("shared" in by_tier for by_tier in tiers.values())
+        return {
+            "passed": read_errors == 0 and stale == 0 and shared_used
+                      and propagation["max_ms"] <= SHARED_CACHE_PROPAGATION_MS,
+            "reads": self.total_requests,
+            "read_errors": read_errors,
+            "tiers": tiers,
+            "propagation": propagation,
+            "stale_rounds": stale,
+            "redis_standin": self.redis_standin_stats() if standin else None,
+        }
+
+    def redis_standin_stats(self) -> Optional[Dict[str, Any]]:
+        try:
+            return requests.get(f"{REDIS_STANDIN_URL}/stats", timeout=5).json()
+        except requests.RequestException:
+            return None
+
+    # ===== SETTLEMENT =====
+
+    def settle(self, restart: bool = False) -> Tuple[requests.Response, float]:
+        query = "?restart=true" if restart else ""
+        started = time.perf_counter()
+        response = self.admin_request("POST", f"/payouts/settlements/{SETTLEMENT_PERIOD}{query}",
+                                      timeout=SETTLEMENT_TIMEOUT)
+        return response, time.perf_counter() - started
+
+    def scenario_settlement(self) -> Dict[str, Any]:
+        """Month-end payout/commission batch over millions of seeded orders: throughput, exact totals,
+        idempotent re-runs and the per-period lease"""
+        self.log("=== Scenario: Settlement batch ===")
+        events = int(self.settlement_orders * SETTLEMENT_EVENTS_RATIO)
+        bulk_seeder.clear_settlement(SETTLEMENT_PERIOD)
+        self.log(f"Seeding {self.settlement_orders} orders and {events} referral events in {SETTLEMENT_PERIOD}...")
+        seed_started = time.perf_counter()
+        expected = bulk_seeder.seed_settlement(self.settlement_orders, events, SETTLEMENT_PERIOD, SETTLEMENT_TIPSTERS)
+        self.log(f"✅ Seeded in {time.perf_counter() - seed_started:.1f}s")
+
+        try:
+            # One order paid through the generic payment webhook (OrdersService.updateStatus),
+            # which must stamp paid_at like the Stripe/Redsys paths; it is then dated into the period
+            confirm = bulk_seeder.seed_confirm_order()
+            response, _ = self.timed_request("POST", "/webhooks/payments/confirm",
+                                             {"product_id": confirm["product_id"], "email": confirm["email"]})
+            confirm_paid = response.status_code in (200, 201) \
+                and bulk_seeder.backdate_paid_at(confirm["id"], SETTLEMENT_PERIOD)
+            if confirm_paid:
+                expected["orders"] += 1
+                expected["gross_cents"] += confirm["amount_cents"]
+            else:
+                self.log(f"❌ Order paid through /webhooks/payments/confirm has no paid_at "
+                         f"(status {response.status_code})", "ERROR")
+
+            # A second run of the same period while the first holds the lease must be refused
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                first = pool.submit(self.settle, True)
+                time.sleep(1)
+                concurrent, _ = pool.submit(self.settle).result()
+                response, duration = first.result()
+            if response is None or response.status_code != 200:
+                return {"passed": False,
+                        "error": f"settlement returned {response.status_code if response is not None else 'no admin'}"}
+            result = response.json()
+            report = bulk_seeder.settlement_report(SETTLEMENT_PERIOD)
+            scanned = result["documents"]["orders"] + result["documents"]["events"]
+            self.log(f"✅ {result['documents']['orders']} orders + {result['documents']['events']} events settled "
+                     f"in {duration:.1f}s ({scanned / duration:.0f} docs/s, {result['chunks']['orders']} order chunks)")
+
+            # Nothing changes on a finished period, and a full recomputation writes the same rows
+            repeat, repeat_s = self.settle()
+            recompute, recompute_s = self.settle(restart=True)
+            after = bulk_seeder.settlement_report(SETTLEMENT_PERIOD)
+        finally:
+            self.log(f"🧹 Removed {bulk_seeder.clear_settlement(SETTLEMENT_PERIOD)} seeded orders and events")
+
+        exact = report["gross_cents"] == expected["gross_cents"] and report["orders"] == expected["orders"]
+        idempotent = after == report
+        if not exact:
+            self.log(f"❌ Payout totals {report} do not match the seeded orders {expected}", "ERROR")
+        if not idempotent:
+            self.log(f"❌ Recomputing changed the rows: {report} -> {after}", "ERROR")
+
+        return {
+            "passed": exact and idempotent and confirm_paid and concurrent.status_code == 409
+                      and repeat.status_code == 200 and recompute.status_code == 200,
+            "orders": self.settlement_orders,
+            "events": events,
+            "duration_s": round(duration, 2),
+            "documents_per_sec": round(scanned / duration, 1) if duration else 0,
+            "chunks": result["chunks"],
+            "payouts": result["payouts"],
+            "commissions": result["commissions"],
+            "expected": expected,
+            "written": report,
+            "confirm_webhook_paid_at": confirm_paid,
+            "concurrent_run_status": concurrent.status_code,
+            "finished_rerun_s": round(repeat_s, 3),
+            "recompute_s": round(recompute_s, 2),
+        }
+
+    # ===== COLD START =====
+
+    def probe(self, endpoint: str) -> Optional[requests.Response]:
+        """Single short-timeout GET; None while the backend is not accepting connections"""
+        try:
+            response, _ = self.timed_request("GET", endpoint, timeout=2)
+            return response
+        except requests.RequestException:
+            return None
+
+    def burst_latencies(self) -> Dict[str, float]:
+        """Latency of COLD_START_BURST concurrent product/flag reads"""
+        endpoints = [f"/checkout/product/{self.product_id}", "/checkout/feature-flags"]
+
+        def read(i: int) -> Optional[float]:
+            try:
+                response, elapsed = self.timed_request("GET", endpoints[i % len(endpoints)])
+                return elapsed if response.status_code == 200 else None
+            except requests.RequestException:
+                return None
+
+        latencies = self.run_concurrently(read, COLD_START_BURST)
+        return summarize_latencies([l for l in latencies if l is not None])
+
+    def measure_cold_start(self) -> Dict[str, Any]:
+        """Restart the backend once and time each step until it serves a real request"""
+        runtime = self.probe("/health/runtime")
+        old_pid = runtime.json().get("pid") if runtime is not None and runtime.status_code == 200 else None
+
+        started = time.perf_counter()
+        restart = subprocess.Popen(shlex.split(self.restart_cmd), stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE, text=True)
+        marks: Dict[str, float] = {}
+        deadline = started + COLD_START_TIMEOUT
+        while time.perf_counter() < deadline and "first_success_s" not in marks:
+            if "new_process_s" not in marks:
+                # The old process may still answer while it shuts down
+                response = self.probe("/health/runtime")
+                if response is not None and response.status_code == 200 and response.json().get("pid") != old_pid:
+                    marks["new_process_s"] = time.perf_counter() - started
+            else:
+                if "ready_s" not in marks:
+                    response = self.probe("/health/ready")
+                    if response is not None and response.status_code == 200:
+                        marks["ready_s"] = time.perf_counter() - started
+                response = self.probe(f"/checkout/product/{self.product_id}")
+                if response is not None and response.status_code == 200:
+                    marks["first_success_s"] = time.perf_counter() - started
+            time.sleep(COLD_START_PROBE_INTERVAL)
+
+        _, restart_errors = restart.communicate()
+        if restart.returncode != 0:
+            return {"error": f"restart command failed: {restart_errors.strip()}"}
+        if "first_success_s" not in marks:
+            return {"error": f"no successful request within {COLD_START_TIMEOUT}s", **marks}
+
+        result = {key: round(value, 3) for key, value in marks.items()}
+        result["first_burst"] = self.burst_latencies()
+        docs_started = time.perf_counter()
+        docs = self.probe("/docs-json")
+        result["docs_first_ms"] = round((time.perf_counter() - docs_started) * 1000, 1) if docs is not None else None
+        time.sleep(COLD_START_SETTLE)
+        result["steady_burst"] = self.burst_latencies()
+        return result
+
+    def scenario_cold_start(self) -> Dict[str, Any]:
+        """Restart the backend repeatedly: time to new process, readiness and first successful request"""
+        self.log("=== Scenario: Cold start ===")
+        self.log(f"Restarting with: {self.restart_cmd}")
+
+        runs = []
+        for run in range(self.cold_starts):
+            result = self.measure_cold_start()
+            runs.append(result)
+            if "error" in result:
+                self.log(f"❌ Run {run + 1}: {result['error']}", "ERROR")
+                continue
+            self.log(f"   run {run + 1}: process {result.get('new_process_s')}s, ready {result.get('ready_s')}s, "
+                     f"first success {result['first_success_s']}s, first burst p95 "
+                     f"{result['first_burst']['p95_ms']}ms vs steady {result['steady_burst']['p95_ms']}ms, "
+                     f"docs {result['docs_first_ms']}ms")
+
+        ok = [r for r in runs if "error" not in r]
+
+        def mean(key: str) -> Optional[float]:
+            values = [r[key] for r in ok if r.get(key) is not None]
+            return round(sum(values) / len(values), 3) if values else None
+
+        return {
+            "passed": len(ok) == len(runs),
+            "runs": runs,
+            "mean_time_to_new_process_s": mean("new_process_s"),
+            "mean_time_to_ready_s": mean("ready_s"),
+            "mean_time_to_first_success_s": mean("first_success_s"),
+            "max_time_to_first_success_s": max((r["first_success_s"] for r in ok), default=None),
+        }
+
+    # ===== SCALING =====
+
+    def start_backend(self, workers: int) -> subprocess.Popen:
+        """Separate backend on SCALING_PORT without background duties (the main one keeps them)"""
+        env = dict(os.environ, API_WORKERS=str(workers), BACKEND_PORT=str(SCALING_PORT),
+                   BACKGROUND_DUTIES="off", SWAGGER_MODE="off", RATE_LIMIT="off",
+                   LOAD_SHEDDING="off")
+        return subprocess.Popen(shlex.split(BACKEND_CMD), env=env, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL, start_new_session=True)
+
+    def stop_backend(self, process: subprocess.Popen):
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+    def wait_until_ready(self, workers: int) -> bool:
+        """Consecutive 200s from /health/ready, enough to have reached every worker"""
+        deadline = time.perf_counter() + SCALE_START_TIMEOUT
+        streak = 0
+        while time.perf_counter() < deadline and streak < workers * 3:
+            response = self.probe("/health/ready")
+            streak = streak + 1 if response is not None and response.status_code == 200 else 0
+            time.sleep(0.05 if streak else 0.25)
+        return streak >= workers * 3
+
+    def scenario_scaling(self) -> Dict[str, Any]:
+        """Requests/sec of the read mix with 1, 2, 4 and 8 API workers"""
+        self.log("=== Scenario: Cluster scaling ===")
+        self.log(f"Backend: {BACKEND_CMD} on port {SCALING_PORT}, {os.cpu_count()} cores, "
+                 f"{self.concurrency} client threads, {self.scale_duration}s per step")
+
+        runs: Dict[int, Dict[str, Any]] = {}
+        self.api_base = f"http://localhost:{SCALING_PORT}/api"
+        try:
+            for workers in self.worker_counts:
+                if workers > (os.cpu_count() or 1):
+                    self.log(f"⚠️ {workers} workers on {os.cpu_count()} cores: expect contention", "WARN")
+                process = self.start_backend(workers)
+                try:
+                    if not self.wait_until_ready(workers):
+                        runs[workers] = {"error": "backend did not become ready"}
+                        self.log(f"❌ {workers} workers: backend did not become ready", "ERROR")
+                        continue
+                    self.run_timed_mix(SCALE_WARMUP, 0)
+                    cpu_before = time.process_time()
+                    with self.profiling(f"{workers}_workers"):
+                        result = self.run_timed_mix(self.scale_duration, 0)
+                    # One Python process drives the load; near 100% it is the bottleneck, not the API
+                    result["client_cpu_pct"] = round((time.process_time() - cpu_before) / self.scale_duration * 100, 1)
+                    runs[workers] = result
+                    self.log(f"   {workers} workers: {result['throughput_rps']} req/s, p50 {result['p50_ms']}ms, "
+                             f"p99 {result['p99_ms']}ms, errors {result['errors']}, "
+                             f"client CPU {result['client_cpu_pct']}%")
+                finally:
+                    self.stop_backend(process)
+        finally:
+            self.api_base = API_BASE
+
+        measured = {n: r for n, r in runs.items() if "error" not in r}
+        base = measured.get(min(measured)) if measured else None
+        for workers, result in measured.items():
+            speedup = result["throughput_rps"] / base["throughput_rps"] if base["throughput_rps"] else 0
+            result["speedup"] = round(speedup, 2)
+            result["efficiency"] = round(speedup / (workers / min(measured)), 2)
+
+        return {
+            "passed": len(measured) == len(runs) and all(r["errors"] == 0 for r in measured.values()),
+            "rps_by_workers": {n: r["throughput_rps"] for n, r in measured.items()},
+            "speedup_by_workers": {n: r["speedup"] for n, r in measured.items()},
+            "runs": runs,
+        }
+
+    SCENARIOS = {
+        "conditional_get": scenario_conditional_get,
+        "payload_size": scenario_payload_size,
+        "config_propagation": scenario_config_propagation,
+        "seat_contention": scenario_seat_contention,
+        "checkout_funnel": scenario_checkout_funnel,
+        "soak": scenario_soak,
+        "expiry_sweep": scenario_expiry_sweep,
+        "bot_purchases": scenario_bot_purchases,
+        "settlement": scenario_settlement,
+        "order_status": scenario_order_status,
+        "invite_pool": scenario_invite_pool,
+        "abuse": scenario_abuse,
+        "overload": scenario_overload,
+        "shared_cache": scenario_shared_cache,
+        "dependency_faults": scenario_dependency_faults,
+        "cold_start": scenario_cold_start,
+        "scaling": scenario_scaling,
+    }
+    # Scenarios that open a profiling window per phase; the rest are profiled as a whole
+    PHASED = {"dependency_faults", "scaling", "bot_purchases", "order_status", "invite_pool", "abuse", "overload"}
+    # Only run when asked for explicitly
+    LONG_RUNNING = {"soak", "expiry_sweep", "bot_purchases", "settlement", "order_status", "invite_pool", "abuse",
+                    "overload", "shared_cache", "dependency_faults", "cold_start", "scaling"}
+
+    def run_scenarios(self, names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Run the selected scenarios in order"""
+        self.log("🚀 Starting Antia Platform Load Scenarios")
+        self.log(f"Testing against: {API_BASE} (concurrency {self.concurrency})")
+
+        results = {}
+        for name in names:
+            self.current_scenario = name
+            self.endpoint_stats.reset()
+            started = time.perf_counter()
+            try:
+                if name in self.PHASED:
+                    results[name] = self.SCENARIOS[name](self)
+                else:
+                    with self.profiling("run"):
+                        results[name] = self.SCENARIOS[name](self)
+            except Exception as e:
+                self.log(f"❌ Scenario {name} failed: {str(e)}", "ERROR")
+                results[name] = {"passed": False, "error": str(e)}
+            self.durations[name] = round(time.perf_counter() - started, 3)
+            self.endpoints[name] = self.endpoint_stats.summary(self.durations[name])
+            if self.trace:
+                self.trace.span(name, started, time.perf_counter(), category="scenario",
+                                args={"passed": results[name].get("passed")}, tid=trace_export.HARNESS_TID)
+        if self.profile_dir:
+            self.write_report(results)
+        if self.trace:
+            self.write_trace()
+        return results
+
+    def write_trace(self):
+        """Request timeline of the run as Chrome trace-event JSON (open it in ui.perfetto.dev)"""
+        spans = self.trace.write(self.trace_path, {"api_base": API_BASE, "concurrency": self.concurrency,
+                                                   "scenarios": list(self.durations)})
+        dropped = f", {self.trace.dropped} dropped" if self.trace.dropped else ""
+        self.log(f"🧵 Trace with {spans} spans{dropped} in {self.trace_path} "
+                 f"(open it in https://ui.perfetto.dev or chrome://tracing)")
+
+    def write_report(self, results: Dict[str, Dict[str, Any]]):
+        """Latency report next to the profiles, so each profile can be matched to its numbers"""
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, "report.json")
+        with open(path, "w") as f:
+            json.dump({"api_base": API_BASE, "results": results, "endpoints": self.endpoints,
+                       "profiles": self.profiles}, f, indent=2, default=str)
+        self.log(f"📁 Report and {len(self.profiles)} profiles in {self.profile_dir}")
+
+    def store_run(self, path: str, started: float, results: Dict[str, Dict[str, Any]], parameters: Dict[str, Any]):
+        """Keep the run (results, per-endpoint latency, dataset size) in the benchmark warehouse"""
+        try:
+            dataset = bulk_seeder.collection_counts()
+        except (RuntimeError, OSError, subprocess.TimeoutExpired):
+            dataset = {}
+        run_id = bench_warehouse.record_run(
+            path, "load", started, results, endpoints=self.endpoints, durations=self.durations,
+            parameters={k: v for k, v in parameters.items() if k not in ("warehouse", "no_warehouse")},
+            dataset=dataset, api_base=API_BASE)
+        self.log(f"📚 Stored as run #{run_id} in {path} (python bench_warehouse.py report)")
+
+    def print_summary(self, results: Dict[str, Dict[str, Any]]) -> bool:
+        """Print scenario results summary"""
+        self.log("\n" + "="*50)
+        self.log("📊 LOAD SCENARIO RESULTS")
+        self.log("="*50)
+
+        for name, result in results.items():
+            status = "✅ PASS" if result.get("passed") else "❌ FAIL"
+            self.log(f"{name.replace('_', ' ').title()}: {status}")
+            self.log(json.dumps(result, indent=2, default=str))
+
+        return all(result.get("passed") for result in results.values())
+
+
+def main():
+    """Main load test execution"""
+    parser = argparse.ArgumentParser(description="Antia backend load scenarios")
+    parser.add_argument("--scenario", action="append", choices=sorted(AntiaLoadTester.SCENARIOS),
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument("--product-id", default=PRODUCT_ID)
+    parser.add_argument("--seat-capacity", type=int, default=DEFAULT_SEAT_CAPACITY)
+    parser.add_argument("--soak-duration", type=int, default=DEFAULT_SOAK_DURATION, help="Soak length in seconds")
+    parser.add_argument("--sample-interval", type=int, default=DEFAULT_SAMPLE_INTERVAL,
+                        help="Seconds between backend resource samples")
+    parser.add_argument("--think-ms", type=int, default=DEFAULT_THINK_MS,
+                        help="Pause between requests of each soak worker")
+    parser.add_argument("--soak-output", help="CSV time series file (default soak_<timestamp>.csv)")
+    parser.add_argument("--grants", type=int, default=DEFAULT_GRANTS, help="Expired grants seeded for expiry_sweep")
+    parser.add_argument("--fault-schedule", help="JSON file with the dependency_faults steps")
+    parser.add_argument("--fault-step", type=int, default=DEFAULT_FAULT_STEP,
+                        help="Seconds per dependency_faults step (unless the step sets duration_s)")
+    parser.add_argument("--cold-starts", type=int, default=DEFAULT_COLD_STARTS, help="Restarts measured by cold_start")
+    parser.add_argument("--restart-cmd", default=RESTART_CMD, help="Command that restarts the backend")
+    parser.add_argument("--workers", default=",".join(map(str, DEFAULT_WORKER_COUNTS)),
+                        help="Comma-separated API_WORKERS values for scaling")
+    parser.add_argument("--scale-duration", type=int, default=DEFAULT_SCALE_DURATION,
+                        help="Measured seconds per scaling step")
+    parser.add_argument("--settlement-orders", type=int, default=DEFAULT_SETTLEMENT_ORDERS,
+                        help="Paid orders seeded for settlement")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the backend (CPU + heap sampling) during each measured phase")
+    parser.add_argument("--profile-dir", help="Where profiles and report.json go (default profiles_<timestamp>)")
+    parser.add_argument("--warehouse", default=bench_warehouse.DEFAULT_DB,
+                        help="SQLite results warehouse (see bench_warehouse.py report)")
+    parser.add_argument("--no-warehouse", action="store_true", help="Do not store this run")
+    parser.add_argument("--trace", nargs="?", const=f"trace_{time.strftime('%Y%m%d_%H%M%S')}.json",
+                        default=os.environ.get("ANTIA_TRACE"),
+                        help="Write every request as a span in a Chrome trace JSON (default trace_<timestamp>.json)")
+    args = parser.parse_args()
+
+    tester = AntiaLoadTester(args.concurrency, args.requests, args.product_id, args.seat_capacity,
+                             args.soak_duration, args.sample_interval, args.think_ms, args.soak_output,
+                             args.grants, args.fault_schedule, args.fault_step, args.cold_starts,
+                             args.restart_cmd, [int(n) for n in args.workers.split(",")],
+                             args.scale_duration,
+                             (args.profile_dir or f"profiles_{time.strftime('%Y%m%d_%H%M%S')}") if args.profile else None,
+                             args.settlement_orders, args.trace)
+    default_scenarios = [name for name in AntiaLoadTester.SCENARIOS if name not in AntiaLoadTester.LONG_RUNNING]
+
+    try:
+        started = time.time()
+        results = tester.run_scenarios(args.scenario or default_scenarios)
+        success = tester.print_summary(results)
+        if not args.no_warehouse:
+            tester.store_run(args.warehouse, started, results, vars(args))
+        sys.exit(0 if success else 1)
+
+    except KeyboardInterrupt:
+        print("\n❌ Load test interrupted by user")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Incremental reader for the Antia backend log
+Remembers its file offset between calls, survives log rotation, parses Nest
+log lines (text or LOG_FORMAT=json) and indexes them by request id
+(X-Request-Id) so many webhook outcomes can be asserted in one pass
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterable, List, Optional
+
+BACKEND_LOG = os.environ.get("ANTIA_BACKEND_LOG", "/var/log/supervisor/backend.out.log")
+MAX_INDEXED_ENTRIES = 200_000
+READ_CHUNK = 1 << 20
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+NEST_LINE = re.compile(
+    r"^\[Nest\] (?P<pid>\d+)\s+-\s+(?P<timestamp>.+?)\s+"
+    r"(?P<level>LOG|ERROR|WARN|DEBUG|VERBOSE|FATAL)\s+"
+    r"(?:\[(?P<context>[^\]]+)\]\s+)?"
+    r"(?:\[req:(?P<request_id>[^\]]+)\]\s+)?"
+    r"(?P<message>.*?)(?:\s+\+\d+ms)?$"
+)
+
+
+@dataclass
+class LogEntry:
+    message: str
+    level: Optional[str] = None
+    context: Optional[str] = None
+    request_id: Optional[str] = None
+    timestamp: Optional[str] = None
+    pid: Optional[int] = None
+    extra: List[str] = field(default_factory=list)  # continuation lines (stack traces)
+
+    @property
+    def text(self) -> str:
+        return "\n".join([self.message] + self.extra)
+
+
+def parse_line(line: str) -> Optional[LogEntry]:
+    """Parse one log line; None for lines that continue the previous entry"""
+    clean = ANSI_ESCAPE.sub("", line).rstrip()
+    if not clean:
+        return None
+
+    if clean.startswith("{"):
+        try:
+            data = json.loads(clean)
+            return LogEntry(
+                message=str(data.get("message", "")),
+                level=str(data.get("level", "")).upper() or None,
+                context=data.get("context"),
+                request_id=data.get("requestId"),
+                timestamp=data.get("ts"),
+                pid=data.get("pid"),
+                extra=data["stack"].splitlines() if data.get("stack") else [],
+            )
+        except ValueError:
+            pass
+
+    match = NEST_LINE.match(clean)
+    if match:
+        return LogEntry(
+            message=match.group("message"),
+            level=match.group("level"),
+            context=match.group("context"),
+            request_id=match.group("request_id"),
+            timestamp=match.group("timestamp"),
+            pid=int(match.group("pid")),
+        )
+    if clean.startswith((" ", "\t")) or clean.startswith("at "):
+        return None
+    # console.log output from code that does not use the Nest logger
+    return LogEntry(message=clean)
+
+
+class BackendLogReader:
+    def __init__(self, path: str = BACKEND_LOG, state_file: Optional[str] = None,
+                 max_entries: int = MAX_INDEXED_ENTRIES):
+        self.path = path
+        self.state_file = state_file
+        self.inode: Optional[int] = None
+        self.offset = 0
+        self.partial = b""
+        self.entries: Deque[LogEntry] = deque(maxlen=max_entries)
+        # Only ids of entries still in `entries`: evicted together with them
+        self.by_request: Dict[str, List[LogEntry]] = {}
+        self.rotations = 0
+        self.bytes_read = 0
+        self._batch: List[LogEntry] = []
+        self._load_state()
+
+    # ===== Offsets =====
+
+    def _load_state(self):
+        if self.state_file and os.path.exists(self.state_file):
+            with open(self.state_file) as state:
+                saved = json.load(state)
+            if saved.get("path") == self.path:
+                self.inode = saved.get("inode")
+                self.offset = saved.get("offset", 0)
+
+    def _save_state(self):
+        if self.state_file:
+            with open(self.state_file, "w") as state:
+                json.dump({"path": self.path, "inode": self.inode, "offset": self.offset}, state)
+
+    def seek_to_end(self):
+        """Ignore everything already in the log (start of a test run)"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        self.inode, self.offset, self.partial = stat.st_ino, stat.st_size, b""
+        self._save_state()
+
+    # ===== Reading =====
+
+    def _rotated_file(self) -> Optional[str]:
+        """The renamed previous log (logrotate / supervisor backups keep the inode)"""
+        for candidate in glob.glob(f"{self.path}*"):
+            if candidate != self.path and os.stat(candidate).st_ino == self.inode:
+                return candidate
+        return None
+
+    def _read_from(self, path: str, offset: int) -> int:
+        with open(path, "rb") as log:
+            log.seek(offset)
+            while True:
+                chunk = log.read(READ_CHUNK)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                self.bytes_read += len(chunk)
+                self._ingest(chunk)
+        return offset
+
+    def read_new(self) -> List[LogEntry]:
+        """Read and index whatever was appended since the previous call"""
+        self._batch = []
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+
+        if self.inode is not None and stat.st_ino != self.inode:
+            # Rotated by rename: finish the old file, then start the new one from the top
+            rotated = self._rotated_file()
+            if rotated:
+                self._read_from(rotated, self.offset)
+            self._flush_partial()
+            self.rotations += 1
+            self.offset = 0
+        elif stat.st_size < self.offset:
+            # Truncated in place (copytruncate)
+            self._flush_partial()
+            self.rotations += 1
+            self.offset = 0
+
+        self.inode = stat.st_ino
+        self.offset = self._read_from(self.path, self.offset)
+        self._save_state()
+        return self._batch
+
+    def _ingest(self, chunk: bytes):
+        data = self.partial + chunk
+        lines = data.split(b"\n")
+        self.partial = lines.pop()
+        for raw in lines:
+            self._index_line(raw.decode("utf-8", errors="replace"))
+
+    def _flush_partial(self):
+        if self.partial:
+            self._index_line(self.partial.decode("utf-8", errors="replace"))
+            self.partial = b""
+
+    def _index_line(self, line: str):
+        entry = parse_line(line)
+        if entry is None:
+            if self.entries and line.strip():
+                self.entries[-1].extra.append(ANSI_ESCAPE.sub("", line).rstrip())
+            return
+        if len(self.entries) == self.entries.maxlen:
+            self._evict(self.entries.popleft())
+        self.entries.append(entry)
+        self._batch.append(entry)
+        if entry.request_id:
+            self.by_request.setdefault(entry.request_id, []).append(entry)
+
+    def _evict(self, entry: LogEntry):
+        """Drop the oldest entry from the request index (it is always first in its list)"""
+        if not entry.request_id:
+            return
+        indexed = self.by_request.get(entry.request_id)
+        if indexed and indexed[0] is entry:
+            del indexed[0]
+            if not indexed:
+                del self.by_request[entry.request_id]
+
+    # ===== Queries =====
+
+    def entries_for(self, request_id: str) -> List[LogEntry]:
+        return self.by_request.get(request_id, [])
+
+    def find(self, pattern: str, request_id: Optional[str] = None,
+             level: Optional[str] = None) -> List[LogEntry]:
+        """Entries containing pattern, optionally limited to one request or level"""
+        source: Iterable[LogEntry] = self.entries_for(request_id) if request_id else self.entries
+        return [e for e in source if pattern in e.text and (level is None or e.level == level)]
+
+    def wait_for(self, predicate: Callable[["BackendLogReader"], bool], timeout: float = 10,
+                 interval: float = 0.25) -> bool:
+        """Keep reading until predicate(reader) holds or timeout expires"""
+        deadline = time.monotonic() + timeout
+        while True:
+            self.read_new()
+            if predicate(self):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+
+    def assert_outcomes(self, expectations: Dict[str, List[str]], timeout: float = 10) -> Dict[str, List[str]]:
+        """
+        Check many requests at once: {request_id: [expected substrings]}.
+        Returns the substrings still missing per request (empty dict = all found).
+        """
+        def missing() -> Dict[str, List[str]]:
+            result = {}
+            for request_id, patterns in expectations.items():
+                texts = [e.text for e in self.entries_for(request_id)]
+                absent = [p for p in patterns if not any(p in text for text in texts)]
+                if absent:
+                    result[request_id] = absent
+            return result
+
+        self.wait_for(lambda _: not missing(), timeout)
+        return missing()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Follow and query the Antia backend log")
+    parser.add_argument("--path", default=BACKEND_LOG)
+    parser.add_argument("--request-id", help="Print the entries of one request")
+    parser.add_argument("--follow", action="store_true", help="Keep printing new entries")
+    parser.add_argument("--state-file", help="Remember the offset between runs")
+    args = parser.parse_args()
+
+    reader = BackendLogReader(args.path, args.state_file)
+    reader.read_new()
+    if args.request_id:
+        for entry in reader.entries_for(args.request_id):
+            print(f"{entry.level or '-':>7} [{entry.context or '-'}] {entry.text}")
+        return
+    if not args.follow:
+        print(f"📋 {len(reader.entries)} entries, {len(reader.by_request)} request ids, "
+              f"{reader.bytes_read} bytes, {reader.rotations} rotations")
+        return
+    try:
+        while True:
+            for entry in reader.read_new():
+                rid = f" [req:{entry.request_id}]" if entry.request_id else ""
+                print(f"{entry.level or '-':>7} [{entry.context or '-'}]{rid} {entry.text}")
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
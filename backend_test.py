@@ -6,12 +6,21 @@ Tests Product CRUD functionality for tipster platform
 
 import requests
 import json
+import os
 import sys
+import time
 from typing import Dict, Any, Optional
 
+import bench_warehouse
+import trace_export
+
 # Configuration
 BASE_URL = "https://betguru-7.preview.emergentagent.com"
 API_BASE = f"{BASE_URL}/api"
+# Chrome trace JSON with every request of the run (see trace_export.py)
+TRACE_FILE = os.environ.get("ANTIA_TRACE")
+# secret_token the backend registered the Telegram webhook with
+TELEGRAM_WEBHOOK_SECRET = os.environ.get("TELEGRAM_WEBHOOK_SECRET", "")
 
 # Test credentials
 TIPSTER_EMAIL = "fausto.perez@antia.com"
@@ -23,10 +32,14 @@ class AntiaAPITester:
         self.access_token = None
         self.test_product_id = None
         self.test_order_id_for_cleanup = None
+        self.endpoint_stats = bench_warehouse.EndpointStats()
+        self.trace = trace_export.TraceRecorder("antia api tests") if TRACE_FILE else None
         
     def log(self, message: str, level: str = "INFO"):
         """Log test messages"""
         print(f"[{level}] {message}")
+        if self.trace:
+            self.trace.log_line(message, level)
         
     def make_request(self, method: str, endpoint: str, data: Dict = None, 
                     headers: Dict = None, use_auth: bool = True) -> requests.Response:
@@ -51,6 +64,7 @@ class AntiaAPITester:
         if data:
             self.log(f"Request data: {json.dumps(data, indent=2)}")
             
+        started = time.perf_counter()
         try:
             response = self.session.request(
                 method=method,
@@ -59,6 +73,10 @@ class AntiaAPITester:
                 headers=req_headers,
                 timeout=30
             )
+            finished = time.perf_counter()
+            self.endpoint_stats.record(method, endpoint, response.status_code, (finished - started) * 1000)
+            if self.trace:
+                self.trace.request(method, endpoint, started, finished, response)
             
             self.log(f"Response status: {response.status_code}")
             
@@ -72,6 +90,10 @@ class AntiaAPITester:
             return response
             
         except requests.exceptions.RequestException as e:
+            finished = time.perf_counter()
+            self.endpoint_stats.record(method, endpoint, 0, (finished - started) * 1000)
+            if self.trace:
+                self.trace.request(method, endpoint, started, finished, error=e)
             self.log(f"Request failed: {str(e)}", "ERROR")
             raise
             
@@ -436,7 +458,9 @@ class AntiaAPITester:
         }
         
         try:
-            response = self.make_request("POST", "/telegram/webhook", webhook_data, use_auth=False)
+            response = self.make_request("POST", "/telegram/webhook", webhook_data,
+                                         headers={"X-Telegram-Bot-Api-Secret-Token": TELEGRAM_WEBHOOK_SECRET},
+                                         use_auth=False)
             
             # The webhook should process the message and return ok: true or false
             if response.status_code == 200:
@@ -749,6 +773,39 @@ class AntiaAPITester:
             self.log(f"❌ MongoDB verification failed: {str(e)}", "ERROR")
             return False
 
+    def test_redsys_notification(self, order_id: str) -> bool:
+        """Test a signed Redsys notification and its retry for a pending order"""
+        if not order_id:
+            self.log("❌ No order ID provided for Redsys notification", "ERROR")
+            return False
+
+        self.log(f"=== Testing Redsys Notification for Order {order_id} ===")
+
+        try:
+            from redsys_notifications import build_notification, transaction_id
+
+            notification = build_notification(order_id, transaction_id(), 3400)
+            first = self.make_request("POST", "/checkout/webhook/redsys", notification, use_auth=False)
+            if first.status_code == 400:
+                self.log("⚠️ Redsys not configured on this backend - skipping", "WARN")
+                return True
+            if first.status_code not in [200, 201] or not first.json().get("processed"):
+                self.log("❌ Signed Redsys notification was not processed", "ERROR")
+                return False
+            self.log("✅ Redsys notification processed")
+
+            # Redsys retries notifications: the second delivery must not pay the order again
+            retry = self.make_request("POST", "/checkout/webhook/redsys", notification, use_auth=False)
+            if retry.status_code in [200, 201] and retry.json().get("duplicate"):
+                self.log("✅ Duplicate Redsys notification ignored")
+                return True
+            self.log("❌ Duplicate Redsys notification was processed again", "ERROR")
+            return False
+
+        except Exception as e:
+            self.log(f"❌ Redsys notification test failed: {str(e)}", "ERROR")
+            return False
+
     def check_telegram_notification_logs(self) -> bool:
         """Check backend logs for Telegram notification attempts"""
         self.log("=== Checking Backend Logs for Telegram Notifications ===")
@@ -1386,6 +1443,9 @@ class AntiaAPITester:
             results["simulate_payment"] = False
             results["complete_payment"] = False
             results["verify_mongodb_order"] = False
+
+        redsys_order_id = self.create_test_order_in_mongodb()
+        results["redsys_notification"] = self.test_redsys_notification(redsys_order_id)
         
         # Test 3: Check Telegram notification logs
         results["telegram_notification_logs"] = self.check_telegram_notification_logs()
@@ -1459,13 +1519,31 @@ class AntiaAPITester:
             
         return passed == total
 
+    def store_run(self, started: float, results: Dict[str, bool]):
+        """Keep pass/fail per test and per-endpoint latency in the benchmark warehouse"""
+        run_id = bench_warehouse.record_run(
+            bench_warehouse.DEFAULT_DB, "api", started,
+            {name: {"passed": ok} for name, ok in results.items()},
+            endpoints={"api_tests": self.endpoint_stats.summary(time.time() - started)},
+            api_base=API_BASE)
+        self.log(f"📚 Stored as run #{run_id} in {bench_warehouse.DEFAULT_DB}")
+
+    def write_trace(self):
+        """Request timeline of the run as Chrome trace-event JSON (open it in ui.perfetto.dev)"""
+        spans = self.trace.write(TRACE_FILE, {"api_base": API_BASE})
+        self.log(f"🧵 Trace with {spans} spans in {TRACE_FILE}")
+
 def main():
     """Main test execution"""
     tester = AntiaAPITester()
     
     try:
+        started = time.time()
         results = tester.run_all_tests()
         success = tester.print_summary(results)
+        tester.store_run(started, results)
+        if tester.trace:
+            tester.write_trace()
         
         # Exit with appropriate code
         sys.exit(0 if success else 1)
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Benchmark results warehouse for the Antia test harnesses
+Every run of backend_load_test.py and backend_test.py is stored in a local
+SQLite file: run metadata (git revision, parameters, dataset size), each
+scenario's result and every numeric metric in it, plus per-endpoint latency and
+throughput. `report` renders trends and the largest regressions across the
+last N runs
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_DB = os.environ.get("ANTIA_BENCH_DB", "bench_results.sqlite")
+RESERVOIR_SIZE = 10000  # Latency samples kept per endpoint (uniform sample of the run)
+DEFAULT_TREND_METRICS = r"(p95_ms|throughput_rps|_per_s)$"
+SPARKS = "▁▂▃▄▅▆▇█"
+
+# Path segments that are ids, so /checkout/order/65f...a1 and /checkout/order/65f...b2 are one endpoint
+ID_SEGMENT = re.compile(r"^([0-9a-f]{24}|[0-9a-f-]{36}|\d+|-?100\d+|(cs|pi|ch|evt)_[A-Za-z0-9_]+)$")
+
+# Last metric path segment -> which way is better
+LOWER_IS_BETTER = re.compile(r"(_ms|_s|_seconds|errors|timeouts|failed|rejected|stale|stale_rounds)$")
+HIGHER_IS_BETTER = re.compile(r"(rps|_per_s|per_second|throughput|(?<!p\d\d_)ratio|speedup|efficiency)$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    harness TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    git_revision TEXT,
+    git_dirty INTEGER,
+    api_base TEXT,
+    parameters TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    passed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scenario_results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    scenario TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    duration_s REAL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (run_id, scenario)
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    scenario TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (run_id, scenario, metric)
+);
+CREATE INDEX IF NOT EXISTS metrics_scenario_metric ON metrics (scenario, metric, run_id);
+"""
+
+
+def normalize_path(path: str) -> str:
+    """Endpoint template of a request path: no query string, ids replaced by :id"""
+    path = path.split("?", 1)[0]
+    return "/".join(":id" if ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0-100) of an already sorted list"""
+    if not values:
+        return 0.0
+    return values[max(1, math.ceil(pct / 100.0 * len(values))) - 1]
+
+
+class EndpointStats:
+    """Per-endpoint request and error counts plus a bounded latency sample, thread-safe"""
+
+    def __init__(self, sample_size: int = RESERVOIR_SIZE):
+        self.sample_size = sample_size
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.endpoints: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, method: str, path: str, status: int, elapsed_ms: float):
+        """status 0 = no response (timeout, connection error)"""
+        key = f"{method.upper()} {normalize_path(path)}"
+        with self.lock:
+            stats = self.endpoints.setdefault(key, {"count": 0, "errors": 0, "sum_ms": 0.0, "sample": []})
+            stats["count"] += 1
+            stats["errors"] += int(status == 0 or status >= 500)
+            stats["sum_ms"] += elapsed_ms
+            if len(stats["sample"]) < self.sample_size:
+                stats["sample"].append(elapsed_ms)
+            else:
+                # Reservoir sampling: every request has the same chance of being kept
+                slot = random.randrange(stats["count"])
+                if slot < self.sample_size:
+                    stats["sample"][slot] = elapsed_ms
+
+    def summary(self, duration_s: float) -> Dict[str, Dict[str, float]]:
+        """{"GET /checkout/product/:id": {count, errors, mean_ms, p50_ms, p95_ms, p99_ms, throughput_rps}}"""
+        with self.lock:
+            snapshot = {key: dict(stats, sample=sorted(stats["sample"])) for key, stats in self.endpoints.items()}
+        return {
+            key: {
+                "count": stats["count"],
+                "errors": stats["errors"],
+                "mean_ms": round(stats["sum_ms"] / stats["count"], 2),
+                "p50_ms": round(percentile(stats["sample"], 50), 2),
+                "p95_ms": round(percentile(stats["sample"], 95), 2),
+                "p99_ms": round(percentile(stats["sample"], 99), 2),
+                "throughput_rps": round(stats["count"] / duration_s, 2) if duration_s > 0 else 0.0,
+            }
+            for key, stats in sorted(snapshot.items())
+        }
+
+
+def git_revision() -> Tuple[Optional[str], Optional[bool]]:
+    """(HEAD commit, uncommitted changes?) of the checkout the harness runs from"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        revision = subprocess.run(["git", "rev-parse", "HEAD"], cwd=here, capture_output=True,
+                                  text=True, timeout=10).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=here,
+                               capture_output=True, text=True, timeout=30).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None, None
+    return revision or None, bool(dirty) if revision else None
+
+
+def flatten_metrics(value: Any, prefix: str = "") -> Iterable[Tuple[str, float]]:
+    """Numeric leaves of a scenario result as (dotted.path, value); booleans and lists are skipped"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten_metrics(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        yield prefix, float(value)
+
+
+def direction(metric: str) -> int:
+    """+1 when higher is better, -1 when lower is better, 0 for plain counts"""
+    leaf = metric.rsplit(".", 1)[-1]
+    if HIGHER_IS_BETTER.search(leaf):
+        return 1
+    if LOWER_IS_BETTER.search(leaf):
+        return -1
+    return 0
+
+
+def connect(path: str = DEFAULT_DB) -> sqlite3.Connection:
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def record_run(path: str, harness: str, started_at: float, results: Dict[str, Dict[str, Any]],
+               endpoints: Dict[str, Dict[str, Dict[str, float]]] = None, durations: Dict[str, float] = None,
+               parameters: Dict[str, Any] = None, dataset: Dict[str, Any] = None,
+               api_base: str = None) -> int:
+    """Store one harness run; returns its id"""
+    revision, dirty = git_revision()
+    endpoints = endpoints or {}
+    durations = durations or {}
+    with connect(path) as connection:
+        cursor = connection.execute(
+            "INSERT INTO runs (harness, started_at, finished_at, git_revision, git_dirty, api_base, parameters,"
+            " dataset, passed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (harness, iso(started_at), iso(time.time()), revision, None if dirty is None else int(dirty), api_base,
+             json.dumps(parameters or {}, default=str), json.dumps(dataset or {}, default=str),
+             int(all(result.get("passed") for result in results.values()))),
+        )
+        run_id = cursor.lastrowid
+        rows = []
+        for scenario, result in results.items():
+            connection.execute(
+                "INSERT INTO scenario_results (run_id, scenario, passed, duration_s, result) VALUES (?, ?, ?, ?, ?)",
+                (run_id, scenario, int(bool(result.get("passed"))), durations.get(scenario),
+                 json.dumps(result, default=str)),
+            )
+            rows.extend((run_id, scenario, metric, value) for metric, value in flatten_metrics(result))
+        for scenario, by_endpoint in endpoints.items():
+            rows.extend((run_id, scenario, metric, value)
+                        for metric, value in flatten_metrics({"endpoints": by_endpoint}))
+        connection.executemany("INSERT OR REPLACE INTO metrics (run_id, scenario, metric, value) VALUES (?, ?, ?, ?)",
+                               rows)
+    return run_id
+
+
+def iso(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(timestamp))
+
+
+def last_runs(connection: sqlite3.Connection, limit: int, harness: Optional[str]) -> List[sqlite3.Row]:
+    """The last `limit` runs, oldest first"""
+    connection.row_factory = sqlite3.Row
+    query = "SELECT * FROM runs" + (" WHERE harness = ?" if harness else "") + " ORDER BY id DESC LIMIT ?"
+    rows = connection.execute(query, ((harness,) if harness else ()) + (limit,)).fetchall()
+    return list(reversed(rows))
+
+
+def metric_series(connection: sqlite3.Connection, run_ids: List[int],
+                  scenario: Optional[str]) -> Dict[Tuple[str, str], Dict[int, float]]:
+    """{(scenario, metric): {run_id: value}} for the given runs"""
+    placeholders = ",".join("?" * len(run_ids))
+    query = f"SELECT run_id, scenario, metric, value FROM metrics WHERE run_id IN ({placeholders})"
+    params: List[Any] = list(run_ids)
+    if scenario:
+        query += " AND scenario = ?"
+        params.append(scenario)
+    series: Dict[Tuple[str, str], Dict[int, float]] = {}
+    for run_id, scenario_name, metric, value in connection.execute(query, params):
+        series.setdefault((scenario_name, metric), {})[run_id] = value
+    return series
+
+
+def sparkline(values: List[Optional[float]]) -> str:
+    present = [v for v in values if v is not None]
+    if not present:
+        return ""
+    low, high = min(present), max(present)
+    span = high - low
+    return "".join(" " if v is None else SPARKS[int((v - low) / span * (len(SPARKS) - 1)) if span else 0]
+                   for v in values)
+
+
+def regressions(series: Dict[Tuple[str, str], Dict[int, float]], run_ids: List[int],
+                min_change: float) -> List[Dict[str, Any]]:
+    """Metrics of the latest run that got worse than the median of the earlier runs, worst first"""
+    latest, earlier = run_ids[-1], run_ids[:-1]
+    found = []
+    for (scenario, metric), by_run in series.items():
+        sign = direction(metric)
+        baseline_values = [by_run[run_id] for run_id in earlier if run_id in by_run]
+        if not sign or latest not in by_run or not baseline_values:
+            continue
+        baseline = statistics.median(baseline_values)
+        if abs(baseline) < 1e-9:
+            continue
+        change = (by_run[latest] - baseline) / abs(baseline)
+        worse = -change * sign
+        if worse >= min_change:
+            found.append({"scenario": scenario, "metric": metric, "baseline": baseline,
+                          "latest": by_run[latest], "change_pct": round(change * 100, 1), "worse": worse})
+    return sorted(found, key=lambda row: row["worse"], reverse=True)
+
+
+def report(args: argparse.Namespace) -> int:
+    connection = connect(args.db)
+    runs = last_runs(connection, args.last, args.harness)
+    if not runs:
+        print(f"No runs stored in {args.db}")
+        return 1
+    run_ids = [run["id"] for run in runs]
+
+    print(f"📚 Last {len(runs)} runs in {args.db}")
+    for run in runs:
+        scenarios = [row[0] for row in connection.execute(
+            "SELECT scenario FROM scenario_results WHERE run_id = ? ORDER BY rowid", (run["id"],))]
+        revision = (run["git_revision"] or "-")[:10] + ("+" if run["git_dirty"] else "")
+        dataset = json.loads(run["dataset"])
+        size = f"{sum(v for v in dataset.values() if isinstance(v, (int, float))):,} docs" if dataset else "-"
+        print(f"  #{run['id']:<4} {run['started_at']}  {run['harness']:<5} {revision:<11} "
+              f"{'PASS' if run['passed'] else 'FAIL'}  {size:>14}  {', '.join(scenarios)}")
+
+    series = metric_series(connection, run_ids, args.scenario)
+    pattern = re.compile(args.metric)
+    trends = sorted(key for key in series if pattern.search(key[1]) and direction(key[1]))
+    if trends:
+        print(f"\n📈 Trends (oldest → newest, metrics matching {args.metric!r})")
+        for scenario, metric in trends:
+            by_run = series[(scenario, metric)]
+            values = [by_run.get(run_id) for run_id in run_ids]
+            present = [v for v in values if v is not None]
+            change = f"{(present[-1] - present[0]) / abs(present[0]) * 100:+.1f}%" \
+                if len(present) > 1 and present[0] else ""
+            print(f"  {sparkline(values):<{len(run_ids)}}  {present[-1]:>12.2f} {change:>8}  {scenario} {metric}")
+
+    if len(run_ids) > 1:
+        worst = regressions(series, run_ids, args.min_change / 100)[:args.top]
+        print(f"\n🔻 Largest regressions of #{run_ids[-1]} against the median of the {len(run_ids) - 1} earlier runs")
+        if not worst:
+            print(f"  None above {args.min_change:g}%")
+        for row in worst:
+            print(f"  {row['change_pct']:+8.1f}%  {row['baseline']:>12.2f} → {row['latest']:<12.2f} "
+                  f"{row['scenario']} {row['metric']}")
+    return 0
+
+
+def show(args: argparse.Namespace) -> int:
+    connection = connect(args.db)
+    connection.row_factory = sqlite3.Row
+    run = connection.execute("SELECT * FROM runs WHERE id = ?", (args.run_id,)).fetchone()
+    if not run:
+        print(f"Run #{args.run_id} not found")
+        return 1
+    print(json.dumps({
+        **{key: run[key] for key in run.keys() if key not in ("parameters", "dataset")},
+        "parameters": json.loads(run["parameters"]),
+        "dataset": json.loads(run["dataset"]),
+        "scenarios": {
+            row["scenario"]: {"passed": bool(row["passed"]), "duration_s": row["duration_s"],
+                              "result": json.loads(row["result"])}
+            for row in connection.execute("SELECT * FROM scenario_results WHERE run_id = ?", (args.run_id,))
+        },
+    }, indent=2))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Antia benchmark results warehouse")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite file (default $ANTIA_BENCH_DB or bench_results.sqlite)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    report_parser = commands.add_parser("report", help="Trends and largest regressions across the last runs")
+    report_parser.add_argument("--last", type=int, default=10, help="Runs to include")
+    report_parser.add_argument("--harness", choices=["load", "api"], help="Only runs of this harness")
+    report_parser.add_argument("--scenario", help="Only this scenario")
+    report_parser.add_argument("--metric", default=DEFAULT_TREND_METRICS, help="Regex of the metrics to chart")
+    report_parser.add_argument("--top", type=int, default=15, help="Regressions listed")
+    report_parser.add_argument("--min-change", type=float, default=5, help="Smallest regression listed, in percent")
+    report_parser.set_defaults(handler=report)
+
+    show_parser = commands.add_parser("show", help="Everything stored for one run")
+    show_parser.add_argument("run_id", type=int)
+    show_parser.set_defaults(handler=show)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -55,15 +55,33 @@ bot.command('mis_compras', async (ctx) => {
   const telegramUserId = ctx.from.id;
   
   try {
-    const response = await axios.post(`${API_URL}/bot/sync-purchase`, {
+    // El backend responde con el resumen cacheado (se rehace al pagarse una orden)
+    const { data: summary } = await axios.post(`${API_URL}/bot/sync-purchase`, {
       telegram_user_id: telegramUserId.toString()
-    });
-    
+    }, { headers: { 'X-Bot-Token': process.env.BOT_API_TOKEN } });
+
+    if (!summary.totalPurchases) {
+      ctx.reply(
+        '🛒 Mis Compras:\n\n' +
+        'No tienes compras registradas aún.\n\n' +
+        'Para comprar pronósticos visita:\n' +
+        'https://betguru-7.preview.emergentagent.com'
+      );
+      return;
+    }
+
+    const money = (cents, currency) => `${((cents || 0) / 100).toFixed(2)} ${currency || 'EUR'}`;
+    const lines = summary.recent.map((item) =>
+      `• ${item.productTitle || 'Producto'} - ${money(item.amountCents, item.currency)}` +
+      (item.paidAt ? ` (${item.paidAt.slice(0, 10)})` : '')
+    );
+    const more = summary.totalPurchases - summary.recent.length;
+    const spent = Object.entries(summary.spentCents).map(([currency, cents]) => money(cents, currency)).join(' + ');
     ctx.reply(
-      '🛒 Mis Compras:\n\n' +
-      'No tienes compras registradas aún.\n\n' +
-      'Para comprar pronósticos visita:\n' +
-      'https://betguru-7.preview.emergentagent.com'
+      `🛒 Mis Compras (${summary.totalPurchases}):\n\n` +
+      lines.join('\n') +
+      (more > 0 ? `\n… y ${more} más` : '') +
+      `\n\n💰 Total: ${spent}`
     );
   } catch (error) {
     console.error('Error fetching orders:', error);
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Bulk data seeder for Antia load tests
+Inserts large volumes of documents server-side through mongosh, tagged so
+they can be removed again without touching real data
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import List, Optional
+
+MONGO_URL = os.environ.get("ANTIA_MONGO_URL", "mongodb://localhost:27017/antia_db")
+SEED_TAG = "bulk_seeder"
+INSERT_BATCH = 10000
+# First Telegram user id given to seeded bot buyers
+TELEGRAM_USER_BASE = 900000000
+
+
+def run_mongosh(script: str, timeout: int = 3600) -> str:
+    """Run a script with mongosh against MONGO_URL and return its stdout"""
+    result = subprocess.run(
+        ["mongosh", "--quiet", MONGO_URL, "--eval", script],
+        capture_output=True, text=True, timeout=timeout
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"mongosh failed: {result.stderr.strip() or result.stdout.strip()}")
+    return result.stdout.strip()
+
+
+def seed_grants(count: int, channel_id: str = "-1001000000000", expired_fraction: float = 1.0,
+                first_user_id: int = 800000000) -> int:
+    """Insert channel access grants; expired_fraction of them are already due"""
+    script = f"""
+    const total = {count};
+    const due = Math.floor(total * {expired_fraction});
+    const now = Date.now();
+    let inserted = 0;
+    while (inserted < total) {{
+      const docs = [];
+      for (let i = inserted; i < Math.min(inserted + {INSERT_BATCH}, total); i++) {{
+        // Due grants expired up to a day ago, the rest expire within 30 days
+        const expiresAt = i < due ? now - 1000 - (i % 86400) * 1000 : now + 86400000 + (i % 30) * 86400000;
+        docs.push({{
+          order_id: '{SEED_TAG}_' + i + '_' + now,
+          client_user_id: null,
+          telegram_user_id: String({first_user_id} + i),
+          channel_id: {json.dumps(channel_id)},
+          status: 'GRANTED',
+          joined_at: new Date(now - 30 * 86400000),
+          expires_at: new Date(expiresAt),
+          created_at: new Date(now - 30 * 86400000),
+          seed: '{SEED_TAG}',
+        }});
+      }}
+      db.channel_access_grants.insertMany(docs, {{ ordered: false }});
+      inserted += docs.length;
+    }}
+    print(inserted);
+    """
+    return int(run_mongosh(script).splitlines()[-1])
+
+
+def clear_grants() -> int:
+    """Delete the grants created by seed_grants"""
+    output = run_mongosh(f"print(db.channel_access_grants.deleteMany({{ seed: '{SEED_TAG}' }}).deletedCount)")
+    return int(output.splitlines()[-1])
+
+
+def count_grants() -> dict:
+    """Seeded grants by status"""
+    output = run_mongosh(f"""
+    const byStatus = {{}};
+    db.channel_access_grants.aggregate([
+      {{ $match: {{ seed: '{SEED_TAG}' }} }},
+      {{ $group: {{ _id: '$status', n: {{ $sum: 1 }} }} }},
+    ]).forEach(row => byStatus[row._id] = row.n);
+    print(JSON.stringify(byStatus));
+    """)
+    return json.loads(output.splitlines()[-1])
+
+
+def seed_orders(count: int, product_id: Optional[str] = None, amount_cents: int = 2500,
+                status: str = "PENDING", telegram_users: int = 0) -> List[dict]:
+    """Insert orders for product_id (first active product if omitted); returns [{id, amount_cents}].
+
+    With telegram_users > 0 the orders are spread round-robin over that many Telegram
+    user ids (TELEGRAM_USER_BASE + n), as bought through the bot.
+    """
+    product_filter = f"{{ _id: ObjectId({json.dumps(product_id)}) }}" if product_id else "{ active: true }"
+    script = f"""
+    const product = db.products.findOne({product_filter});
+    if (!product) throw new Error('No product to attach orders to');
+    const now = new Date();
+    const created = [];
+    for (let start = 0; start < {count}; start += {INSERT_BATCH}) {{
+      const docs = [];
+      for (let i = start; i < Math.min(start + {INSERT_BATCH}, {count}); i++) {{
+        docs.push({{
+          _id: new ObjectId(),
+          product_id: product._id.toString(),
+          tipster_id: product.tipster_id,
+          amount_cents: product.price_cents || {amount_cents},
+          currency: product.currency || 'EUR',
+          email_backup: 'seed' + i + '@antia.test',
+          status: {json.dumps(status)},
+          payment_provider: 'redsys',
+          telegram_user_id: {telegram_users} > 0 ? String({TELEGRAM_USER_BASE} + i % {telegram_users}) : null,
+          paid_at: {json.dumps(status)} === 'PENDING' ? null : now,
+          created_at: now,
+          updated_at: now,
+          seed: '{SEED_TAG}',
+        }});
+      }}
+      db.orders.insertMany(docs, {{ ordered: false }});
+      docs.forEach(d => created.push({{ id: d._id.toString(), amount_cents: d.amount_cents }}));
+    }}
+    print(JSON.stringify(created));
+    """
+    return json.loads(run_mongosh(script).splitlines()[-1])
+
+
+def clear_orders() -> int:
+    """Delete the orders created by seed_orders, with their grants and seat holds"""
+    output = run_mongosh(f"""
+    const ids = db.orders.find({{ seed: '{SEED_TAG}' }}, {{ _id: 1 }}).toArray().map(o => o._id.toString());
+    db.channel_access_grants.deleteMany({{ order_id: {{ $in: ids }} }});
+    db.seat_holds.deleteMany({{ _id: {{ $in: ids }} }});
+    print(db.orders.deleteMany({{ seed: '{SEED_TAG}' }}).deletedCount);
+    """)
+    return int(output.splitlines()[-1])
+
+
+def clear_invite_links(channel_id: str) -> int:
+    """Delete every pooled or claimed invite link of a (load test) channel"""
+    output = run_mongosh(f"print(db.invite_links.deleteMany({{ channel_id: {json.dumps(channel_id)} }}).deletedCount)")
+    return int(output.splitlines()[-1])
+
+
+def seed_settlement(orders: int, events: int, period: str, tipsters: int = 1000) -> dict:
+    """Paid orders and referral events spread over a month (YYYY-MM) and `tipsters` fake
+    tipster ids, for the settlement engine; returns the totals it should find"""
+    script = f"""
+    const [year, month] = {json.dumps(period)}.split('-').map(Number);
+    const start = Date.UTC(year, month - 1, 1);
+    const span = Date.UTC(year, month, 1) - start;
+    const tipsters = [];
+    for (let t = 0; t < {tipsters}; t++) tipsters.push(new ObjectId().toString());
+    const houses = db.houses.find({{}}, {{ _id: 1 }}).toArray().map(h => h._id.toString());
+    if (!houses.length) houses.push(new ObjectId().toString());
+    const types = ['CLICK', 'REGISTER', 'FTD', 'DEPOSIT'];
+    const eventStatuses = ['VALID', 'VALID', 'PENDING', 'REJECTED'];
+    let gross = 0, fees = 0, counted = 0;
+    for (let start_i = 0; start_i < {orders}; start_i += {INSERT_BATCH}) {{
+      const docs = [];
+      for (let i = start_i; i < Math.min(start_i + {INSERT_BATCH}, {orders}); i++) {{
+        const paidAt = new Date(start + Math.floor(Math.random() * span));
+        const amount = 500 + (i % 50) * 100;
+        // One in twenty refunded: must not be paid out
+        const status = i % 20 === 0 ? 'REFUNDED' : (i % 2 ? 'PAGADA' : 'ACCESS_GRANTED');
+        if (status !== 'REFUNDED') {{ gross += amount; fees += Math.round(amount * 0.029); counted++; }}
+        docs.push({{
+          product_id: 'seed_product',
+          tipster_id: tipsters[i % tipsters.length],
+          amount_cents: amount,
+          commission_cents: Math.round(amount * 0.029),
+          currency: 'EUR',
+          status,
+          payment_provider: 'stripe',
+          paid_at: paidAt,
+          created_at: paidAt,
+          updated_at: paidAt,
+          seed: '{SEED_TAG}',
+        }});
+      }}
+      db.orders.insertMany(docs, {{ ordered: false }});
+    }}
+    for (let start_i = 0; start_i < {events}; start_i += {INSERT_BATCH}) {{
+      const docs = [];
+      for (let i = start_i; i < Math.min(start_i + {INSERT_BATCH}, {events}); i++) {{
+        const eventAt = new Date(start + Math.floor(Math.random() * span));
+        const type = types[i % types.length];
+        docs.push({{
+          house_id: houses[i % houses.length],
+          tipster_id: tipsters[(i * 7) % tipsters.length],
+          type,
+          amount_cents: type === 'DEPOSIT' ? 1000 + (i % 10) * 500 : null,
+          currency: 'EUR',
+          event_at: eventAt,
+          source: 'API',
+          status: eventStatuses[Math.floor(i / types.length) % eventStatuses.length],
+          raw_payload: {{}},
+          created_at: eventAt,
+          updated_at: eventAt,
+          seed: '{SEED_TAG}',
+        }});
+      }}
+      db.referral_events.insertMany(docs, {{ ordered: false }});
+    }}
+    print(JSON.stringify({{ orders: counted, gross_cents: gross, gateway_fee_cents: fees, tipsters: tipsters.length }}));
+    """
+    return json.loads(run_mongosh(script).splitlines()[-1])
+
+
+def seed_confirm_order(amount_cents: int = 2500) -> dict:
+    """A PENDING order to be paid through /api/webhooks/payments/confirm (which finds it by
+    product id and email) for the settlement scenario; its product does not exist, so no
+    access is granted. Returns {id, product_id, email, amount_cents}"""
+    output = run_mongosh(f"""
+    const id = new ObjectId();
+    const order = {{
+      _id: id,
+      product_id: new ObjectId().toString(),
+      tipster_id: new ObjectId().toString(),
+      amount_cents: {amount_cents},
+      commission_cents: Math.round({amount_cents} * 0.029),
+      currency: 'EUR',
+      email_backup: 'confirm-' + id.toString() + '@antia.test',
+      status: 'PENDING',
+      payment_provider: 'redsys',
+      paid_at: null,
+      created_at: new Date(),
+      updated_at: new Date(),
+      seed: '{SEED_TAG}',
+      settlement_confirm: true,
+    }};
+    db.orders.insertOne(order);
+    print(JSON.stringify({{ id: id.toString(), product_id: order.product_id, email: order.email_backup,
+                           amount_cents: order.amount_cents }}));
+    """)
+    return json.loads(output.splitlines()[-1])
+
+
+def backdate_paid_at(order_id: str, period: str) -> bool:
+    """Move a paid order's paid_at into the first day of `period` (YYYY-MM). False when the
+    order has no paid_at to move (it was never stamped paid)"""
+    output = run_mongosh(f"""
+    const [year, month] = {json.dumps(period)}.split('-').map(Number);
+    const result = db.orders.updateOne(
+      {{ _id: ObjectId({json.dumps(order_id)}), paid_at: {{ $type: 'date' }} }},
+      {{ $set: {{ paid_at: new Date(Date.UTC(year, month - 1, 1, 12)) }} }},
+    );
+    print(result.matchedCount);
+    """)
+    return int(output.splitlines()[-1]) == 1
+
+
+def settlement_report(period: str) -> dict:
+    """Payout and commission rows written for a period (seeded tipsters included)"""
+    output = run_mongosh(f"""
+    const payouts = db.payouts.aggregate([
+      {{ $match: {{ period_month: {json.dumps(period)} }} }},
+      {{ $group: {{ _id: null, rows: {{ $sum: 1 }}, gross: {{ $sum: '$gross_cents' }}, orders: {{ $sum: '$order_count' }} }} }},
+    ]).toArray()[0] || {{ rows: 0, gross: 0, orders: 0 }};
+    const commissions = db.commissions.countDocuments({{ period_month: {json.dumps(period)} }});
+    print(JSON.stringify({{ payouts: payouts.rows, gross_cents: payouts.gross, orders: payouts.orders, commissions }}));
+    """)
+    return json.loads(output.splitlines()[-1])
+
+
+def clear_settlement(period: str) -> int:
+    """Delete seeded settlement data plus the period's payouts, commissions and run"""
+    output = run_mongosh(f"""
+    let deleted = db.orders.deleteMany({{
+      seed: '{SEED_TAG}', $or: [{{ product_id: 'seed_product' }}, {{ settlement_confirm: true }}],
+    }}).deletedCount;
+    deleted += db.referral_events.deleteMany({{ seed: '{SEED_TAG}' }}).deletedCount;
+    db.payouts.deleteMany({{ period_month: {json.dumps(period)} }});
+    db.commissions.deleteMany({{ period_month: {json.dumps(period)} }});
+    db.settlement_runs.deleteOne({{ _id: {json.dumps(period)} }});
+    print(deleted);
+    """)
+    return int(output.splitlines()[-1])
+
+
+def collection_counts() -> dict:
+    """Documents per collection (estimated counts), the dataset size a benchmark ran against"""
+    output = run_mongosh("""
+    const counts = {};
+    db.getCollectionNames().filter(name => !name.startsWith('system.'))
+      .forEach(name => counts[name] = db.getCollection(name).estimatedDocumentCount());
+    print(JSON.stringify(counts));
+    """, timeout=60)
+    return json.loads(output.splitlines()[-1])
+
+
+def order_report(order_ids: List[str]) -> dict:
+    """Status counts, paid timestamps and access grants for the given orders"""
+    output = run_mongosh(f"""
+    const ids = {json.dumps(order_ids)};
+    const byStatus = {{}};
+    let paid = 0;
+    db.orders.find({{ _id: {{ $in: ids.map(id => ObjectId(id)) }} }}, {{ status: 1, paid_at: 1 }})
+      .forEach(o => {{ byStatus[o.status] = (byStatus[o.status] || 0) + 1; if (o.paid_at) paid++; }});
+    const grants = db.channel_access_grants.countDocuments({{ order_id: {{ $in: ids }} }});
+    print(JSON.stringify({{ by_status: byStatus, paid_at_set: paid, grants }}));
+    """)
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Antia bulk seeder (mongosh)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    grants = sub.add_parser("grants", help="Seed channel access grants")
+    grants.add_argument("--count", type=int, default=1_000_000)
+    grants.add_argument("--channel-id", default="-1001000000000")
+    grants.add_argument("--expired-fraction", type=float, default=1.0)
+    sub.add_parser("clear-grants", help="Delete seeded grants")
+    sub.add_parser("count-grants", help="Seeded grants by status")
+
+    orders = sub.add_parser("orders", help="Seed orders (PENDING unless --status)")
+    orders.add_argument("--count", type=int, default=1000)
+    orders.add_argument("--product-id")
+    orders.add_argument("--status", default="PENDING")
+    orders.add_argument("--telegram-users", type=int, default=0,
+                        help="Spread the orders over this many Telegram user ids")
+    sub.add_parser("clear-orders", help="Delete seeded orders and their grants")
+
+    settlement = sub.add_parser("settlement", help="Seed a month of paid orders and referral events")
+    settlement.add_argument("--orders", type=int, default=1_000_000)
+    settlement.add_argument("--events", type=int, default=200_000)
+    settlement.add_argument("--period", default="2020-01")
+    settlement.add_argument("--tipsters", type=int, default=1000)
+    clear_settlement_parser = sub.add_parser("clear-settlement", help="Delete seeded settlement data")
+    clear_settlement_parser.add_argument("--period", default="2020-01")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "grants":
+            print(f"✅ Inserted {seed_grants(args.count, args.channel_id, args.expired_fraction)} grants")
+        elif args.command == "clear-grants":
+            print(f"✅ Deleted {clear_grants()} seeded grants")
+        elif args.command == "orders":
+            seeded = seed_orders(args.count, args.product_id, status=args.status, telegram_users=args.telegram_users)
+            print(f"✅ Inserted {len(seeded)} orders")
+        elif args.command == "clear-orders":
+            print(f"✅ Deleted {clear_orders()} seeded orders")
+        elif args.command == "settlement":
+            print(json.dumps(seed_settlement(args.orders, args.events, args.period, args.tipsters), indent=2))
+        elif args.command == "clear-settlement":
+            print(f"✅ Deleted {clear_settlement(args.period)} seeded orders and events")
+        else:
+            print(json.dumps(count_grants(), indent=2))
+    except (RuntimeError, subprocess.TimeoutExpired) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Latency and fault-injection TCP proxy for Antia load tests
+Sits between the backend and a dependency (MongoDB, the Telegram stand-in,
+any plain-HTTP API) and injects latency distributions, bandwidth caps,
+connection resets and stalls. Faults are changed at runtime through a small
+HTTP control API, either one profile at a time or as a timed schedule, so
+load scenarios can step through them while measuring
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+DEFAULT_CONTROL_PORT = 8474
+DEFAULT_ROUTES = ["mongo=27018:localhost:27017", "telegram=8082:localhost:8081"]
+CHUNK_SIZE = 64 * 1024
+DISTRIBUTIONS = {"fixed", "uniform", "normal", "lognormal", "pareto"}
+DIRECTIONS = {"upstream", "downstream", "both"}
+
+
+class ResetInjected(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class FaultProfile:
+    """Faults applied to one route; the default profile is a transparent proxy"""
+    latency_ms: float = 0           # fixed value, median (lognormal) or scale (pareto)
+    jitter_ms: float = 0            # half-width (uniform) or standard deviation (normal)
+    distribution: str = "fixed"
+    sigma: float = 0.5              # lognormal shape: larger = heavier tail
+    alpha: float = 2.5              # pareto shape: smaller = heavier tail
+    direction: str = "downstream"   # which traffic is delayed: replies, requests or both
+    bandwidth_kb_s: float = 0       # per connection and direction (0 = unlimited)
+    reset_rate: float = 0           # per chunk: abort the connection with a RST
+    refuse_rate: float = 0          # per new connection: RST before reaching upstream
+    stall_rate: float = 0           # per chunk: stop forwarding
+    stall_ms: float = 0             # how long a stall lasts (0 = until the client gives up)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FaultProfile":
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown profile fields: {', '.join(sorted(unknown))}")
+        profile = cls(**data)
+        if profile.distribution not in DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {sorted(DISTRIBUTIONS)}")
+        if profile.direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {sorted(DIRECTIONS)}")
+        return profile
+
+    def applies_to(self, direction: str) -> bool:
+        return self.direction in (direction, "both")
+
+    def sample_latency(self) -> float:
+        """Seconds of delay for one chunk"""
+        base = self.latency_ms
+        if self.distribution == "uniform":
+            delay = base + random.uniform(-self.jitter_ms, self.jitter_ms)
+        elif self.distribution == "normal":
+            delay = random.gauss(base, self.jitter_ms)
+        elif self.distribution == "lognormal":
+            delay = base * math.exp(random.gauss(0, self.sigma)) if base else 0
+        elif self.distribution == "pareto":
+            delay = base * random.paretovariate(self.alpha)
+        else:
+            delay = base
+        return max(0.0, delay) / 1000
+
+
+def abort(writer: asyncio.StreamWriter):
+    """Close with a TCP RST instead of a FIN"""
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        except OSError:
+            pass
+    writer.transport.abort()
+
+
+class Route:
+    def __init__(self, name: str, listen_port: int, upstream_host: str, upstream_port: int):
+        self.name = name
+        self.listen_port = listen_port
+        self.upstream_host = upstream_host
+        self.upstream_port = upstream_port
+        self.profile = FaultProfile()
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+        self.schedule: Optional["Schedule"] = None
+
+    def count(self, name: str, amount: int = 1):
+        with self.stats_lock:
+            self.stats[name] += amount
+
+    def describe(self) -> Dict[str, Any]:
+        with self.stats_lock:
+            stats = dict(self.stats)
+        return {
+            "listen": self.listen_port,
+            "upstream": f"{self.upstream_host}:{self.upstream_port}",
+            "profile": asdict(self.profile),
+            "stats": stats,
+            "schedule": self.schedule.describe() if self.schedule and self.schedule.running else None,
+        }
+
+    # ===== Data path =====
+
+    async def handle(self, client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter):
+        self.count("connections")
+        if self.profile.refuse_rate and random.random() < self.profile.refuse_rate:
+            self.count("refused")
+            abort(client_writer)
+            return
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(self.upstream_host, self.upstream_port)
+        except OSError:
+            self.count("upstream_errors")
+            abort(client_writer)
+            return
+
+        self.count("active")
+        client_gone = asyncio.Event()
+        pipes = [
+            asyncio.ensure_future(self.pipe(client_reader, upstream_writer, "upstream", client_gone)),
+            asyncio.ensure_future(self.pipe(upstream_reader, client_writer, "downstream", client_gone)),
+        ]
+        try:
+            done, pending = await asyncio.wait(pipes, return_when=asyncio.FIRST_EXCEPTION)
+            if any(task.exception() for task in done):
+                for task in pending:
+                    task.cancel()
+                abort(client_writer)
+                abort(upstream_writer)
+        finally:
+            self.count("active", -1)
+            for writer in (client_writer, upstream_writer):
+                if not writer.is_closing():
+                    writer.close()
+
+    async def pipe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, direction: str,
+                   client_gone: asyncio.Event):
+        """Forward one direction; chunks keep their order and are delayed from the moment they were read"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def pump():
+            last_due = 0.0
+            while True:
+                try:
+                    data = await reader.read(CHUNK_SIZE)
+                except (ConnectionError, OSError):
+                    data = b""
+                if not data:
+                    if direction == "upstream":
+                        client_gone.set()
+                    await queue.put(None)
+                    return
+                profile = self.profile
+                delay = profile.sample_latency() if profile.applies_to(direction) else 0
+                last_due = max(loop.time() + delay, last_due)
+                await queue.put((last_due, data))
+
+        reading = asyncio.ensure_future(pump())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    if writer.can_write_eof() and not writer.is_closing():
+                        writer.write_eof()
+                    return
+                due, data = item
+                profile = self.profile
+                if profile.applies_to(direction):
+                    if profile.reset_rate and random.random() < profile.reset_rate:
+                        self.count("resets")
+                        raise ResetInjected()
+                    if profile.stall_rate and random.random() < profile.stall_rate:
+                        self.count("stalls")
+                        if profile.stall_ms:
+                            await asyncio.sleep(profile.stall_ms / 1000)
+                        else:
+                            await client_gone.wait()
+                            return
+                    wait = due - loop.time()
+                    if wait > 0:
+                        self.count("delayed_chunks")
+                        await asyncio.sleep(wait)
+                    if profile.bandwidth_kb_s:
+                        await asyncio.sleep(len(data) / (profile.bandwidth_kb_s * 1024))
+                writer.write(data)
+                await writer.drain()
+                self.count(f"bytes_{direction}", len(data))
+        finally:
+            reading.cancel()
+
+
+class Schedule:
+    """Timed sequence of profiles for one route; the route goes back to no faults at the end"""
+
+    def __init__(self, route: Route, steps: List[Dict[str, Any]], repeat: bool = False):
+        self.route = route
+        self.steps = [(float(step["duration_s"]), FaultProfile.from_dict(step.get("profile", {}))) for step in steps]
+        self.repeat = repeat
+        self.current = 0
+        self.started = time.monotonic()
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try:
+            while True:
+                for index, (duration, profile) in enumerate(self.steps):
+                    self.current = index
+                    self.route.profile = profile
+                    if self.stop_event.wait(duration):
+                        return
+                if not self.repeat:
+                    return
+        finally:
+            # A cancelled schedule leaves the route to whoever cancelled it
+            if not self.stop_event.is_set() and self.route.schedule is self:
+                self.route.profile = FaultProfile()
+            self.running = False
+
+    def cancel(self):
+        """Stop the schedule and wait until its thread can no longer touch the route"""
+        self.stop_event.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "step": self.current,
+            "steps": len(self.steps),
+            "repeat": self.repeat,
+            "elapsed_s": round(time.monotonic() - self.started, 1),
+        }
+
+
+class FaultProxy:
+    def __init__(self, routes: List[Route]):
+        self.routes = {route.name: route for route in routes}
+
+    def set_profile(self, name: str, data: Dict[str, Any]) -> Route:
+        route = self.routes[name]
+        self.cancel_schedule(route)
+        route.profile = FaultProfile.from_dict(data)
+        return route
+
+    def set_schedule(self, name: str, data: Dict[str, Any]) -> Route:
+        route = self.routes[name]
+        schedule = Schedule(route, data["steps"], data.get("repeat", False))
+        self.cancel_schedule(route)
+        route.schedule = schedule
+        schedule.start()
+        return route
+
+    def cancel_schedule(self, route: Route):
+        if route.schedule:
+            route.schedule.cancel()
+            route.schedule = None
+
+    def reset(self):
+        for route in self.routes.values():
+            self.cancel_schedule(route)
+            route.profile = FaultProfile()
+            with route.stats_lock:
+                active = route.stats["active"]
+                route.stats = Counter(active=active)
+
+    async def serve(self):
+        servers = []
+        for route in self.routes.values():
+            servers.append(await asyncio.start_server(route.handle, "0.0.0.0", route.listen_port))
+            print(f"🔀 {route.name}: localhost:{route.listen_port} -> {route.upstream_host}:{route.upstream_port}")
+        await asyncio.gather(*(server.serve_forever() for server in servers))
+
+
+class ControlHandler(BaseHTTPRequestHandler):
+    proxy: FaultProxy = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, body: Any):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def do_GET(self):
+        if self.path == "/routes":
+            self.send_json(200, {name: route.describe() for name, route in self.proxy.routes.items()})
+            return
+        self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        parts = self.path.strip("/").split("/")
+        try:
+            body = self.read_json()
+            if parts == ["reset"]:
+                self.proxy.reset()
+                self.send_json(200, {"ok": True})
+            elif len(parts) == 2 and parts[0] == "routes":
+                self.send_json(200, self.proxy.set_profile(parts[1], body).describe())
+            elif len(parts) == 3 and parts[0] == "routes" and parts[2] == "schedule":
+                self.send_json(200, self.proxy.set_schedule(parts[1], body).describe())
+            elif len(parts) == 3 and parts[0] == "routes" and parts[2] == "clear":
+                self.send_json(200, self.proxy.set_profile(parts[1], {}).describe())
+            else:
+                self.send_json(404, {"error": "not found"})
+        except KeyError as e:
+            self.send_json(404, {"error": f"unknown route or field {e}"})
+        except (ValueError, TypeError) as e:
+            self.send_json(400, {"error": str(e)})
+
+
+def parse_route(spec: str) -> Route:
+    """name=LISTEN_PORT:UPSTREAM_HOST:UPSTREAM_PORT"""
+    name, _, target = spec.partition("=")
+    listen_port, upstream_host, upstream_port = target.split(":")
+    return Route(name, int(listen_port), upstream_host, int(upstream_port))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and fault-injection TCP proxy")
+    parser.add_argument("--route", action="append",
+                        help=f"name=LISTEN_PORT:UPSTREAM_HOST:UPSTREAM_PORT (default: {' '.join(DEFAULT_ROUTES)})")
+    parser.add_argument("--control-port", type=int, default=DEFAULT_CONTROL_PORT)
+    parser.add_argument("--schedule", help='JSON file: {"<route>": {"steps": [{"duration_s": 30, "profile": {...}}]}}')
+    args = parser.parse_args()
+
+    try:
+        proxy = FaultProxy([parse_route(spec) for spec in args.route or DEFAULT_ROUTES])
+        if args.schedule:
+            with open(args.schedule) as schedule_file:
+                for name, schedule in json.load(schedule_file).items():
+                    proxy.set_schedule(name, schedule)
+    except (ValueError, KeyError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    ControlHandler.proxy = proxy
+    control = ThreadingHTTPServer(("0.0.0.0", args.control_port), ControlHandler)
+    control.daemon_threads = True
+    threading.Thread(target=control.serve_forever, daemon=True).start()
+    print(f"🎛️  Control API on http://localhost:{args.control_port} (GET /routes, POST /routes/<name>, POST /reset)")
+
+    try:
+        asyncio.run(proxy.serve())
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -105,6 +105,10 @@ export const checkoutApi = {
   getStatus: (sessionId: string) => api.get(`/checkout/status/${sessionId}`),
   verify: (sessionId: string, orderId: string) => 
     api.get('/checkout/verify', { params: { session_id: sessionId, order_id: orderId } }),
+  // Answers as soon as the order leaves `known` (or after `wait` seconds); for push, use
+  // an EventSource on /checkout/order/:orderId/events and close it once status != PENDING
+  waitForStatus: (orderId: string, known: string, wait = 25) =>
+    api.get(`/checkout/order/${orderId}/status`, { params: { known, wait }, timeout: (wait + 10) * 1000 }),
 };
 
 // Orders / Sales (Tipster)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Local Redis-protocol stand-in for Antia load tests
+Speaks enough RESP2 for the backend's shared cache tier (GET/SET with expiry,
+DEL, PUBLISH/SUBSCRIBE plus the handshake ioredis sends) and counts hits,
+misses and invalidation messages, so multi-node cache coherence can be tested
+without a Redis server. Point the backend at it with
+REDIS_URL=redis://localhost:6380
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set
+
+DEFAULT_PORT = 6380
+DEFAULT_HTTP_PORT = 8380
+
+
+class RespError(Exception):
+    pass
+
+
+class StandinState:
+    """Keyspace with lazy expiry, channel subscribers and command counters"""
+
+    def __init__(self, latency_ms: float, jitter_ms: float):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.lock = threading.Lock()
+        self.channels: Dict[bytes, Set["RespConnection"]] = {}
+        self.data: Dict[bytes, bytes] = {}
+        self.expires: Dict[bytes, float] = {}
+        self.connections = 0
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.commands = Counter()
+            self.hits = 0
+            self.misses = 0
+            self.published = 0
+            self.delivered = 0
+
+    def flush(self):
+        with self.lock:
+            self.data.clear()
+            self.expires.clear()
+
+    def lookup(self, key: bytes) -> Optional[bytes]:
+        """Value of a key that has not expired (expired keys are removed on access)"""
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return self.data.get(key)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "commands": dict(self.commands),
+                "total_commands": sum(self.commands.values()),
+                "keys": len(self.data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "published": self.published,
+                "delivered": self.delivered,
+                "subscribers": sum(len(subscribers) for subscribers in self.channels.values()),
+                "connections": self.connections,
+            }
+
+
+def encode(value: Any) -> bytes:
+    """RESP2 reply: None is a null bulk string, str a simple string, bytes a bulk string"""
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return f"-{value}\r\n".encode()
+    if isinstance(value, bool):
+        return f":{int(value)}\r\n".encode()
+    if isinstance(value, int):
+        return f":{value}\r\n".encode()
+    if isinstance(value, str):
+        return f"+{value}\r\n".encode()
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(encode(item) for item in value)
+    raise TypeError(f"cannot encode {type(value)}")
+
+
+class RespConnection:
+    """One client connection; commands are answered in order"""
+
+    def __init__(self, state: StandinState, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.state = state
+        self.reader = reader
+        self.writer = writer
+        self.subscriptions: Set[bytes] = set()
+
+    async def read_command(self) -> Optional[List[bytes]]:
+        line = await self.reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Inline command (redis-cli over telnet, nc)
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:])):
+            header = await self.reader.readline()
+            if not header.startswith(b"$"):
+                raise RespError("ERR Protocol error: expected '$'")
+            length = int(header[1:])
+            args.append((await self.reader.readexactly(length + 2))[:-2])
+        return args
+
+    def send(self, payload: bytes):
+        self.writer.write(payload)
+
+    async def serve(self):
+        with self.state.lock:
+            self.state.connections += 1
+        try:
+            while True:
+                try:
+                    command = await self.read_command()
+                except RespError as error:
+                    self.send(encode(error))
+                    break
+                if command is None:
+                    break
+                if not command:
+                    continue
+                state = self.state
+                if state.latency_ms or state.jitter_ms:
+                    delay_ms = state.latency_ms + random.uniform(-state.jitter_ms, state.jitter_ms)
+                    await asyncio.sleep(max(0.0, delay_ms) / 1000)
+                name = command[0].decode().upper()
+                try:
+                    reply = self.execute(name, command[1:])
+                except RespError as error:
+                    reply = encode(error)
+                if reply is not None:
+                    self.send(reply)
+                await self.writer.drain()
+                if name == "QUIT":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            with self.state.lock:
+                self.state.connections -= 1
+                for channel in self.subscriptions:
+                    self.state.channels.get(channel, set()).discard(self)
+            self.writer.close()
+
+    def execute(self, name: str, args: List[bytes]) -> Optional[bytes]:
+        state = self.state
+        with state.lock:
+            state.commands[name] += 1
+
+            if name == "PING":
+                if self.subscriptions:
+                    return encode([b"pong", args[0] if args else b""])
+                return encode(args[0]) if args else encode("PONG")
+            if name == "ECHO":
+                return encode(args[0])
+            if name in ("SELECT", "QUIT", "AUTH") or (name == "CLIENT" and args and args[0].upper() != b"GETNAME"):
+                return encode("OK")
+            if name == "CLIENT":
+                return encode(None)
+            if name == "INFO":
+                return encode(b"# Server\r\nredis_version:7.0.0\r\nredis_mode:standalone\r\n"
+                              b"# Persistence\r\nloading:0\r\n")
+            if name == "COMMAND":
+                return encode([])
+
+            if name == "GET":
+                value = state.lookup(args[0])
+                if value is None:
+                    state.misses += 1
+                else:
+                    state.hits += 1
+                return encode(value)
+            if name == "SET":
+                return self.set(args)
+            if name == "DEL":
+                removed = 0
+                for key in args:
+                    if state.lookup(key) is not None:
+                        removed += 1
+                    state.data.pop(key, None)
+                    state.expires.pop(key, None)
+                return encode(removed)
+            if name == "EXISTS":
+                return encode(sum(1 for key in args if state.lookup(key) is not None))
+            if name == "PTTL":
+                if state.lookup(args[0]) is None:
+                    return encode(-2)
+                deadline = state.expires.get(args[0])
+                return encode(-1 if deadline is None else int((deadline - time.monotonic()) * 1000))
+            if name == "DBSIZE":
+                return encode(len(state.data))
+            if name in ("FLUSHDB", "FLUSHALL"):
+                state.data.clear()
+                state.expires.clear()
+                return encode("OK")
+
+            if name == "PUBLISH":
+                subscribers = list(state.channels.get(args[0], ()))
+                state.published += 1
+                state.delivered += len(subscribers)
+                message = encode([b"message", args[0], args[1]])
+                for subscriber in subscribers:
+                    subscriber.send(message)
+                return encode(len(subscribers))
+            if name == "SUBSCRIBE":
+                replies = []
+                for channel in args:
+                    self.subscriptions.add(channel)
+                    state.channels.setdefault(channel, set()).add(self)
+                    replies.append(encode([b"subscribe", channel, len(self.subscriptions)]))
+                return b"".join(replies)
+            if name == "UNSUBSCRIBE":
+                replies = []
+                for channel in args or list(self.subscriptions):
+                    self.subscriptions.discard(channel)
+                    state.channels.get(channel, set()).discard(self)
+                    replies.append(encode([b"unsubscribe", channel, len(self.subscriptions)]))
+                return b"".join(replies) or encode([b"unsubscribe", None, 0])
+
+        raise RespError(f"ERR unknown command '{name}'")
+
+    def set(self, args: List[bytes]) -> bytes:
+        """SET key value [EX seconds | PX milliseconds] [NX | XX]"""
+        state = self.state
+        key, value = args[0], args[1]
+        options = [option.upper() for option in args[2:]]
+        ttl = None
+        for flag, scale in ((b"EX", 1.0), (b"PX", 0.001)):
+            if flag in options:
+                ttl = float(args[2 + options.index(flag) + 1]) * scale
+        exists = state.lookup(key) is not None
+        if (b"NX" in options and exists) or (b"XX" in options and not exists):
+            return encode(None)
+        state.data[key] = value
+        if ttl is None:
+            state.expires.pop(key, None)
+        else:
+            state.expires[key] = time.monotonic() + ttl
+        return encode("OK")
+
+
+class StatsHandler(BaseHTTPRequestHandler):
+    state: StandinState = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, body: Dict[str, Any]):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.send_json(200, self.state.snapshot())
+            return
+        self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path == "/reset":
+            self.state.reset()
+            self.send_json(200, {"ok": True})
+            return
+        if self.path == "/flush":
+            self.state.flush()
+            self.send_json(200, {"ok": True})
+            return
+        self.send_json(404, {"error": "not found"})
+
+
+async def serve(state: StandinState, port: int):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await RespConnection(state, reader, writer).serve()
+
+    server = await asyncio.start_server(handle, "0.0.0.0", port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Redis-protocol stand-in")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--http-port", type=int, default=DEFAULT_HTTP_PORT, help="GET /stats, POST /reset, POST /flush")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Added latency per command")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    state = StandinState(args.latency_ms, args.jitter_ms)
+    StatsHandler.state = state
+    http_server = ThreadingHTTPServer(("0.0.0.0", args.http_port), StatsHandler)
+    http_server.daemon_threads = True
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+
+    print(f"🧱 Redis stand-in listening on redis://localhost:{args.port} "
+          f"(GET /stats, POST /reset, POST /flush on http://localhost:{args.http_port})")
+    try:
+        asyncio.run(serve(state, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+
+
+if __name__ == "__main__":
+    main()
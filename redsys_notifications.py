@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Signed Redsys merchant notifications for Antia webhook load tests
+Builds Ds_MerchantParameters / Ds_Signature exactly as Redsys does
+(HMAC_SHA256_V1 with a per-order 3DES key) and fires them at
+/api/checkout/webhook/redsys, including duplicate and out-of-order
+deliveries, to measure throughput and check that every order is paid once
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import random
+import string
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List
+from urllib.parse import quote
+
+import requests
+
+from bulk_seeder import clear_orders, order_report, seed_orders
+
+BASE_URL = os.environ.get("ANTIA_BASE_URL", "http://localhost:8001")
+API_BASE = f"{BASE_URL}/api"
+# Public Redsys sandbox key; must match the backend's REDSYS_SECRET_KEY
+REDSYS_SECRET_KEY = os.environ.get("REDSYS_SECRET_KEY", "sq7HjrUOBfKmC576ILgskD5srU870gJ7")
+REDSYS_MERCHANT_CODE = os.environ.get("REDSYS_MERCHANT_CODE", "999008881")
+REDSYS_TERMINAL = os.environ.get("REDSYS_TERMINAL", "001")
+APPROVED = "0000"
+DECLINED = "0190"
+
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+except ImportError:  # fall back to the openssl binary
+    Cipher = None
+
+
+@lru_cache(maxsize=100_000)
+def order_key(secret_key: str, ds_order: str) -> bytes:
+    """3DES-CBC (zero IV) of the zero-padded Ds_Order under the merchant key"""
+    key = base64.b64decode(secret_key)
+    data = ds_order.encode()
+    data += b"\0" * (-len(data) % 8)
+    if Cipher is not None:
+        encryptor = Cipher(algorithms.TripleDES(key), modes.CBC(b"\0" * 8)).encryptor()
+        return encryptor.update(data) + encryptor.finalize()
+    result = subprocess.run(
+        ["openssl", "enc", "-des-ede3-cbc", "-K", key.hex(), "-iv", "0" * 16, "-nopad"],
+        input=data, capture_output=True, check=True,
+    )
+    return result.stdout
+
+
+def sign(secret_key: str, ds_order: str, merchant_parameters: str) -> str:
+    """Ds_Signature as sent in notifications (URL-safe base64)"""
+    digest = hmac.new(order_key(secret_key, ds_order), merchant_parameters.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode()
+
+
+def transaction_id() -> str:
+    """12-character Ds_Order: 4 digits then alphanumerics, like redsys-easy's randomTransactionId"""
+    tail = "".join(random.choices(string.ascii_letters + string.digits, k=8))
+    return f"{random.randint(0, 9999):04d}{tail}"
+
+
+def build_notification(order_id: str, ds_order: str, amount_cents: int, response: str = APPROVED,
+                       secret_key: str = REDSYS_SECRET_KEY) -> Dict[str, str]:
+    """Form body Redsys POSTs to DS_MERCHANT_MERCHANTURL"""
+    now = datetime.now()
+    params = {
+        # Redsys URL-encodes the date and hour inside the JSON
+        "Ds_Date": quote(now.strftime("%d/%m/%Y"), safe=""),
+        "Ds_Hour": quote(now.strftime("%H:%M"), safe=""),
+        "Ds_SecurePayment": "1",
+        "Ds_Amount": str(amount_cents),
+        "Ds_Currency": "978",
+        "Ds_Order": ds_order,
+        "Ds_MerchantCode": REDSYS_MERCHANT_CODE,
+        "Ds_Terminal": REDSYS_TERMINAL,
+        "Ds_Response": response,
+        "Ds_TransactionType": "0",
+        "Ds_MerchantData": json.dumps({"orderId": order_id}),
+        "Ds_AuthorisationCode": f"{random.randint(0, 999999):06d}" if response == APPROVED else "",
+        "Ds_ConsumerLanguage": "1",
+        "Ds_Card_Country": "724",
+        "Ds_Card_Brand": "1",
+    }
+    merchant_parameters = base64.b64encode(json.dumps(params).encode()).decode()
+    return {
+        "Ds_SignatureVersion": "HMAC_SHA256_V1",
+        "Ds_MerchantParameters": merchant_parameters,
+        "Ds_Signature": sign(secret_key, ds_order, merchant_parameters),
+    }
+
+
+class RedsysNotifier:
+    def __init__(self, concurrency: int, secret_key: str = REDSYS_SECRET_KEY):
+        self.concurrency = concurrency
+        self.secret_key = secret_key
+        self.session = requests.Session()
+        self.lock = threading.Lock()
+        self.outcomes = Counter()
+        self.processed_per_order = Counter()
+        self.latencies: List[float] = []
+
+    def log(self, message: str, level: str = "INFO"):
+        timestamp = time.strftime("%H:%M:%S")
+        print(f"[{timestamp}] {level}: {message}")
+
+    def plan(self, orders: List[dict], duplicates: int, declines: float, tampered: float,
+             shuffle: bool) -> List[dict]:
+        """
+        One approval per order plus `duplicates` retries of it; a `declines` fraction of
+        orders also get a late decline, a `tampered` fraction a notification with a bad signature
+        """
+        deliveries, late = [], []
+        for order in orders:
+            ds_order = transaction_id()
+            approval = build_notification(order["id"], ds_order, order["amount_cents"], APPROVED, self.secret_key)
+            deliveries += [{"order_id": order["id"], "kind": "approval", "body": approval}] * (1 + duplicates)
+            if random.random() < declines:
+                decline = build_notification(order["id"], ds_order, order["amount_cents"], DECLINED, self.secret_key)
+                late.append({"order_id": order["id"], "kind": "decline", "body": decline})
+            if random.random() < tampered:
+                forged = dict(approval, Ds_Signature=base64.urlsafe_b64encode(os.urandom(32)).decode())
+                deliveries.append({"order_id": order["id"], "kind": "tampered", "body": forged})
+        if shuffle:
+            random.shuffle(deliveries)
+            random.shuffle(late)
+        # Declines stay late: a decline landing before its approval would rightly fail the order
+        return deliveries + late
+
+    def deliver(self, delivery: dict):
+        start = time.perf_counter()
+        try:
+            response = self.session.post(f"{API_BASE}/checkout/webhook/redsys", data=delivery["body"], timeout=30)
+            result = response.json() if response.ok else {}
+        except (requests.RequestException, ValueError):
+            response, result = None, {}
+        elapsed = (time.perf_counter() - start) * 1000
+
+        with self.lock:
+            self.latencies.append(elapsed)
+            if response is None or not response.ok:
+                self.outcomes["http_error"] += 1
+            elif result.get("processed"):
+                self.outcomes[f"{delivery['kind']}_processed"] += 1
+                self.processed_per_order[delivery["order_id"]] += 1
+            elif result.get("duplicate"):
+                self.outcomes[f"{delivery['kind']}_duplicate"] += 1
+            else:
+                self.outcomes[f"{delivery['kind']}_ignored"] += 1
+
+    def fire(self, deliveries: List[dict]) -> float:
+        """Send every delivery with `concurrency` workers, declines only once every approval
+        has been answered; returns elapsed seconds"""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            list(pool.map(self.deliver, [d for d in deliveries if d["kind"] != "decline"]))
+            list(pool.map(self.deliver, [d for d in deliveries if d["kind"] == "decline"]))
+        return time.perf_counter() - start
+
+    def percentile(self, p: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else 0.0
+
+    def report(self, orders: List[dict], deliveries: List[dict], elapsed: float) -> bool:
+        self.log(f"📨 {len(deliveries)} notifications in {elapsed:.1f}s "
+                 f"({len(deliveries) / elapsed:.1f}/s), p50 {self.percentile(0.5):.0f}ms, "
+                 f"p95 {self.percentile(0.95):.0f}ms, p99 {self.percentile(0.99):.0f}ms")
+        self.log(f"Outcomes: {dict(self.outcomes)}")
+
+        ok = True
+        twice = [order_id for order_id, n in self.processed_per_order.items() if n > 1]
+        if twice:
+            self.log(f"❌ {len(twice)} orders processed more than once (e.g. {twice[:3]})", "ERROR")
+            ok = False
+        if self.outcomes["tampered_processed"]:
+            self.log(f"❌ {self.outcomes['tampered_processed']} forged notifications were accepted", "ERROR")
+            ok = False
+
+        state = order_report([order["id"] for order in orders])
+        self.log(f"MongoDB: {state}")
+        paid = state["by_status"].get("PAGADA", 0) + state["by_status"].get("ACCESS_GRANTED", 0)
+        if paid != len(orders):
+            self.log(f"❌ {len(orders) - paid} orders did not end up paid", "ERROR")
+            ok = False
+        if ok:
+            self.log("✅ Every order paid exactly once")
+        return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fire signed Redsys notifications at the Antia backend")
+    parser.add_argument("--orders", type=int, default=500, help="PENDING orders to seed")
+    parser.add_argument("--product-id", help="Product for the seeded orders (first active one by default)")
+    parser.add_argument("--duplicates", type=int, default=2, help="Extra copies of each approval")
+    parser.add_argument("--declines", type=float, default=0.1, help="Fraction of orders with a late decline")
+    parser.add_argument("--tampered", type=float, default=0.02, help="Fraction with a forged signature")
+    parser.add_argument("--no-shuffle", action="store_true", help="Deliver in order instead of shuffled")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--secret-key", default=REDSYS_SECRET_KEY)
+    parser.add_argument("--keep", action="store_true", help="Do not delete the seeded orders afterwards")
+    args = parser.parse_args()
+
+    notifier = RedsysNotifier(args.concurrency, args.secret_key)
+    try:
+        orders = seed_orders(args.orders, args.product_id)
+    except (RuntimeError, subprocess.TimeoutExpired) as e:
+        notifier.log(f"❌ Could not seed orders: {e}", "ERROR")
+        sys.exit(1)
+    notifier.log(f"✅ Seeded {len(orders)} PENDING orders")
+
+    try:
+        deliveries = notifier.plan(orders, args.duplicates, args.declines, args.tampered, not args.no_shuffle)
+        ok = notifier.report(orders, deliveries, notifier.fire(deliveries))
+    finally:
+        if not args.keep:
+            notifier.log(f"🧹 Deleted {clear_orders()} seeded orders")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
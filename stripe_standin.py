@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Local Stripe API stand-in for Antia checkout load tests
+Implements Checkout Sessions create/retrieve/expire and delivers signed
+checkout.session.completed / checkout.session.expired webhooks, with
+configurable latency and error injection. Point the backend at it with
+STRIPE_API_BASE=http://localhost:12111 (any STRIPE_API_KEY works) and use
+the same STRIPE_WEBHOOK_SECRET on both sides.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import secrets
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlparse
+
+DEFAULT_PORT = 12111
+DEFAULT_WEBHOOK_URL = "http://localhost:8001/api/checkout/webhook/stripe"
+DEFAULT_WEBHOOK_SECRET = os.environ.get("STRIPE_WEBHOOK_SECRET", "whsec_standin")
+WEBHOOK_ATTEMPTS = 3
+API_VERSION = "2023-10-16"
+
+SESSION_PATH = re.compile(r"^/v1/checkout/sessions/(?P<id>cs_[A-Za-z0-9_]+)(?P<action>/expire)?$")
+PAY_PATH = re.compile(r"^/pay/(?P<id>cs_[A-Za-z0-9_]+)$")
+CONTROL_PATH = re.compile(r"^/_standin/sessions/(?P<id>cs_[A-Za-z0-9_]+)/(?P<action>complete|expire)$")
+
+
+def new_id(prefix: str) -> str:
+    return f"{prefix}_test_{secrets.token_hex(12)}"
+
+
+def parse_form(body: str) -> Dict[str, Any]:
+    """Decode Stripe's bracket form encoding (line_items[0][price_data][currency]=eur)"""
+    result: Dict[str, Any] = {}
+    for key, value in parse_qsl(body, keep_blank_values=True):
+        parts = re.findall(r"[^\[\]]+", key)
+        target = result
+        for part, following in zip(parts, parts[1:]):
+            container = [] if following.isdigit() else {}
+            if isinstance(target, list):
+                index = int(part)
+                while len(target) <= index:
+                    target.append(None)
+                if target[index] is None:
+                    target[index] = container
+                target = target[index]
+            else:
+                target = target.setdefault(part, container)
+        last = parts[-1]
+        if isinstance(target, list):
+            index = int(last)
+            while len(target) <= index:
+                target.append(None)
+            target[index] = value
+        else:
+            target[last] = value
+    return result
+
+
+def sign_payload(payload: str, secret: str, timestamp: Optional[int] = None) -> str:
+    """Stripe-Signature header value for payload"""
+    timestamp = timestamp or int(time.time())
+    signature = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+class StripeStandin:
+    """Sessions, webhook delivery and counters"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.public_url = args.public_url or f"http://localhost:{args.port}"
+        self.lock = threading.Lock()
+        self.webhooks = ThreadPoolExecutor(max_workers=args.webhook_workers)
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.sessions: Dict[str, Dict[str, Any]] = {}
+            self.counters = Counter()
+            self.webhook_latencies = []
+
+    def count(self, name: str, amount: int = 1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            latencies = sorted(self.webhook_latencies)
+            p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)] if latencies else 0
+            return {
+                "counters": dict(self.counters),
+                "sessions": len(self.sessions),
+                "open_sessions": sum(1 for s in self.sessions.values() if s["status"] == "open"),
+                "webhook_p95_ms": round(p95, 2),
+            }
+
+    # ===== Sessions =====
+
+    def create_session(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        line_items = params.get("line_items") or []
+        amount_total = 0
+        currency = "eur"
+        for item in line_items:
+            price = (item or {}).get("price_data", {})
+            currency = price.get("currency", currency)
+            amount_total += int(price.get("unit_amount", 0)) * int(item.get("quantity", 1))
+
+        now = int(time.time())
+        session_id = new_id("cs")
+        session = {
+            "id": session_id,
+            "object": "checkout.session",
+            "amount_total": amount_total,
+            "currency": currency,
+            "customer_email": params.get("customer_email"),
+            "expires_at": int(params.get("expires_at") or now + 24 * 3600),
+            "created": now,
+            "livemode": False,
+            "metadata": params.get("metadata", {}),
+            "mode": params.get("mode", "payment"),
+            "payment_intent": None,
+            "payment_method_types": params.get("payment_method_types", ["card"]),
+            "payment_status": "unpaid",
+            "status": "open",
+            "success_url": params.get("success_url"),
+            "cancel_url": params.get("cancel_url"),
+            "url": f"{self.public_url}/pay/{session_id}",
+        }
+        with self.lock:
+            self.sessions[session_id] = session
+        self.count("sessions_created")
+
+        if self.args.auto_complete_ms:
+            threading.Timer(self.args.auto_complete_ms / 1000, self.complete, (session_id,)).start()
+        elif self.args.auto_expire_ms:
+            threading.Timer(self.args.auto_expire_ms / 1000, self.expire, (session_id,)).start()
+        return session
+
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            return self.sessions.get(session_id)
+
+    def complete(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if not session or session["status"] != "open":
+                return session
+            session.update(status="complete", payment_status="paid", payment_intent=new_id("pi"))
+        self.count("sessions_completed")
+        self.deliver("checkout.session.completed", session)
+        return session
+
+    def expire(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if not session or session["status"] != "open":
+                return session
+            session["status"] = "expired"
+        self.count("sessions_expired")
+        self.deliver("checkout.session.expired", session)
+        return session
+
+    # ===== Webhooks =====
+
+    def deliver(self, event_type: str, session: Dict[str, Any]):
+        if not self.args.webhook_url:
+            return
+        event = {
+            "id": new_id("evt"),
+            "object": "event",
+            "api_version": API_VERSION,
+            "created": int(time.time()),
+            "livemode": False,
+            "pending_webhooks": 1,
+            "request": {"id": None, "idempotency_key": None},
+            "type": event_type,
+            "data": {"object": dict(session)},
+        }
+        self.webhooks.submit(self._post_event, json.dumps(event))
+
+    def _post_event(self, payload: str):
+        if self.args.webhook_delay_ms:
+            time.sleep(self.args.webhook_delay_ms / 1000)
+        for attempt in range(1, WEBHOOK_ATTEMPTS + 1):
+            request = urllib.request.Request(
+                self.args.webhook_url,
+                data=payload.encode(),
+                headers={
+                    "Content-Type": "application/json",
+                    "Stripe-Signature": sign_payload(payload, self.args.webhook_secret),
+                },
+                method="POST",
+            )
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                with self.lock:
+                    self.webhook_latencies.append((time.perf_counter() - started) * 1000)
+                self.count("webhooks_delivered")
+                return
+            except (urllib.error.URLError, OSError):
+                self.count("webhook_failures")
+                time.sleep(0.5 * attempt)
+        self.count("webhooks_dropped")
+
+
+class StripeApiHandler(BaseHTTPRequestHandler):
+    standin: StripeStandin = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Request-Id", f"req_{secrets.token_hex(7)}")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_error_json(self, status: int, error_type: str, message: str):
+        self.send_json(status, {"error": {"type": error_type, "message": message}})
+
+    def read_body(self) -> str:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length).decode() if length else ""
+
+    def simulate_api(self) -> bool:
+        """Latency and error injection for the Stripe API routes; False if an error was sent"""
+        args = self.standin.args
+        if args.latency_ms or args.jitter_ms:
+            time.sleep(max(0.0, args.latency_ms + random.uniform(-args.jitter_ms, args.jitter_ms)) / 1000)
+        if args.error_rate and random.random() < args.error_rate:
+            self.standin.count("errors_injected")
+            self.send_error_json(500, "api_error", "Simulated Stripe API error")
+            return False
+        if args.rate_limit_rate and random.random() < args.rate_limit_rate:
+            self.standin.count("rate_limited")
+            self.send_error_json(429, "rate_limit_error", "Too many requests")
+            return False
+        return True
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        standin = self.standin
+
+        if path == "/_standin/stats":
+            self.send_json(200, standin.stats())
+            return
+
+        match = SESSION_PATH.match(path)
+        if match and not match.group("action"):
+            if not self.simulate_api():
+                return
+            session = standin.get_session(match.group("id"))
+            standin.count("sessions_retrieved")
+            if session is None:
+                self.send_error_json(404, "invalid_request_error", f"No such checkout.session: '{match.group('id')}'")
+            else:
+                self.send_json(200, session)
+            return
+
+        match = PAY_PATH.match(path)
+        if match:
+            # The buyer "pays" on the hosted page and is redirected to success_url
+            session = standin.complete(match.group("id"))
+            if session is None:
+                self.send_error_json(404, "invalid_request_error", "No such checkout.session")
+                return
+            location = (session.get("success_url") or "/").replace("{CHECKOUT_SESSION_ID}", session["id"])
+            self.send_response(303)
+            self.send_header("Location", location)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_error_json(404, "invalid_request_error", f"Unrecognized request URL (GET: {path})")
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        standin = self.standin
+        body = self.read_body()
+
+        if path == "/_standin/reset":
+            standin.reset()
+            self.send_json(200, {"ok": True})
+            return
+
+        match = CONTROL_PATH.match(path)
+        if match:
+            action = standin.complete if match.group("action") == "complete" else standin.expire
+            session = action(match.group("id"))
+            if session is None:
+                self.send_error_json(404, "invalid_request_error", "No such checkout.session")
+            else:
+                self.send_json(200, session)
+            return
+
+        if path == "/v1/checkout/sessions":
+            if not self.simulate_api():
+                return
+            self.send_json(200, standin.create_session(parse_form(body)))
+            return
+
+        match = SESSION_PATH.match(path)
+        if match and match.group("action"):
+            if not self.simulate_api():
+                return
+            session = standin.expire(match.group("id"))
+            if session is None:
+                self.send_error_json(404, "invalid_request_error", "No such checkout.session")
+            else:
+                self.send_json(200, session)
+            return
+
+        self.send_error_json(404, "invalid_request_error", f"Unrecognized request URL (POST: {path})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Stripe Checkout Sessions stand-in")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--public-url", help="Base URL used in session.url (default http://localhost:<port>)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Added latency per API call")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of API calls answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0, help="Fraction of API calls answered with 429")
+    parser.add_argument("--webhook-url", default=DEFAULT_WEBHOOK_URL, help="Where events are POSTed ('' = off)")
+    parser.add_argument("--webhook-secret", default=DEFAULT_WEBHOOK_SECRET)
+    parser.add_argument("--webhook-delay-ms", type=float, default=0)
+    parser.add_argument("--webhook-workers", type=int, default=16)
+    parser.add_argument("--auto-complete-ms", type=float, default=0,
+                        help="Pay every session this long after creation (0 = off)")
+    parser.add_argument("--auto-expire-ms", type=float, default=0,
+                        help="Expire every session this long after creation (0 = off)")
+    args = parser.parse_args()
+
+    StripeApiHandler.standin = StripeStandin(args)
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), StripeApiHandler)
+    server.daemon_threads = True
+    print(f"💳 Stripe stand-in listening on http://localhost:{args.port} "
+          f"(webhooks -> {args.webhook_url or 'off'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+
+
+if __name__ == "__main__":
+    main()
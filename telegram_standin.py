@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Local Telegram Bot API stand-in for Antia load tests
+Answers the Bot API methods the backend uses and counts every call, so
+bulk operations (access revocation, notifications) can run without
+hitting api.telegram.org. Point the backend at it with
+TELEGRAM_API_ROOT=http://localhost:8081
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Tuple
+from urllib.parse import parse_qs
+
+DEFAULT_PORT = 8081
+METHOD_PATH = re.compile(r"^/bot(?P<token>[^/]+)/(?P<method>\w+)$")
+
+
+class StandinState:
+    """Call counters, duplicate-revocation tracking and flood control"""
+
+    def __init__(self, latency_ms: float, jitter_ms: float, rate_limit: int, error_rate: float):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.calls = Counter()
+            self.bans = Counter()
+            self.message_id = 0
+            self.window_start = time.monotonic()
+            self.window_calls = 0
+            self.throttled = 0
+
+    def admit(self) -> bool:
+        """False when the per-second rate limit is exceeded (Telegram answers 429)"""
+        if not self.rate_limit:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= 1:
+                self.window_start = now
+                self.window_calls = 0
+            self.window_calls += 1
+            if self.window_calls > self.rate_limit:
+                self.throttled += 1
+                return False
+            return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            duplicates = {key: count for key, count in self.bans.items() if count > 1}
+            return {
+                "calls": dict(self.calls),
+                "total_calls": sum(self.calls.values()),
+                "distinct_bans": len(self.bans),
+                "duplicate_bans": len(duplicates),
+                "duplicate_examples": list(duplicates)[:10],
+                "throttled": self.throttled,
+            }
+
+
+class BotApiHandler(BaseHTTPRequestHandler):
+    state: StandinState = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, body: Dict[str, Any]):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def read_params(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        content_type = self.headers.get("Content-Type", "")
+        if "application/json" in content_type and raw:
+            return json.loads(raw)
+        if raw:
+            return {key: values[0] for key, values in parse_qs(raw.decode()).items()}
+        return {}
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.send_json(200, self.state.snapshot())
+            return
+        self.handle_method()
+
+    def do_POST(self):
+        if self.path == "/reset":
+            self.state.reset()
+            self.send_json(200, {"ok": True})
+            return
+        self.handle_method()
+
+    def handle_method(self):
+        match = METHOD_PATH.match(self.path.split("?")[0])
+        if not match:
+            self.send_json(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+            return
+
+        method = match.group("method")
+        params = self.read_params()
+        state = self.state
+
+        if state.latency_ms or state.jitter_ms:
+            time.sleep(max(0.0, state.latency_ms + random.uniform(-state.jitter_ms, state.jitter_ms)) / 1000)
+
+        if not state.admit():
+            self.send_json(429, {
+                "ok": False,
+                "error_code": 429,
+                "description": "Too Many Requests: retry after 1",
+                "parameters": {"retry_after": 1},
+            })
+            return
+
+        if state.error_rate and random.random() < state.error_rate:
+            self.send_json(400, {"ok": False, "error_code": 400, "description": "Bad Request: simulated failure"})
+            return
+
+        status, body = self.answer(method, params)
+        with state.lock:
+            state.calls[method] += 1
+            if method == "banChatMember":
+                state.bans[f"{params.get('chat_id')}:{params.get('user_id')}"] += 1
+        self.send_json(status, body)
+
+    def answer(self, method: str, params: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Minimal but well-formed results for the methods Antia calls"""
+        if method == "getMe":
+            return 200, {"ok": True, "result": {
+                "id": 1000000001, "is_bot": True, "first_name": "Antia Stand-in", "username": "AntiaStandinBot",
+            }}
+        if method == "sendMessage":
+            with self.state.lock:
+                self.state.message_id += 1
+                message_id = self.state.message_id
+            return 200, {"ok": True, "result": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": params.get("chat_id"), "type": "private"},
+                "text": params.get("text", ""),
+            }}
+        if method == "createChatInviteLink":
+            return 200, {"ok": True, "result": {
+                "invite_link": f"https://t.me/+standin{random.getrandbits(48):012x}",
+                "creator": {"id": 1000000001, "is_bot": True, "first_name": "Antia Stand-in"},
+                "creates_join_request": False,
+                "is_primary": False,
+                "is_revoked": False,
+                "member_limit": params.get("member_limit"),
+            }}
+        if method == "revokeChatInviteLink":
+            return 200, {"ok": True, "result": {
+                "invite_link": params.get("invite_link"),
+                "creator": {"id": 1000000001, "is_bot": True, "first_name": "Antia Stand-in"},
+                "creates_join_request": False,
+                "is_primary": False,
+                "is_revoked": True,
+            }}
+        if method == "getWebhookInfo":
+            return 200, {"ok": True, "result": {"url": "", "has_custom_certificate": False, "pending_update_count": 0}}
+        if method == "getChat":
+            return 200, {"ok": True, "result": {"id": params.get("chat_id"), "type": "channel", "title": "Stand-in"}}
+        # setWebhook, banChatMember, unbanChatMember, answerCallbackQuery...
+        return 200, {"ok": True, "result": True}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Telegram Bot API stand-in")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Added latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-limit", type=int, default=0, help="Calls per second before answering 429 (0 = off)")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of calls answered with 400")
+    args = parser.parse_args()
+
+    BotApiHandler.state = StandinState(args.latency_ms, args.jitter_ms, args.rate_limit, args.error_rate)
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), BotApiHandler)
+    server.daemon_threads = True
+    print(f"🤖 Telegram stand-in listening on http://localhost:{args.port} (GET /stats, POST /reset)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,22 @@ Tests webhook configuration and message handling flows
 
 import requests
 import json
+import os
 import sys
-import subprocess
+import time
+import uuid
 from typing import Dict, Any, Optional
 
+import trace_export
+from backend_log_reader import BackendLogReader
+
 # Configuration
 BASE_URL = "https://betguru-7.preview.emergentagent.com"
 WEBHOOK_URL = f"{BASE_URL}/api/telegram/webhook"
+# Chrome trace JSON with every webhook request of the run (see trace_export.py)
+# secret_token the backend registered the webhook with (TELEGRAM_WEBHOOK_SECRET)
+WEBHOOK_SECRET = os.environ.get("TELEGRAM_WEBHOOK_SECRET", "")
+TRACE_FILE = os.environ.get("ANTIA_TRACE")
 BOT_TOKEN = "8422601694:AAHiM9rnHgufLkeLKrNe28aibFZippxGr-k"
 BOT_USERNAME = "Antiabetbot"
 
@@ -22,26 +31,41 @@ REAL_PRODUCT_ID = "6941ab8bc37d0aa47ab23ef8"
 class TelegramWebhookTester:
     def __init__(self):
         self.session = requests.Session()
+        # Only look at log lines written during this run
+        self.log_reader = BackendLogReader()
+        self.log_reader.seek_to_end()
+        self.request_ids: Dict[str, str] = {}
+        self.trace = trace_export.TraceRecorder("antia telegram webhook tests") if TRACE_FILE else None
         
     def log(self, message: str, level: str = "INFO"):
         """Log test messages"""
         print(f"[{level}] {message}")
+        if self.trace:
+            self.trace.log_line(message, level)
         
-    def make_webhook_request(self, update_data: Dict) -> requests.Response:
-        """Make webhook request to Telegram endpoint"""
-        self.log(f"Making webhook request to {WEBHOOK_URL}")
+    def make_webhook_request(self, update_data: Dict, test_name: Optional[str] = None) -> requests.Response:
+        """Make webhook request to Telegram endpoint (tagged with a request id for log checks)"""
+        request_id = f"tg-{uuid.uuid4().hex[:16]}"
+        if test_name:
+            self.request_ids[test_name] = request_id
+        self.log(f"Making webhook request to {WEBHOOK_URL} (request id {request_id})")
         self.log(f"Update data: {json.dumps(update_data, indent=2)}")
         
+        started = time.perf_counter()
         try:
             response = self.session.post(
                 WEBHOOK_URL,
                 json=update_data,
                 headers={
                     "Content-Type": "application/json",
-                    "Accept": "application/json"
+                    "Accept": "application/json",
+                    "X-Request-Id": request_id,
+                    "X-Telegram-Bot-Api-Secret-Token": WEBHOOK_SECRET
                 },
                 timeout=30
             )
+            if self.trace:
+                self.trace.request("POST", "/telegram/webhook", started, time.perf_counter(), response)
             
             self.log(f"Response status: {response.status_code}")
             
@@ -54,6 +78,8 @@ class TelegramWebhookTester:
             return response
             
         except requests.exceptions.RequestException as e:
+            if self.trace:
+                self.trace.request("POST", "/telegram/webhook", started, time.perf_counter(), error=e)
             self.log(f"Request failed: {str(e)}", "ERROR")
             raise
             
@@ -116,7 +142,7 @@ class TelegramWebhookTester:
         }
         
         try:
-            response = self.make_webhook_request(update_data)
+            response = self.make_webhook_request(update_data, "start_no_payload")
             
             # Check if webhook returns success
             if response.status_code == 200:
@@ -164,7 +190,7 @@ class TelegramWebhookTester:
         }
         
         try:
-            response = self.make_webhook_request(update_data)
+            response = self.make_webhook_request(update_data, "valid_product_link")
             
             if response.status_code == 200:
                 response_data = response.json()
@@ -206,7 +232,7 @@ class TelegramWebhookTester:
         }
         
         try:
-            response = self.make_webhook_request(update_data)
+            response = self.make_webhook_request(update_data, "invalid_text")
             
             if response.status_code == 200:
                 response_data = response.json()
@@ -248,7 +274,7 @@ class TelegramWebhookTester:
         }
         
         try:
-            response = self.make_webhook_request(update_data)
+            response = self.make_webhook_request(update_data, "deep_link_payload")
             
             if response.status_code == 200:
                 response_data = response.json()
@@ -267,46 +293,49 @@ class TelegramWebhookTester:
             return False
             
     def check_backend_logs(self) -> Dict[str, bool]:
-        """Check backend logs for expected messages"""
+        """Check backend logs for the expected line of each webhook request"""
         self.log("=== Checking Backend Logs ===")
-        
+
+        # Log check -> (webhook test that triggers it, expected substring)
+        expected = {
+            "start_command": ("start_no_payload", "Received /start command"),
+            "no_payload": ("start_no_payload", "No product payload, asking user to paste link"),
+            "product_detection": ("valid_product_link", f"Detected product link, extracting ID: {REAL_PRODUCT_ID}"),
+            "invalid_text": ("invalid_text", "Text does not contain valid product link"),
+            "deep_link": ("deep_link_payload", f"Starting product flow from deep link for: {REAL_PRODUCT_ID}"),
+        }
+
         try:
-            # Get recent backend logs
-            result = subprocess.run(
-                ["tail", "-n", "50", "/var/log/supervisor/backend.out.log"],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0:
-                logs = result.stdout
-                self.log("Backend logs (last 50 lines):")
-                self.log(logs)
-                
-                # Check for expected log patterns
-                log_checks = {
-                    "start_command": "📥 Received /start command" in logs,
-                    "no_payload": "No product payload, asking user to paste link" in logs or "ℹ️  No product payload, asking user to paste link" in logs,
-                    "product_detection": f"🎯 Detected product link, extracting ID: {REAL_PRODUCT_ID}" in logs,
-                    "invalid_text": "❌ Text does not contain valid product link" in logs,
-                    "deep_link": f"Starting product flow from deep link for: {REAL_PRODUCT_ID}" in logs or f"🎯 Starting product flow from deep link for: {REAL_PRODUCT_ID}" in logs
-                }
-                
-                self.log("Log pattern analysis:")
-                for check_name, found in log_checks.items():
-                    status = "✅ FOUND" if found else "❌ NOT FOUND"
-                    self.log(f"  {check_name}: {status}")
-                    
-                return log_checks
-            else:
-                self.log("❌ Failed to read backend logs", "ERROR")
-                return {}
-                
+            expectations: Dict[str, list] = {}
+            for test_name, pattern in expected.values():
+                if test_name in self.request_ids:
+                    expectations.setdefault(self.request_ids[test_name], []).append(pattern)
+            missing = self.log_reader.assert_outcomes(expectations, timeout=10)
+            tagged = any(self.log_reader.entries_for(rid) for rid in expectations)
+            self.log(f"Read {len(self.log_reader.entries)} new log entries "
+                     f"({self.log_reader.bytes_read} bytes, {self.log_reader.rotations} rotations)")
+
+            log_checks = {}
+            for check_name, (test_name, pattern) in expected.items():
+                request_id = self.request_ids.get(test_name)
+                if tagged:
+                    found = request_id is not None and pattern not in missing.get(request_id, [])
+                else:
+                    # Backend without request ids in its log lines: match anywhere in this run
+                    found = bool(self.log_reader.find(pattern))
+                log_checks[check_name] = found
+
+            self.log("Log pattern analysis:")
+            for check_name, found in log_checks.items():
+                status = "✅ FOUND" if found else "❌ NOT FOUND"
+                self.log(f"  {check_name}: {status}")
+
+            return log_checks
+
         except Exception as e:
             self.log(f"❌ Log check failed: {str(e)}", "ERROR")
             return {}
-            
+
     def run_all_tests(self) -> Dict[str, bool]:
         """Run all webhook tests"""
         self.log("🚀 Starting Telegram Bot Webhook Integration Tests")
@@ -389,6 +418,9 @@ def main():
     try:
         results = tester.run_all_tests()
         success = tester.print_summary(results)
+        if tester.trace:
+            spans = tester.trace.write(TRACE_FILE, {"webhook_url": WEBHOOK_URL})
+            tester.log(f"🧵 Trace with {spans} spans in {TRACE_FILE}")
         
         # Exit with appropriate code
         sys.exit(0 if success else 1)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Request timeline export for the Antia test harnesses
+Records every request of every virtual user (harness thread) as a timed span,
+with the backend's Server-Timing phases nested inside it, and writes them as
+Chrome trace-event JSON. Open the file in https://ui.perfetto.dev or
+chrome://tracing to see queueing, stalls and head-of-line blocking per user
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:  # The summary CLI only reads files
+    import requests
+
+MAX_EVENTS = 2_000_000  # Beyond this, spans are counted as dropped instead of kept
+HARNESS_TID = 0  # Row for scenario and phase spans
+
+# Server-Timing phases that run one after another (the rest happen inside "handler")
+SEQUENTIAL_PHASES = ("handler", "serialize", "compress")
+
+
+def parse_server_timing(header: str) -> List[Tuple[str, float, Optional[str]]]:
+    """Entries of a Server-Timing header as (name, dur ms, desc), in header order"""
+    entries = []
+    for entry in header.split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        if not name:
+            continue
+        duration, description = 0.0, None
+        for param in params:
+            key, _, value = param.partition("=")
+            if key == "dur":
+                duration = float(value)
+            elif key == "desc":
+                description = value.strip('"')
+        entries.append((name, duration, description))
+    return entries
+
+
+class TraceRecorder:
+    """Thread-safe collector of trace events; one trace thread per harness thread (virtual user)"""
+
+    def __init__(self, process_name: str = "harness", max_events: int = MAX_EVENTS):
+        self.process_name = process_name
+        self.max_events = max_events
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.events: List[Dict[str, Any]] = []
+        self.threads: Dict[int, int] = {}
+        self.dropped = 0
+
+    def micros(self, perf_counter: float) -> float:
+        return round((perf_counter - self.origin) * 1e6, 1)
+
+    def tid(self) -> int:
+        """Trace thread of the calling thread: 0 for the main thread, vu-1, vu-2... for workers"""
+        ident = threading.get_ident()
+        with self.lock:
+            tid = self.threads.get(ident)
+            if tid is None:
+                tid = HARNESS_TID if threading.current_thread() is threading.main_thread() else len(self.threads) + 1
+                self.threads[ident] = tid
+            return tid
+
+    def add(self, events: List[Dict[str, Any]]):
+        with self.lock:
+            if len(self.events) + len(events) > self.max_events:
+                self.dropped += len(events)
+                return
+            self.events.extend(events)
+
+    def span(self, name: str, started: float, finished: float, category: str = "phase",
+             args: Dict[str, Any] = None, tid: int = None):
+        """Complete event between two time.perf_counter() readings"""
+        event = {"name": name, "cat": category, "ph": "X", "pid": self.pid,
+                 "tid": self.tid() if tid is None else tid,
+                 "ts": self.micros(started), "dur": round((finished - started) * 1e6, 1)}
+        if args:
+            event["args"] = args
+        self.add([event])
+
+    @contextlib.contextmanager
+    def phase(self, name: str, args: Dict[str, Any] = None) -> Iterator[None]:
+        """Span around a block, on the harness row (scenarios, measured phases)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.span(name, started, time.perf_counter(), args=args, tid=HARNESS_TID)
+
+    def instant(self, name: str, args: Dict[str, Any] = None):
+        """Point-in-time mark on the caller's row (harness log lines)"""
+        event = {"name": name, "cat": "log", "ph": "i", "s": "t", "pid": self.pid, "tid": self.tid(),
+                 "ts": self.micros(time.perf_counter())}
+        if args:
+            event["args"] = args
+        self.add([event])
+
+    def log_line(self, message: str, level: str):
+        """Mark section headers ("=== ...") and warnings/errors of a harness log on the caller's row"""
+        if level != "INFO" or message.startswith("==="):
+            self.instant(message.strip("= \n")[:120], {"level": level})
+
+    def request(self, method: str, path: str, started: float, finished: float,
+                response: Optional["requests.Response"] = None, error: Optional[BaseException] = None):
+        """One request span on the caller's row, with the backend's Server-Timing phases inside it"""
+        tid = self.tid()
+        duration_us = (finished - started) * 1e6
+        args: Dict[str, Any] = {"path": path}
+        if response is not None:
+            args["status"] = response.status_code
+            args["bytes"] = len(response.content)
+            if response.headers.get("X-Request-Id"):
+                args["request_id"] = response.headers["X-Request-Id"]
+        if error is not None:
+            args["error"] = type(error).__name__
+        events = [{"name": f"{method} {path.split('?', 1)[0]}", "cat": "request", "ph": "X", "pid": self.pid,
+                   "tid": tid, "ts": self.micros(started), "dur": round(duration_us, 1), "args": args}]
+
+        timings = parse_server_timing(response.headers.get("Server-Timing", "")) if response is not None else []
+        if timings:
+            events.extend(self.server_spans(timings, self.micros(started), duration_us, tid))
+        self.add(events)
+
+    def server_spans(self, timings: List[Tuple[str, float, Optional[str]]], start_us: float,
+                     duration_us: float, tid: int) -> List[Dict[str, Any]]:
+        """Server-Timing only gives durations: the sequential phases are centered in the request
+        (network time split evenly before and after) and db / outbound totals start with the handler"""
+        sequential = [t for t in timings if t[0] in SEQUENTIAL_PHASES]
+        inside = [t for t in timings if t[0] not in SEQUENTIAL_PHASES]
+        server_us = sum(t[1] for t in sequential) * 1000 or max((t[1] for t in inside), default=0) * 1000
+        cursor = start_us + max(0.0, duration_us - server_us) / 2
+        handler_start = cursor
+        handler_ms = next((t[1] for t in sequential if t[0] == "handler"), None)
+        spans = []
+        for name, duration_ms, description in sequential:
+            spans.append(self.server_event(name, cursor, duration_ms, description, tid))
+            cursor += duration_ms * 1000
+        for name, duration_ms, description in inside:
+            # Totals of concurrent calls can exceed the handler; clamped so the spans still nest
+            if handler_ms is not None and duration_ms > handler_ms:
+                description = f"{description or ''} {duration_ms:.3f}ms in total".strip()
+                duration_ms = handler_ms
+            spans.append(self.server_event(name, handler_start, duration_ms, description, tid))
+        return spans
+
+    def server_event(self, name: str, ts: float, duration_ms: float, description: Optional[str],
+                     tid: int) -> Dict[str, Any]:
+        event = {"name": name, "cat": "server", "ph": "X", "pid": self.pid, "tid": tid,
+                 "ts": round(ts, 1), "dur": round(duration_ms * 1000, 1)}
+        if description:
+            event["args"] = {"desc": description}
+        return event
+
+    def write(self, path: str, metadata: Dict[str, Any] = None) -> int:
+        """Write the trace (Chrome trace-event JSON object format); returns the number of spans"""
+        with self.lock:
+            events = list(self.events)
+            threads = sorted(set(self.threads.values()))
+            dropped = self.dropped
+        names = [{"name": "process_name", "ph": "M", "pid": self.pid, "tid": HARNESS_TID,
+                  "args": {"name": self.process_name}}]
+        for tid in threads or [HARNESS_TID]:
+            names.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                          "args": {"name": "harness" if tid == HARNESS_TID else f"vu-{tid}"}})
+            names.append({"name": "thread_sort_index", "ph": "M", "pid": self.pid, "tid": tid,
+                          "args": {"sort_index": tid}})
+        with open(path, "w") as f:
+            json.dump({
+                "traceEvents": names + events,
+                "displayTimeUnit": "ms",
+                "otherData": {**(metadata or {}), "dropped_spans": dropped},
+            }, f)
+        return len(events)
+
+
+def summarize(path: str) -> Dict[str, Any]:
+    """Spans, virtual users and the slowest requests of a trace file"""
+    with open(path) as f:
+        trace = json.load(f)
+    requests_ = [e for e in trace["traceEvents"] if e.get("cat") == "request"]
+    users = {e["tid"] for e in requests_}
+    slowest = sorted(requests_, key=lambda e: e["dur"], reverse=True)[:10]
+    return {
+        "requests": len(requests_),
+        "virtual_users": len(users),
+        "server_phases": sum(1 for e in trace["traceEvents"] if e.get("cat") == "server"),
+        "dropped_spans": trace.get("otherData", {}).get("dropped_spans", 0),
+        "slowest": [{"name": e["name"], "ms": round(e["dur"] / 1000, 1), "vu": e["tid"],
+                     "at_s": round(e["ts"] / 1e6, 3), **e.get("args", {})} for e in slowest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a harness trace (open the file itself in Perfetto)")
+    parser.add_argument("trace", help="Trace JSON written with --trace / ANTIA_TRACE")
+    args = parser.parse_args()
+    try:
+        print(json.dumps(summarize(args.trace), indent=2))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()